@@ -1,34 +1,22 @@
-import csv
+import contextlib
 import datetime as dt
-from io import BytesIO
 import json
-import math
-import random
-from statistics import stdev
 import time
 import uuid
-import PIL
 import dearpypixl as dp
 import dearpygui.dearpygui as dpg
-import dearpygui.demo as demo
 import os
-import re
-from matplotlib import pyplot as plt
-import numpy as np
-from rich.console import Console as RichConsole
-import screeninfo
-import yaml
+import sys
+import tempfile
 import threading
-import pyperclip
 import textwrap
-from PIL import Image, ImageDraw, ImageFont, ImageTk
-from thefuzz import fuzz
-import matplotlib
-matplotlib.use('agg')
+import tracemalloc
 import copy
 
 # From local files
 import RateaTexts
+# Teas, reviews, categories, settings, saving and loading, stats and exports, without any UI
+from RateaCore import *
 
 # Reminders
 '''
@@ -56,7 +44,6 @@ TODO: Documentation: Add Image Support to blog window.
 TODO: Visualizeation: Pie chart for consumption of amount and types of tea, split over all, over years
 TODO: Visualization: Solid fill line graph for consumption of types of tea over years
 TODO: Summary: User preference visualization for types of tea, amount of tea, etc.
-TODO: File: Import from CSV: Add in functionality to import from CSV
 TODO: Optional Override of autocalculated fields
 TODO: Adjustments of quantities including sells and purchases
 TODO: Highlight color customization
@@ -67,18 +54,9 @@ TODO: Allow copying of table cells on right
 TODO: Some sort of tea linking system, or review linking system.
 TODO: Sort reviews by date then renumber operation
 '''
-
-
-# ALL - All messages
-# INFO - Informational messages that are not errors
-# WARNING - Warning messages that may indicate a problem or alteration
-# ERROR - Error messages that indicate a problem
-# (SUCCESS) - Success messages that indicate a successful operation, minor for operation that is part of a larger operation 
-# CRITICAL - Critical error messages that indicate a serious problem that may cause the program to crash
-DEBUG_LEVEL = "ERROR"  # ALL, INFO, WARNING, ERROR, CRITICAL
-
 #region Constants
 
+
 # light green
 COLOR_AUTOCALCULATED_TABLE_CELL = (0, 100, 0, 60)
 # light red
@@ -100,65 +78,30 @@ COLOR_AUTOCALCULATED_2 =  COLOR_LIGHT_BLUE_TEXT  # Light blue for autocalculated
 CONSTANT_DELAY_MULTIPLIER = 120 # +1frame per X items for the table
 #endregion
 
+
 #region Global Variables
+
 backupThread = False
 backupStopEvent = threading.Event()
-# Global variables
 #endregion
 
+
 #region Helpers1
+startupProfile = []
 
-richPrintConsole = RichConsole()
-terminalConsoleLogs = []
 
-def MakeFilePath(path):
-    # Make sure the folder exists
-    if not os.path.exists(path):
-        os.makedirs(path)
-        RichPrintSuccessMinor(f"Made {path} folder")
-    else:
-        RichPrintWarning(f"{path} folder already exists")
-        
-def WriteFile(path, content):
-    with open(path, "w") as file:
-        file.write(content)
-    RichPrintSuccessMinor(f"Written {path} to file")
-    
-def ReadFile(path):
-    with open(path, "r") as file:
-        RichPrintSuccessMinor(f"Read {path} from file")
-        return file.read()
-
-def ListFiles(path):
-    return os.listdir(path)
-
-def WriteYaml(path, data):
-    with open(path, "w") as file:
-        yaml.dump(data, file)
-    RichPrintSuccessMinor(f"Written {path} to file")
-
-def ReadYaml(path):
-    with open(path, "r") as file:
-        RichPrintSuccessMinor(f"Read {path} from file")
-        return yaml.load(file, Loader=yaml.FullLoader)
-    
-def timezoneToOffset(timezone, daylightSaving=False):
-    # Convert timezone to offset
-    offset = 0
-    if timezone == "UTC":
-        offset = 0
-
-    # Daylight saving time
-    if daylightSaving and timezone != "UTC":
-        offset += 1
-    return offset
 
+def showDemo(sender=None, app_data=None, user_data=None):
+    import dearpygui.demo as demo
+    demo.show_demo()
 
 # Function yields the name of the current font and size
 def getFontName(size=1, bold=False, fontName=None):
     # Get the current font name and size
     if fontName is None:
         fontName = settings["DEFAULT_FONT"]
+    # Fonts other than the default are only added to the registry once used
+    loadFontFamily(fontName)
     if size == 1:
         if bold:
             return f"{fontName}Bold"
@@ -169,1298 +112,55 @@ def getFontName(size=1, bold=False, fontName=None):
             return f"{fontName}Bold{size}"
         else:
             return f"{fontName}Regular{size}"
-        
-
 
-
-def parseDTToStringWithFallback(stringOrDT, fallbackString, quiet=False):
-    output = None
-    try:
-        output = parseDTToString(stringOrDT)
-        #if output is not None:
-    except Exception as e:
-        RichPrintError(f"Failed to parse date string: {stringOrDT}. Error: {e}")
-        # If it fails, return the fallback string
-        output = fallbackString.strip()
-    return output
-
-
-def parseDTToString(stringOrDT):
-    format = settings["DATE_FORMAT"]
-    timezone = settings["TIMEZONE"]
-    # Parse into datetime
-    datetimeobj = None
-    if isinstance(stringOrDT, dict) and "year" in stringOrDT and "month" in stringOrDT and "month_day" in stringOrDT:
-        datetimeobj = DateDictToDT(stringOrDT)  # Convert dict to datetime object
-    if isinstance(stringOrDT, str):
-        datetimeobj = dt.datetime.strptime(stringOrDT, format)
-    elif isinstance(stringOrDT, dt.datetime):
-        datetimeobj = stringOrDT
-    else:
-        raise ValueError("Input must be a string or datetime object.")
-
-    # Convert to timezone
-    timezoneObj = dt.timezone(dt.timedelta(hours=timezoneToOffset(timezone)))
-    datetimeobj = datetimeobj.astimezone(timezoneObj)
-    return datetimeobj.strftime(format)
-
-def parseDTToStringWithHoursMinutes(stringOrDT):
-    # Use consistant format with no slashes or colons
-    format = "%Y-%m-%d %H-%M"
-    timezone = settings["TIMEZONE"]
-    # Parse into datetime
-    datetimeobj = None
-    if isinstance(stringOrDT, str):
-        datetimeobj = dt.datetime.strptime(stringOrDT, format)
-    elif isinstance(stringOrDT, dt.datetime):
-        datetimeobj = stringOrDT
-    else:
-        raise ValueError(f"Input must be a string or datetime object., got {type(stringOrDT)}")
-
-    # Convert to timezone
-    timezoneObj = dt.timezone(dt.timedelta(hours=timezoneToOffset(timezone)))
-    datetimeobj = datetimeobj.astimezone(timezoneObj)
-    returnedString = datetimeobj.strftime(format)
-
-    # Clean of spaces, colons
-    returnedString = re.sub(r'\s+', ' ', returnedString)
-    returnedString = re.sub(r':', '', returnedString)
-    returnedString = re.sub(r' ', '', returnedString)
-    return returnedString
-
-def parseStringToDT(string, default=None, format=None, silent=False):
-    if type(string) is dt.datetime:
-        # If it's already a datetime object, return it directly
-        return string
-    string: str = string.strip()
-    fallbackFormats = [
-        "%Y-%m-%d",  # YYYY-MM-DD
-        "%m-%d-%Y",  # MM-DD-YYYY
-        "%d-%m-%Y",  # DD-MM-YYYY
-        "%Y/%m/%d",  # YYYY/MM/DD
-        "%m/%d/%Y",  # MM/DD/YYYY
-        "%d/%m/%Y",  # DD/MM/YYYY
-        "%Y-%m-%d %H:%M",  # YYYY-MM-DD HH:MM (with time)
-        "%m-%d-%Y %H:%M",  # MM-DD-YYYY HH:MM (with time)
-        "%d-%m-%Y %H:%M",  # DD-MM-YYYY HH:MM (with time)
-        "%Y/%m/%d %H:%M",  # YYYY/MM/DD HH:MM (with time)
-        # With HMS
-        "%Y-%m-%d %H:%M:%S",  # YYYY-MM-DD HH:MM:SS
-        "%m-%d-%Y %H:%M:%S",  # MM-DD-YYYY HH:MM:SS
-        "%d-%m-%Y %H:%M:%S",  # DD-MM-YYYY HH:MM:SS
-        "%Y/%m/%d %H:%M:%S",  # YYYY/MM/DD HH:MM:SS
-    ]
-
-    if format is None:
-        format = settings["DATE_FORMAT"]
-
-    if type(string) is dt.datetime:
-        # If it's already a datetime object, return it directly
-        return string
+# Startup profiler
+# main() runs each startup phase in profileStartupPhase, which records its wall time and the change in allocated memory blocks.
+# When started with python -X tracemalloc, the bytes each phase allocated and its peak are recorded as well.
+@contextlib.contextmanager
+def profileStartupPhase(name):
+    phase = {"phase": name}
+    blocks = sys.getallocatedblocks()
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.reset_peak()
+        traced = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
     try:
-        return dt.datetime.strptime(string, format)
-    except ValueError:
-        for fallback_format in fallbackFormats:
-            try:
-                return dt.datetime.strptime(string, fallback_format)
-            except ValueError:
-                continue
-
-    # Nothing works
-    if default is not None:
-        if isinstance(default, dt.datetime):
-            return default
-        elif isinstance(default, str):
-            return dt.datetime.strptime(default, format)
-        else:
-            raise ValueError("Default value must be a datetime object or a string in the correct format.")
-    else:
-        # If no valid date found and no default provided, return None
-        if silent == False:
-            RichPrintError(f"Failed to parse date string: {string}. No valid date found and no default provided (Silent={silent})")
-    return False  # Return False if no valid date found and no default provided
-    
-
-
-def DTToDateDict(dt):
-    # Convert datetime to date dict
-    year = None
-    try:
-        year = dt.year
-    except AttributeError as e:
-        RichPrintError(f"DTToDateDict: dt is not a datetime object: {e}")
-    except Exception as e:
-        RichPrintError(f"DTToDateDict: {e}")
-        return None
-    if year > 1900:
-        year = year - 1900
-
-    # Month is 0-indexed
-    # Year starts from 1900
-    return {
-        'month_day': dt.day,
-        'year': year,
-        'month': dt.month-1,
-    }
-    
-def DateDictToDT(dateDict):
-    # Convert date dict to datetime
-    year = dateDict['year']
-    if year < 1900:
-        year += 1900  # Convert 2-digit year to 4-digit year
-    return dt.datetime(year, dateDict['month']+1, dateDict['month_day'])
-
-# Timestamp based operations
-
-def TimeStampToDateTime(timestamp):
-    # Convert timestamp to datetime
-    return dt.datetime.fromtimestamp(timestamp)
-def DateTimeToTimeStamp(datetime):
-    # Convert datetime to timestamp
-    return int(datetime.timestamp())
-def TimeStampToDateDict(timestamp):
-    # Convert timestamp to date dict
-    datetime = TimeStampToDateTime(timestamp)
-    return DTToDateDict(datetime)
-def DateDictToTimeStamp(dateDict):
-    # Convert date dict to timestamp
-    datetime = DateDictToDT(dateDict)
-    return DateTimeToTimeStamp(datetime)
-def TimeStampToString(timestamp, format=None):
-    # Convert timestamp to string
-    if format is None:
-        format = settings["DATE_FORMAT"]
-    datetime = TimeStampToDateTime(timestamp)
-    return parseDTToString(datetime)
-def TimeStampToStringWithHoursMinutes(timestamp):
-    # Convert timestamp to string with hours and minutes
-    format = "%Y-%m-%d %H-%M"
-    datetime = TimeStampToDateTime(timestamp)
-    return parseDTToStringWithHoursMinutes(datetime, format=format)
-def TimeStampToStringWithFallback(timestamp, fallbackString):
-    # Convert timestamp to string with fallback
-    datetime = TimeStampToDateTime(timestamp)
-    return parseDTToStringWithFallback(datetime, fallbackString=fallbackString, quiet=True)
-def AnyDTFormatToTimeStamp(unknownDT):
-    # Convert any datetime format to timestamp
-    if type(unknownDT) is dt.datetime:
-        return DateTimeToTimeStamp(unknownDT)
-    elif isinstance(unknownDT, str):
-        return DateDictToTimeStamp(parseStringToDT(unknownDT, silent=True))
-    elif isinstance(unknownDT, dict):
-        return DateDictToTimeStamp(DateDictToDT(unknownDT))
-    elif isinstance(unknownDT, int) or isinstance(unknownDT, float):
-        # If it's a timestamp, return it directly
-        return int(unknownDT)
-    else:
-        raise ValueError("Invalid datetime format")
-def StringToTimeStamp(string, silent=False):
-    # Convert string to timestamp
-    dt = parseStringToDT(string, silent=silent)
-    return DateTimeToTimeStamp(dt)
-
-
-
-
-def RichPrint(text, color, typeText="console"):
-    richPrintConsole.print(text, style=color)
-    # Add to logs
-    timeStr = dt.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
-    # Remove if greater than 2500 entries
-    global terminalConsoleLogs
-    if len(terminalConsoleLogs) > 2500:
-        terminalConsoleLogs.pop(0)
-    terminalConsoleLogs.append(f"[{typeText}] {timeStr} -- {text}")
-
-def RichPrintCritical(text):
-    if DEBUG_LEVEL == "CRITICAL" or DEBUG_LEVEL == "WARNING" or DEBUG_LEVEL == "ERROR" or DEBUG_LEVEL == "CRITICAL" or DEBUG_LEVEL == "ALL" or DEBUG_LEVEL == "INFO":
-        RichPrint(f"CRITICAL: {text}", "bold red", typeText="CRITICAL")
-
-def RichPrintError(text):
-    if DEBUG_LEVEL == "ERROR" or DEBUG_LEVEL == "ALL" or DEBUG_LEVEL == "INFO" or DEBUG_LEVEL == "WARNING":
-        RichPrint(text, "bold red", typeText="ERROR")
-def RichPrintInfo(text):
-    if DEBUG_LEVEL == "INFO" or DEBUG_LEVEL == "ALL":
-        RichPrint(text, "blue", typeText="INFO")
-def RichPrintSuccess(text):
-    if DEBUG_LEVEL == "INFO" or DEBUG_LEVEL == "WARNING" or DEBUG_LEVEL == "ERROR" or DEBUG_LEVEL == "ALL":
-        RichPrint(text, "bold green", typeText="SUCCESS")
-def RichPrintSuccessMinor(text):
-    if DEBUG_LEVEL == "INFO" or DEBUG_LEVEL == "WARNING" or DEBUG_LEVEL == "ERROR" or DEBUG_LEVEL == "ALL":
-        RichPrint(text, "dark_green", typeText="SUCCESS_MINOR")
-def RichPrintWarning(text):
-    if DEBUG_LEVEL == "WARNING" or DEBUG_LEVEL == "ALL" or DEBUG_LEVEL == "INFO":
-        RichPrint(text, "bold yellow", typeText="WARNING")
-def RichPrintSeparator():
-    if DEBUG_LEVEL == "INFO" or DEBUG_LEVEL == "ALL":
-        RichPrint("--------------------------------------------------", "bold white")
-
-def print_me(sender, data, user_data):
-    print("Hello World")
-    print(sender, data, user_data)
-
-def Settings_SaveCurrentSettings():
-    WriteYaml(session["settingsPath"], settings)
-    RichPrintSuccessMinor("Saved current settings to file")
-
-# Fast print the ID and names of all teas and reviews in a tree
-def printTeasAndReviews():
-    RichPrintSeparator()
-    RichPrintInfo("Teas and Reviews:")
-    for i, tea in enumerate(TeaStash):
-        RichPrintInfo(f"Tea {i}: {tea.name} ({tea.dateAdded})")
-        for j, review in enumerate(tea.reviews):
-            RichPrintInfo(f"\tReview {j}: {review.name} ({review.dateAdded})")
-    RichPrintSeparator()
-
-# Fast print of Categories and Review Categories
-def printCategories():
-    RichPrintSeparator()
-    RichPrintInfo("Categories:")
-    for i, cat in enumerate(TeaCategories):
-        RichPrintInfo(f"Category {i}: {cat.name} ({cat.categoryType}) ({cat.categoryRole})")
-    RichPrintSeparator()
-    RichPrintInfo("Review Categories:")
-    for i, cat in enumerate(TeaReviewCategories):
-        RichPrintInfo(f"Category {i}: {cat.name} ({cat.categoryType}) ({cat.categoryRole})")
-    RichPrintSeparator()
-
-#endregion
-
-
-#region Helpers2
-
-# Iterates through list of categories and returns first category id that matches the role
-def getCategoryIDByrole(role):
-    noneFoundValue = -1
-    for i, cat in enumerate(TeaCategories):
-        if cat.categoryRole == role:
-            return i
-        
-    return noneFoundValue
-def getCategoryByrole(role):
-    catID = getCategoryIDByrole(role)
-    if catID == -1:
-        return None
-    return TeaCategories[catID]
-
-def getAlLCategoryEntriesByID(categoryID, review=False):
-    # Get the values of all entries of a category by ID, returning the list of values
-    returnList = []
-    catName = ""
-    catRole = ""
-
-    
-    if review == True:
-        catName = TeaReviewCategories[categoryID].name
-        catRole = TeaReviewCategories[categoryID].categoryRole
-    else:
-        catName = TeaCategories[categoryID].name
-        catRole = TeaCategories[categoryID].categoryRole
-    
-    if review:
-        for tea in TeaStash:
-            for review in tea.reviews:
-                if catName in review.attributes:
-                    returnList.append(review.attributes[catName])
-                elif catRole in review.attributes:
-                    returnList.append(review.attributes[catRole])
-    else:
-        for tea in TeaStash:
-            if catName in tea.attributes:
-                returnList.append(tea.attributes[catName])
-            elif catRole in tea.attributes:
-                returnList.append(tea.attributes[catRole])
-
-
-    return returnList
-
-# Get all entries and uses function provided on the category to get the value
-def aggregateCategoryEntriesByID(categoryID, review=False, func=None):
-    if func is None:
-        # Average by default
-        func = lambda x: sum(x) / len(x)
-
-    returnList = getAlLCategoryEntriesByID(categoryID, review=review)
-    if len(returnList) == 0:
-        RichPrintWarning(f"No entries found for category {categoryID} {TeaCategories[categoryID].name}, returning 0")
-
-    returnValue = func(returnList)
-
-    return returnValue
-
-# Average category entries by ID
-def averageCategoryEntriesByID(categoryID, review=False):
-    # Average function, only if the category is a number
-    def averageFunc(x):
-        if len(x) == 0:
-            return 0
-        if isinstance(x[0], str):
-            return -1
-        elif isinstance(x[0], dt.datetime):
-            return -1
-        return round(sum(x) / len(x), 3)
-    return aggregateCategoryEntriesByID(categoryID, review=review, func=averageFunc)
-
-# Sum category entries by ID
-def sumCategoryEntriesByID(categoryID, review=False):
-    # Sum function, only if the category is a number
-    def sumFunc(x):
-        if len(x) == 0:
-            return 0
-        if isinstance(x[0], str):
-            return -1
-        elif isinstance(x[0], dt.datetime):
-            return -1
-        return round(sum(x), 3)
-    return aggregateCategoryEntriesByID(categoryID, review=review, func=sumFunc)
-
-# Count category entries by ID
-def countCategoryEntriesByID(categoryID, review=False):
-    # Count function
-    def countFunc(x):
-        return len(x)
-    return aggregateCategoryEntriesByID(categoryID, review=review, func=countFunc)
-
-# Unique category entries by ID
-def uniqueCategoryEntriesByID(categoryID, review=False):
-    # Unique function
-    def uniqueFunc(x):
-        return list(set(x))
-    return aggregateCategoryEntriesByID(categoryID, review=review, func=uniqueFunc)
-
-# UniqueEntries with count by ID
-def uniqueEntriesWithCountByID(categoryID, review=False):
-    # Unique function with count
-    def uniqueFunc(x):
-        return {i: x.count(i) for i in set(x)}
-    return aggregateCategoryEntriesByID(categoryID, review=review, func=uniqueFunc)
-
-def debugGetcategoryRole():
-    allroleCategories = []
-    for k, v in session["validroleCategory"].items():
-        for i, cat in enumerate(v):
-            allroleCategories.append(cat)
-
-    # Dedup and remove UNUSED
-    allroleCategories = list(set(allroleCategories))
-    allroleCategories.remove("UNUSED")
-
-    # Print a tea dict for debugging
-    RichPrintInfo(f"TeaStash: {TeaStash[0].__dict__}")
-
-    validCatgories = []
-    for i, cat in enumerate(allroleCategories):
-        if cat == "ID":
-            continue
-
-        hasCoorespondingCategory = getCategoryIDByrole(cat)
-        if hasCoorespondingCategory == -1:
-            RichPrintWarning(f"Category {cat} does not have a cooresponding category")
-            continue
-        else:
-            # Get info on category
-            numEntriesInCategory = 0
-            for tea in TeaStash:
-                if cat in tea.attributes:
-                    numEntriesInCategory += 1
-
-            # Get the values of all entries of a category by ID, then truncate to 10
-            dataAverage = averageCategoryEntriesByID(hasCoorespondingCategory, review=False)
-            dataUnique = uniqueCategoryEntriesByID(hasCoorespondingCategory, review=False)
-            dataSum = sumCategoryEntriesByID(hasCoorespondingCategory, review=False)
-            dataCount = countCategoryEntriesByID(hasCoorespondingCategory, review=False)
-            dataUniqueCount = uniqueEntriesWithCountByID(hasCoorespondingCategory, review=False)
-
-
-            RichPrintInfo(f"Category {cat} has a cooresponding category {hasCoorespondingCategory} of name {TeaCategories[hasCoorespondingCategory].name}")
-            RichPrintInfo(f"Category {cat} has average {dataAverage}, unique {dataUnique}, sum {dataSum}, count {dataCount}, uniqueCount {dataUniqueCount}")
-
-            if dataCount > 0:
-                validCatgories.append(cat)
-    RichPrintSuccess(f"Valid categories: {validCatgories}")
-
-def getValidCategoryRolesList():
-    # Get all valid category roles from the session
-    allroleCategories = []
-    for k, v in session["validroleCategory"].items():
-        for i, cat in enumerate(v):
-            allroleCategories.append(cat)
-
-    # Dedup and remove UNUSED
-    allroleCategories = list(set(allroleCategories))
-    allroleCategories.remove("UNUSED")
-
-    validCategoryRoles = []
-    for i, cat in enumerate(allroleCategories):
-        if cat == "ID":
-            continue
-
-        hasCoorespondingCategory = getCategoryIDByrole(cat)
-        if hasCoorespondingCategory == -1:
-            RichPrintWarning(f"Category {cat} does not have a cooresponding category")
-            continue
-        else:
-            # Get info on category
-            numEntriesInCategory = 0
-            for tea in TeaStash:
-                if cat in tea.attributes:
-                    numEntriesInCategory += 1
-
-            # Get the values of all entries of a category by ID, then truncate to 10
-            #dataAverage = averageCategoryEntriesByID(hasCoorespondingCategory, review=False)
-            #dataUnique = uniqueCategoryEntriesByID(hasCoorespondingCategory, review=False)
-            #dataSum = sumCategoryEntriesByID(hasCoorespondingCategory, review=False)
-            dataCount = countCategoryEntriesByID(hasCoorespondingCategory, review=False)
-
-            if dataCount > 0:
-                validCategoryRoles.append(cat)
-
-    return validCategoryRoles, allroleCategories
-
-def getValidReviewCategoryRolesList():
-    # Get all valid category roles from the session
-    allroleCategories = []
-    for k, v in session["validroleReviewCategory"].items():
-        for i, cat in enumerate(v):
-            allroleCategories.append(cat)
-
-    # Dedup and remove UNUSED
-    allroleCategories = list(set(allroleCategories))
-    allroleCategories.remove("UNUSED")
-
-    validCategoryRoles = []
-    for i, cat in enumerate(allroleCategories):
-        if cat == "ID":
-            continue
-
-        hasCoorespondingCategory = getReviewCategoryIDByrole(cat)
-        if hasCoorespondingCategory == -1:
-            RichPrintWarning(f"Category {cat} does not have a cooresponding category")
-            continue
-        else:
-            # Get info on category
-            numEntriesInCategory = 0
-            for tea in TeaStash:
-                for review in tea.reviews:
-                    if cat in review.attributes:
-                        numEntriesInCategory += 1
-
-            # Get the values of all entries of a category by ID, then truncate to 10
-            #dataAverage = averageCategoryEntriesByID(hasCoorespondingCategory, review=True)
-            #dataUnique = uniqueCategoryEntriesByID(hasCoorespondingCategory, review=True)
-            #dataSum = sumCategoryEntriesByID(hasCoorespondingCategory, review=True)
-            dataCount = countCategoryEntriesByID(hasCoorespondingCategory, review=True)
-
-            if dataCount > 0:
-                validCategoryRoles.append(cat)
-
-    return validCategoryRoles, allroleCategories
-
-def getStatsOnCategoryByRole(role, review=False):
-    if review:
-        # Get all review categories
-        id = getReviewCategoryIDByrole(role)
-        sum, avrg, count, unique = sumCategoryEntriesByID(id, review=True), averageCategoryEntriesByID(id, review=True), countCategoryEntriesByID(id, review=True), uniqueCategoryEntriesByID(id, review=True)
-        uniqueCount = uniqueEntriesWithCountByID(id, review=True)
-        return sum, avrg, count, unique, uniqueCount
-    else:
-        # Get all categories
-        id = getCategoryIDByrole(role)
-        sum, avrg, count, unique = sumCategoryEntriesByID(id, review=False), averageCategoryEntriesByID(id, review=False), countCategoryEntriesByID(id, review=False), uniqueCategoryEntriesByID(id, review=False)
-        uniqueCount = uniqueEntriesWithCountByID(id, review=False)
-        return sum, avrg, count, unique, uniqueCount
-    
-
-# Iterate through ReviewCategories and return the first category id that matches the role
-def getReviewCategoryIDByrole(role):
-    noneFoundValue = -1
-    for i, cat in enumerate(TeaReviewCategories):
-        if cat.categoryRole == role:
-            return i
-        
-    return noneFoundValue
-
-def debugGetReviewcategoryRole():
-    allroleCategories = []
-    for k, v in session["validroleReviewCategory"].items():
-        for i, cat in enumerate(v):
-            allroleCategories.append(cat)
-
-    # Dedup and remove UNUSED
-    allroleCategories = list(set(allroleCategories))
-    allroleCategories.remove("UNUSED")
-
-    # Print a tea dict for debugging
-    RichPrintInfo(f"TeaStash: {TeaStash[1].__dict__}")
-    
-    validCatgories = []
-    for i, cat in enumerate(allroleCategories):
-        if cat == "ID":
-            continue
-
-        hasCoorespondingCategory = getReviewCategoryIDByrole(cat)
-        if hasCoorespondingCategory == -1:
-            RichPrintWarning(f"Category {cat} does not have a cooresponding category")
-            continue
-        else:
-            # Get info on category
-            numEntriesInCategory = 0
-            for tea in TeaStash:
-                for review in tea.reviews:
-                    if cat in review.attributes:
-                        numEntriesInCategory += 1
-
-            # Get the values of all entries of a category by ID, then truncate to 10
-            dataAverage = averageCategoryEntriesByID(hasCoorespondingCategory, review=True)
-            dataUnique = uniqueCategoryEntriesByID(hasCoorespondingCategory, review=True)
-            dataSum = sumCategoryEntriesByID(hasCoorespondingCategory, review=True)
-            dataCount = countCategoryEntriesByID(hasCoorespondingCategory, review=True)
-            
-            
-            RichPrintInfo(f"Category {cat} has a cooresponding category {hasCoorespondingCategory} of name {TeaReviewCategories[hasCoorespondingCategory].name}")
-            RichPrintInfo(f"Category {cat} has average {dataAverage}, unique {dataUnique}, sum {dataSum}, count {dataCount}")
-            if dataCount > 0:
-                validCatgories.append(cat)
-
-    RichPrintSuccess(f"Valid categories: {validCatgories}")
-
-# Renumbers the IDs of all teas and reviews in the stash
-def renumberTeasAndReviews(save=True):
-    global TeaStash
-    RichPrintInfo("Renumbering Teas and Reviews...")
-    
-    # Sort by date added, if available, otherwise by id
-    if hasattr(TeaStash, 'sort') and callable(getattr(TeaStash, 'sort')):
-        TeaStash.sort(key=lambda tea: (getattr(tea, 'date', dt.datetime.min), tea.id))
-    else:
-        RichPrintWarning("TeaStash does not support sorting or has no dateAdded attribute. Renumbering will proceed without sorting.")
-        # Sort by id only if no dateAdded attribute is found
-        TeaStash.sort(key=lambda tea: tea.id)  # Fallback to sorting by id if no dateAdded attribute exists
-
-    # Renumber teas
-    for i, tea in enumerate(TeaStash):
-        tea.id = i
-
-        # Renumber reviews
-        for j, review in enumerate(tea.reviews):
-            review.id = j
-            review.parentID = tea.id  # Ensure parent ID is correct
-
-    RichPrintSuccessMinor("Completed renumbering Teas and Reviews.")
-    printTeasAndReviews()  # Print the updated teas and reviews for verification
-
-    if save:
-        # Save to file after renumbering
-        saveTeasData(TeaStash, settings["TEA_REVIEWS_PATH"])
-        RichPrintSuccess("Saved renumbered teas and reviews to file.")
-
-#endregion
-
-
-
-#region Grade letter functions
-
-def getGradeList():
-    return ["S+ (5.0)", "S (4.5)", "S- (4.25)", "A+ (4.0)", "A (3.5)", "A- (3.25)", "B+ (3.0)", "B (2.5)", "B- (2.25)", "C+ (2.0)", "C (1.5)", "C- (1.25)", "D+ (1.0)", "D (0.5)", "D- (0.25)", "F (0)"]
-
-def getGradeValue(grade, silent=False):
-    # Get the value of a grade
-    if grade is None or grade == "":
-        if not silent:
-            RichPrintError("Grade is None or empty")
-        return None
-    gradingOptions = getGradeList()
-    if grade in gradingOptions:
-        return float(grade.split("(")[1].split(")")[0])
-    else:
-        if grade == "---":
-            return 0.0
-        if not silent:
-            RichPrintError(f"Grade {grade} not found in grading options")
-        return None
-
-def getGradeNumericalList():
-    # Get a list of numerical values for the grades
-    return [getGradeValue(grade) for grade in getGradeList() if getGradeValue(grade) is not None]
-
-def getGradeLetter(value):
-    # Get the letter grade for a value
-    if value is None or value == "":
-        return value
-    gradingOptions = getGradeList()
-    for grade in gradingOptions:
-        if getGradeValue(grade) == value:
-            return grade
-    RichPrintError(f"Value {value} not found in grading options")
-    return None
-
-def getGradeLetterFuzzy(value, onlyLetter=False):
-    # Gets letter based on fuzzy range in the format
-    # Letter (actual value)
-    # Letters start at defined range and end right above the next range
-    # IE S+ is from 4.51 to 5.0, S is from 4.26 to 4.5, etc.
-    if value is None or value == "":
-        return None
-    gradingOptions = getGradeList()
-    
-    # If out of range
-    if value < 0 or value > 5:
-        return None
-    
-    # Round value to 3 decimal places
-    value = round(value, 3)
-    
-    for grade in gradingOptions:
-        gradeLettersOnly = grade.split(" (")[0]  # Get the letter part of the grade
-        # If exact match, return grade
-        if getGradeValue(grade) == value:
-            if onlyLetter:
-                return f"{gradeLettersOnly}"
-            else:
-                return f"{gradeLettersOnly} ({value})"
-        
-        upperBound = getGradeValue(grade)
-        lowerBound = upperBound - 0.5  # Assuming each grade has a range of 0.25
-        if "+" not in grade:
-            # If grade has a plus, it is the upper bound of the range
-            lowerBound = upperBound - 0.25
-        if grade == "F (0)":
-            # F is a special case, it is always 0
-            lowerBound = 0
-            upperBound = 0.25
-
-        if onlyLetter:
-            if lowerBound < value <= upperBound:
-                # If value is in range, return grade
-                return f"{gradeLettersOnly}"
-        else:
-            if lowerBound < value <= upperBound:
-                # If value is in range, return grade
-                return f"{gradeLettersOnly} ({value})"
-
-    # If no grade found, return None
-    RichPrintError(f"Value {value} not found in grading options")
-    return None
-
-def resolveLetterGradeToImageGradeIncludingMinusSigns(thisTeaAverageRating):
-    # Resolve letter grade to image grade including minus signs
-    
-    # First get the base letter grade
-    baseGrade = getGradeLetterFuzzy(thisTeaAverageRating, onlyLetter=True)
-    if baseGrade is None:
-        return None
-    hasMinus = False
-    # Check if the value is in the minus range
-    if "-" in baseGrade:
-        hasMinus = True
-        baseGrade = baseGrade.replace("-", "")
-
-    # First construct the image grade
-    asset_path = f"./assets/images/ui_letter_{baseGrade}.png"
-    print(f"Base asset path: {asset_path}")
-    final_image = None
-    try:
-        chart_img = Image.open(asset_path)
-        # Normalize orientation (important!)
-        chart_img = PIL.ImageOps.exif_transpose(chart_img)
-        # Composite over white if transparent
-        if chart_img.mode in ("RGBA", "LA") or (chart_img.mode == "P" and "transparency" in chart_img.info):
-            chart_img = PIL.Image.alpha_composite(
-                PIL.Image.new("RGBA", chart_img.size, (255, 255, 255, 255)),
-                chart_img.convert("RGBA")
-            ).convert("RGB")
-        chart_image_test = chart_img.resize((128, 128), Image.LANCZOS)
-
-        # Add the minus sign if needed
-        if hasMinus:
-            # for now, construct the minus as a red line at the right spot
-            draw = ImageDraw.Draw(chart_image_test)
-            line_y = 16  # Y position for the minus sign
-            line_start_x = 72  # Start X position
-            line_end_x = 120    # End X position
-            line_thickness = 14  # Thickness of the minus sign
-            draw.line((line_start_x, line_y, line_end_x, line_y), fill="red", width=line_thickness)
-        final_image = chart_image_test
-        return final_image
-    except Exception as e:
-        RichPrintError(f"Error loading test image: {e}")
-    return None
-
-
-def getGradeDropdownValueByFloat(value):
-    # Get the dropdown value for a float value
-    gradingOptions = getGradeList()
-    for grade in gradingOptions:
-        if getGradeValue(grade) == value:
-            return grade
-    RichPrintError(f"Value {value} not found in grading options")
-    return None
-
-def injectGradeMeaningIntoText(gradeLetter):
-    # Inject the meaning of the grade into the text
-    # Replaces <meaning> with an explanation of the grade
-    gradeMeanings = {
-        "S+": "S (+) outstanding or exceptional. good value. -> must sample. strongly consider dedicated order, rebuy.",
-        "S":  "S (X) outstanding or exceptional. ok value. -> must sample. strongly consider dedicated order, rebuy.",
-        "S-": "S (-) outstanding or exceptional. poor value. -> must sample. consider dedicated order, rebuy.",
-        
-        "A+": "A (+) notably good. good value. -> should sample. strongly consider dedicated order, rebuy.",
-        "A":  "A (X) notably good. ok value. -> should sample. consider dedicated order, rebuy.",
-        "A-": "A (-) notably good. poor value. -> should sample, avoid dedicated order, consider rebuy.",
-        
-        "B+": "B (+) above average. good value. -> consider sample, rebuy.",
-        "B":  "B (X) above average. ok value. -> consider sample, rebuy only if sales.",
-        "B-": "B (-) above average. poor value. -> consider sample, avoid rebuy.",
-        
-        "C+": "C (+) drinkable, unremarkable. good value. -> wouldn't rebuy.",
-        "C":  "C (X) drinkable, unremarkable. ok value. -> wouldn't rebuy.",
-        "C-": "C (-) drinkable, unremarkable. poor value. -> avoid.",
-        
-        "D+": "D (+) bad. good value. -> avoid.",
-        "D":  "D (X) bad. ok value. -> avoid.",
-        "D-": "D (-) bad. poor value. -> avoid.",
-        
-        "F":  "Dumped"
-    }
-    text = gradeMeanings.get(gradeLetter.split(" ")[0], "No meaning found for this grade.")
-    return text
-
-#endregion
-
-
-
-#region Visualization stuff. 
-# 1. Given a type of tea, return a list of average ratings for all reviews of that type of tea in list form
-# 2. Given a vendor of tea, return a list of average ratings for all reviews of that vendor in list form
-# 3. Given a year of tea, return a list of average ratings for all reviews of that year in list form
-# 4. Given a list from 1-3, automatically find range, return a tuple of (x, y, size) points deduping similar points
-
-def getAverageRatingRange(teaType=None, vendor=None, year=None, overlap_threshold=0.05):
-    # If none are provided, it is considered "All"
-    getAll = False
-    if sum([teaType is None, vendor is None, year is None]) == 3:
-        getAll = True
-    # if more than 1 are provided, error for now
-    elif sum([teaType is not None, vendor is not None, year is not None]) != 1:
-        RichPrintError("Only one of teaType, vendor, or year must be provided")
-        return None
-    # Get the average ratings for the specified criteria
-    if getAll:
-        ratings = getAverageRatingsAll()
-    elif teaType:
-        ratings = getAverageRatingsByTeaType(teaType)
-    elif vendor:
-        ratings = getAverageRatingsByVendor(vendor)
-    elif year:
-        ratings = getAverageRatingsByYear(year)
-    else:
-        RichPrintError("No valid criteria provided")
-        return None
-
-    # If no ratings found, return None
-    if not ratings:
-        RichPrintError("No ratings found")
-        return None
-
-    # Sort ratings for easier clustering
-    ratings = sorted(ratings)
-    min_r, max_r = min(ratings), max(ratings)
-    r_range = max_r - min_r if max_r != min_r else 1e-6  # avoid divide by zero
-
-    # Define max distance considered "overlapping"
-    threshold = overlap_threshold * r_range
-
-    clusters = []
-    current_cluster = [ratings[0]]
-
-    # Group nearby points
-    for r in ratings[1:]:
-        if abs(r - current_cluster[-1]) <= threshold:
-            current_cluster.append(r)
-        else:
-            clusters.append(current_cluster)
-            current_cluster = [r]
-    clusters.append(current_cluster)
-
-    # Now convert clusters into (x, y, size) points
-    points = []
-    for cluster in clusters:
-        x = np.mean(cluster)  # average rating in cluster
-        # y should be static as the plot is very flat
-        y = 1
-        size = len(cluster)
-        # Round y to 2 decimal places
-        y = round(y, 2)
-        points.append((x, y, size))
-    return points
-
-# Given a type of tea, return a list of average prices for all teas of that type in list form
-# Apply bubble thresholding similar to above function
-def getAveragePriceOfTeasOfType(teaType=None, overlap_threshold=0.02):
-    if teaType is None:
-        RichPrintError("teaType must be provided")
-        return None
-    prices = getAveragePriceRange(teaType)
-    RichPrintInfo(f"Found {len(prices)} prices for tea type '{teaType}'")
-    prices = sorted(prices)
-    if not prices:
-        RichPrintError("No prices found")
-        return None
-    
-    threshold = overlap_threshold * (max(prices) - min(prices) if max(prices) != min(prices) else 1e-6)
-    clusters = []
-    current_cluster = [prices[0]]
-
-    # Group nearby points
-    for p in prices[1:]:
-        if abs(p - current_cluster[-1]) <= threshold:
-            current_cluster.append(p)
-        else:
-            clusters.append(current_cluster)
-            current_cluster = [p]
-    clusters.append(current_cluster)
-
-    # Now convert clusters into (x, y, size) points
-    points = []
-    for cluster in clusters:
-        x = np.mean(cluster)  # average price in cluster
-        # y should be static as the plot is very flat
-        y = 1
-        size = len(cluster)
-        # Round y to 2 decimal places
-        y = round(y, 2)
-        points.append((x, y, size))
-    return points, len(prices)
-
-# Given a type of tea, and a price, calculate the percentile of that price among all teas of that type
-# (excluding teas with price <= 0.01)
-def getPercentileofPricing(teaType=None, price=None):
-    if teaType is None or price is None:
-        RichPrintError("teaType and price must be provided")
-        return None
-    
-    prices = getAveragePriceRange(teaType)
-    # Exclude prices <= 0.01
-    prices = [p for p in prices if p > 0.01]
-    if not prices:
-        RichPrintError("No valid prices found")
-        return None
-    prices = sorted(prices)
-    # Calculate the percentile
-    numBelow = sum(1 for p in prices if p < price)
-    percentile = (numBelow / len(prices)) * 100
-    return percentile
-
-def getPercentileOfRatingGivenType(teaType=None, rating=None):
-    if teaType is None or rating is None:
-        RichPrintError("teaType and rating must be provided")
-        return None
-    ratings = getAverageRatingsByTeaType(teaType)
-    if not ratings:
-        RichPrintError("No ratings found")
-        return None
-    ratings = sorted(ratings)
-    numBelow = sum(1 for r in ratings if r < rating)
-    percentile = (numBelow / len(ratings)) * 100
-    return percentile
-
-def getAveragePriceRange(teaType=None):
-    # If none are provided, it is considered "All"
-    prices = []
-    for tea in TeaStash:
-        teaTypeLower = teaType.lower().strip() if teaType is not None else None
-        searchedType = tea.attributes.get('Type', '').lower().strip() if teaType is not None else None
-        if teaType is None or (searchedType in teaTypeLower) or (searchedType == teaTypeLower):
-            if tea.calculated.get("costPerGram") is not None and tea.calculated.get("costPerGram") > 0.01:
-                prices.append(tea.calculated.get("costPerGram"))
-    return prices
-
-def getAverageRatingsAll():
-    ratings = []
-    for tea in TeaStash:
-        for review in tea.reviews:
-            if review.attributes.get("Final Score") is not None:
-                ratings.append(review.attributes.get("Final Score"))
-    return ratings
-
-def getAverageRatingsByTeaType(teaType):
-    ratings = []
-    for tea in TeaStash:
-        if teaType.lower() in tea.attributes.get("Type", "").lower():
-            for review in tea.reviews:
-                if review.attributes.get("Final Score") is not None:
-                    ratings.append(review.attributes.get("Final Score"))
-    return ratings
-
-def getAverageRatingsByVendor(vendor):
-    ratings = []
-    for tea in TeaStash:
-        if vendor.lower() in tea.attributes.get("Vendor", "").lower():
-            for review in tea.reviews:
-                if review.attributes.get("Final Score") is not None:
-                    ratings.append(review.attributes.get("Final Score"))
-    return ratings
-
-def getAverageRatingsByYear(year):
-    ratings = []
-    for tea in TeaStash:
-        if tea.attributes.get("Year") == year:
-            for review in tea.reviews:
-                if review.attributes.get("Final Score") is not None:
-                    ratings.append(review.attributes.get("Final Score"))
-    return ratings
-
-def make_rating_bubble_image(points, width=320, height=125, highlight=None, name="", grade_labels=True, labelPrefix="", labelSuffix=""):
-    # Create figure
-    fig, ax = plt.subplots(figsize=(width/100, height/100), dpi=100)
-    x, y, size = zip(*points)
-
-    # Normalize size for bubbles
-    # largest bubble shouldnt exceed 750 in size
-    # smallest bubble shouldnt be smaller than 50
-    # If any bubbles are greater than 750, scale all down proportionally
-    bubble_sizes = [s * 100 for s in size]  # Scale sizes for better visibility
-    if max(bubble_sizes) > 750:
-        scale_factor = 750 / max(bubble_sizes)
-        bubble_sizes = [s * scale_factor for s in bubble_sizes]
-    elif min(bubble_sizes) < 50:
-        scale_factor = 50 / min(bubble_sizes)
-        bubble_sizes = [s * scale_factor for s in bubble_sizes]
-    # Ensure at least 50 to most 750
-    bubble_sizes = [max(50, min(s, 750)) for s in bubble_sizes]
-
-
-    # Add a highlight for highlight if provided
-    if highlight is not None:
-        highlight = float(highlight)
-        highlight_x = highlight
-        highlight_y = 0.96
-
-    if grade_labels == True:
-        labels = {
-        0: "F",
-        0.5: "D",
-        1.5: "C",
-        2.5: "B",
-        3.5: "A",
-        4.5: "S",
-        5: "S+"
-        }
-        # map 0-5 to the xlabels
-        # Set tick positions and labels
-        ax.set_xticks(list(labels.keys()))
-        ax.set_xticklabels(list(labels.values()))
-        ax.tick_params(axis='x', which='major', labelsize=11)
-    else:
-        # Determine numeric labels based on min and max x
-        min_x = min(x)
-        max_x = max(x)
-        step = (max_x - min_x) / 5
-        numeric_labels = [round(min_x + i * step, 1) for i in range(6)]
-        labels = {val: f"{labelPrefix}{val}{labelSuffix}" for val in numeric_labels}
-        ax.set_xticklabels([labels[val] for val in numeric_labels])
-        ax.set_xticks(numeric_labels)
-        ax.tick_params(axis='x', which='major', labelsize=11)
-
-    ax.scatter(x, y, s=bubble_sizes, alpha=0.6, edgecolors='black', linewidths=0.5)
-    if highlight is not None:
-        ax.scatter([highlight_x], [highlight_y], s=85, color='red', edgecolors='black', linewidths=1.5, label='This Rating')
-    ax.set_xlabel("")
-    ax.set_ylabel("")  # y is just jitter
-    ax.set_title(name if name else "Rating Distribution")
-    ax.set_ylim(min(y) - 0.1, max(y) + 0.1)
-    if grade_labels == True:
-        ax.set_xlim(-0.5, 5.5)
-    else:
-        ax.set_xlim(-0.1, max(x) * 1.1)
-    ax.get_yaxis().set_visible(False)
-    ax.grid(alpha=0.2)
-
-    # Save figure to BytesIO buffer
-    buf = BytesIO()
-    plt.tight_layout()
-    plt.savefig(buf, format="png", transparent=True)
-    plt.close(fig)
-    buf.seek(0)
-
-    # Load as Pillow image
-    chart_img = Image.open(buf)
-    return chart_img
-
-# We calculate the percentiles for price and rating and return a combined visualization
-# that shows both price and rating percentiles in an intuitive way
-# We also show the difference between the two (cheap tea should be good value, expensive tea should be high quality)
-# We visualize this with a dumbell scatter plot
-def make_price_rating_value_image(price_per_gram, rating, price_percentile, rating_percentile, name="", width=320, height=130):
-    difference = rating_percentile - price_percentile
-
-    # Convert pixel size to inches for matplotlib
-    dpi = 100
-    fig_w = width / dpi
-    fig_h = height / dpi
-
-    fig, ax = plt.subplots(figsize=(fig_w, fig_h), dpi=dpi)
-
-    # Dumbbell plot
-    ax.plot(
-        [price_percentile, rating_percentile],
-        [0, 0],
-        linewidth=2
-    )
-    ax.scatter(price_percentile, 0, s=50, zorder=3, label="Price", color="red")
-    ax.scatter(rating_percentile, 0, s=50, zorder=3, label="Rating", color="green")
-
-    # Annotations
-    price_percentile = round(price_percentile, 2)
-    rating_percentile = round(rating_percentile, 2)
-    ax.text(price_percentile, 0.14, f"{price_percentile:.0f}%", ha="left", fontsize=11)
-    ax.text(rating_percentile, 0.14, f"{rating_percentile:.0f}%", ha="right", fontsize=11)
-
-    ax.text(
-        (price_percentile + rating_percentile) / 2,
-        -0.3, # y offset
-        f"Δ {difference:+.0f}%",
-        ha="center",
-        fontsize=11,
-    )
-
-    # Title and subtitle
-    price_per_gram = round(price_per_gram, 2)
-    title = f"${price_per_gram:.2f}/g ({price_percentile:.0f}%) • Rating {rating:.1f} ({rating_percentile:.0f}%)"
-
-    ax.set_title(title, fontsize=12, pad=4)
-
-    # Styling
-    ax.set_xlim(0, 100)
-    ax.set_ylim(-0.5, 0.5)
-    ax.set_yticks([])
-    #ax.set_xlabel("Percentile", fontsize=11)
-    ax.tick_params(axis="x", labelsize=11)
-
-    for spine in ["top", "right", "left"]:
-        ax.spines[spine].set_visible(False)
-
-    plt.tight_layout()
-
-    # Save to image buffer
-    buf = BytesIO()
-    plt.savefig(buf, format="png", transparent=True)
-    plt.close(fig)
-    buf.seek(0)
-
-    return Image.open(buf)
-
-
-
-def make_tea_consumption_progress_image(
-    not_consumed_reasons,     # dict[str, float]  e.g. {"Sale": 12.5, "Gifted": 0}
-    reviews_done,             # int
-    total_consumed,           # float (grams)
-    total_purchased,          # float (grams)
-    last_consumed, # float (grams)
-    name="",
-    width=320,
-    height=130
-):
-    # Safety
-    total_purchased = max(total_purchased, 1e-6)
-
-    # Normalize values
-    consumed_pct_previous = (total_consumed - last_consumed) / total_purchased * 100
-    consumed_pct_this = (last_consumed) / total_purchased * 100
-    consumed_pct = total_consumed / total_purchased * 100
-
-    reason_items = [
-        (k, v) for k, v in not_consumed_reasons.items() if v > 0
-    ]
-
-    total_consumed_reasons = sum(v for k, v in reason_items)
-    total_remaining = total_purchased - total_consumed - total_consumed_reasons
-    if total_remaining < 0:
-        total_remaining = 0
-
-    total_remaining_pct = total_remaining / total_purchased * 100
-    total_remaining = total_purchased - total_consumed - total_consumed_reasons
-    total_remaining = max(total_remaining, 0)
-
-    # Color palette (extendable)
-    reason_colors = [
-        "#f4a261", "#e76f51", "#2a9d8f", "#e9c46a", "#8ab17d"
-    ]
-
-    # Figure setup
-    dpi = 100
-    fig_w = width / dpi
-    fig_h = height / dpi
-
-    fig, ax = plt.subplots(figsize=(fig_w, fig_h), dpi=dpi)
-
-    # --- Build stacked bar ---
-    left = 0.0
-
-    # Not-consumed reasons
-    for (reason, amount), color in zip(reason_items, reason_colors):
-        pct = amount / total_purchased * 100
-        ax.barh(
-            y=0,
-            width=pct,
-            left=left,
-            height=0.35,
-            color=color,
-            label=reason
-        )
-        left += pct
-
-    # Consumed portion
-    ax.barh(
-        y=0,
-        width=consumed_pct_previous,
-        left=left,
-        height=0.35,
-        color="#347636",
-        label="Consumed"
-    )
-    
-    left += consumed_pct_previous
-
-    ax.barh(
-        y=0,
-        width=consumed_pct_this,
-        left=left,
-        height=0.35,
-        color="#4CAF50",
-        label="Consumed2"
-    )
-
-    left += consumed_pct_this
-
-    
-
-    # --- Labels ---
-    ax.text(
-        7.5,
-        0.35,
-        f"{total_remaining:.1f}g/{total_purchased:.1f}g",
-        ha="left",
-        va="bottom",
-        fontsize=11
-    )
-
-    ax.text(
-        100,
-        0.35,
-        f"{reviews_done} reviews",
-        ha="right",
-        va="bottom",
-        fontsize=11
-    )
-
-    averageConsumedPerReview = total_consumed / reviews_done if reviews_done > 0 else 0
-    
-    estimatedReviewsLeft = total_remaining / averageConsumedPerReview if averageConsumedPerReview > 0 else 0
-    # ceil to nearest int
-    estimatedReviewsLeft = math.ceil(estimatedReviewsLeft)
-
-    # Title
-    title = f"{total_remaining_pct:.0f}% remaining (est. {estimatedReviewsLeft} reviews left)" if estimatedReviewsLeft > 0 else f"All finished!"
-    ax.set_title(title, fontsize=12, pad=4)
-
-    # Styling
-    ax.set_xlim(0, 100)
-    ax.set_ylim(-0.7, 0.8)
-    ax.set_yticks([])
-
-    ax.set_xticks([0, 25, 50, 75, 100])
-    ax.set_xticklabels(["0%", "25%", "50%", "75%", "100%"])
-    ax.tick_params(axis="x", labelsize=10, length=4)
-
-    for spine in ["top", "right"]:
-        ax.spines[spine].set_visible(False)
-
-    plt.tight_layout()
-
-    # Save to image buffer
-    buf = BytesIO()
-    plt.savefig(buf, format="png", transparent=True)
-    plt.close(fig)
-    buf.seek(0)
-
-    return Image.open(buf)
-
+        yield phase
+    finally:
+        phase["seconds"] = time.perf_counter() - start
+        phase["blocks"] = sys.getallocatedblocks() - blocks
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            phase["bytes"] = current - traced
+            phase["peakBytes"] = peak - traced
+        startupProfile.append(phase)
+
+def formatStartupProfile():
+    lines = ["Startup profile:"]
+    for phase in startupProfile:
+        line = f"{phase['phase']:<20}{phase['seconds'] * 1000:>10.1f} ms{phase['blocks']:>+12} blocks"
+        if "bytes" in phase:
+            line += f"{phase['bytes'] / 1024:>+12.0f} KB{phase['peakBytes'] / 1024:>12.0f} KB peak"
+        lines.append(line)
+    lines.append(f"{'Total':<20}{sum(phase['seconds'] for phase in startupProfile) * 1000:>10.1f} ms")
+    return lines
+
+def dumpStartupProfile(path=None):
+    # ignore sender when called from a button
+    if type(path) != str:
+        path = settings["STARTUP_PROFILE_PATH"]
+    profile = {"created": dt.datetime.now(tz=dt.timezone.utc).timestamp(), "appVersion": settings["APP_VERSION"],
+               "tracemalloc": tracemalloc.is_tracing(), "totalSeconds": sum(phase["seconds"] for phase in startupProfile), "phases": startupProfile}
+    WriteFileAtomic(path, json.dumps(profile, indent=2))
+    RichPrintSuccessMinor(f"Written startup profile to {path}")
 #endregion
 
 
 #region Helpers3
-
-# TODO: Fuzzy tea name matching under same vendor and type (ie sample vs cake or year differences)
-def fuzzy_tea_name_matching(tea, strict_vendor=True, strict_type=True, strict_year=False):
-    teaType = tea.attributes.get("Type", "").lower()
-    vendor = tea.attributes.get("Vendor", "").lower()
-    year = tea.attributes.get("Year", None)
-    name = tea.name.lower().strip()
-    allMatchedTeas = []
-    allMatchedReviews = [] # return list of reviews as well for various display stuff
-    # Implement fuzzy matching logic here
-    for other_tea in TeaStash:
-        if other_tea.id == tea.id:
-            continue
-        otherTea_vendor = other_tea.attributes.get("Vendor", "").lower().strip()
-        otherTea_type = other_tea.attributes.get("Type", "").lower().strip()
-        otherTea_year = other_tea.attributes.get("Year", None)
-        otherTea_name = other_tea.name.lower().strip()
-        if strict_vendor and otherTea_vendor != vendor:
-            continue
-        if strict_type and otherTea_type != teaType:
-            continue
-        if strict_year and otherTea_year != year:
-            continue
-        # If we reach here, we need to strip year and vendor from the name and do fuzzy matching
-        # Remove year from name if it exists
-        name_no_year = re.sub(r'\b(19|20)\d{2}\b', '', name).strip()
-        other_name_no_year = re.sub(r'\b(19|20)\d{2}\b', '', otherTea_name).strip()
-        # Remove vendor from name if it exists
-        name_no_vendor = re.sub(r'\b' + re.escape(vendor) + r'\b', '', name_no_year).strip()
-        other_name_no_vendor = re.sub(r'\b' + re.escape(otherTea_vendor) + r'\b', '', other_name_no_year).strip()
-        # Perform fuzzy matching with package fuzzywuzzy
-        lvratio = fuzz.partial_ratio(name_no_vendor, other_name_no_vendor)
-        ratio = fuzz.ratio(name_no_vendor, other_name_no_vendor)
-        print(f"Fuzzy matching {name_no_vendor} and {other_name_no_vendor}: LVRatio={lvratio}, Ratio={ratio}")
-        # If either ratio is above 80, we consider it a match
-        if lvratio >= 80 or ratio >= 70:
-            allMatchedTeas.append(other_tea)
-            allMatchedReviews.extend(other_tea.reviews)
-    # add self tea and reviews to the list
-    allMatchedTeas.append(tea)
-    allMatchedReviews.extend(tea.reviews)
-    return allMatchedTeas, allMatchedReviews
-
-
-# Defines valid categories, and role as categories
-# Also defines the types of role
-
-def setValidTypes():
-    session["validTypesCategory"] = ["string", "int", "float", "bool", "datetime"]
-    session["validTypesReviewCategory"] = ["string", "int", "float", "bool", "datetime"]
-    
-    session["validroleCategory"] = {"string": ["UNUSED", "Notes (short)", "Notes (Long)", "Name", "Vendor", "Type"],
-                                "int": ["UNUSED","Year"],
-                                "float": ["UNUSED", "Total Score", "Amount", "Remaining", "Cost", "Cost per Gram"],
-                                "bool": ["UNUSED", "bool"],
-                                "date": ["UNUSED", "date"],
-                                "datetime": ["UNUSED", "date"]}
-    
-    session["validroleReviewCategory"] = {"string": ["UNUSED", "Notes (short)", "Notes (Long)", "Name", "Method"],
-                                "int": ["UNUSED", "Year", "Amount", "Steeps", "Vessel size"],
-                                "float": ["UNUSED", "Score", "Final Score", "Amount"],
-                                "bool": ["UNUSED", "bool"],
-                                "date": ["UNUSED", "date"],
-                                "datetime": ["UNUSED", "date"]}
     
 
 def _table_sort_callback(sender, sortSpec):
-    suffixes = ['g', 'ml', '$', '%']
     # If num rows is less than 2, return
     numRows = dpg.get_item_children(sender, 1)
     if numRows is None or len(numRows) < 2:
@@ -1506,444 +206,26 @@ def _table_sort_callback(sender, sortSpec):
     if not rows:
         RichPrintError("No rows to sort")
         return
-    sortableItems = []
+    cells = []
     for row in rows:
         if dpg.get_item_type(row) == dp.mvTableRow:
             rowData = dpg.get_item_children(row, 1)
             if rowData is not None and len(rowData) > 0:
                 # Get the value from the column index
-                cell = rowData[column_index]
-                cellValue = dpg.get_value(cell)
-                # If value is an number, convert it to float
-
-                parsed_possible_number = cellValue
-                if isinstance(cellValue, str):
-                    # Try to strip periods and "g" suffixes for grams
-                    possibleNumber = cellValue.lower().replace('g', '').replace(',', '', 1).strip()
-                    possibleNumber = possibleNumber.replace('$', '', 1).strip()
-                    possibleNumber = possibleNumber.replace('%', '', 1).strip()
-                    possibleNumber = possibleNumber.replace('ml', '', 1).strip()
-                    if possibleNumber.isdigit():
-                        cellValue = float(possibleNumber)
-                        sortableItems.append((row, parsed_possible_number))
-                    else:
-                        try:
-                            parsed_possible_number = float(possibleNumber)
-                            sortableItems.append((row, parsed_possible_number))
-                        except ValueError:
-                            sortableItems.append((row, cellValue))
-                else:
-                    sortableItems.append((row, cellValue))
+                cells.append((row, dpg.get_value(rowData[column_index])))
             else:
                 RichPrintWarning(f"Row {row} has no data, skipping")
-            
-
-
-    # Define sort key
-    def sort_key(item):
-        suffixes = ['g', 'ml', '$', '%']
-        if isinstance(item[1], str):
-            for suffix in suffixes:
-                if item[1].endswith(suffix):
-                    try:
-                        return float(item[1][:-len(suffix)].strip())
-                    except ValueError:
-                        pass
-        # If date string, try to parse it, if succeeds, use timestamp
-        if isinstance(item[1], str):
-            try:
-                parsed_date = StringToTimeStamp(item[1], silent=True)
-                if parsed_date:
-                    return parsed_date
-            except:
-                # Fail silently as we know it isnt always a date
-                return item[1]
-        return item[1]
-    
-    unsortableItems = []
-    cleanSortableItems = []
-    RichPrintSuccessMinor(f"Found {len(sortableItems)} sortable items and {len(unsortableItems)} unsortable items")
-    # Remove N/A from the list
-    if len(sortableItems) > 1:
-        for i, item in enumerate(sortableItems):
-            if item[1] == "N/A" or item[1] == "" or item[1] == "None":
-                unsortableItems.append(item)
-            elif item[1] is None:
-                unsortableItems.append(item)
-            # Can convert to int or float
-            elif isinstance(item[1], str):
-                #print(item)
-                possibleNumber = item[1].lower()
-                for suffix in suffixes:
-                    if possibleNumber.endswith(suffix):
-                        possibleNumber = possibleNumber[:-len(suffix)].strip()
-                possibleNumber = possibleNumber.replace(',', '', 1).strip()
-                try:
-                    possibleFloat = float(possibleNumber)
-                    cleanSortableItems.append((item[0], possibleFloat))
-                except ValueError:
-                    # Try to convert and parse as grade letter
-                    try:
-                        gradeValue = getGradeValue(item[1], silent=True)
-                        if gradeValue is not None:
-                            cleanSortableItems.append((item[0], gradeValue))
-                        else:
-                            cleanSortableItems.append(item)
-                    except ValueError:
-                        cleanSortableItems.append(item)
-                        RichPrintWarning(f"Could not convert item (str) to float or grade: {item[1]}")
-            else:
-                cleanSortableItems.append(item)
-
-    # string/number comparisons not supported in python3, so we need to separate them
-    # Put all items that are not of the same type as the first item to the end
-    numsCleanSortableItems = []
-    strsCleanSortableItems = []
-    if len(cleanSortableItems) > 0:
-        # We want to have numbers first, then strings
-        for item in cleanSortableItems:
-            if isinstance(item[1], (int, float)):
-                numsCleanSortableItems.append(item)
-            else:
-                strsCleanSortableItems.append(item)
-    
-    # We sort numbers first, then strings then append unsortable items
-    numsCleanSortableItems.sort(key=sort_key, reverse=not ascending)
-    strsCleanSortableItems.sort(key=sort_key, reverse=not ascending)
-    
-    # Sort the items
-    cleanSortableItems = numsCleanSortableItems + strsCleanSortableItems
-
-    if len(cleanSortableItems) < 2:
-        RichPrintError("Not enough sortable items to sort (found less than 2 after cleaning)")
+    sorted_rows = sortTableCells(cells, ascending)
+    if sorted_rows is None:
         return
-    RichPrintSuccessMinor(f"Found {len(cleanSortableItems)} sortable items and {len(unsortableItems)} unsortable items")
-    # Re-add the unsortable items to the end of the list
-    for item in unsortableItems:
-        cleanSortableItems.append(item)
-    sorted_rows = [item[0] for item in cleanSortableItems]
     # Reorder rows
     dpg.reorder_items(sender, 1, sorted_rows)
     RichPrintSuccess(f"Sorted table by column {column_index} in {'ascending' if ascending else 'descending'} order")
-
-
-# We want to search our entire list of teas or reviews for a list of previous answers, then return the top X results by frequency
-def searchPreviousAnswers(categoryName, data="Tea", topX=5):
-    topX = int(topX)
-    # data must be either "Tea" or "Review"
-    if data not in ["Tea", "Review"]:
-        RichPrintError("Data must be either Tea or Review")
-        return []
-    
-    # If data less than top X return all data
-    if len(TeaStash) < topX:
-        topX = len(TeaStash)
-    
-    answersDict = {}
-    if data == "Tea":
-        for tea in TeaStash:
-            if categoryName in tea.attributes:
-                if tea.attributes[categoryName] in answersDict:
-                    answersDict[tea.attributes[categoryName]] += 1
-                else:
-                    answersDict[tea.attributes[categoryName]] = 1
-
-    elif data == "Review":
-        for tea in TeaStash:
-            for review in tea.reviews:
-                if categoryName in review.attributes:
-                    if review.attributes[categoryName] in answersDict:
-                        answersDict[review.attributes[categoryName]] += 1
-                    else:
-                        answersDict[review.attributes[categoryName]] = 1
-
-    # Get the top X results by frequency, then sort and return them
-    sortedAnswers = sorted(answersDict.items(), key=lambda x: x[1], reverse=True)
-    topAnswers = sortedAnswers[:topX]
-    # Remove time from any datetime objects
-    for i, answer in enumerate(topAnswers):
-        if isinstance(answer[0], dt.datetime):
-            topAnswers[i] = (answer[0].strftime(settings["DATE_FORMAT"]), answer[1])
-    topAnswersList = [answer[0] for answer in topAnswers]
-    RichPrintInfo(f"Top {topX} answers for {categoryName} in {data}: {topAnswers}")
-    return topAnswers, topAnswersList
-
-
 #endregion
 
 
 #region DataObject Classes
 
-# Defines one tea that has been purchased and may have reviews
-class StashedTea:
-    id = 0
-    name = ""
-    dateAdded = None  # Date when the tea was added to the stash
-    attributes = {}
-    reviews = []
-    calculated = {}
-    # Price and amount adjustments, if required, in lists of Adjustment dicts
-    # Price adjustments = [{"price": 10, "amount": 100}, {"price": 5, "amount": 50}]
-    adjustments = {}
-
-    # Finished flag
-    finished = False
-
-    # Teas may be copies of other teas aquired in other methods. We would like to link them together somehow.
-    # We can either link them with IDs or with names. For now, we will use names.
-    # When we call a function with the keywork incLinkedTeas=True, it will include all linked teas in the calculation.
-    linkedTeas = []  # List of tea IDs that are linked to this tea
-
-    def __init__(self, id, name, dateAdded=None, attributes={}):
-        self.id = id
-        self.name = name
-        if dateAdded is None:
-            dateAdded = dt.datetime.now(tz=dt.timezone.utc).timestamp()
-        self.dateAdded = dateAdded
-        self.attributes = attributes
-        self.reviews = []
-        self.calculated = {}
-
-    def addReview(self, review):
-        self.reviews.append(review)
-    def removeReview(self, reviewID):
-        # Remove review by ID
-        self.reviews = [review for review in self.reviews if review.id != reviewID]
-        # Recalculate the average rating after removing a review
-        self.calculateAverageRating()
-
-    def calculate(self):
-        # call all the calculate functions
-        self.calculateAverageRating()
-    def calculateAverageRating(self):
-        # calculate the average rating
-        if len(self.reviews) > 0:
-            totalRating = 0
-            for review in self.reviews:
-                totalRating += review.rating
-            self.calculated["averageRating"] = totalRating / len(self.reviews)
-        else:
-            self.calculated["averageRating"] = 0
-
-    def getLatestReview(self):
-        # Get the latest review by date added
-        if len(self.reviews) == 0:
-            return None
-        if "date" not in self.reviews[0].attributes:
-            RichPrintError("No date attribute found in reviews, cannot get latest review. (DATEADDED)")
-            return None
-        latestReview = max(self.reviews, key=lambda r: r.attributes["date"])
-        return latestReview
-    
-    def getEarliestReview(self):
-        # Get the earliest review by date added
-        if len(self.reviews) == 0:
-            return None
-        if "date" not in self.reviews[0].attributes:
-            RichPrintError("No date attribute found in reviews, cannot get earliest review. (DATEADDED)")
-            return None
-        earliestReview = min(self.reviews, key=lambda r: r.attributes["date"])
-        return earliestReview
-    
-    def getEstimatedConsumedByReviews(self):
-        # Get the estimated consumed amount by reviews
-        if len(self.reviews) == 0:
-            return 0
-        consumed = 0
-        for review in self.reviews:
-            if "Amount" in review.attributes:
-                consumed += review.attributes["Amount"]
-
-        consumed = round(consumed, 2)  # Round to 2 decimal places
-        return consumed
-    
-    def getEstimatedRemaining(self):
-        # Find self in cache
-        global TeaCache
-        if self in TeaCache:
-            return TeaCache[self.id].get("remaining", None)
-        
-    def getCalcedValue(self, categoryRole="Cost per Gram"):
-        # Get the category role
-        cat = getCategoryByrole(categoryRole)
-        
-        # Check if flagged as autocalculated
-        if cat is None:
-            RichPrintError(f"Category role {categoryRole} not found")
-            return None
-        if not cat.isAutoCalculated:
-            return self.attributes.get(categoryRole, None)
-
-        # Get the calculated cost per gram from the cache
-        global TeaCache
-        if self in TeaCache:
-            print(F"Getting {categoryRole} from cache")
-            return TeaCache[self.id].get(categoryRole, None)
-        # if not found, get calculated
-        if categoryRole in self.calculated:
-            print(F"Getting {categoryRole} from calculated")
-            return self.calculated[categoryRole]
-        # if not found, run autocalculate
-        print(F"Calculating {categoryRole}")
-        value, explanation = cat.autocalculate(self)
-        self.calculated[categoryRole] = value
-        return value
-    
-    def _getLinkedTeas(self):
-        # Get the linked teas as StashedTea objects
-        linkedTeas = [] # self is implicitly included
-        global TeaCache
-        for teaID in self.linkedTeas:
-            tea = TeaCache.get(teaID, None)
-            if tea is not None:
-                linkedTeas.append(tea)
-        return linkedTeas
-
-# Defines a review for a tea
-class Review:
-    attempt = 0
-    parentID = 0
-    id = 0
-    name = ""
-    dateAdded = None
-    attributes = {}
-    calculated = {}
-
-    # If is required, for when talking about tea, or for all, like teaware and shipping
-    isRequiredForTea = False
-    isRequiredForAll = False
-
-    # Autocalculated, if it is, it would be hidden in entry window and would rely on a calc step after submission
-    # based on its role, would be Not Required if so.
-    isAutoCalculated = False
-
-    # Show as dropdown?
-    isDropdown = False
-    def __init__(self, id, name, dateAdded, attributes, rating):
-        self.id = id
-        self.name = name
-        if dateAdded is None:
-            dateAdded = dt.datetime.now(tz=dt.timezone.utc).timestamp()
-        self.dateAdded = dateAdded
-        self.attributes = attributes
-        self.rating = rating
-        self.calculated = {}
-
-        self.isRequiredForTea = False
-        self.isRequiredForAll = False
-        self.isAutoCalculated = False
-        self.isDropdown = False
-
-
-    def calculate(self):
-        # call all the calculate functions
-        self.calculateFinalScore()
-
-
-
-
-class TeaCategory:
-    name = ""
-    categoryType = ""
-    color = ""
-    defaultValue = None
-    categoryRole = None
-
-    # If is required, for when talking about tea, or for all, like teaware and shipping
-    isRequiredForTea = False
-    isRequiredForAll = False
-
-    # Autocalculated, if it is, it would be hidden in entry window and would rely on a calc step after submission
-    # based on its role, would be Not Required if so.
-    isAutoCalculated = False
-
-    # Show as dropdown?
-    isDropdown = False
-
-    # Prefix, rounding
-    prefix = ""
-    suffix = ""
-    rounding = 2
-    
-    # Specific options
-    dropdownMaxLength = 5
-    gradingDisplayAsLetter = False  # If the category is a grading category, like "Score" or "Final Score", it will be a letter grade (A, B, C, D, F) instead of a number
-
-
-    def __init__(self, name, categoryType):
-        self.name = name
-        self.categoryType = categoryType
-        if categoryType == "string":
-            self.defaultValue = ""
-        elif categoryType == "int":
-            self.defaultValue = 0
-        elif categoryType == "float":
-            self.defaultValue = 0.0
-        elif categoryType == "bool":
-            self.defaultValue = False
-        elif categoryType == "date" or categoryType == "datetime":
-            # Set the default value to the current date and time
-            self.defaultValue = dt.datetime.now(tz=dt.timezone.utc).timestamp()
-        self.categoryRole = "UNUSED"
-
-        self.isRequiredForTea = False
-        self.isRequiredForAll = False
-        self.isAutoCalculated = False
-        self.isDropdown = False
-
-    def autocalculate(self, data):
-        
-        # role - Remaining
-        RichPrintInfo("Autocalculating...")
-        if self.categoryRole == "Remaining":
-            return data.calculated.get("remaining", None), data.calculated.get("remainingExplanation", None)
-        elif self.categoryRole == "Cost per Gram":
-            return data.calculated.get("costPerGram", None), data.calculated.get("costPerGramExplanation", None)
-        elif self.categoryRole == "Total Score":
-            # Pulls cached values from TeaCache and put into the calculated dict
-            return data.calculated.get("averageScore", None), data.calculated.get("totalScoreExplanation", None)
-        return None, None 
-        
-    # IsValidBase
-    def isValidBase(self, value):
-        # Checks based on data type
-        if self.categoryType == "string":
-            return isinstance(value, str)
-        elif self.categoryType == "int":
-            return isinstance(value, int)
-        elif self.categoryType == "float":
-            return isinstance(value, (int, float))
-        elif self.categoryType == "bool":
-            return isinstance(value, bool)
-        elif self.categoryType == "date" or self.categoryType == "datetime":
-            # Check if value is a valid datetime object or a timestamp
-            if isinstance(value, dt.datetime):
-                return True
-            elif isinstance(value, (int, float)):
-                # If it's a timestamp, check if it can be converted to a datetime object
-                try:
-                    dt.datetime.fromtimestamp(value, tz=dt.timezone.utc)
-                    return True
-                except (ValueError, OverflowError):
-                    return False
-        return False
-    
-    def isValid(self, value):
-        # Checks base, and on autocalculated values
-        if not self.isValidBase(value):
-            RichPrintWarning(f"Value {value} is not valid for category {self.name} of type {self.categoryType}")
-            return False
-        # If autocalculated, check if it is None
-        if self.isAutoCalculated:
-            if value is None:
-                RichPrintWarning(f"Value {value} is not valid for autocalculated category {self.name}")
-                return False
-            # If it is a string, check if it is empty
-            if isinstance(value, str) and value.strip() == "":
-                RichPrintWarning(f"Value {value} is not valid for autocalculated category {self.name}, it is empty")
-                return False
-        return True
-
 # Themes for coloring
 def create_cell_theme(color_rgba):
     with dpg.theme() as theme_id:
@@ -1951,671 +233,12 @@ def create_cell_theme(color_rgba):
             dpg.add_theme_color(dpg.mvThemeCol_Header, color_rgba, category=dpg.mvThemeCat_Core)
             dpg.add_theme_style(dpg.mvStyleVar_FramePadding, 5, 5)
     return theme_id
+#endregion
 
 
-class ReviewCategory:
-    name = ""
-    categoryType = ""
-    defaultValue = ""
-    categoryRole = None
-
-    # If is required, for when talking about tea, or for all, like teaware and shipping
-    isRequiredForTea = False
-    isRequiredForAll = False
-    
-    # Autocalculated, if it is, it would be hidden in entry window and would rely on a calc step after submission
-    # based on its role, would be Not Required if so.
-    isAutoCalculated = False
-
-    # Show as dropdown?
-    isDropdown = False
-
-    # Prefix, rounding
-    prefix = ""
-    suffix = ""
-    rounding = 2
-
-    # Special options
-    dropdownMaxLength = 5
-    gradingDisplayAsLetter = False
-
-    def __init__(self, name, categoryType):
-        self.name = name
-        self.categoryType = categoryType
-        self.categoryRole = self.categoryType
-        self.ifisRequiredForTea = False
-        self.ifisRequiredForAll = False
-        
-    # Define if is required depending on role
-    def setRequired(self, isRequiredForTea, isRequiredForAll):
-        self.isRequiredForTea = isRequiredForTea
-        self.isRequiredForAll = isRequiredForAll
-
-    def format_attribute(self, key, value, no_inject_grade_meaning=False):
-        """Formats a review attribute based on its category metadata."""
-        correctTeaReviewCat = TeaReviewCategories # This should be a list of ReviewCategory objects
-        correct_cat = None
-        for cat in correctTeaReviewCat:
-            if cat.categoryRole == key:
-                correct_cat = cat
-                break
-
-        if value is None:
-            return "N/A"
-            
-        # Don't warn for vendor or cost per gram since they are injected from parent tea and may not have a category
-        if not correct_cat and not key in ["Vendor", "Cost per Gram"]:
-            RichPrintWarning(f"No category found for key: {key}. Returning raw value.")
-            return str(value)
-        
-        # Special handling for injected attributes
-        if key == "Vendor":
-            return str(value)
-        if key == "Cost per Gram":
-            try:
-                value = float(value)
-            except ValueError:
-                RichPrintWarning(f"Value {value} for key {key} is not a valid float for Cost per Gram.")
-                return str(value)
-
-            # Free sample casting
-            if value == 0 or value <= 0.01:
-                return "Free Sample"
-            return f"${value:.2f}/g"
-
-        # Handle datetime formatting
-        if correct_cat.categoryType == "date" or correct_cat.categoryType == "datetime":
-            return TimeStampToStringWithFallback(value, "Can't parse date")
-        
-        # Handle grading display by displaying both letter and number regardless of internal setting
-        if correct_cat.categoryRole == "Score" or correct_cat.categoryRole == "Final Score":
-            numerical_value = None
-            try:
-                numerical_value = float(value)
-            except ValueError:
-                RichPrintWarning(f"Value {value} for key {key} is not a valid float for grading.")
-                return str(value)
-            letter_grade = getGradeLetterFuzzy(numerical_value)
-            # Will return either None, just the Letter if exact match, or Letter (value) if fuzzy match, we want it to always be letter (value/5)
-            if letter_grade:
-                if no_inject_grade_meaning:
-                    return f"{letter_grade.split(' (')[0]} ({numerical_value:.{correct_cat.rounding}f}/5)"
-                else:
-                    return f"{letter_grade.split(' (')[0]} ({numerical_value:.{correct_cat.rounding}f}/5) | {injectGradeMeaningIntoText(letter_grade)}"
-            else:
-                return f"{numerical_value:.{correct_cat.rounding}f}"
-            
-        
-        # Handle numeric formatting
-        if isinstance(value, (int, float)):
-            formatted_value = f"{value:.{correct_cat.rounding}f}"
-            # if int
-            if correct_cat.categoryType == "int":
-                formatted_value = str(int(float(formatted_value)))
-            return f"{correct_cat.prefix}{formatted_value}{correct_cat.suffix}"
-        
-        
-
-        return str(value)
-    
-    def generate_review_outputs(self, review: Review, font_size: int = 24):
-        """
-        Ingests a Review object and creates a text-only review, an HTML review, and a PNG image.
-
-        Args:
-            review: A Review object.
-            review_categories: A dictionary mapping attribute names to ReviewCategory objects.
-            font_size: The font size to use for the image generation.
-
-        Returns:
-            A tuple containing (text_review, html_review, image_path).
-        """
-
-        # Get the tea parent for the name of the tea, the vendor, and other info
-        overrideDoNotGenerateImage = settings.get("EXPORT_REVIEW_DONT_GENERATE_IMAGES", False)
-        overrideDoNotgenerateTeaLevelAttributes = settings.get("EXPORT_REVIEW_DONT_GENERATE_TEA_LEVEL", False)
-        overrideDoNotDrawGraphs_relativeBubbles = settings.get("EXPORT_REVIEW_DONT_DRAW_BUBBLES", False)
-        # EXPORT_REVIEW_DONT_DRAW_BUBBLES, EXPORT_REVIEW_DONT_GENERATE_IMAGES, EXPORT_REVIEW_DONT_GENERATE_TEA_LEVEL
-
-        
-        teaParent = None
-        for tea in TeaStash:
-            if tea.id == review.parentID:
-                teaParent = tea
-                break
-
-        if teaParent is None:
-            RichPrintError(f"Could not find parent tea for review {review.name} with parent ID {review.parentID}")
-            return None, None, None
-        RichPrintInfo(f"Generating review outputs for review: {review.name} of tea: {teaParent.name}")
-        sessionNum = 1
-        for r in teaParent.reviews:
-            if r.id == review.id:
-                break
-            sessionNum += 1
-        teaYear = teaParent.attributes.get("Year", "")
-
-        reviewAttributes = review.attributes.items()
-        # Tea level attributes, for multiple reviews across one tea.
-        hasTeaLevelAttributes = False
-        # Check if there are reviews dated before this one
-        allReviewsIncludingThisOne = []
-        thisReviewTimestamp = review.attributes.get("date", None)
-        for r in teaParent.reviews:
-            if "date" in r.attributes and thisReviewTimestamp is not None:
-                if r.attributes["date"] <= thisReviewTimestamp:
-                    allReviewsIncludingThisOne.append(r)
-        if len(allReviewsIncludingThisOne) <= 1:
-            hasTeaLevelAttributes = False  # Only this review, no tea-level attributes
-        else:
-            hasTeaLevelAttributes = True
-        RichPrintInfo(f"Found {len(allReviewsIncludingThisOne)} reviews including this one for tea {teaParent.name}")
-
-        # Attributes to derive tea-level: Average ratio, Average rating, earliest review date, latest review date (this review), average time between reviews, total amount drank
-        teaLevelAttributes = dict()
-        formattedTeaLevelAttributes = dict()
-        numReviewsIncludingThisOne = len(allReviewsIncludingThisOne)
-        if hasTeaLevelAttributes:
-            # Average ratio
-            totalRatio = 0
-            countRatio = 0
-            for r in allReviewsIncludingThisOne:
-                if "Score" in r.attributes:
-                    try:
-                        totalRatio += float(r.attributes["Score"])
-                        countRatio += 1
-                    except ValueError:
-                        RichPrintWarning(f"Score {r.attributes['Score']} is not a valid float for review {r.name}")
-            if countRatio > 0:
-                teaLevelAttributes["Average Score"] = round(totalRatio / countRatio, 2)
-            else:
-                teaLevelAttributes["Average Score"] = "N/A"
-
-            # Average rating
-            totalRating = 0
-            countRating = 0
-            for r in allReviewsIncludingThisOne:
-                if r.rating is not None:
-                    try:
-                        totalRating += float(r.rating)
-                        countRating += 1
-                    except ValueError:
-                        RichPrintWarning(f"Rating {r.rating} is not a valid float for review {r.name}")
-            if countRating > 0:
-                teaLevelAttributes["Average Rating"] = round(totalRating / countRating, 2)
-            else:
-                teaLevelAttributes["Average Rating"] = "N/A"
-
-            # Stdev of rating
-            if countRating > 1:
-                ratings = [r.rating for r in allReviewsIncludingThisOne if r.rating is not None]
-                if len(ratings) > 1:
-                    teaLevelAttributes["Rating Std Dev"] = round(stdev(ratings), 2)
-                else:
-                    teaLevelAttributes["Rating Std Dev"] = "N/A"
-
-            # Earliest review date
-            earliestDate = None
-            for r in allReviewsIncludingThisOne:
-                if "date" in r.attributes:
-                    try:
-                        review_date = dt.datetime.fromtimestamp(r.attributes["date"], tz=dt.timezone.utc)
-                        if earliestDate is None or review_date < earliestDate:
-                            earliestDate = review_date
-                    except (ValueError, OSError):
-                        RichPrintWarning(f"Date {r.attributes['date']} is not a valid timestamp for review {r.name}")
-            if earliestDate is not None:
-                teaLevelAttributes["First Reviewed"] = earliestDate.strftime(settings["DATE_FORMAT"])
-            else:
-                teaLevelAttributes["First Reviewed"] = "N/A"
-
-            # Latest review date (this review)
-            if "date" in review.attributes:
-                try:
-                    latestDate = dt.datetime.fromtimestamp(review.attributes["date"], tz=dt.timezone.utc)
-                    teaLevelAttributes["Last Reviewed"] = latestDate.strftime(settings["DATE_FORMAT"])
-                except (ValueError, OSError):
-                    RichPrintWarning(f"Date {review.attributes['date']} is not a valid timestamp for review {review.name}")
-                    teaLevelAttributes["Last Reviewed"] = "N/A"
-            else:
-                teaLevelAttributes["Last Reviewed"] = "N/A"
-
-
-            # Average time between reviews
-            daysBetweenFirstAndLast = 0
-            if earliestDate is not None and latestDate is not None:
-                daysBetweenFirstAndLast = (latestDate - earliestDate).days
-                teaLevelAttributes["Days Between First and Last Review"] = daysBetweenFirstAndLast
-            if numReviewsIncludingThisOne > 1 and daysBetweenFirstAndLast > 0:
-                teaLevelAttributes["Average Time Between Reviews"] = daysBetweenFirstAndLast / (numReviewsIncludingThisOne - 1) # time between reviews is total time divided by number of intervals (num reviews - 1)
-            else:
-                teaLevelAttributes["Average Time Between Reviews"] = "N/A"
-
-            # Total amount drank
-            totalAmount = 0
-            for r in allReviewsIncludingThisOne:
-                if "Amount" in r.attributes:
-                    try:
-                        totalAmount += float(r.attributes["Amount"])
-                    except ValueError:
-                        RichPrintWarning(f"Amount {r.attributes['Amount']} is not a valid float for review {r.name}")
-            teaLevelAttributes["Total Amount Drank"] = f"{totalAmount:.2f}"
-        else:
-            teaLevelAttributes["Average Score"] = "N/A"
-            teaLevelAttributes["Average Rating"] = "N/A"
-            teaLevelAttributes["First Reviewed"] = "N/A"
-            if "date" in review.attributes:
-                try:
-                    latestDate = dt.datetime.fromtimestamp(review.attributes["date"], tz=dt.timezone.utc)
-                    teaLevelAttributes["Last Reviewed"] = latestDate.strftime(settings["DATE_FORMAT"])
-                except (ValueError, OSError):
-                    RichPrintWarning(f"Date {review.attributes['date']} is not a valid timestamp for review {review.name}")
-                    teaLevelAttributes["Last Reviewed"] = "N/A"
-            else:
-                teaLevelAttributes["Last Reviewed"] = "N/A"
-            teaLevelAttributes["Average Time Between Reviews"] = "N/A"
-            if "Amount" in review.attributes:
-                try:
-                    totalAmount = float(review.attributes["Amount"])
-                    teaLevelAttributes["Total Amount Drank"] = totalAmount
-                except ValueError:
-                    RichPrintWarning(f"Amount {review.attributes['Amount']} is not a valid float for review {review.name}")
-                    teaLevelAttributes["Total Amount Drank"] = "N/A"
-            else:
-                teaLevelAttributes["Total Amount Drank"] = "N/A"
-
-
-
-       
-
-
-
-        # Formatted tea level attributes
-        # Grade/rating should be 
-        # We do not inject grade meaning into these summaries to keep them concise
-        # additionally, averaging A+ and B+ gives A- which does not communicate value (A rating but poor value)
-        # so we exclude it entirely.
-        if isinstance(teaLevelAttributes.get("Average Score", None), (int, float)):
-            formattedTeaLevelAttributes["Average Score"] = self.format_attribute("Score", teaLevelAttributes["Average Score"], no_inject_grade_meaning=True)
-        if isinstance(teaLevelAttributes.get("Average Rating", None), (int, float)):
-            formattedTeaLevelAttributes["Average Rating"] = f"{self.format_attribute("Final Score", teaLevelAttributes["Average Rating"], no_inject_grade_meaning=True)} (Std Dev: {teaLevelAttributes.get('Rating Std Dev', 'N/A')})"
-
-        # if average rating is n/a, set to current rating
-        if teaLevelAttributes.get("Average Rating", "N/A") == "N/A" and review.attributes.get("Final Score", None) is not None:
-            formatted_value = self.format_attribute("Final Score", review.attributes["Final Score"], no_inject_grade_meaning=True)
-            formattedTeaLevelAttributes["Average Rating"] = f"{formatted_value} (only one review)"
-
-        # First , last, average review time before should  be combined into 1 line
-        reviewDateString = ""
-        if teaLevelAttributes.get("First Reviewed", "N/A") != "N/A" and teaLevelAttributes.get("Last Reviewed", "N/A") != "N/A":
-            reviewDateString += f"From {teaLevelAttributes['First Reviewed']} to {teaLevelAttributes['Last Reviewed']}"
-        else:
-            reviewDateString += "N/A"
-        if teaLevelAttributes.get("Average Time Between Reviews", "N/A") != "N/A":
-            if reviewDateString != "":
-                reviewDateString += ", "
-            reviewDateString += f"avg. {teaLevelAttributes['Average Time Between Reviews']:.1f} days between reviews"
-            if numReviewsIncludingThisOne <= 1:
-                reviewDateString += " (only one review)"
-            formattedTeaLevelAttributes["Review Dates"] = reviewDateString
-        else:
-            if reviewDateString != "":
-                reviewDateString += "."
-            formattedTeaLevelAttributes["Review Dates"] = reviewDateString
-        # Amount drank and number of reviews, should include both total and avrg
-        #reviewAmtString = ""
-        #if teaLevelAttributes.get("Total Amount Drank", "N/A") != "N/A":
-        #    if reviewAmtString != "":
-        #        reviewAmtString += " "
-        #    reviewAmtString += f"Total amount drank: {teaLevelAttributes['Total Amount Drank']}g over {numReviewsIncludingThisOne} review(s)."
-        #else:
-        #    reviewAmtString += "N/A"
-        #
-        #formattedTeaLevelAttributes["Amount Drank"] = reviewAmtString
-
-
-
-        # inject attribute from parent: Cost per gram if exists, don't inject vendor because this is already covered in the graphs
-        if "Cost" in teaParent.attributes and "Amount" in teaParent.attributes:
-            # Calculate cost per gram if possible
-            cpg = teaParent.getCalcedValue("Cost per Gram")
-            if cpg is not None:
-                reviewAttributes = list(reviewAttributes) + [("Cost per Gram", cpg)]
-
-         # -- Adjustments to review level attributes for formatting --
-
-        # If first reviewed is n/a but last reviewed is not, set first reviewed to last reviewed
-        if teaLevelAttributes["First Reviewed"] == "N/A" and teaLevelAttributes["Last Reviewed"] != "N/A":
-            teaLevelAttributes["First Reviewed"] = teaLevelAttributes["Last Reviewed"]
-
-        # combine amount and cost per gram into one line if both exist
-        amount = 0
-        if "Amount" in dict(reviewAttributes) and "Cost per Gram" in dict(reviewAttributes):
-            amount = dict(reviewAttributes)["Amount"]
-            costPerGram = dict(reviewAttributes)["Cost per Gram"]
-            newAmtCPG = f"{amount}g @ {self.format_attribute('Cost per Gram', costPerGram)}"
-            # Remove both and add new
-            reviewAttributes = [(k, v) for k, v in reviewAttributes if k not in ["Amount", "Cost per Gram"]]
-            reviewAttributes.append(("Amount & $/g", newAmtCPG))
-
-        # Combine "Steeps", "Brew Method", vessel size
-        if "Steeps" in dict(reviewAttributes) or "Method" in dict(reviewAttributes) or "Vessel size" in dict(reviewAttributes):
-            steeps = dict(reviewAttributes).get("Steeps", "N/A")
-            brewMethod = dict(reviewAttributes).get("Method", "N/A")
-            vesselSize = dict(reviewAttributes).get("Vessel size", "N/A")
-            newBrewInfo = f"{steeps} steeps, {brewMethod} method, {vesselSize}ml vessel."
-            # Remove all three and add new
-            reviewAttributes = [(k, v) for k, v in reviewAttributes if k not in ["Steeps", "Method", "Vessel size"]]
-            reviewAttributes.append(("Brewing Info", newBrewInfo))
-
-        # Sort attributes to have notes at the end, date and type near the beginning
-        sortedAttributes = sorted(reviewAttributes, key=lambda x: (("note" in x[0].lower(), x[0] != "date", x[0] != "Type", x[0])))
-        reviewAttributes = sortedAttributes
-
-
-        # Graph data getting
-        thisTeaAverageRating = teaLevelAttributes["Average Rating"] if isinstance(teaLevelAttributes["Average Rating"], (int, float)) else review.attributes.get("Final Score", None)
-        typeDatapts = getAverageRatingRange(teaType=teaParent.attributes.get("Type", None), overlap_threshold=0.04)
-        vendorDatapts = getAverageRatingRange(vendor=teaParent.attributes.get("Vendor", None), overlap_threshold=0.04)
-        allDatapts = getAverageRatingRange(overlap_threshold=0.04)
-        sumTypeData = 0
-        totalTypeData = 0
-        sumvendorData = 0
-        totalvendorData = 0
-        sumAllData = 0
-        totalAllData = 0
-        for pt in typeDatapts:
-            sumTypeData += pt[0] * pt[2]
-            totalTypeData += pt[2]
-        for pt in vendorDatapts:
-            sumvendorData += pt[0] * pt[2]
-            totalvendorData += pt[2]
-        for pt in allDatapts:
-            sumAllData += pt[0] * pt[2]
-            totalAllData += pt[2]
-        typeAvrg = sumTypeData / totalTypeData if totalTypeData > 0 else 0
-        vendorAvrg = sumvendorData / totalvendorData if totalvendorData > 0 else 0
-        priceDataPts, lenPriceData = getAveragePriceOfTeasOfType(teaType=teaParent.attributes.get("Type", None))
-        thisTeaPricePerGram = teaParent.calculated.get("costPerGram")
-
-        # Calc percentiles
-        pricePercentile = getPercentileofPricing(teaParent.attributes.get("Type", None), thisTeaPricePerGram) if thisTeaPricePerGram is not None else None
-        ratingPercentile = getPercentileOfRatingGivenType(teaParent.attributes.get("Type", None), thisTeaAverageRating) if thisTeaAverageRating is not None else None
-        print(f"Type average rating: {typeAvrg}, Vendor average rating: {vendorAvrg}, Price percentile: {pricePercentile}, Rating percentile: {ratingPercentile}")
-
-        # Calc progress to finishing the tea (amount consumed over number of reviews and total final weight)
-        print(f"Calculating progress to finishing tea {teaParent.name}")
-        totalVolumePurchased = teaParent.attributes.get("Amount", None)
-        remaining = totalVolumePurchased - float(teaLevelAttributes['Total Amount Drank'])
-        otherAdjustments = 0
-        for adjName, adjValue in teaParent.adjustments.items():
-            otherAdjustments += adjValue
-
-        print(teaParent.adjustments, otherAdjustments)
-        print(f"{teaLevelAttributes['Total Amount Drank']}g over {numReviewsIncludingThisOne} out of {totalVolumePurchased}g purchased. remaining: {remaining}")
-
-        # --- Text & HTML Review Generation ---
-        doIncludeTeaYear = teaYear != "" and teaYear is not None
-        # Dont include if year is already in the name
-        if doIncludeTeaYear and str(teaYear) in teaParent.name:
-            doIncludeTeaYear = False
-
-        if doIncludeTeaYear:
-            teaYear = str(teaYear) + " "
-        else:
-            teaYear = ""
-        vendorName = teaParent.attributes.get("Vendor", "N/A")
-        text_review = f"Session {sessionNum}: {vendorName} {teaYear}{teaParent.name}\n"
-        html_review = f"<h3>Session {sessionNum}: {vendorName} {teaYear}{teaParent.name}</h3>\n"
-        image_title = f"Session {sessionNum}: {vendorName} {teaYear}{teaParent.name}"
-
-        for key, value in reviewAttributes:
-            if key in ["Name", "dateAdded"]:  # Filter out redundant or internal fields
-                continue
-            # If word "note" in key, lookup and use category description
-            
-            formatted_value = self.format_attribute(key, value)
-            for cat in TeaReviewCategories:
-                if cat.categoryRole == key:
-                    key = cat.name
-                    break
-            text_review += f"\n{key}: {formatted_value}"
-            html_review += f"  <li><b>{key}:</b> {formatted_value.replace(chr(10), '<br>')}</li>\n"
-
-        if hasTeaLevelAttributes and not overrideDoNotgenerateTeaLevelAttributes:
-            text_review += "\n\n--- Cross-Review Summary ---"
-            html_review += "\n<h4>--- Cross-Review Summary ---</h4>\n<ul>"
-            for key, value in formattedTeaLevelAttributes.items():
-                if value == "N/A":
-                    continue
-                text_review += f"\n{key}: {value}"
-                html_review += f"  <li><b>{key}:</b> {value}</li>\n"
-
-            # Add type and vendor average ratings if available as a sub for graphs
-            if typeAvrg > 0:
-                text_review += f"\n Teas of this type ({teaParent.attributes.get('Type', 'N/A')}) average {typeAvrg:.2f} rating. (t={len(typeDatapts)} data points)"
-                html_review += f"  <li>Teas of this type ({teaParent.attributes.get('Type', 'N/A')}) average {typeAvrg:.2f} rating. (t={len(typeDatapts)} data points)</li>\n"
-            if vendorAvrg > 0:
-                text_review += f"\n Teas from this vendor ({teaParent.attributes.get('Vendor', 'N/A')}) average {vendorAvrg:.2f} rating. (t={len(vendorDatapts)} data points)"
-                html_review += f"  <li>Teas from this vendor ({teaParent.attributes.get('Vendor', 'N/A')}) average {vendorAvrg:.2f} rating. (t={len(vendorDatapts)} data points)</li>\n"
-
-        html_review += "</ul>"
-
-        # --- Image Review Generation ---
-        if not overrideDoNotGenerateImage:
-            padding = 50
-            image_width = 1200
-            line_spacing = 12
-            try:
-                title_font = ImageFont.truetype("arialbd.ttf", size=font_size + 8)
-                body_font = ImageFont.truetype("arial.ttf", size=font_size)
-                body_font_smaller = ImageFont.truetype("arial.ttf", size=font_size - 2)
-            except IOError:
-                title_font = ImageFont.load_default()
-                body_font = ImageFont.load_default()
-                body_font_smaller = ImageFont.load_default()
-
-            # --- Calculate Dynamic Image Height ---
-            current_y = padding
-            # Title height
-            current_y += title_font.getbbox(teaParent.name)[3] - title_font.getbbox(teaParent.name)[1] + line_spacing * 2
-
-            # Attributes height
-            reviewAttributes = sortedAttributes
-            for key, value in reviewAttributes:
-                if key in ["Name", "dateAdded"]:
-                    continue
-                
-                # If word "note" in key, lookup and use category description
-                if "note" in key.lower():
-                    for cat in TeaReviewCategories:
-                        if cat.categoryRole == key:
-                            key = cat.name
-                            break
-                        
-                formatted_value = self.format_attribute(key, value)
-                for cat in TeaReviewCategories:
-                    if cat.categoryRole == key:
-                        key = cat.name
-                        break
-                key_text = f"{key}: "
-
-                # Calculate height for the key
-                key_height = (body_font.getbbox(key_text)[3] - body_font.getbbox(key_text)[1]) + 10
-
-                # Calculate height for the wrapped value
-                wrapped_lines = textwrap.wrap(str(formatted_value), width=80)
-                value_height = len(wrapped_lines) * (key_height + line_spacing + 4)
-
-                current_y += value_height + line_spacing
-
-            # Add tea-level attributes height if applicable
-            if hasTeaLevelAttributes and not overrideDoNotgenerateTeaLevelAttributes:
-                current_y += title_font.getbbox("--- Cross-Review Summary ---")[3] - title_font.getbbox("--- Cross-Review Summary ---")[1] + line_spacing * 2
-                for key, value in formattedTeaLevelAttributes.items():
-                    if value == "N/A":
-                        continue
-                    key_text = f"{key}: "
-
-                    # Calculate height for the key
-                    key_height = (body_font.getbbox(key_text)[3] - body_font.getbbox(key_text)[1]) + 10
-
-                    # Calculate height for the wrapped value
-                    wrapped_lines = textwrap.wrap(str(value), width=80)
-                    value_height = len(wrapped_lines) * (key_height + line_spacing + 7)
-
-                    current_y += value_height + line_spacing
-
-            # Add space for cross-review summary if applicable
-            if hasTeaLevelAttributes and not overrideDoNotgenerateTeaLevelAttributes:
-                current_y += line_spacing * 2 # space for seperator line
-                current_y += 50  # Arbitrary space for cross-review summary
-
-            # Add space for graphs if applicable
-            if not overrideDoNotDrawGraphs_relativeBubbles:
-                current_y += 225  # Arbitrary space for graphs
-                current_y += line_spacing * 2 # space for seperator line
-
-            image_height = current_y + padding + 200
-
-            # --- Create and Draw Image ---
-            img = Image.new('RGB', (image_width, image_height), color=(240, 240, 240))
-            draw = ImageDraw.Draw(img)
-
-            # Draw Title
-            current_y = padding
-            draw.text((padding, current_y), image_title, fill=(0, 0, 0), font=title_font)
-            current_y += title_font.getbbox(image_title)[3] - title_font.getbbox(image_title)[1] + line_spacing * 2
-
-            # Draw Attributes
-            for key, value in reviewAttributes:
-                if key in ["Name", "dateAdded"]:
-                    continue
-
-                formatted_value = self.format_attribute(key, value)
-                for cat in TeaReviewCategories:
-                    if cat.categoryRole == key:
-                        key = cat.name
-                        break
-                key_text = f"{key}: "
-
-                # Get line height from a sample character
-                line_height = (body_font.getbbox('A')[3] - body_font.getbbox('A')[1] + line_spacing)
-
-                draw.text((padding, current_y), key_text, fill=(80, 80, 80), font=body_font)
-                key_width = draw.textlength(key_text, font=body_font)
-
-                # Handle multi-line values
-                lines = str(formatted_value).split('\n')
-                for i, line in enumerate(lines):
-                    wrapped_sublines = textwrap.wrap(line, width=90) # Adjust width as needed
-                    if not wrapped_sublines: # Handle empty lines
-                         current_y += line_height 
-                    for sub_line in wrapped_sublines:
-                        # Indent subsequent lines of a wrapped value
-                        text_x = padding + key_width if i == 0 else padding + key_width + 20
-                        draw.text((text_x, current_y), sub_line, fill=(0, 0, 0), font=body_font_smaller)
-                        current_y += line_height
-                current_y += line_spacing # Extra space between attributes
-
-            # Draw Tea-level attributes if applicable
-            if hasTeaLevelAttributes and not overrideDoNotgenerateTeaLevelAttributes:
-                draw.text((padding, current_y), "--- Cross-Review Summary ---", fill=(0, 0, 0), font=title_font)
-                current_y += title_font.getbbox("--- Cross-Review Summary ---")[3] - title_font.getbbox("--- Cross-Review Summary ---")[1] + line_spacing * 2
-                for key, value in formattedTeaLevelAttributes.items():
-                    if value == "N/A":
-                        continue
-                    key_text = f"{key}: "
-
-                    # Get line height from a sample character
-                    line_height = body_font.getbbox('A')[3] - body_font.getbbox('A')[1] + line_spacing
-
-                    draw.text((padding, current_y), key_text, fill=(80, 80, 80), font=body_font)
-                    key_width = draw.textlength(key_text, font=body_font)
-
-                    # Handle multi-line values
-                    lines = str(value).split('\n')
-                    for i, line in enumerate(lines):
-                        wrapped_sublines = textwrap.wrap(line, width=90)
-
-                        if not wrapped_sublines: # Handle empty lines
-                            current_y += line_height
-                        for sub_line in wrapped_sublines:
-                            # Indent subsequent lines of a wrapped value
-                            text_x = padding + key_width if i == 0 else padding + key_width + 20
-                            draw.text((text_x, current_y), sub_line, fill=(0, 0, 0), font=body_font_smaller)
-                            current_y += line_height
-                    current_y += line_spacing # Extra space between attributes
-
-
-            # Group the images horizontally with a title.
-            if not overrideDoNotDrawGraphs_relativeBubbles:
-                # Image only graphing
-                # add a line separator
-                draw.line((padding, current_y, image_width - padding, current_y), fill=(200, 200, 200), width=2)
-                current_y += line_spacing * 2
-                chart_img_all = make_rating_bubble_image(allDatapts, highlight=thisTeaAverageRating, name="All" +f" (n={totalAllData})", grade_labels=True)
-                chart_img_type = make_rating_bubble_image(typeDatapts, highlight=thisTeaAverageRating, name="Type: " + teaParent.attributes.get("Type", "Unknown") +f" (n={totalTypeData})")
-                chart_img_vendor = make_rating_bubble_image(vendorDatapts, highlight=thisTeaAverageRating, name="Vendor: " + teaParent.attributes.get("Vendor", "Unknown") +f" (n={totalvendorData})")
-                chart_title = "Relative Rating Comparison"
-                draw.text((padding, current_y), chart_title, fill=(0, 0, 0), font=body_font)
-                current_y += body_font.getbbox(chart_title)[3] - body_font.getbbox(chart_title)[1] + line_spacing
-                if chart_img_all is not None:
-                    img.paste(chart_img_all, (padding, current_y))
-                if chart_img_type is not None:
-                    img.paste(chart_img_type, (padding + (chart_img_all.width if chart_img_all is not None else 0) + 20, current_y))
-                if chart_img_vendor is not None:
-                    img.paste(chart_img_vendor, (padding + (chart_img_all.width if chart_img_all is not None else 0) + (chart_img_type.width if chart_img_type is not None else 0) + 40, current_y))
-            
-
-                # Second row of graphs can go here, placeholders, use previously defined functions
-                current_y += max(chart_img_all.height if chart_img_all is not None else 0, chart_img_type.height if chart_img_type is not None else 0, chart_img_vendor.height if chart_img_vendor is not None else 0) + 10
-                chart_img_ppg = make_rating_bubble_image(priceDataPts, highlight=thisTeaPricePerGram, name="$/g of Type: " + teaParent.attributes.get("Type", "Unknown") +f" (n={lenPriceData})", grade_labels=False, labelPrefix="$")
-                chart_img_value = make_price_rating_value_image(thisTeaPricePerGram, thisTeaAverageRating, pricePercentile, ratingPercentile)
-                chart_img_progress = make_tea_consumption_progress_image(teaParent.adjustments, numReviewsIncludingThisOne, float(teaLevelAttributes['Total Amount Drank']), totalVolumePurchased, amount)
-
-                # TESTING, paste an image representing the letter grade including minus signs
-                # Disabled for now
-                #chart_image_test = resolveLetterGradeToImageGradeIncludingMinusSigns(thisTeaAverageRating)
-
-                #chart_img_vendor2 = make_rating_bubble_image(vendorDatapts, highlight=thisTeaAverageRating, name="Vendor: " + teaParent.attributes.get("Vendor", "Unknown") +f" (t={totalvendorData})")
-                #chart_title2 = "Relative Rating Comparison 2"
-                #draw.text((padding, current_y), chart_title2, fill=(0, 0, 0), font=body_font)
-                #current_y += body_font.getbbox(chart_title2)[3] - body_font.getbbox(chart_title2)[1] + line_spacing
-                if chart_img_ppg is not None:
-                    img.paste(chart_img_ppg, (padding, current_y))
-                if chart_img_value is not None:
-                    img.paste(chart_img_value, (padding + (chart_img_ppg.width if chart_img_ppg is not None else 0) + 20, current_y))
-                if chart_img_progress is not None:
-                    img.paste(chart_img_progress, (padding + (chart_img_ppg.width if chart_img_ppg is not None else 0) + (chart_img_value.width if chart_img_value is not None else 0) + 40, current_y))
-                #if chart_image_test is not None:
-                #    img.paste(chart_image_test, (padding + (chart_img_ppg.width if chart_img_ppg is not None else 0) + (chart_img_value.width if chart_img_value is not None else 0) + 80, current_y+10))
-                #if chart_img_vendor2 is not None:
-                #    img.paste(chart_img_vendor2, (padding + (chart_img_ppg.width if chart_img_ppg is not None else 0) + (chart_img_value.width if chart_img_value is not None else 0) + 40, current_y))
-
-            current_y += max(chart_img_type.height, chart_img_vendor.height) + 20
-
-            # Trim the bottom of the image of excess space
-            img = img.crop((0, 0, image_width, current_y + padding))
-
-
-
-
-            # --- Save Image ---
-            # Save image to unique path with timestamp, review, parent id, parent name abridged, using underscores
-            image_path = f"review_{review.id}_{review.parentID}_{sessionNum}_{teaParent.name[:20].replace(' ', '_')}_{int(dt.datetime.now().timestamp())}.png"
-            # | is invalid character for file names, remove it
-            image_path = image_path.replace("|", "")
-            img.save(image_path)
-            RichPrintSuccess(f"Generated review image at {image_path}")
-        else:
-            image_path = None
-
-        return text_review, html_review, image_path, current_y
+#region Window Classes
 
-#endregion
 
-#region Window Classes
 class WindowBase:
     tag = 0
     dpgWindow = None
@@ -2832,6 +455,7 @@ class Window_Timer(WindowBase):
         self.rawDisplay.set_value(times)
 
     def copyRawTimeToClipboard(self):
+        import pyperclip
         times = "["
         for i, time in enumerate(self.previousTimes):
             times += f"{time:.2f}"
@@ -3106,7 +730,8 @@ class Window_Stash_Reviews(WindowBase):
         user_data.addReview(newReview)
 
         # Renumber and Save
-        renumberTeasAndReviews(save=True)  # Renumber teas and reviews to keep IDs consistent
+        renumberTeasAndReviews(save=False)  # Renumber teas and reviews to keep IDs consistent
+        appendTeaJournal("set", user_data.id, user_data)
         
         # close the popup
         dpg.configure_item(self.reviewsWindow.tag, show=False)
@@ -3327,7 +952,8 @@ class Window_Stash_Reviews(WindowBase):
             tea.reviews = [r for r in tea.reviews if r.id != review.id]
             # Remove the review from the stash
             RichPrintSuccess(f"Deleted review {review.id} from tea {tea.name}")
-            renumberTeasAndReviews(save=True)
+            renumberTeasAndReviews(save=False)
+            appendTeaJournal("set", tea.id, tea)
 
         # Close the edit review window
         dpg.configure_item(self.editReviewWindow.tag, show=False)
@@ -3513,6 +1139,7 @@ class Window_Stash_Reviews(WindowBase):
 
         newReview = Review(teaId, reviewName, allAttributes["dateAdded"], allAttributes, allAttributes["Final Score"])
         hasModified = False
+        modifiedTea = None
         if operation == "edit":
             # Transfer the reviews
             for i, tea in enumerate(TeaStash):
@@ -3521,6 +1148,7 @@ class Window_Stash_Reviews(WindowBase):
                     for j, rev in enumerate(tea.reviews):
                         if rev == review:
                             TeaStash[i].reviews[j] = newReview
+                            modifiedTea = TeaStash[i]
                             hasModified = True
                             break
                     if hasModified:
@@ -3533,10 +1161,13 @@ class Window_Stash_Reviews(WindowBase):
             for i, tea in enumerate(TeaStash):
                 if tea.id == teaId:
                     TeaStash[i].addReview(newReview)
+                    modifiedTea = TeaStash[i]
                     break
         
         # Renumber and Save
-        renumberTeasAndReviews(save=True)  # Renumber teas and reviews to keep IDs consistent
+        renumberTeasAndReviews(save=False)  # Renumber teas and reviews to keep IDs consistent
+        if modifiedTea is not None:
+            appendTeaJournal("set", modifiedTea.id, modifiedTea)
         
 
         # hide the popup
@@ -3586,9 +1217,8 @@ class Window_Stash_Reviews(WindowBase):
             dateString = f"Date Added: {TimeStampToString(tea.getLatestReview().attributes['date'])}" if tea.getLatestReview() else "No reviews yet"
             dp.Text(f"Total Reviews: {len(tea.reviews)}, Last Review date: {dateString}")
             # Populate stats cache if not already done
-            global TeaCache
             if not TeaCache:
-                TeaCache = populateStatsCache()
+                TeaCache.update(populateStatsCache())
             # Get the estimated remaining tea
             val = tea.calculated["remaining"]
             exp = tea.calculated["remainingExplanation"]
@@ -3890,7 +1520,8 @@ class Window_Stash_Reviews(WindowBase):
             tea.reviews.sort(key=lambda r: r.attributes.get("dateAdded", 0))
             RichPrintWarning(f"No date purchased found for tea {tea.name}. Reordered reviews by date added instead.")
         # Renumber the reviews
-        renumberTeasAndReviews(save=True)  # Renumber teas and reviews to keep IDs consistent
+        renumberTeasAndReviews(save=False)  # Renumber teas and reviews to keep IDs consistent
+        appendTeaJournal("set", tea.id, tea)
         RichPrintSuccess(f"Reordered {len(tea.reviews)} reviews for tea {tea.name} by date purchased or added.")
 
         # Refresh the window
@@ -3909,6 +1540,7 @@ class Window_Stash_Reviews(WindowBase):
         return super().softRefresh()
     
     def exportReview(self, sender, app_data, user_data):
+        import pyperclip
         review = user_data
         review: Review
         if review is None:
@@ -4044,9 +1676,8 @@ class Window_Stash(WindowBase):
         timeLoadStart = dt.datetime.now(tz=dt.timezone.utc).timestamp()
 
         # Call the pop of the TeaCache if not already populated
-        global TeaCache
-        if TeaCache is None or (len(TeaCache) == 0 and len(TeaStash) > 0):
-            TeaCache = populateStatsCache()
+        if len(TeaCache) == 0 and len(TeaStash) > 0:
+            TeaCache.update(populateStatsCache())
             RichPrintSuccessMinor("TeaCache populated from TeaStash")
 
         numTeasDisplay = None
@@ -4063,7 +1694,7 @@ class Window_Stash(WindowBase):
                 else:
                     dp.Button(label="No Teas to Duplicate", enabled=False)
                 dp.Button(label="Import Tea", callback=self.importOneTeaFromClipboard)
-                dp.Button(label="Import All (TODO)", callback=self.DummyCallback)
+                dp.Button(label="Import CSV", callback=self.importAllFromCSV)
                 dp.Button(label="Export One (TODO)", callback=self.DummyCallback)
                 dp.Button(label="Export All (TODO)", callback=self.DummyCallback)
                 
@@ -4195,13 +1826,13 @@ class Window_Stash(WindowBase):
 
                         # If hideUnreviewed is set, filter out teas with no reviews
                         if self.hideUnreviewed:
-                            if len(tea.reviews) == 0:
+                            if tea.getNumReviews() == 0:
                                 RichPrintInfo(f"Tea {tea.name} has no reviews, skipping.")
                                 continue
 
                         # If hideReviewed is set, filter out teas with reviews
                         if self.hideReviewed:
-                            if len(tea.reviews) > 0:
+                            if tea.getNumReviews() > 0:
                                 RichPrintInfo(f"Tea {tea.name} has reviews, skipping.")
                                 continue
 
@@ -4356,7 +1987,7 @@ class Window_Stash(WindowBase):
                                 dpg.highlight_table_cell(teasTable, i, j+1, color=COLOR_INVALID_EMPTY_TABLE_CELL)
 
                         # button that opens a modal with reviews
-                        numReviews = len(tea.reviews)
+                        numReviews = tea.getNumReviews()
                         dp.Button(label=f"{numReviews} Reviews", callback=self.generateReviewListWindow, user_data=tea)
                         with dp.Group(horizontal=True):
                             dp.Button(label="Edit", callback=self.ShowEditTea, user_data=tea)
@@ -4441,6 +2072,7 @@ class Window_Stash(WindowBase):
 
 
     def importOneTeaFromClipboard(self, sender, app_data, user_data):
+        import pyperclip
         # Import a tea from the clipboard
         # Ex: {"Name": "reviews", "Year": 2000, "Type": "Hong", "Remaining": 123123.0, "Vendor": "N/A", "bool": true, "datetime": "2025-05-07"}
         # Get the data from the clipboard
@@ -4466,8 +2098,8 @@ class Window_Stash(WindowBase):
             TeaStash.append(newTea)
             RichPrintSuccess(f"Imported tea from clipboard: {newTea.name}")
 
-            # Save the tea stash to file
-            saveTeasData(TeaStash, settings["TEA_REVIEWS_PATH"])
+            # Save the tea to the journal
+            appendTeaJournal("set", len(TeaStash) - 1, newTea)
 
             # Refresh the window
             self.softRefresh()
@@ -4483,6 +2115,19 @@ class Window_Stash(WindowBase):
         
             
 
+    def importAllFromCSV(self, sender, app_data, user_data):
+        # Import teas and reviews from the CSV import paths in settings
+        numTeas, numReviews, badRows = importTeasFromCSV(settings["CSV_IMPORT_TEA_PATH"], settings["CSV_IMPORT_REVIEW_PATH"])
+        self.softRefresh()
+
+        # Show a popup with the rows that were skipped
+        if len(badRows) > 0:
+            importWindow = dp.Window(label="CSV Import", width=700 * settings["UI_SCALE"], height=400 * settings["UI_SCALE"], modal=True, show=True)
+            with importWindow:
+                dp.Text(f"Imported {numTeas} teas and {numReviews} reviews, skipped {len(badRows)} rows:")
+                dp.InputText(default_value="\n".join(formatCSVImportBadRows(badRows)), multiline=True, readonly=True, width=660 * settings["UI_SCALE"], height=280 * settings["UI_SCALE"])
+                dp.Button(label="Close", callback=lambda s, a, u: importWindow.delete())
+
     def generateReviewListWindow(self, sender, app_data, user_data):
         Menu_Stash_Reviews(sender, app_data, (self, user_data))
 
@@ -4744,6 +2389,7 @@ class Window_Stash(WindowBase):
 
 
     def copyTeaValues(self, sender, app_data, user_data):
+        import pyperclip
         # Call the dumpReviewToString function to get the string representation of the review
         # and copy it to the clipboard
         if self.teasWindow is None:
@@ -4786,6 +2432,7 @@ class Window_Stash(WindowBase):
 
 
     def pasteTeaValues(self, sender, app_data, user_data):
+        import pyperclip
         # (DEBUG) Print instead of actually setting, compare to original to see if it works
         if self.teasWindow is None:
             RichPrintError("No teas window to paste values into.")
@@ -5095,24 +2742,28 @@ class Window_Stash(WindowBase):
         combinedTea.reviews.extend(tea2.reviews)
 
         # Update tea1 in stash with combinedTea
+        tea1Position = 0
         for i, tea in enumerate(TeaStash):
             if tea.id == tea1Index:
                 TeaStash[i] = combinedTea
+                tea1Position = i
                 break
 
 
         
 
         # Remove tea2 from stash
+        tea2Position = TeaStash.index(tea2)
         TeaStash.remove(tea2)
 
         # Trigger renumber of all teas and reviews after combining
-        renumberTeasAndReviews()
+        renumberTeasAndReviews(save=False)
 
         
 
-        # Save the tea stash to file
-        saveTeasData(TeaStash, settings["TEA_REVIEWS_PATH"])
+        # Save the tea stash to file, positions are recorded as they were before the removal
+        appendTeaJournal("set", tea1Position, combinedTea)
+        appendTeaJournal("delete", tea2Position)
 
         RichPrintSuccess(f"Combined Tea {tea1Index} and Tea {tea2Index} into Tea {tea1Index}. Deleted Tea {tea2Index} from stash.")
 
@@ -5171,14 +2822,15 @@ class Window_Stash(WindowBase):
             RichPrintError("Error: Tea not found in stash.")
             return
         # Remove the tea from the stash
+        oldPosition = TeaStash.index(teaStashObj)
         TeaStash.remove(teaStashObj)
         # Insert the tea at the new index
-        TeaStash = TeaStash[:newIndex] + [teaStashObj] + TeaStash[newIndex:]
+        TeaStash.insert(newIndex, teaStashObj)
         # Renumber the tea ids
         for i, teaStash in enumerate(TeaStash):
             teaStash.id = i
         # Save the tea stash to file
-        saveTeasData(TeaStash, settings["TEA_REVIEWS_PATH"])
+        appendTeaJournal("move", oldPosition, newIndex=newIndex)
         RichPrintSuccess(f"Moved tea {tea.name} to index {newIndex} from current index {currentIndex}, renumbered stash.")
         # Refresh the window
         self.deleteAdjustmentsWindow()
@@ -5228,7 +2880,7 @@ class Window_Stash(WindowBase):
         tea.adjustments[typeOfAdjustment] = round(adjustment, 2)
         tea.finished = finished
         # Save the tea stash to file
-        saveTeasData(TeaStash, settings["TEA_REVIEWS_PATH"])
+        appendTeaJournal("set", TeaStash.index(tea), tea)
         RichPrintSuccess(f"Updated {typeOfAdjustment} adjustment amount for tea {tea.name} to {adjustment:.3f}g")
 
         # Delete the adjustments window
@@ -5272,7 +2924,7 @@ class Window_Stash(WindowBase):
         TeaStash.append(newTea)
 
         # Save to file
-        saveTeasData(TeaStash, settings["TEA_REVIEWS_PATH"])
+        appendTeaJournal("set", len(TeaStash) - 1, newTea)
         
         # hide the popup
         dpg.configure_item(self.teasWindow.tag, show=False)
@@ -5326,13 +2978,16 @@ class Window_Stash(WindowBase):
         # Transfer the finished flag
         newTea.finished = tea.finished
 
+        editedPosition = None
         for i, tea in enumerate(TeaStash):
             if tea.id == user_data.id:
                 TeaStash[i] = newTea
+                editedPosition = i
                 break
 
         # Save to file
-        saveTeasData(TeaStash, settings["TEA_REVIEWS_PATH"])
+        if editedPosition is not None:
+            appendTeaJournal("set", editedPosition, newTea)
 
         # hide the popup
         dpg.configure_item(self.teasWindow.tag, show=False)
@@ -5357,17 +3012,20 @@ class Window_Stash(WindowBase):
             return
         
         # Tag
+        deletedPosition = None
         for i, tea in enumerate(TeaStash):
             if tea.id == selectedTea.id:
                 RichPrintInfo(f"Deleting tea: {tea.name} (ID: {tea.id})")
                 TeaStash.pop(i)
+                deletedPosition = i
                 break
 
         # Renumber the IDs of the remaining teas
         renumberTeasAndReviews(save=False)
 
         # Save to file
-        saveTeasData(TeaStash, settings["TEA_REVIEWS_PATH"])
+        if deletedPosition is not None:
+            appendTeaJournal("delete", deletedPosition)
 
         # Refresh the window to reflect the deletion
         self.softRefresh()
@@ -5443,6 +3101,7 @@ class Window_Notepad(WindowBase):
         self.text = ""
         self._disableSaveReminder()
     def copyNotepad(self, sender, data):
+        import pyperclip
         pyperclip.copy(self.text)
     def updatePersist(self, sender, data):
         self.persist = data
@@ -5538,676 +3197,6 @@ F -- (0.0, 0.0, 0.0)
         self.dpgWindow.height = self.height
 
 
-
-# Stats functions
-
-# Get Start day will use the start day from the settings, or default the earliest date it can find
-
-def reCacheStats():
-    # Recalculate all stats and cache them
-    global statsCache
-    statsCache = populateStatsCache()
-    RichPrintSuccessMinor(f"Stats cache updated")
-    return statsCache
-
-def populateStatsCache():
-    # Run all calcs in parallel and cache them for other cals. return the cache
-    cache = {}
-    timeCacheStart = dt.datetime.now(tz=dt.timezone.utc).timestamp()
-    AllTypesCategoryRoleValid, AllTypesCategoryRole = getValidCategoryRolesList()
-    allTypesCategoryRoleReviewsValid, allTypesCategoryRoleReviews = getValidReviewCategoryRolesList()
-
-    remainingCategory = None
-    for cat in TeaCategories:
-        if cat.categoryRole == "Remaining":
-            remainingCategory = cat
-            break
-
-
-    # Num teas
-    cache["numTeas"] = statsNumTeas()
-    # Num reviews
-    cache["numReviews"] = statsNumReviews()
-    # Start day
-    cache["startDay"] = statsgetStartDayTimestamp()
-    totalDays = dt.datetime.now(tz=dt.timezone.utc).timestamp() - cache["startDay"]
-    cache["totalDays"] = totalDays / (24 * 60 * 60)  # Convert to days
-    monthsSinceStart = cache["totalDays"] / 30.44  # Average days per month
-
-    cache_allTypesOfTea = set()
-    for tea in TeaStash:
-        if "Type" in tea.attributes:
-            cache_allTypesOfTea.add(tea.attributes["Type"])
-    cache["allTypesOfTea"] = list(cache_allTypesOfTea)
-
-    # Num teas by type
-    cache["numTeasByType"] = dict()
-    for tea in TeaStash:
-        if "Type" in tea.attributes:
-            teaType = tea.attributes["Type"]
-            if teaType in cache["numTeasByType"]:
-                cache["numTeasByType"][teaType] += 1
-            else:
-                cache["numTeasByType"][teaType] = 1
-
-    # Calc total volume, average volume and all the other stash stats in one loop to prevent multiple loops
-    ctrTotalVolume = 0
-    ctrTotalCost = 0
-    ctrTotalConsumedByReviews = 0
-    ctrTotalConsumedByStdAdjustments = 0
-    ctrTotalConsumedByFinishedTeas = 0
-    ctrTotalConsumedByGiftedTeas = 0
-    ctrTotalConsumedBySaleAdjustments = 0
-    ctrTotalReturnedBySales = 0
-    ctrTotalRemaining = 0
-    ctrTotalTeasTried = 0
-    dictCtrTeasTried = {}
-    ctrTeasFinished = 0
-    dictCtrTeasFinished = {}
-    ctrTotalScored = 0
-    dictCtrScoresByType = {}
-    dictSteepsByType = {}
-    dictNumReviewsByType = {}
-    listTopTenTeasSoldByValue = []
-    dictTeaVolByType = {}
-    ctrTotalTeasSold= 0
-    dictRatingsByVendor = {} # Ratings by vendor
-    # Samples are defined as under or including 30g of total amount original.
-    ctrTotalSamples = 0
-    ctrSumTotalSampleAmount = 0
-    # Bags are defined as 30-150g of total amount original.
-    ctrTotalBags = 0
-    ctrSumTotalBagAmount = 0
-    # Bulk is defined as over 150g of total amount original.
-    ctrTotalBulk = 0
-    ctrSumTotalBulkAmount = 0
-
-    # Histogram 1 data, tea consumed by month (dates not handled well, use months from start day to now)
-    cache["histogram1Data"] = {
-        "month": {},
-        "year": {}
-    }
-
-    # Set to 1990-01-01 00:00:00 UTC as the default for latest purchase
-    ctrLatestPurchase = dt.datetime(1990, 1, 1, 0, 0, 0, tzinfo=dt.timezone.utc).timestamp()
-    remainingCategory = None
-    for cat in TeaCategories:
-        if cat.categoryRole == "Remaining":
-            remainingCategory = cat
-            break
-    cache["remainingCategory"] = remainingCategory
-
-    # Info for percentiles
-    cache_dictPriceByType = {}
-    cache_dictRatingByType = {}
-
-    for teaType in cache["allTypesOfTea"]:
-        cache_dictPriceByType[teaType] = []
-        cache_dictRatingByType[teaType] = []
-
-    for tea in TeaStash:
-        ctrTeaRemaining = 0
-        ctrTeaDrankReviews = 0
-        ctrTeaTotalAdjustments = 0
-        ctrTeaGiftAdjustments = 0
-        ctrTeaStandardAdjustments = 0
-        cache_ctrTeaFinishedAmt = 0
-        cache_calcTotalScore = 0
-        cache_calcAverageScore = 0
-        cache_calcAverageCost = 0
-        teaType = None
-        if "Type" in AllTypesCategoryRoleValid:
-            teaType = tea.attributes["Type"]
-
-            if teaType not in dictTeaVolByType:
-                dictTeaVolByType[teaType] = 0
-            dictTeaVolByType[teaType] += tea.attributes["Amount"]
-
-        if "Cost" in AllTypesCategoryRoleValid and "Amount" in AllTypesCategoryRoleValid:
-            if "Cost" in tea.attributes and "Amount" in tea.attributes:
-                cache_calcAverageCost = tea.attributes["Cost"] / tea.attributes["Amount"]
-                # Append to price per gram list split by type
-                if teaType is not None:
-                    cache_dictPriceByType[teaType].append(cache_calcAverageCost)
-
-
-        if "Amount" in AllTypesCategoryRoleValid:
-            if "Amount" in tea.attributes:
-                ctrTotalVolume += tea.attributes["Amount"]
-                # Classify as sample, bag, or bulk
-                if tea.attributes["Amount"] <= 30:
-                    ctrTotalSamples += 1
-                    ctrSumTotalSampleAmount += tea.attributes["Amount"]
-                elif tea.attributes["Amount"] < 200:
-                    ctrTotalBags += 1
-                    ctrSumTotalBagAmount += tea.attributes["Amount"]
-                else:
-                    ctrTotalBulk += 1
-                    ctrSumTotalBulkAmount += tea.attributes["Amount"]
-
-        if "Cost" in AllTypesCategoryRoleValid:
-            if "Cost" in tea.attributes:
-                ctrTotalCost += tea.attributes["Cost"]
-
-        # If the tea has a date, check if it's the latest purchase
-        if "date" in tea.attributes:
-            if tea.attributes["date"] > ctrLatestPurchase:
-                ctrLatestPurchase = tea.attributes["date"]
-
-        if "Standard" in tea.adjustments:
-            ctrTeaStandardAdjustments = tea.adjustments["Standard"]
-            ctrTotalConsumedByStdAdjustments += ctrTeaStandardAdjustments
-            ctrTeaTotalAdjustments += ctrTeaStandardAdjustments
-
-        # Gifted teas
-        if "Amount" in tea.attributes:
-            if "Gift" in tea.adjustments:
-                ctrTeaGiftAdjustments = tea.adjustments["Gift"]
-                ctrTotalConsumedByGiftedTeas += ctrTeaGiftAdjustments
-                ctrTeaTotalAdjustments += ctrTeaGiftAdjustments
-
-        # Sale adjustments
-        ctrTeaSaleAdjustments = 0
-        if "Sale" in tea.adjustments:
-            ctrTeaSaleAdjustments = tea.adjustments["Sale"]
-            if ctrTeaSaleAdjustments > 0:
-            # If there is a sale adjustment, add it to the list of top ten teas sold by value
-                ctrTotalTeasSold += 1
-                ctrTotalConsumedBySaleAdjustments += ctrTeaSaleAdjustments
-                ctrTeaTotalAdjustments += ctrTeaSaleAdjustments
-                # Given cost and amount of sale, calculate total returned
-                if "Cost" in tea.attributes and "Amount" in tea.attributes:
-                    ctrTotalReturnedBySales += cache_calcAverageCost * ctrTeaSaleAdjustments
-                    listTopTenTeasSoldByValue.append((tea, ctrTeaSaleAdjustments, cache_calcAverageCost))
-
-        # Teas tried
-        if len(tea.reviews) > 0 or tea.finished or ctrTeaStandardAdjustments > 0:
-            # If the tea has reviews or is finished, count it as tried
-            ctrTotalTeasTried += 1
-            if "Type" in AllTypesCategoryRoleValid:
-                if tea.attributes["Type"] not in dictCtrTeasTried:
-                    dictCtrTeasTried[tea.attributes["Type"]] = 1
-                else:
-                    dictCtrTeasTried[tea.attributes["Type"]] += 1
-
-        
-
-        # Review loop
-        for review in tea.reviews:
-            if "Amount" in allTypesCategoryRoleReviewsValid:
-                if "Amount" in review.attributes:
-                    ctrTeaDrankReviews += review.attributes["Amount"]
-
-            # Total up score raw value
-            if "Final Score" in allTypesCategoryRoleReviewsValid and "Total Score" in AllTypesCategoryRoleValid:
-                ctrTotalScored += review.attributes["Final Score"]
-                cache_calcTotalScore += review.attributes["Final Score"]
-                if "Type" in allTypesCategoryRoleReviewsValid:
-                    if review.attributes["Type"] not in dictCtrScoresByType:
-                        dictCtrScoresByType[review.attributes["Type"]] = 0
-                    dictCtrScoresByType[review.attributes["Type"]] += review.attributes["Final Score"]
-
-            # Steeps by type
-            if "Steeps" in allTypesCategoryRoleReviewsValid and teaType is not None:
-                if teaType not in dictSteepsByType:
-                    dictSteepsByType[teaType] = 0
-                dictSteepsByType[teaType] += review.attributes["Steeps"]
-
-            # Num reviews by type
-            if teaType is not None:
-                if teaType not in dictNumReviewsByType:
-                    dictNumReviewsByType[teaType] = 0
-                dictNumReviewsByType[teaType] += 1
-
-
-        ctrTotalConsumedByReviews += ctrTeaDrankReviews
-
-        # Histogram 1 data (tea consumed by month or year)
-        # Get the number of months since start day for the tea's reviews
-        for review in tea.reviews:
-            reviewDateunix = review.attributes.get("date", None)
-            if reviewDateunix is not None:
-                reviewDate = TimeStampToDateDict(reviewDateunix)
-                reviewYear = f"{(reviewDate['year'] + 1900)}" # Offset year to start from 1900 for easier histogramming
-                reviewMonth = f"{reviewDate['month']}-{reviewYear}"
-                
-                reviewAmount = review.attributes.get("Amount", 0)
-                # Add to histogram data the amount consumed in this review
-                if reviewMonth not in cache["histogram1Data"]["month"]:
-                    cache["histogram1Data"]["month"][reviewMonth] = 0
-                if reviewYear not in cache["histogram1Data"]["year"]:
-                    cache["histogram1Data"]["year"][reviewYear] = 0
-
-                cache["histogram1Data"]["month"][reviewMonth] += reviewAmount
-                cache["histogram1Data"]["year"][reviewYear] += reviewAmount
-
-
-        # Calculate remaining
-        ctrTeaRemaining = tea.attributes["Amount"] - ctrTeaDrankReviews - tea.adjustments.get("Standard", 0) - tea.adjustments.get("Gift", 0) - tea.adjustments.get("Sale", 0)
-
-        # If finished, the remaining is set to 0 and added to the total consumed by finished teas
-        if ctrTeaRemaining <= 0:
-            ctrTeaRemaining = 0
-            # If the tea is finished, set the finished flag
-            tea.finished = True
-        if tea.finished:
-            ctrTotalConsumedByFinishedTeas += ctrTeaRemaining
-            cache_ctrTeaFinishedAmt = ctrTeaRemaining
-            ctrTeaRemaining = 0
-            ctrRemainingExcludingStandard = tea.attributes["Amount"] - ctrTeaDrankReviews - tea.adjustments.get("Gift", 0) - tea.adjustments.get("Sale", 0)
-
-            if ctrRemainingExcludingStandard > 0:
-                RichPrintInfo(f"Tea {tea.name} is finished, adjusting standard amount to {ctrRemainingExcludingStandard:.2f}g and remaining amount to 0g.")
-                # back-adjust the tea's standard adjustment to reflect the remaining amount
-                tea.adjustments["Standard"] = ctrRemainingExcludingStandard
-                # back-adjust the tea's remaining amount to 0 to reflect the finished state, only if it is autocalculated
-                if "Remaining" in AllTypesCategoryRoleValid and remainingCategory.isAutoCalculated:
-                    tea.attributes["Remaining"] = 0
-
-        ctrTotalRemaining += ctrTeaRemaining
-
-
-        # Derive explanation for remaining
-        remainingExplanation = ""
-        stdPlusFinished = tea.adjustments.get("Standard", 0) + cache_ctrTeaFinishedAmt
-        explanation = f"{tea.attributes['Amount']:.2f}g Purchased\n- {ctrTeaDrankReviews:.2f}g Sum of all review Amounts\n- {stdPlusFinished:.2f}g Standard Adjustments (inc Finished)\n- {ctrTeaGiftAdjustments:.2f}g Gift Adjustments\n- {ctrTeaSaleAdjustments:.2f}g Sale Adjustments\n= {ctrTeaRemaining:.2f}g Remaining"
-        if ctrTeaRemaining < 0:
-            remainingExplanation = explanation + " (Overdrawn)"
-        elif ctrTeaRemaining == 0:
-            remainingExplanation = explanation + " (Finished)"
-        else:
-            remainingExplanation = explanation + " (Not Finished)"
-
-        # Calc average score
-        if cache_calcTotalScore > 0:
-            cache_calcAverageScore = cache_calcTotalScore / len(tea.reviews)
-
-        totalScoreExplanation = f"{cache_calcTotalScore:.2f} Total Score\n/ {len(tea.reviews)} Number of reviews\n= {cache_calcAverageScore:.2f} Average Score"
-
-        # if no reviews, set cache_calcAverageScore to -1
-        if len(tea.reviews) == 0:
-            cache_calcAverageScore = -1
-            totalScoreExplanation = "No reviews, no score"
-
-        # Finished teas
-        if tea.finished or ctrTeaRemaining <= 0:
-            ctrTeasFinished += 1
-            if "Type" in AllTypesCategoryRoleValid:
-                if tea.attributes["Type"] not in dictCtrTeasFinished:
-                    dictCtrTeasFinished[tea.attributes["Type"]] = 1
-                else:
-                    dictCtrTeasFinished[tea.attributes["Type"]] += 1
-            
-        # Autocalc explanation for cost per gram
-        costPerGramExplanation = f"${tea.attributes['Cost']:.2f} Cost\n/ {tea.attributes['Amount']:.2f} Amount\n= ${cache_calcAverageCost:.2f} Price per gram"
-        
-        # Ratings by vendor
-        if "Final Score" in allTypesCategoryRoleReviewsValid and "Vendor" in tea.attributes:
-            if cache_calcAverageScore >= 0:
-                vendor = tea.attributes["Vendor"]
-                if vendor not in dictRatingsByVendor:
-                    dictRatingsByVendor[vendor] = list()
-                dictRatingsByVendor[vendor].append(cache_calcAverageScore)
-                if tea.attributes["Type"] is not None:
-                    cache_dictRatingByType[tea.attributes["Type"]].append(cache_calcAverageScore)
-            else:
-                dictRatingsByVendor[vendor].append(-1)
-                if tea.attributes["Type"] is not None:
-                    cache_dictRatingByType[tea.attributes["Type"]].append(-1)
-
-       
-
-
-
-        # Add to tea.cache
-        tea.calculated["remaining"] = ctrTeaRemaining
-        tea.calculated["remainingExplanation"] = remainingExplanation
-        tea.calculated["averageScore"] = cache_calcAverageScore
-        tea.calculated["totalScoreExplanation"] = totalScoreExplanation
-        tea.calculated["costPerGramExplanation"] = costPerGramExplanation
-        tea.calculated["costPerGram"] = cache_calcAverageCost
-
-
-     # Price and rating percentiles
-    # We want to calculate them all in one go to avoid multiple loops
-    # Price is gotten from cost per gram of all teas gt 0.01
-    # Rating is gotten from cache_calcAverageScore of all teas gt -1
-    # Filter and sort the lists first
-    cache_listPriceByTypeFiltered = {}
-    for teaType in cache_dictPriceByType:
-        cache_listPriceByTypeFiltered[teaType] = [
-            x for x in cache_dictPriceByType[teaType] if x > 0.01
-        ]
-        cache_listPriceByTypeFiltered[teaType] = sorted(cache_listPriceByTypeFiltered[teaType])
-    cache_listRatingByTypeFiltered = {}
-    for teaType in cache_dictRatingByType:
-        cache_listRatingByTypeFiltered[teaType] = [
-            x for x in cache_dictRatingByType[teaType] if x > -1
-        ]
-        cache_listRatingByTypeFiltered[teaType] = sorted(cache_listRatingByTypeFiltered[teaType])
-
-    cache_listPricePercentiles = [] # tuple of (id, tea name, price percentile)
-    cache_listRatingPercentiles = [] # tuple of (id, tea name, rating percentile)
-    cache_listallPercentiles = [] # tuple of (id, tea name, price, rating, value percentiles)
-    for tea in TeaStash:
-        teaType = None
-        if "Type" in tea.attributes:
-            teaType = tea.attributes["Type"]
-        # Price percentiles
-        if teaType is not None and teaType in cache_listPriceByTypeFiltered:
-            priceList = cache_listPriceByTypeFiltered[teaType]
-            priceList = sorted(priceList)
-            numBelow = sum(1 for price in priceList if price < tea.calculated["costPerGram"])
-            if len(priceList) > 0:
-                pricePercentile = numBelow / len(priceList)
-                tea.calculated["pricePercentile"] = pricePercentile
-            else:
-                tea.calculated["pricePercentile"] = 0
-
-        # Rating percentiles
-        if teaType is not None and teaType in cache_listRatingByTypeFiltered:
-            ratingList = cache_listRatingByTypeFiltered[teaType]
-            ratingList = sorted(ratingList)
-            numBelow = sum(1 for rating in ratingList if rating < tea.calculated["averageScore"])
-            if len(ratingList) > 0:
-                ratingPercentile = numBelow / len(ratingList)
-                tea.calculated["ratingPercentile"] = ratingPercentile
-            else:
-                tea.calculated["ratingPercentile"] = 0
-
-        # Value is taken by subtracting price percentile from rating percentile
-        if "pricePercentile" in tea.calculated and "ratingPercentile" in tea.calculated:
-            tea.calculated["valuePercentile"] = tea.calculated["ratingPercentile"] - tea.calculated["pricePercentile"]
-        else:
-            tea.calculated["valuePercentile"] = 0
-
-        cache_listallPercentiles.append((
-            tea.id,
-            tea.name,
-            tea.calculated.get("pricePercentile", 0),
-            tea.calculated.get("ratingPercentile", 0),
-            tea.calculated.get("valuePercentile", 0)
-        ))
-
-        cache_listPricePercentiles.append((
-            tea.id,
-            tea.name,
-            tea.calculated.get("pricePercentile", 0)
-        ))
-        cache_listRatingPercentiles.append((
-            tea.id,
-            tea.name,
-            tea.calculated.get("ratingPercentile", 0)
-        ))
-
-    cache["pricePercentiles"] = cache_listPricePercentiles
-    cache["ratingPercentiles"] = cache_listRatingPercentiles
-    cache["allPercentiles"] = cache_listallPercentiles
-
-    # filter first
-    filtered_percentiles = []
-    for tea in cache["allPercentiles"]:
-        if tea[2] > 0 and tea[3] > 0:
-            filtered_percentiles.append(tea)
-    filtered_percentiles = sorted(filtered_percentiles, key=lambda x: x[4], reverse=True)
-    ##for tea in filtered_percentiles:
-    ##    print(f"Tea {tea[1]}: price percentile = {tea[2]:.4f}, rating percentile = {tea[3]:.4f}, value percentile = {tea[4]:.4f}")
-    ##
-    
-    # Average volume
-    if cache["numTeas"] > 0:
-        cache["averageVolume"] = ctrTotalVolume / cache["numTeas"]
-    else:
-        cache["averageVolume"] = 0
-
-    # Samples, bags, bulk
-    cache["totalSamples"] = ctrTotalSamples
-    cache["totalBags"] = ctrTotalBags
-    cache["totalBulk"] = ctrTotalBulk
-    cache["sumTotalSampleAmount"] = ctrSumTotalSampleAmount
-    cache["sumTotalBagAmount"] = ctrSumTotalBagAmount
-    cache["sumTotalBulkAmount"] = ctrSumTotalBulkAmount
-
-    # Tea volume by type
-    cache["teaVolumeByType"] = dictTeaVolByType
-
-    cache["totalVolume"] = ctrTotalVolume
-    if cache["numTeas"] > 0:
-        cache["averageCost"] = ctrTotalCost / cache["numTeas"]
-    else:
-        cache["averageCost"] = 0
-    cache["totalCost"] = ctrTotalCost
-
-    # Weighted average cost
-    if "Cost" in AllTypesCategoryRoleValid and "Amount" in AllTypesCategoryRoleValid:
-        if ctrTotalVolume > 0:
-            cache["weightedAverageCost"] = ctrTotalCost / ctrTotalVolume
-        else:
-            cache["weightedAverageCost"] = 0
-    else:
-        cache["weightedAverageCost"] = 0
-
-    # Total consumed by reviews
-    if "Amount" in allTypesCategoryRoleReviewsValid and cache["numReviews"] > 0 and cache["numTeas"] > 0:
-        cache["totalConsumedByReviewsSum"] = ctrTotalConsumedByReviews
-        cache["averageConsumedByReviews"] = ctrTotalConsumedByReviews / cache["numTeas"]
-    else:
-        cache["totalConsumedByReviewsSum"] = 0
-        cache["averageConsumedByReviews"] = 0
-
-    # Total consumed by standard adjustments
-    if "Remaining" in AllTypesCategoryRoleValid and cache["numTeas"] > 0:
-        cache["totalConsumedByStdAdjustmentsOnlySum"] = ctrTotalConsumedByStdAdjustments
-        cache["averageConsumedByStdAdjustmentsOnly"] = ctrTotalConsumedByStdAdjustments / cache["numTeas"]
-    else:
-        cache["totalConsumedByStdAdjustmentsOnlySum"] = 0
-        cache["averageConsumedByStdAdjustmentsOnly"] = 0
-
-    # Total consumed by finished teas
-    if "Amount" in AllTypesCategoryRoleValid and cache["numTeas"] > 0:
-        cache["totalConsumedByFinishedTeasSum"] = ctrTotalConsumedByFinishedTeas
-        cache["averageConsumedByFinishedTeas"] = ctrTotalConsumedByFinishedTeas / cache["numTeas"]
-    else:
-        cache["totalConsumedByFinishedTeasSum"] = 0
-        cache["averageConsumedByFinishedTeas"] = 0
-
-    # Total personally consumed (finished + reviews + standard adjustments)
-    if "Amount" in AllTypesCategoryRoleValid and cache["numTeas"] > 0:
-        cache["totalConsumedByPersonalSum"] = ctrTotalConsumedByReviews + ctrTotalConsumedByStdAdjustments + ctrTotalConsumedByFinishedTeas
-        cache["averageConsumedByPersonal"] = (ctrTotalConsumedByReviews + ctrTotalConsumedByStdAdjustments + ctrTotalConsumedByFinishedTeas) / cache["numTeas"]
-    else:
-        cache["totalConsumedByPersonalSum"] = 0
-        cache["averageConsumedByPersonal"] = 0
-
-    # Total consumed by gifted teas
-    if "Amount" in AllTypesCategoryRoleValid and cache["numTeas"] > 0:
-        cache["totalConsumedByGiftedTeasSum"] = ctrTotalConsumedByGiftedTeas
-        cache["averageConsumedByGiftedTeas"] = ctrTotalConsumedByGiftedTeas / cache["numTeas"]
-    else:
-        cache["totalConsumedByGiftedTeasSum"] = 0
-        cache["averageConsumedByGiftedTeas"] = 0
-
-    # Total consumed by sale adjustments
-    if "Amount" in AllTypesCategoryRoleValid and cache["numTeas"] > 0:
-        cache["totalConsumedBySaleAdjustmentsSum"] = ctrTotalConsumedBySaleAdjustments
-        cache["averageConsumedBySaleAdjustments"] = ctrTotalConsumedBySaleAdjustments / cache["numTeas"]
-    else:
-        cache["totalConsumedBySaleAdjustmentsSum"] = 0
-        cache["averageConsumedBySaleAdjustments"] = 0
-
-    # Total returned by sales
-    if "Amount" in AllTypesCategoryRoleValid and cache["numTeas"] > 0:
-        cache["totalReturnedBySales"] = ctrTotalReturnedBySales
-        cache["averageReturnedBySales"] = ctrTotalReturnedBySales / cache["numTeas"]
-    else:
-        cache["totalReturnedBySales"] = 0
-        cache["averageReturnedBySales"] = 0
-
-    if len(dictRatingsByVendor) > 0:
-        cache["ratingsByVendor"] = {}
-        for vendor in dictRatingsByVendor:
-            # -1s indicate untried tea, count them seperately so we have a total teas drank for the vendor
-            # we want a number of reviews (count), a number of teas and number of untried teas
-            numTeas = sum(1 for score in dictRatingsByVendor[vendor] if score != -1)
-            numUntried = dictRatingsByVendor[vendor].count(-1)
-            sumRatings = sum(score for score in dictRatingsByVendor[vendor] if score != -1)
-            lenRatingsTried = len(dictRatingsByVendor[vendor]) - numUntried
-            cache["ratingsByVendor"][vendor] = {
-                "average": sumRatings / lenRatingsTried if lenRatingsTried > 0 else 0,
-                "count": len(dictRatingsByVendor[vendor]),
-                "numTeas": numTeas,
-                "numUntried": numUntried
-            }
-    else:
-        cache["ratingsByVendor"] = {}
-
-    # Top ten teas sold by value
-    listTopTenTeasSoldByValue.sort(key=lambda x: x[1], reverse=True)
-    cache["topTenTeasSoldByValue"] = listTopTenTeasSoldByValue[:10]  # Limit to top 10
-    cache["totalTeasSold"] = ctrTotalTeasSold
-
-    # Steeps by type
-    cache["steepsByType"] = dictSteepsByType
-    # Num reviews by type
-    cache["numReviewsByType"] = dictNumReviewsByType
-
-    # Total consumed by all methods
-    totalConsumed = ctrTotalConsumedByReviews + ctrTotalConsumedByStdAdjustments + ctrTotalConsumedByFinishedTeas + ctrTotalConsumedByGiftedTeas + ctrTotalConsumedBySaleAdjustments
-    cache["totalConsumed"] = totalConsumed
-    cache["averageConsumed"] = totalConsumed / cache["numTeas"] if cache["numTeas"] > 0 else 0
-
-    # Total consumed excluding gift adjustments
-    totalConsumedExcludingGiftAdj = ctrTotalConsumedByReviews + ctrTotalConsumedByStdAdjustments + ctrTotalConsumedByFinishedTeas
-    cache["totalConsumedExcludingGiftAdj"] = totalConsumedExcludingGiftAdj
-    cache["averageConsumedExcludingGiftAdj"] = totalConsumedExcludingGiftAdj / cache["numTeas"] if cache["numTeas"] > 0 else 0
-
-    # Total Consumed Standard Adjustments is finished plus standard
-    totalConsumedStandardAdj = ctrTotalConsumedByStdAdjustments
-    cache["totalConsumedStandardAdj"] = totalConsumedStandardAdj
-    cache["averageConsumedStandardAdj"] = totalConsumedStandardAdj / cache["numTeas"] if cache["numTeas"] > 0 else 0
-
-    # Total Consumed Gift Adjustments is just the gift adjustments
-    totalConsumedGiftAdj = ctrTotalConsumedByGiftedTeas
-    cache["totalConsumedGiftAdj"] = totalConsumedGiftAdj
-    cache["averageConsumedGiftAdj"] = totalConsumedGiftAdj / cache["numTeas"] if cache["numTeas"] > 0 else 0
-
-    # Total consumed by sale and gift adjustments
-    totalConsumedSaleAdj = ctrTotalConsumedBySaleAdjustments
-    cache["totalConsumedSaleGiftAdj"] = totalConsumedSaleAdj
-    cache["averageConsumedSaleGiftAdj"] = totalConsumedSaleAdj / cache["numTeas"] if cache["numTeas"] > 0 else 0
-
-    # Total Remaining
-    cache["totalRemaining"] = ctrTotalRemaining
-    if cache["numTeas"] > 0:
-        cache["averageRemaining"] = ctrTotalRemaining / cache["numTeas"]
-    else:
-        cache["averageRemaining"] = 0
-
-    # Teas tried
-    cache["totalTeasTried"] = ctrTotalTeasTried
-    cache["averageTeasTried"] = ctrTotalTeasTried / cache["numTeas"] if cache["numTeas"] > 0 else 0
-    cache["teasTriedByType"] = dictCtrTeasTried
-    
-    # Teas not tried
-    cache["totalTeasNotTried"] = cache["numTeas"] - ctrTotalTeasTried
-    cache["averageTeasNotTried"] = (cache["numTeas"] - ctrTotalTeasTried) / cache["numTeas"] if cache["numTeas"] > 0 else 0
-    cache["teasNotTriedByType"] = {k: cache["numTeasByType"].get(k, 0) - dictCtrTeasTried.get(k, 0) for k in cache["numTeasByType"]}
-
-    # Teas finished
-    cache["totalTeasFinished"] = ctrTeasFinished
-    cache["averageTeasFinished"] = ctrTeasFinished / cache["numTeas"] if cache["numTeas"] > 0 else 0
-    cache["teasFinishedByType"] = dictCtrTeasFinished
-
-    # Total and average score by type
-    cache["totalScore"] = ctrTotalScored
-    cache["scoreByType"] = dictCtrScoresByType
-
-    # Average purchase per month
-    if monthsSinceStart > 0:
-        cache["averagePurchasePerMonth"] = cache["totalCost"] / monthsSinceStart
-    else:
-        cache["averagePurchasePerMonth"] = 0
-    # Latest purchase date
-    cache["latestPurchase"] = ctrLatestPurchase
-    
-    # Days since last purchase
-    if ctrLatestPurchase > 0:
-        daysSinceLastPurchase = (dt.datetime.now(tz=dt.timezone.utc).timestamp() - ctrLatestPurchase) / (24 * 60 * 60)
-        cache["daysSinceLastPurchase"] = daysSinceLastPurchase
-    else:
-        cache["daysSinceLastPurchase"] = 0
-
-    # Purchases by month
-    purchasesByMonth = {}
-    for tea in TeaStash:
-        if "date" in tea.attributes and tea.attributes["date"] is not None:
-            purchaseDate = dt.datetime.fromtimestamp(tea.attributes["date"], tz=dt.timezone.utc)
-            monthYear = purchaseDate.strftime("%Y-%m")
-            if monthYear not in purchasesByMonth:
-                purchasesByMonth[monthYear] = 0
-            purchasesByMonth[monthYear] += tea.attributes.get("Cost", 0)
-    cache["purchasesByMonth"] = purchasesByMonth
-
-    timeCacheEnd = dt.datetime.now(tz=dt.timezone.utc).timestamp()
-    timeCacheDuration = timeCacheEnd - timeCacheStart
-    RichPrintSuccessMinor(f"Stats cache duration: {timeCacheDuration:.2f} seconds")
-
-    return cache
-
-def statsgetStartDayTimestamp():
-    startDay = None
-    if "START_DAY" in settings and settings["START_DAY"] is not None and settings["START_DAY"] != "":
-        startDay = settings["START_DAY"]
-        return AnyDTFormatToTimeStamp(startDay)
-    # If no start day is set, find the earliest date in the stash
-    earliestDate = None
-    for tea in TeaStash:
-        if tea.dateAdded is not None:
-            dateAddedTimestamp = AnyDTFormatToTimeStamp(tea.dateAdded)
-            if earliestDate is None or dateAddedTimestamp < earliestDate:
-                earliestDate = dateAddedTimestamp
-        # Also check date purchased if it exists
-        if "date" in tea.attributes and tea.attributes["date"] is not None:
-            datePurchasedTimestamp = AnyDTFormatToTimeStamp(tea.attributes["date"])
-            if earliestDate is None or datePurchasedTimestamp < earliestDate:
-                earliestDate = datePurchasedTimestamp
-    if earliestDate is not None:
-        return earliestDate
-    # If no teas are in the stash, return the current time
-    RichPrintWarning("No start day set and no teas in the stash. Defaulting to current time.")
-    return dt.datetime.now(tz=dt.timezone.utc).timestamp()
-
-def statsNumTeas():
-    # Get the number of teas in the stash
-    numTeas = len(TeaStash)
-    return numTeas
-def statsNumReviews():
-    # Get the number of reviews in the stash
-    numReviews = 0
-    for tea in TeaStash:
-        numReviews += len(tea.reviews)
-    return numReviews
-
-def statsWaterConsumed():
-    # For each review, multiply the number of steeps by vessel size
-    # and sum them up
-    totalWaterConsumed = 0
-    for tea in TeaStash:
-        tea: StashedTea
-        for review in tea.reviews:
-            if "Steeps" in review.attributes and "Vessel size" in review.attributes:
-                steeps = review.attributes["Steeps"]
-                vesselSize = review.attributes["Vessel size"]
-                totalWaterConsumed += steeps * vesselSize
-    # Calculate the average water consumed
-    sum, avrg, count, unique, _ = getStatsOnCategoryByRole("Steeps", True)
-    if sum > 0:
-        averageWaterConsumed = totalWaterConsumed / sum
-    else:
-        averageWaterConsumed = 0
-    return totalWaterConsumed, averageWaterConsumed
-
-
 def Menu_Stats():
     w = 1280 * settings["UI_SCALE"]
     h = 920 * settings["UI_SCALE"]
@@ -6883,15 +3872,14 @@ class Window_Stats(WindowBase):
             # Init cache so we dont have to recalculate every time
             if self.cache is None:
                 # Check global cache
-                global TeaCache
                 lenGlobalCache = len(TeaCache)
                 
-                if TeaCache is not None and lenGlobalCache > 0:
+                if lenGlobalCache > 0:
                     self.cache = TeaCache
                 else:
-                    self.cache = populateStatsCache()
                     # Populate global cache
-                    TeaCache = self.cache
+                    TeaCache.update(populateStatsCache())
+                    self.cache = TeaCache
                     RichPrintSuccessMinor("Stats cache populated.")
 
             windowWidth = window.width
@@ -8005,6 +4993,7 @@ def Menu_Welcome(sender, app_data, user_data):
     welcome = Window_Welcome("Welcome", w, h, exclusive=True)
 class Window_Welcome(WindowBase):
     def windowDefintion(self, window):
+        import screeninfo
         # Get screen dimensions using Dear PyPixl
         screenWidth, screenHeight = screeninfo.get_monitors()[0].width, screeninfo.get_monitors()[0].height
         cw = screenWidth / 4
@@ -8111,6 +5100,9 @@ class Window_Terminal(WindowBase):
             dp.Button(label="Clear", callback=self.clearTerminal, user_data=textInput)
             dp.Button(label="Copy to Clipboard", callback=self.copyTerminalToClipboard, user_data=textInput)
             dp.Separator()
+            with dp.CollapsingHeader(label="Startup Profile", default_open=False):
+                dp.Text("\n".join(formatStartupProfile()))
+                dp.Button(label="Save Startup Profile", callback=dumpStartupProfile)
         RichPrintSuccess("Opened Terminal window")
 
     def clearTerminal(self, sender, app_data, user_data):
@@ -8161,6 +5153,7 @@ class Manager_Windows:
         if title in self.windows:
             self.removeWindow(self.windows[title])
     def sortWindows(self):
+        import screeninfo
         # Callback function to sort and re-layout windows
 
         # Get screen dimensions using Dear PyPixl
@@ -8314,298 +5307,29 @@ class Manager_Windows:
             elif title == "Notepad":
                 Menu_Notepad(None, None, data)
         windowManager.sortWindows()
-
 #endregion
 
 
 #region Save and Load
 
-def generateBackup():
-    # Use the alternate backup path and generate a folder containing all backed up files, add datetime to path
-    backupPath = f"{settings['BACKUP_PATH']}/{parseDTToStringWithHoursMinutes(dt.datetime.now(tz=dt.timezone.utc))}"
-    os.makedirs(backupPath, exist_ok=True)
-    SaveAll(backupPath, saveCSV=True)
-    RichPrintSuccess(f"Backup generated at {backupPath}")
-
-def saveTeasData(stash, path):
-    # Save as one file in yml format
-    allData = []
-    nowString = parseDTToString(dt.datetime.now(tz=dt.timezone.utc))  # Get current time as string for default dateAdded
-    for tea in stash:
-        teaAttributesModified = tea.attributes
-        # Convert all datetimes to unix timestamps
-        for key, value in teaAttributesModified.items():
-            if isinstance(value, dt.datetime):
-                teaAttributesModified[key] = value.timestamp()
-
-        timestamp = tea.dateAdded
-        if type(timestamp) == dt.datetime:
-            timestamp = tea.dateAdded.timestamp()
-        # Clone adjustments
-        adjustments = tea.adjustments.copy() if tea.adjustments else {}
-        teaData = {
-            "_index": tea.id,
-            "Name": tea.name,
-            "dateAddedTimeStamp": timestamp,  # Save dateAdded as timestamp for easier parsing
-            "attributes": teaAttributesModified,
-            "attributesJson": dumpAttributesToString(tea.attributes),  # Save attributes as JSON string for easier parsing
-            "reviews": [],
-            "adjustments": adjustments,
-            "finished": tea.finished,
-        }
-        for review in tea.reviews:
-            reviewAttributesModified = review.attributes
-            # Convert all datetimes to unix timestamps
-            for key, value in reviewAttributesModified.items():
-                if isinstance(value, dt.datetime):
-                    reviewAttributesModified[key] = value.timestamp()
-
-            timestamp = review.dateAdded
-            if type(timestamp) == dt.datetime:
-                timestamp = review.dateAdded.timestamp()
-            reviewData = {
-                "_reviewindex": review.id,
-                "parentIDX": tea.id,
-                "Name": review.name,
-                "dateAddedTimeStamp": timestamp,  # Save dateAdded as timestamp for easier parsing
-                "attributes": reviewAttributesModified,
-                "attributesJson": dumpAttributesToString(review.attributes),  # Save review attributes as JSON string for easier parsing
-                "rating": review.rating,
-            }
-            teaData["reviews"].append(reviewData)
-        allData.append(teaData)
-
-    # If stash is not empty and data is not empty, write to file
-    if len(allData) > 0 and allData is not None:
-        RichPrintInfo(f"Saving {len(allData)} teas to {path}")
-        WriteYaml(path, allData)
-    else:
-        RichPrintWarning(f"No teas to save, skipping save to {path}")
-        return
-
-    
-
-def loadTeasReviews(path):
-    # If not exists, create the directory, return false
-    if not os.path.exists(path):
-        RichPrintInfo(f"Directory {path} created")
-        return []
-    
-    # Load from one file in yml format
-    allData = ReadYaml(path)
-    TeaStash = []
-    i = 0
-    j = 0
-    for teaData in allData:
-        idx = i
-        if "_index" in teaData:
-            idx = teaData["_index"]
-
-        # Name could be under name or Name
-        name = teaData.get("name", None)
-        if name is None:
-            name = teaData.get("Name", None)
-
-        dateAdded = dt.datetime.now(tz=dt.timezone.utc).timestamp()
-        if "dateAddedTimeStamp" in teaData:
-            dateAdded = dt.datetime.fromtimestamp(teaData["dateAddedTimeStamp"], tz=dt.timezone.utc)
-
-        tea = StashedTea(idx, name, dateAdded=dateAdded, attributes=teaData["attributes"])
-        
-        if "attributesJson" in teaData and teaData["attributesJson"]:
-            # If attributesJson is present, load it
-            try:
-                tea.attributes = loadAttributesFromString(teaData["attributesJson"])
-            except Exception as e:
-                # Fall back on loading from the old attributes format if JSON loading fails
-                if "attributes" in teaData:
-                    tea.attributes = teaData["attributes"]
-                else:
-                    RichPrintError(f"Failed to load attributes from JSON: {e}. Falling back to old attributes format.")
-                    tea.attributes = {}  # Fallback to empty attributes if both fail
-
-        # Add adjustments and finished flags
-        if "adjustments" in teaData:
-            tea.adjustments = teaData["adjustments"]
-        if "finished" in teaData:
-            tea.finished = teaData["finished"]
-        for reviewData in teaData["reviews"]:
-            idx2 = j
-            if "_reviewindex" in reviewData:
-                idx2 = reviewData["_reviewindex"]
-            # Rating could be stored under 'rating' or 'Final Score', check both
-            rating = reviewData.get("rating", None)
-            if rating is None:
-                rating = reviewData.get("Final Score", None)
-
-            # Name could be under name or Name
-            name = reviewData.get("name", None)
-            if name is None:
-                name = reviewData.get("Name", None)
-
-
-            # dateadded Timestamp could be under dateAddedTimeStamp or Date Added TimeStamp
-            dateAddedTimeStamp = reviewData.get("dateAddedTimeStamp", None)
-            if dateAddedTimeStamp is None:
-                dateAddedTimeStamp = reviewData.get("Date Added TimeStamp", None)
-
-            
-            review = Review(idx2, name, dateAddedTimeStamp, reviewData["attributes"], rating)
-            review.parentID = tea.id
-            tea.addReview(review)
-            j += 1
-        TeaStash.append(tea)
-        i += 1
-        j = 0
-    return TeaStash
-
-def saveTeaCategories(categories, path):
-    # Save as one file in yml format
-    allData = []
-    for category in categories:
-        category: TeaCategory
-        categoryData = {
-            "Name": category.name,
-            "categoryType": category.categoryType,
-            "defaultValue": category.defaultValue,
-            "categoryRole": category.categoryRole,
-            "isAutoCalculated": category.isAutoCalculated,
-            "isRequiredForTea": category.isRequiredForTea,
-            "isRequiredForAll": category.isRequiredForAll,
-            "isDropdown": category.isDropdown,
-            "rounding": int(category.rounding),
-            "prefix": category.prefix,
-            "suffix": category.suffix,
-            "maxItems": int(category.dropdownMaxLength),
-            "gradingDisplayAsLetter": category.gradingDisplayAsLetter,
-        }
-        allData.append(categoryData)
-
-    WriteYaml(path, allData)
-
-def loadTeaCategories(path):
-    # If not exists, create the directory, return false
-    if not os.path.exists(path):
-        RichPrintInfo(f"Directory {path} created")
-        return []
-    
-    # Load from one file in yml format
-    allData = ReadYaml(path)
-    TeaCategories = []
-    for categoryData in allData:
-        category = TeaCategory(categoryData["Name"], categoryData["categoryType"])
-        category.defaultValue = ""
-        if "defaultValue" in categoryData:
-            category.defaultValue = categoryData["defaultValue"]
-        # Check if the category type is valid
-        if category.categoryType not in session["validTypesCategory"]:
-            category.categoryType = "string"
-
-        # Add role
-        if "categoryRole" in categoryData:
-            category.categoryRole = categoryData["categoryRole"]
-        else:
-            category.categoryRole = category.categoryType
-        TeaCategories.append(category)
-
-        # Add flags
-        if "isRequiredForAll" in categoryData:
-            category.isRequiredForAll = categoryData["isRequiredForAll"]
-        else:
-            category.isRequiredForAll = False
-
-        if "isRequiredForTea" in categoryData:
-            category.isRequiredForTea = categoryData["isRequiredForTea"]
-
-        if "isDropdown" in categoryData:
-            category.isDropdown = categoryData["isDropdown"]
-
-        if "isAutoCalculated" in categoryData:
-            category.isAutoCalculated = categoryData["isAutoCalculated"]
-
-        # Additional options
-        if "rounding" in categoryData:
-            category.rounding = int(categoryData["rounding"])
-        else:
-            category.rounding = 2
-
-        if "prefix" in categoryData:
-            category.prefix = categoryData["prefix"]
-
-        if "suffix" in categoryData:
-            category.suffix = categoryData["suffix"]
-
-        if "maxItems" in categoryData:
-            category.dropdownMaxLength = int(categoryData["maxItems"])
-        else:
-            category.dropdownMaxLength = 5
-
-        if "gradingDisplayAsLetter" in categoryData:
-            category.gradingDisplayAsLetter = categoryData["gradingDisplayAsLetter"]
-        else:
-            category.gradingDisplayAsLetter = False
-
-    return TeaCategories
-
-def loadTeaReviewCategories(path):
-    # If not exists, create the directory, return false
-    if not os.path.exists(path):
-        RichPrintInfo(f"Directory {path} created")
-        return []
-    
-    # Load from one file in yml format
-    allData = ReadYaml(path)
-    TeaReviewCategories = []
-    for categoryData in allData:
-        category = ReviewCategory(categoryData["Name"], categoryData["categoryType"])
-        category.defaultValue = ""
-        if "defaultValue" in categoryData:
-            category.defaultValue = categoryData["defaultValue"]
-        # Check if the category type is valid
-        if category.categoryType not in session["validTypesReviewCategory"]:
-            category.categoryType = "string"
-        TeaReviewCategories.append(category)
-
-        # Add role
-        if "categoryRole" in categoryData:
-            category.categoryRole = categoryData["categoryRole"]
-        else:
-            category.categoryRole = category.categoryType
-
-        # Add flags
-        if "isRequiredForAll" in categoryData:
-            category.isRequiredForAll = categoryData["isRequiredForAll"]
-        else:
-            category.isRequiredForAll = False
-
-        if "isRequiredForTea" in categoryData:
-            category.isRequiredForTea = categoryData["isRequiredForTea"]
-
-        if "isDropdown" in categoryData:
-            category.isDropdown = categoryData["isDropdown"]
 
-        if "isAutoCalculated" in categoryData:
-            category.isAutoCalculated = categoryData["isAutoCalculated"]
 
-        if "rounding" in categoryData:
-            category.rounding = int(categoryData["rounding"])
 
-        if "prefix" in categoryData:
-            category.prefix = categoryData["prefix"]
-
-        if "suffix" in categoryData:
-            category.suffix = categoryData["suffix"]
-
-        if "maxItems" in categoryData:
-            category.dropdownMaxLength = int(categoryData["maxItems"])
-
-        if "gradingDisplayAsLetter" in categoryData:
-            category.gradingDisplayAsLetter = categoryData["gradingDisplayAsLetter"]
-        else:
-            category.gradingDisplayAsLetter = False
+def generateBackup():
+    # Store a snapshot of all files in the manual backup store, compressing in the background
+    createBackupSnapshot(settings["BACKUP_PATH"], kind="manual", background=True, saveFunc=SaveAll)
 
+def restoreLatestBackup(sender=None, app_data=None, user_data=None):
+    latest = findLatestBackupSnapshot()
+    if latest is None:
+        RichPrintError("No backups to restore")
+        return
+    storePath, name = latest
 
-    return TeaReviewCategories
+    # Keep the current state so the restore can be undone
+    createBackupSnapshot(settings["BACKUP_PATH"], kind="pre-restore", saveFunc=SaveAll)
+    if restoreBackupSnapshot(storePath, name):
+        LoadAll()
 
 def verifyCategoriesReviewCategories():
     # For each category, double check all values are valid
@@ -8626,50 +5350,23 @@ def verifyCategoriesReviewCategories():
     # Save the categories again
     SaveAll(saveCSV=False)
 
-def saveTeaReviewCategories(categories, path):
-    # Save as one file in yml format
-    allData = []
-    for category in categories:
-        category: ReviewCategory
-        categoryData = {
-            "Name": category.name,
-            "categoryType": category.categoryType,
-            "defaultValue": category.defaultValue,
-            "categoryRole": category.categoryRole,
-            "isAutoCalculated": category.isAutoCalculated,
-            "isRequiredForTea": category.isRequiredForTea,
-            "isRequiredForAll": category.isRequiredForAll,
-            "isDropdown": category.isDropdown,
-            "rounding": int(category.rounding),
-            "prefix": category.prefix,
-            "suffix": category.suffix,
-            "maxItems": category.dropdownMaxLength,
-            "gradingDisplayAsLetter": category.gradingDisplayAsLetter,
-        }
-        allData.append(categoryData)
-
-    WriteYaml(path, allData)
-
 def SaveAll(altPath=None, saveCSV=True):
     # ignore sender and app_data
     if type(altPath) != str and altPath is not None:
         altPath = None
     # Save all data
+    if altPath is not None and altPath.endswith(".zip"):
+        # Single archive, written to a temp folder and packed in the background
+        stagingPath = tempfile.mkdtemp(prefix="ratea-archive-")
+        SaveAll(stagingPath, saveCSV=saveCSV)
+        threading.Thread(target=writeBackupArchive, args=(stagingPath, altPath)).start()
+        return
     if altPath is not None:
-        # This is a backup path, so save to the backup path
-        newBaseDirectory = altPath
-        saveTeasData(TeaStash, f"{newBaseDirectory}/tea_reviews.yml")
-        saveTeaCategories(TeaCategories, f"{newBaseDirectory}/tea_categories.yml")
-        saveTeaReviewCategories(TeaReviewCategories, f"{newBaseDirectory}/tea_review_categories.yml")
-        WriteYaml(f"{newBaseDirectory}/user_settings.yml", settings)
-        windowManager.exportPersistantWindows(f"{newBaseDirectory}/persistant_windows.yml")
-        RichPrintSuccess(f"All data saved to {newBaseDirectory}")
-
-        # CSVs
-        if saveCSV:
-            teaStashToCSV(f"{newBaseDirectory}/tea.csv", f"{newBaseDirectory}/review.csv")
-            RichPrintSuccess(f"CSV files saved to {newBaseDirectory}")
+        # This is a backup path, so save to the backup path, with the windows as they are open now
+        saveAllToDirectory(altPath, saveCSV=saveCSV)
+        windowManager.exportPersistantWindows(f"{altPath}/persistant_windows.yml")
         return
+    # Each write is skipped when the file already holds the same data
     saveTeasData(TeaStash, settings["TEA_REVIEWS_PATH"])
     saveTeaCategories(TeaCategories, settings["TEA_CATEGORIES_PATH"])
     saveTeaReviewCategories(TeaReviewCategories, settings["TEA_REVIEW_CATEGORIES_PATH"])
@@ -8678,9 +5375,17 @@ def SaveAll(altPath=None, saveCSV=True):
 
     # CSVs
     if saveCSV:
-        # CSVs are slow to save due to file serialization, so only save if specified
-        teaStashToCSV(settings["CSV_OUTPUT_TEA_PATH"], settings["CSV_OUTPUT_REVIEW_PATH"])
-        RichPrintSuccess(f"CSV files saved to {settings['CSV_OUTPUT_TEA_PATH']} and {settings['CSV_OUTPUT_REVIEW_PATH']}")
+        # CSVs are slow to save due to file serialization, so only save if specified and their sources changed since the last export
+        # The tea fingerprint is only current once the queued tea save has been written
+        flushSaveWorker()
+        csvSources = [getFileFingerprint(path) for path in (settings["TEA_REVIEWS_PATH"], settings["TEA_CATEGORIES_PATH"], settings["TEA_REVIEW_CATEGORIES_PATH"], session["settingsPath"])]
+        csvMissing = not os.path.exists(settings["CSV_OUTPUT_TEA_PATH"]) or not os.path.exists(settings["CSV_OUTPUT_REVIEW_PATH"])
+        if csvMissing or None in csvSources or csvSources != session.get("csvSourceFingerprints", None):
+            teaStashToCSV(settings["CSV_OUTPUT_TEA_PATH"], settings["CSV_OUTPUT_REVIEW_PATH"])
+            session["csvSourceFingerprints"] = csvSources
+            RichPrintSuccess(f"CSV files saved to {settings['CSV_OUTPUT_TEA_PATH']} and {settings['CSV_OUTPUT_REVIEW_PATH']}")
+        else:
+            RichPrintSuccessMinor("Teas, categories and settings unchanged, skipping CSV export")
 
 
 # Start Backup Thread
@@ -8723,11 +5428,10 @@ def pollAndAutosaveIfNeeded():
     if timeLastSave >= autosaveInterval and settings["AUTO_SAVE"] and timeLastSave >= 5:
         print(f"Autosaving after {timeLastSave} minutes")
         # Save To Backup
-        autoBackupPath = settings["AUTO_SAVE_PATH"] + f"/{parseDTToStringWithHoursMinutes(dt.datetime.now(tz=dt.timezone.utc))}"
+        autoBackupPath = settings["AUTO_SAVE_PATH"]
         if autoBackupPath != None and autoBackupPath != "":
-            if not os.path.exists(autoBackupPath):
-                os.makedirs(autoBackupPath, exist_ok=True)
-            SaveAll(autoBackupPath, saveCSV=True)
+            createBackupSnapshot(autoBackupPath, kind="auto", saveFunc=SaveAll)
+            pruneBackupSnapshots(autoBackupPath)
             global globalTimeLastSave
             globalTimeLastSave = dt.datetime.now(tz=dt.timezone.utc)
             timeLastSave = pollTimeSinceStartMinutes()
@@ -8736,314 +5440,11 @@ def pollAndAutosaveIfNeeded():
         
 
     RichPrintInfo(f"Autosave interval is {autosaveInterval} minutes, last save was {timeLastSave} minutes ago")
+#endregion
 
-def LoadSettings(path=None):
-    global settings
-    if path is None:
-        path = session["settingsPath"]
-    if not os.path.exists(path):
-        RichPrintError(f"Settings file {path} does not exist. Using default settings.")
-        return False
-    settings = ReadYaml(path)
-    if settings is None:
-        RichPrintError("Failed to load settings from YAML.")
-        return False
-    session["settingsPath"] = path
-    RichPrintSuccess(f"Loaded settings from {path}")
-
-    # If there are any keys missing from the settings, add them from the default settings
-    for key, value in default_settings.items():
-        if key not in settings:
-            RichPrintWarning(f"Key {key} missing from settings, adding default value {value}")
-            settings[key] = value
-    return settings
-
-def hasLoadableFiles():
-    # Checks if the DIRECTORY exists and if the files exist
-    # else, checks if backup or autobackup path exists
-    mainFilesExist = os.path.exists(settings["TEA_REVIEWS_PATH"]) and os.path.exists(settings["TEA_CATEGORIES_PATH"]) and os.path.exists(settings["TEA_REVIEW_CATEGORIES_PATH"])
-    backupFilesExist = os.path.exists(settings["AUTO_SAVE_PATH"]) and os.path.exists(settings["BACKUP_PATH"])
-    return mainFilesExist, backupFilesExist
-
-def LoadAll(baseDir=None):
-    if baseDir is None:
-        baseDir = os.path.dirname(os.path.abspath(__file__))
-    # Load all data
-    global settings
-    #baseDir = os.path.dirname(os.path.abspath(__file__))
-    settingsPath = f"{baseDir}/{default_settings['SETTINGS_FILENAME']}"
-    session["settingsPath"] = settingsPath
-    settings = LoadSettings(session["settingsPath"])
-    # Update version
-    categoriesPath = f"{baseDir}/{settings['TEA_CATEGORIES_PATH']}"
-    teaReviewCategoriesPath = f"{baseDir}/{settings['TEA_REVIEW_CATEGORIES_PATH']}"
-    session["categoriesPath"] = categoriesPath
-    session["reviewCategoriesPath"] = teaReviewCategoriesPath
-    settings["APP_VERSION"] = default_settings["APP_VERSION"]
-    global TeaStash
-    TeaStash = loadTeasReviews(settings["TEA_REVIEWS_PATH"])
-    global TeaCategories
-    TeaCategories = loadTeaCategories(session["categoriesPath"])
-    global TeaReviewCategories
-    TeaReviewCategories = loadTeaReviewCategories(session["reviewCategoriesPath"])
-    # Renumber the teas and reviews if needed
-    renumberTeasAndReviews()  # Ensure all teas and reviews have unique IDs after loading
-
-    RichPrintInfo(f"Loaded settings from {session['settingsPath']}")
-    
-    RichPrintSuccess(f"Loaded {len(TeaStash)} teas and {len(TeaCategories)} categories")
-
-# Attributes to string, json, with special datetime handling
-def dumpAttributesToString(attributes):
-    returnDict = dumpAttributesToDict(attributes)
-    # Convert dict to JSON string
-    returnString = json.dumps(returnDict)  # Convert datetime objects to string
-    
-    # Replace escaped double quotes with double quotes
-    returnString = returnString.replace('\\"', '"')
-    return returnString
-    
-
-def dumpAttributesToDict(attributes):
-    returnDict = {}
-    parseDict = json.loads(json.dumps(attributes, default=str))  # Convert datetime objects to string
-    # for strings, remove the HH:MM:SS part
-    if isinstance(parseDict, str):
-        parseDict = parseDict.replace("00:00:00", "")  # Remove HH:MM:SS part
-    if not isinstance(parseDict, dict):
-        try:
-            parseDict = json.loads(parseDict)  # Try to parse it again if it's not a dict
-        except json.JSONDecodeError:
-            RichPrintError("Failed to parse attributes to dict")
-            return {}
-    if not isinstance(parseDict, dict):
-        RichPrintError("Attributes must be a dictionary")
-        return {}
-    
-    # Ensure all datetime objects are converted to strings
-    for key, value in parseDict.items():
-        if isinstance(value, dt.datetime):
-            #atetimeString = parseDTToString(value)
-            #dateString = datetimeString.split(" ")[0]
-            #timeString = datetimeString.split(" ")[1]
-            # Timestamp
-            dateString = TimeStampToString(value.timestamp())
-            returnDict[key] = dateString
-        else:
-            keyvalue = value
-            if isinstance(value, str):
-                keyvalue = keyvalue.replace("00:00:00", "")  # Remove HH:MM:SS part
-            returnDict[key] = keyvalue
-    return returnDict
-
-# Return Attributes dict from a JSON string, handling datetime parsing
-def loadAttributesFromString(json_string):
-    if not json_string or json_string.strip() == "":
-        return {}
-    try:
-        attributes = json.loads(json_string)
-        # Convert datetime strings back to datetime objects if needed
-        for key, value in attributes.items():
-            if isinstance(value, str):
-                try:
-                    # Attempt to parse as datetime
-                    parsed_date = parseStringToDT(value, silent=True)
-                    if parsed_date is None or parsed_date == "" or parsed_date == False:
-                        raise ValueError("Invalid datetime string")
-                    if type(parsed_date) is dt.datetime:
-                        attributes[key] = parsed_date
-                    else:
-                        attributes[key] = value
-                except (ValueError, TypeError):
-                    # If parsing fails, keep the original string value
-                    attributes[key] = value
-                except ValueError:
-                    pass  # Not a datetime string, keep it as is
-        return attributes
-    except json.JSONDecodeError:
-        print (f"Error decoding JSON string: {json_string}")
-        RichPrintError("Failed to decode JSON string for attributes")
-        return {}
-    
-def dumpReviewToDict(review):
-    returnDict = {}
-    # Declare an empty dict then handle each attribute seperately, datetime needs to be converted to string
-    for key, value in review.__dict__.items():
-        if isinstance(value, dt.datetime):
-            datetimeString = parseDTToString(value)
-            dateString = datetimeString.split(" ")[0]
-            #timeString = datetimeString.split(" ")[1]
-            returnDict[key] = dateString
-        elif isinstance(value, dict):
-            # Recursive handling
-            returnDict[key] = dumpAttributesToDict(value)
-        else:
-            returnDict[key] = value
-    return returnDict
-
-def dumpTeaToDict(tea):
-    returnDict = {}
-    # Declare an empty dict then handle each attribute seperately, datetime needs to be converted to string
-    for key, value in tea.__dict__.items():
-        if isinstance(value, dt.datetime):
-            datetimeString = parseDTToString(value)
-            dateString = datetimeString.split(" ")[0]
-            #timeString = datetimeString.split(" ")[1]
-            returnDict[key] = dateString
-    
-        elif isinstance(value, dict):
-            # Recursive handling
-            returnDict[key] = dumpAttributesToDict
-        else:
-            returnDict[key] = value
-    
-    returnDict["attributes"] = dumpAttributesToDict(tea.attributes)  # Save attributes as JSON string for easier parsing
-    
-    returnDict["calculated"] = tea.calculated  # Save calculated values
-    returnDict["reviews"] = []  # Add empty list for reviews
-
-    # Add in reviews from the tea object
-    # Reviews is a list of Review objects, convert to dicts first
-    reviews = []
-    for review in tea.reviews:
-        reviews.append(dumpReviewToDict(review))
-    returnDict["reviews"] = reviews
 
 
-    return returnDict
 
-def loadReviewFromDictNewID(reviewData, id, parentId):
-    # Create a new review object from the dict generated by the above function
-    review = Review(id, reviewData["Name"], reviewData["dateAdded"], reviewData["attributes"], reviewData["Final Score"])
-    review.parentID = parentId  # Set the parent ID to the tea ID
-    if type(reviewData["attributes"]) is str:
-        review.attributes = loadAttributesFromString(reviewData["attributes"])
-    else:
-        review.attributes = reviewData["attributes"]
-
-    # Convert datetime strings back to datetime objects if needed
-    for key, value in review.__dict__.items():
-        if isinstance(value, str):
-            try:
-                # Attempt to parse as datetime
-                parsed_date = parseStringToDT(value, silent=True)
-                if type(parsed_date) is dt.datetime:
-                    review.__dict__[key] = parsed_date
-                else:
-                    review.__dict__[key] = value
-            except (ValueError, TypeError):
-                # If parsing fails, keep the original string value
-                review.__dict__[key] = value
-            except ValueError:
-                pass
-
-    # If calculated is not in the review, add blank
-    if "calculated" not in review.__dict__:
-        review.calculated = {}
-
-    return review
-
-def teaStashToCSV(csvPath=None, csvPathReviews=None):
-    # If no path is given, use the default path
-    if csvPath is None:
-        csvPath = settings["CSV_OUTPUT_TEA_PATH"]
-    if csvPathReviews is None:
-        csvPathReviews = settings["CSV_OUTPUT_REVIEW_PATH"]
-    # Piggyback on exisitng json support to convert to CSV
-    # For exporting every tea in TeaStash to a CSV file
-    RichPrintInfo("Exporting TeaStash to CSV")
-    rawData = TeaStash
-    # For each tea, convert to dict
-    allData = []
-    for tea in rawData:
-        teaData = dumpTeaToDict(tea)
-        allData.append(teaData)
-        
-    # Seperate reviews from the tea data
-    allReviews = []
-    for tea in allData:
-        if len(tea["reviews"]) > 0:
-            for review in tea["reviews"]:
-                allReviews.append(review)
-    
-    # Flatten attributes and calculated values
-    for tea in allData:
-        for key, value in tea["attributes"].items():
-            if key not in tea:
-                tea[key] = value
-        for key, value in tea["calculated"].items():
-            if key not in tea:
-                tea[key] = value
-
-    for review in allReviews:
-        for key, value in review["attributes"].items():
-            if key not in review:
-                review[key] = value
-        for key, value in review["calculated"].items():
-            if key not in review:
-                review[key] = value
-
-    # Remove reviews from the tea data
-    for tea in allData:
-        tea.pop("reviews", None)
-        tea.pop("calculated", None)
-        tea.pop("attributes", None)
-    
-    # Remove attributes from the review data
-    for review in allReviews:
-        review.pop("attributes", None)
-        review.pop("calculated", None)
-    
-
-    # Swap datetime to string for all datetime objects
-    for tea in allData:
-        for key, value in tea.items():
-            if isinstance(value, dt.datetime):
-                datetimeString = parseDTToString(value)
-                dateString = datetimeString.split(" ")[0]
-                #timeString = datetimeString.split(" ")[1]
-                tea[key] = dateString
-    
-    for review in allReviews:
-        for key, value in review.items():
-            if isinstance(value, dt.datetime):
-                datetimeString = parseDTToString(value)
-                dateString = datetimeString.split(" ")[0]
-                #timeString = datetimeString.split(" ")[1]
-                review[key] = dateString
-
-    # Add headers for both by iterating over all keys in both lists
-    headers = []
-    for tea in allData:
-        for key in tea.keys():
-            if key not in headers:
-                headers.append(key)
-    headersReviews = []
-    for review in allReviews:
-        for key in review.keys():
-            if key not in headersReviews:
-                headersReviews.append(key)
-
-
-
-    # Create two CSV files, one for teas and one for reviews
-    with open(csvPath, "w", newline="") as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=headers)
-        writer.writeheader()
-        for tea in allData:
-            writer.writerow(tea)
-        RichPrintSuccess(f"Exported {len(allData)} teas to {csvPath}")
-
-    with open(csvPathReviews, "w", newline="") as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=headersReviews)
-        writer.writeheader()
-        for review in allReviews:
-            writer.writerow(review)
-        RichPrintSuccess(f"Exported {len(allReviews)} reviews to {csvPathReviews}")
-    return allData, allReviews
-
-
-#endregion
 
 def UI_CreateViewPort_MenuBar():
     # UI is constructed before backup thread is started, so check if it is enabled
@@ -9055,9 +5456,12 @@ def UI_CreateViewPort_MenuBar():
             dp.Button(label="Load", callback=LoadAll)
             with dp.Menu(label="Backup"):
                 dp.Button(label="Backup", callback=generateBackup)
+                dp.Button(label="Restore Latest Backup", callback=restoreLatestBackup)
                 dp.Checkbox(label="Auto Backup", callback=checkboxBackupThread, default_value=shouldBackupThread)
             with dp.Menu(label="Export"):
                 dp.Button(label="Export to CSV", callback=teaStashToCSV)
+                dp.Button(label="Export to NumPy (.npz)", callback=teaStashToNPZ)
+                dp.Button(label="Export to JSON", callback=teaStashToJSON)
         with dp.Menu(label="Stash"):
             dp.MenuItem(label="Log", callback=Menu_Stash)
             dp.MenuItem(label="Edit Categories", callback=Menu_EditCategories)
@@ -9083,7 +5487,7 @@ def UI_CreateViewPort_MenuBar():
             with dp.Menu(label="Library(TODO)"):
                 dp.Button(label="Press Me", callback=print_me)
         with dp.Menu(label="Debug"):
-            dp.Button(label="Demo", callback=demo.show_demo)
+            dp.Button(label="Demo", callback=showDemo)
             with dp.Menu(label="Ops"):
                 dp.Button(label="Terminal", callback=Menu_Terminal)
                 dp.Button(label="Renumber data", callback=renumberTeasAndReviews)
@@ -9101,47 +5505,49 @@ def UI_CreateViewPort_MenuBar():
                 
     
 
+# Font files of the families in session["validFonts"] and the size of their smallest font, the other sizes are FONT_SIZES
+FONT_FAMILIES = {
+    "OpenSans": ("OpenSans-Regular.ttf", "OpenSans-Bold.ttf", 18),
+    "Roboto": ("Roboto-Regular.ttf", "Roboto-Bold.ttf", 16),
+    "Merriweather": ("Merriweather_24pt-Regular.ttf", "Merriweather_24pt-Bold.ttf", 16),
+    "Montserrat": ("Montserrat-Regular.ttf", "Montserrat-Bold.ttf", 16),
+}
+FONT_SIZES = {2: 20, 3: 26}
+# Glyphs dearpygui rasterizes per font by default (Basic Latin and Latin-1 Supplement), for estimating atlas size
+FONT_ATLAS_GLYPHS = 224
+
+# Rough atlas size of one font: a size x size RGBA cell per glyph, an upper bound as most glyphs are narrower
+def estimateFontAtlasBytes(size):
+    return FONT_ATLAS_GLYPHS * size * size * 4
+
+def getFontFamilySizes(fontName):
+    return [FONT_FAMILIES[fontName][2]] + list(FONT_SIZES.values())
+
+# Adds the regular and bold fonts of a family in all sizes to the font registry, once
+def loadFontFamily(fontName):
+    loadedFonts = session.setdefault("loadedFonts", set())
+    if fontName in loadedFonts or fontName not in FONT_FAMILIES:
+        return
+    regularFile, boldFile, baseSize = FONT_FAMILIES[fontName]
+    for weight, fileName in [("Regular", regularFile), ("Bold", boldFile)]:
+        dpg.add_font(f"assets/fonts/{fileName}", baseSize, tag=f"{fontName}{weight}", parent="fontRegistry")
+        for size, pixels in FONT_SIZES.items():
+            dpg.add_font(f"assets/fonts/{fileName}", pixels, tag=f"{fontName}{weight}{size}", parent="fontRegistry")
+    loadedFonts.add(fontName)
+    atlasBytes = sum(2 * estimateFontAtlasBytes(size) for size in getFontFamilySizes(fontName))
+    RichPrintSuccessMinor(f"Loaded font {fontName}, about {atlasBytes / 1024:.0f} KB of font atlas")
+
 def bindLoadFonts():
-    # Load fonts
-    with dpg.font_registry():
-        dpg.add_font("assets/fonts/Roboto-Regular.ttf", 16, tag="RobotoRegular")
-        dpg.add_font("assets/fonts/Roboto-Regular.ttf", 20, tag="RobotoRegular2")
-        dpg.add_font("assets/fonts/Roboto-Regular.ttf", 26, tag="RobotoRegular3")
-
-        dpg.add_font("assets/fonts/Roboto-Bold.ttf", 16, tag="RobotoBold")
-        dpg.add_font("assets/fonts/Roboto-Bold.ttf", 20, tag="RobotoBold2")
-        dpg.add_font("assets/fonts/Roboto-Bold.ttf", 26, tag="RobotoBold3")
-        # Merriweather 24pt regular
-        dpg.add_font("assets/fonts/Merriweather_24pt-Regular.ttf", 16, tag="MerriweatherRegular")
-        dpg.add_font("assets/fonts/Merriweather_24pt-Regular.ttf", 20, tag="MerriweatherRegular2")
-        dpg.add_font("assets/fonts/Merriweather_24pt-Regular.ttf", 26, tag="MerriweatherRegular3")
-        # Merriweather 24pt bold
-        dpg.add_font("assets/fonts/Merriweather_24pt-Bold.ttf", 16, tag="MerriweatherBold")
-        dpg.add_font("assets/fonts/Merriweather_24pt-Bold.ttf", 20, tag="MerriweatherBold2")
-        dpg.add_font("assets/fonts/Merriweather_24pt-Bold.ttf", 26, tag="MerriweatherBold3")
-        # Montserrat-regular
-        dpg.add_font("assets/fonts/Montserrat-Regular.ttf", 16, tag="MontserratRegular")
-        dpg.add_font("assets/fonts/Montserrat-Regular.ttf", 20, tag="MontserratRegular2")
-        dpg.add_font("assets/fonts/Montserrat-Regular.ttf", 26, tag="MontserratRegular3")
-        # Montserrat-bold
-        dpg.add_font("assets/fonts/Montserrat-Bold.ttf", 16, tag="MontserratBold")
-        dpg.add_font("assets/fonts/Montserrat-Bold.ttf", 20, tag="MontserratBold2")
-        dpg.add_font("assets/fonts/Montserrat-Bold.ttf", 26, tag="MontserratBold3")
-        # Opensans regular
-        dpg.add_font("assets/fonts/OpenSans-Regular.ttf", 18, tag="OpenSansRegular")
-        dpg.add_font("assets/fonts/OpenSans-Regular.ttf", 20, tag="OpenSansRegular2")
-        dpg.add_font("assets/fonts/OpenSans-Regular.ttf", 26, tag="OpenSansRegular3")
-        # Opensans bold
-        dpg.add_font("assets/fonts/OpenSans-Bold.ttf", 18, tag="OpenSansBold")
-        dpg.add_font("assets/fonts/OpenSans-Bold.ttf", 20, tag="OpenSansBold2")
-        dpg.add_font("assets/fonts/OpenSans-Bold.ttf", 26, tag="OpenSansBold3")
-
-        # Set the default font to specified in settings
-        if settings["DEFAULT_FONT"] is not None and settings["DEFAULT_FONT"] in session["validFonts"]:
-            dpg.bind_font(f"{settings['DEFAULT_FONT']}Regular")
-        else:
-            RichPrintError(f"Default font {settings['DEFAULT_FONT']} not found, using OpenSansRegular")
-            dpg.bind_font("OpenSansRegular")
+    # Only the default family is loaded here, getFontName loads the others the first time they are asked for
+    dpg.add_font_registry(tag="fontRegistry")
+    fontName = settings["DEFAULT_FONT"]
+    if fontName is None or fontName not in session["validFonts"]:
+        RichPrintError(f"Default font {fontName} not found, using OpenSansRegular")
+        fontName = "OpenSans"
+    loadFontFamily(fontName)
+    dpg.bind_font(f"{fontName}Regular")
+    savedBytes = sum(2 * estimateFontAtlasBytes(size) for family in FONT_FAMILIES if family != fontName for size in getFontFamilySizes(family))
+    RichPrintInfo(f"Skipped loading {len(FONT_FAMILIES) - 1} font families at startup, saving about {savedBytes / 1024:.0f} KB of font atlas")
     
 def bind_image_registry():
     # Bind the image registry for the application
@@ -9195,32 +5601,34 @@ def debugPrintPolledTime():
     RichPrintInfo(f"Polled time since start: {polledTime} minutes")
 
 def main():
+    import screeninfo
     RichPrintInfo("Starting Tea Tracker")
     print("RaTea - Tea Tracker")
     timestartLoad = dt.datetime.now(tz=dt.timezone.utc)
     global globalTimeLastSave
     globalTimeLastSave = dt.datetime.now(tz=dt.timezone.utc)
-    # get monitor resolution
-    monitors = screeninfo.get_monitors()
-    monitor = monitors[0] if len(monitors) == 1 else None
-    if monitor is None:
-        # Find based on primary monitor
-        for m in monitors:
-            if m.is_primary:
-                monitor = m
-                break
-    Monitor_Scale = 1
-    if monitor.width >= 3840:
-        Monitor_Scale = 2.0
-    elif monitor.width < 2560:
-        Monitor_Scale = 1.5
-    elif monitor.width < 1920:
-        Monitor_Scale = 1.25
-    elif monitor.width < 1600:
-        Monitor_Scale = 1.0
-    elif monitor.width < 1280:
-        Monitor_Scale = 0.75
-    print(f"Monitor scale set to {Monitor_Scale} based on resolution {monitor.width}x{monitor.height}")
+    with profileStartupPhase("Monitor detection"):
+        # get monitor resolution
+        monitors = screeninfo.get_monitors()
+        monitor = monitors[0] if len(monitors) == 1 else None
+        if monitor is None:
+            # Find based on primary monitor
+            for m in monitors:
+                if m.is_primary:
+                    monitor = m
+                    break
+        Monitor_Scale = 1
+        if monitor.width >= 3840:
+            Monitor_Scale = 2.0
+        elif monitor.width < 2560:
+            Monitor_Scale = 1.5
+        elif monitor.width < 1920:
+            Monitor_Scale = 1.25
+        elif monitor.width < 1600:
+            Monitor_Scale = 1.0
+        elif monitor.width < 1280:
+            Monitor_Scale = 0.75
+        print(f"Monitor scale set to {Monitor_Scale} based on resolution {monitor.width}x{monitor.height}")
     baseDir = os.path.dirname(os.path.abspath(__file__))
     
 
@@ -9233,100 +5641,75 @@ def main():
     global backupThread
     backupThread = False
 
-    global default_settings
-    default_settings = {
-        "UI_SCALE": Monitor_Scale,
-        "SETTINGS_FILENAME": "ratea-data/user_settings.yml", # do not change
-        "TEA_CATEGORIES_PATH": f"ratea-data/tea_categories.yml",
-        "TEA_REVIEW_CATEGORIES_PATH": f"ratea-data/tea_review_categories.yml",
-        "CSV_OUTPUT_TEA_PATH": f"ratea-data/tea_stash.csv",
-        "CSV_OUTPUT_REVIEW_PATH": f"ratea-data/tea_review.csv",
-        "FALLBACK_DEFAULT_PATH": f"defaults",
-        "USERNAME": "John Puerh",
-        "DIRECTORY": "ratea-data",
-        "DATE_FORMAT": "%Y-%m-%d",
-        "TIMEZONE": "UTC", # default to UTC, doesn't really matter since time is not used
-        "TIMER_WINDOW_LABEL": True,
-        "TIMER_PERSIST_LAST_WINDOW": True, # TODO
-        "TEA_REVIEWS_PATH": f"ratea-data/tea_reviews.yml",
-        "BACKUP_PATH": f"ratea-data/backup",
-        "PERSISTANT_WINDOWS_PATH": f"ratea-data/persistant_windows.yml",
-        "APP_VERSION": "0.25.0", # Updates to most recently loaded
-        "AUTO_SAVE": True,
-        "AUTO_SAVE_INTERVAL": 15, # Minutes
-        "AUTO_SAVE_PATH": f"ratea-data/auto_backup",
-        "DEFAULT_FONT": "OpenSans", # OpenSans, Roboto, Merriweather, Montserrat
-        "START_DAY": "", # If none, will find the earliest tea date, else will use the date set here
-        "EXPORT_REVIEW_DONT_DRAW_BUBBLES": False, # If true, will not draw bubbles on export review graph (Will still write the text if images are disabled)
-        "EXPORT_REVIEW_DONT_GENERATE_IMAGES": False, # If true, will not generate images on export review graph
-        "EXPORT_REVIEW_DONT_GENERATE_TEA_LEVEL": False, # If true, will not generate tea level on export review graph
-    }
-    global settings
-    settings = default_settings
-    global session
-    session = {}
+    default_settings.clear()
+    default_settings.update(getDefaultSettings(Monitor_Scale))
+    settings.clear()
+    settings.update(default_settings)
+    session.clear()
     # Get a list of all valid types for Categories
     setValidTypes()
     session["validFonts"] = ["OpenSans", "Roboto", "Merriweather", "Montserrat"]
     
-    global TeaStash
-    global TeaCache
-    TeaStash = {}
-    TeaCache = {}
-    
-    global TeaCategories
-    TeaCategories = []
+    TeaStash.clear()
+    TeaCache.clear()
+    TeaCategories.clear()
+    TeaReviewCategories.clear()
 
 
-    global TeaReviewCategories
-    TeaReviewCategories = []
 
-
-
-    mainfilesExist, backupFilesExist = hasLoadableFiles()
-    if mainfilesExist and not DEBUG_ALWAYSNEWJSON:
-        RichPrintSuccess("Main files found, loading main files")
-        LoadAll()  # Load all data including settings, teas, categories, reviews, etc
-    elif backupFilesExist and not DEBUG_ALWAYSNEWJSON:
-        RichPrintError("Main files not found, loading backup files")
-        LoadAll(settings["BACKUP_PATH"])  # Load all data including settings, teas, categories, reviews, etc
-    else:
-        RichPrintError("No files found. Please copy the files to the correct directory. Exiting.")
-        exit(1)
+    with profileStartupPhase("LoadAll"):
+        mainfilesExist, backupFilesExist = hasLoadableFiles()
+        if mainfilesExist and not DEBUG_ALWAYSNEWJSON:
+            RichPrintSuccess("Main files found, loading main files")
+            LoadAll()  # Load all data including settings, teas, categories, reviews, etc
+        elif backupFilesExist and not DEBUG_ALWAYSNEWJSON:
+            RichPrintError("Main files not found, loading backup files")
+            LoadAll(settings["BACKUP_PATH"])  # Load all data including settings, teas, categories, reviews, etc
+        else:
+            RichPrintError("No files found. Please copy the files to the correct directory. Exiting.")
+            exit(1)
 
 
 
 
-    dataPath = f"{baseDir}/{settings['DIRECTORY']}"
-    session["dataPath"] = dataPath
-    hasDataDirectory = os.path.exists(dataPath)
-    if hasDataDirectory and not DEBUG_ALWAYSNEWJSON:
-        RichPrintSuccess(f"Found {settings['DIRECTORY']} at full path {os.path.abspath(settings['DIRECTORY'])}")
-    else:
-        RichPrintError(f"Could not find {settings['DIRECTORY']} at full path {os.path.abspath(settings['DIRECTORY'])}")
-        MakeFilePath(dataPath)
-        RichPrintInfo(f"Made {settings['DIRECTORY']} at full path {os.path.abspath(settings['DIRECTORY'])}")
+    with profileStartupPhase("Data directory"):
+        dataPath = f"{baseDir}/{settings['DIRECTORY']}"
+        session["dataPath"] = dataPath
+        hasDataDirectory = os.path.exists(dataPath)
+        if hasDataDirectory and not DEBUG_ALWAYSNEWJSON:
+            RichPrintSuccess(f"Found {settings['DIRECTORY']} at full path {os.path.abspath(settings['DIRECTORY'])}")
+        else:
+            RichPrintError(f"Could not find {settings['DIRECTORY']} at full path {os.path.abspath(settings['DIRECTORY'])}")
+            MakeFilePath(dataPath)
+            RichPrintInfo(f"Made {settings['DIRECTORY']} at full path {os.path.abspath(settings['DIRECTORY'])}")
 
     if len(TeaStash) == 0:
         RichPrintError("No teas found in stash! Potentially issue with loading teas. ")
     
     # Menu MUST be loaded before any font based calls, don't ask me why. Will Ref error if not
-    UI_CreateViewPort_MenuBar()
-    bindLoadFonts()
-    bind_image_registry()  # Bind the image registry for the application
+    with profileStartupPhase("Menu bar"):
+        UI_CreateViewPort_MenuBar()
+    with profileStartupPhase("Fonts"):
+        bindLoadFonts()
+    with profileStartupPhase("Image registry"):
+        bind_image_registry()  # Bind the image registry for the application
 
 
-    Settings_SaveCurrentSettings()
+    with profileStartupPhase("Save settings"):
+        Settings_SaveCurrentSettings()
     # Set the DearPyGui theme
         
         
     dpg.set_global_font_scale(settings["UI_SCALE"])
 
     # Start first welcome window
-    Menu_Welcome(None, None, None)
+    with profileStartupPhase("Welcome window"):
+        Menu_Welcome(None, None, None)
 
     
-    startStopBackupThread(settings["AUTO_SAVE"])
+    with profileStartupPhase("Threads"):
+        startStopSaveWorker(True)
+        startStopBackupThread(settings["AUTO_SAVE"])
     # Start the backup thread
     dp.Viewport.title = "RaTea"
     dp.Viewport.width = monitor.width
@@ -9340,6 +5723,10 @@ def main():
     timeDiffSeconds = timeDiff.total_seconds()
     RichPrintSuccess(f"Loaded RaTea in {timeDiffSeconds:.2f} seconds")
     print(f"Loaded RaTea in {timeDiffSeconds:.2f} seconds")
+    for line in formatStartupProfile():
+        RichPrintInfo(line)
+    if settings["STARTUP_PROFILE_PATH"] != "":
+        dumpStartupProfile(settings["STARTUP_PROFILE_PATH"])
 
     dpg.set_exit_callback(on_exit_callback)
 
@@ -9352,6 +5739,7 @@ def on_exit_callback():
     import warnings
     warnings.filterwarnings("ignore", category=RuntimeWarning)
     startStopBackupThread(False)  # Stop the backup thread if running
+    startStopSaveWorker(False)  # Write any queued saves before exiting
     dp.Runtime.stop()
 
 if __name__ == "__main__":
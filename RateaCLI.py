@@ -0,0 +1,184 @@
+# Command line entry point for batch jobs on the RaTea data, without opening the app.
+# Data is loaded with RateaCore only and no windows are built, so these can run from cron or other scripts.
+# Usage: python RateaCLI.py [--dir APP_DIR] [--log-level LEVEL] <command>
+#   verify [--repair]                   Check tea and review IDs are numbered in order, --repair renumbers and saves them
+#   export csv|json|npz [--out PATH]    Export to the paths in the settings, or --out (and --reviews-out for the review CSV)
+#   backup [--store PATH]               Store a backup snapshot in BACKUP_PATH, or in --store
+#   backups                             List the stored backups, newest first
+#   restore [NAME] [--store PATH]       Restore a backup over the live files, the newest if no name is given
+#   stats [--out PATH]                  Print the stats cache as JSON, or write it to --out
+# Results go to stdout and log messages to stderr. Exits with 1 when verify finds a problem or a command fails.
+import argparse
+import contextlib
+import datetime as dt
+import json
+import os
+import sys
+import time
+
+import RateaCore
+
+# Settings paths are relative to the app folder, the same folder the app is started from
+def setupSettings(appDir):
+    os.chdir(appDir)
+    RateaCore.default_settings.update(RateaCore.getDefaultSettings())
+    RateaCore.settings.update(RateaCore.default_settings)
+    RateaCore.session["settingsPath"] = f"{appDir}/{RateaCore.default_settings['SETTINGS_FILENAME']}"
+    if os.path.exists(RateaCore.session["settingsPath"]):
+        RateaCore.LoadSettings()
+    RateaCore.setValidTypes()
+
+def loadData(appDir, repairIDs=True):
+    setupSettings(appDir)
+    mainFilesExist, backupFilesExist = RateaCore.hasLoadableFiles()
+    if not mainFilesExist:
+        RateaCore.RichPrintError(f"No tea, category and review category files found in {appDir}")
+        return False
+    RateaCore.LoadAll(appDir, repairIDs=repairIDs)
+    return True
+
+# Stats hold sets, dates and category objects besides plain values
+def toJSONValue(value):
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, dt.datetime):
+        return value.isoformat()
+    if hasattr(value, "name"):
+        return value.name
+    return str(value)
+
+def commandVerify(args):
+    if not loadData(args.dir, repairIDs=False):
+        return 1, None
+    numTeas = len(RateaCore.TeaStash)
+    problem = RateaCore.findTeaIDProblem(RateaCore.TeaStash)
+    if problem is None:
+        return 0, f"IDs of {numTeas} teas and their reviews are in order"
+    if not args.repair:
+        return 1, f"{problem}, run verify --repair to renumber the teas and reviews"
+    RateaCore.renumberTeasAndReviews(printStash=False)
+    return 0, f"{problem}, renumbered and saved {numTeas} teas"
+
+def commandExport(args):
+    if not loadData(args.dir):
+        return 1, None
+    if args.format == "csv":
+        numTeas, numReviews = RateaCore.teaStashToCSV(args.out, args.reviewsOut)
+        return 0, f"Exported {numTeas} teas and {numReviews} reviews to {args.out or RateaCore.settings['CSV_OUTPUT_TEA_PATH']} and {args.reviewsOut or RateaCore.settings['CSV_OUTPUT_REVIEW_PATH']}"
+    if args.format == "json":
+        numTeas = RateaCore.teaStashToJSON(args.out)
+        return 0, f"Exported {numTeas} teas to {args.out or RateaCore.settings['JSON_OUTPUT_PATH']}"
+    RateaCore.teaStashToNPZ(args.out)
+    return 0, f"Exported {len(RateaCore.TeaStash)} teas to {args.out or RateaCore.settings['NPZ_OUTPUT_PATH']}"
+
+def commandBackup(args):
+    if not loadData(args.dir):
+        return 1, None
+    storePath = args.store or RateaCore.settings["BACKUP_PATH"]
+    name = RateaCore.createBackupSnapshot(storePath, kind="manual")
+    if not os.path.exists(f"{storePath}/snapshots/{name}.json"):
+        return 1, None
+    return 0, f"Stored backup {name} in {storePath}"
+
+def getBackupStores(args):
+    if args.store:
+        return [args.store]
+    return [RateaCore.settings["BACKUP_PATH"], RateaCore.settings["AUTO_SAVE_PATH"]]
+
+def commandBackups(args):
+    setupSettings(args.dir)
+    lines = []
+    for storePath in getBackupStores(args):
+        for name, manifest in RateaCore.listBackupSnapshots(storePath):
+            lines.append(f"{name}  {manifest.get('kind', 'manual'):<12}{len(manifest['files']):>3} files  {storePath}")
+    if len(lines) == 0:
+        return 0, "No backups stored"
+    return 0, "\n".join(lines)
+
+# (storePath, name) of the backup to restore, None if there is no such backup
+def findBackup(args):
+    if args.name is None and not args.store:
+        return RateaCore.findLatestBackupSnapshot()
+    for storePath in getBackupStores(args):
+        for name, manifest in RateaCore.listBackupSnapshots(storePath):
+            # Without a name, the newest backup that isn't a safety copy taken by an earlier restore
+            if name == args.name or (args.name is None and manifest.get("kind", None) != "pre-restore"):
+                return storePath, name
+    return None
+
+def commandRestore(args):
+    setupSettings(args.dir)
+    backup = findBackup(args)
+    if backup is None:
+        RateaCore.RichPrintError(f"No backup {args.name or ''} found to restore")
+        return 1, None
+    storePath, name = backup
+
+    # Keep the current state so the restore can be undone, when there is one
+    if loadData(args.dir):
+        RateaCore.createBackupSnapshot(RateaCore.settings["BACKUP_PATH"], kind="pre-restore")
+    if not RateaCore.restoreBackupSnapshot(storePath, name):
+        return 1, None
+    return 0, f"Restored backup {name} from {storePath}"
+
+def commandStats(args):
+    if not loadData(args.dir):
+        return 1, None
+    text = json.dumps(RateaCore.populateStatsCache(), indent=2, default=toJSONValue)
+    if args.out:
+        RateaCore.WriteFileAtomic(args.out, text)
+        return 0, f"Written stats to {args.out}"
+    return 0, text
+
+def buildParser():
+    parser = argparse.ArgumentParser(prog="RateaCLI.py", description="Batch jobs on the RaTea data, without opening the app")
+    parser.add_argument("--dir", default=os.path.dirname(os.path.abspath(__file__)), help="App folder holding ratea-data, defaults to the folder of this script")
+    parser.add_argument("--log-level", dest="logLevel", default="ERROR", choices=["ALL", "INFO", "WARNING", "ERROR", "CRITICAL"], help="Messages shown on stderr, as DEBUG_LEVEL in the app")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    verify = commands.add_parser("verify", help="Check tea and review IDs are numbered in order")
+    verify.add_argument("--repair", action="store_true", help="Renumber and save the teas and reviews if they are not")
+    verify.set_defaults(func=commandVerify)
+
+    export = commands.add_parser("export", help="Export the stash to CSV, JSON or NumPy columns")
+    export.add_argument("format", choices=["csv", "json", "npz"])
+    export.add_argument("--out", default=None, help="Output path, the path in the settings by default")
+    export.add_argument("--reviews-out", dest="reviewsOut", default=None, help="Review CSV path, for csv")
+    export.set_defaults(func=commandExport)
+
+    backup = commands.add_parser("backup", help="Store a backup snapshot")
+    backup.add_argument("--store", default=None, help="Backup store, BACKUP_PATH by default")
+    backup.set_defaults(func=commandBackup)
+
+    backups = commands.add_parser("backups", help="List stored backups")
+    backups.add_argument("--store", default=None, help="Only list this backup store")
+    backups.set_defaults(func=commandBackups)
+
+    restore = commands.add_parser("restore", help="Restore a backup over the live files")
+    restore.add_argument("name", nargs="?", default=None, help="Backup to restore, the newest if left out")
+    restore.add_argument("--store", default=None, help="Only look in this backup store")
+    restore.set_defaults(func=commandRestore)
+
+    stats = commands.add_parser("stats", help="Print the stats cache as JSON")
+    stats.add_argument("--out", default=None, help="Write to this file instead of stdout")
+    stats.set_defaults(func=commandStats)
+    return parser
+
+def main(argv=None):
+    parser = buildParser()
+    args = parser.parse_args(argv)
+    args.dir = os.path.abspath(args.dir)
+    if not os.path.isdir(args.dir):
+        parser.error(f"app folder {args.dir} does not exist")
+    RateaCore.DEBUG_LEVEL = args.logLevel
+    start = time.perf_counter()
+    # Everything the data functions print goes to stderr, so stdout only holds the result
+    with contextlib.redirect_stdout(sys.stderr):
+        exitCode, output = args.func(args)
+        RateaCore.RichPrintInfo(f"{args.command} finished in {time.perf_counter() - start:.2f} s")
+    if output is not None:
+        print(output)
+    return exitCode
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,5762 @@
+# Data side of RaTea: the tea and review model, categories, settings, saving and loading, stats and exports.
+# Nothing here imports DearPyGui, so scripts, benchmarks and worker processes can use it without a display.
+# Ratea.py builds the UI on top of it.
+import concurrent.futures
+import csv
+import datetime as dt
+import gzip
+import hashlib
+import itertools
+import json
+import lzma
+import math
+import os
+import pickle
+import queue
+import re
+import shutil
+import sqlite3
+from statistics import stdev
+import tempfile
+import threading
+import textwrap
+import time
+import zipfile
+from io import BytesIO
+from rich.console import Console as RichConsole
+import yaml
+
+
+# ALL - All messages
+# INFO - Informational messages that are not errors
+# WARNING - Warning messages that may indicate a problem or alteration
+# ERROR - Error messages that indicate a problem
+# (SUCCESS) - Success messages that indicate a successful operation, minor for operation that is part of a larger operation 
+# CRITICAL - Critical error messages that indicate a serious problem that may cause the program to crash
+DEBUG_LEVEL = "ERROR"  # ALL, INFO, WARNING, ERROR, CRITICAL
+
+#region Global Variables
+# Ratea.py imports these with the rest of the module, so while the app runs they are filled and emptied in place, never reassigned
+settings = {}
+default_settings = {}
+session = {}
+TeaStash = []
+TeaCache = {}
+TeaCategories = []
+TeaReviewCategories = []
+saveWorkerThread = False
+saveWorkerQueue = queue.Queue()
+#endregion
+
+
+#region Helpers1
+# Heavy modules used by only a few features (charts, fuzzy matching, clipboard, images) are imported where they are used,
+# so they cost nothing at startup. benchmarks/bench_import_time.py checks they stay out of the import of Ratea and RateaCore.
+# pyplot is only needed for the review export charts, and takes longer to import than the rest of the app
+def importPyplot():
+    import matplotlib
+    matplotlib.use('agg')
+    from matplotlib import pyplot
+    return pyplot
+
+richPrintConsole = RichConsole()
+terminalConsoleLogs = []
+
+def MakeFilePath(path):
+    # Make sure the folder exists
+    if not os.path.exists(path):
+        os.makedirs(path)
+        RichPrintSuccessMinor(f"Made {path} folder")
+    else:
+        RichPrintWarning(f"{path} folder already exists")
+        
+def WriteFile(path, content):
+    with open(path, "w") as file:
+        file.write(content)
+    RichPrintSuccessMinor(f"Written {path} to file")
+    
+def ReadFile(path):
+    with open(path, "r") as file:
+        RichPrintSuccessMinor(f"Read {path} from file")
+        return file.read()
+
+def ListFiles(path):
+    return os.listdir(path)
+
+# Use the libyaml C loader and dumper when PyYAML was built with them, they are several times faster
+if yaml.__with_libyaml__:
+    YamlLoader = yaml.CSafeLoader
+    YamlDumper = yaml.CSafeDumper
+else:
+    YamlLoader = yaml.SafeLoader
+    YamlDumper = yaml.SafeDumper
+
+# Loader for reading a document node by node, the C parser's events composed by PyYAML's composer
+if yaml.__with_libyaml__:
+    class YamlStreamLoader(yaml.cyaml.CParser, yaml.composer.Composer, yaml.constructor.SafeConstructor, yaml.resolver.Resolver):
+        def __init__(self, stream):
+            yaml.cyaml.CParser.__init__(self, stream)
+            yaml.composer.Composer.__init__(self)
+            yaml.constructor.SafeConstructor.__init__(self)
+            yaml.resolver.Resolver.__init__(self)
+else:
+    YamlStreamLoader = yaml.SafeLoader
+
+# Writes to a temp file next to path and renames it over, so a crash never leaves a half written file
+def WriteFileAtomic(path, text):
+    tempPath = f"{path}.tmp"
+    with open(tempPath, "w") as file:
+        file.write(text)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tempPath, path)
+
+# Cheap content hash of plain data, None if the data cannot be hashed
+def fingerprintData(data):
+    try:
+        text = json.dumps(data, sort_keys=True, default=str)
+    except (TypeError, ValueError):
+        return None
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+# Fingerprint of the data last read from or written to path, with the file size and mtime at that point
+def getFileFingerprint(path):
+    return session.setdefault("savedFileFingerprints", {}).get(os.path.abspath(path), None)
+
+def setFileFingerprint(path, fingerprint):
+    fingerprints = session.setdefault("savedFileFingerprints", {})
+    if fingerprint is None or not os.path.exists(path):
+        fingerprints.pop(os.path.abspath(path), None)
+        return
+    stat = os.stat(path)
+    fingerprints[os.path.abspath(path)] = (fingerprint, stat.st_size, stat.st_mtime_ns)
+
+# True if path still holds exactly what was last read or written with this fingerprint
+def isFileUnchanged(path, fingerprint):
+    saved = getFileFingerprint(path)
+    if fingerprint is None or saved is None or not os.path.exists(path):
+        return False
+    stat = os.stat(path)
+    return saved == (fingerprint, stat.st_size, stat.st_mtime_ns)
+
+# Returns True if the file was written, False if it already held the same data
+def WriteYaml(path, data):
+    fingerprint = fingerprintData(data)
+    if isFileUnchanged(path, fingerprint):
+        RichPrintSuccessMinor(f"{path} is unchanged, skipping write")
+        return False
+    try:
+        text = yaml.dump(data, Dumper=YamlDumper)
+    except yaml.representer.RepresenterError:
+        # Python specific objects (tuples, custom classes) need the full dumper
+        RichPrintWarning(f"Data for {path} is not plain YAML, falling back to the full dumper")
+        text = yaml.dump(data, Dumper=yaml.Dumper)
+    WriteFileAtomic(path, text)
+    setFileFingerprint(path, fingerprint)
+    RichPrintSuccessMinor(f"Written {path} to file")
+    return True
+
+def ReadYaml(path):
+    with open(path, "r") as file:
+        RichPrintSuccessMinor(f"Read {path} from file")
+        text = file.read()
+    try:
+        data = yaml.load(text, Loader=YamlLoader)
+    except yaml.constructor.ConstructorError:
+        # Files written by older versions may contain python tags the safe loader refuses
+        RichPrintWarning(f"{path} contains non-standard YAML tags, falling back to the full loader")
+        data = yaml.load(text, Loader=yaml.FullLoader)
+    # Remember what was read so saving the same data back can be skipped
+    setFileFingerprint(path, fingerprintData(data))
+    return data
+    
+def timezoneToOffset(timezone, daylightSaving=False):
+    # Convert timezone to offset
+    offset = 0
+    if timezone == "UTC":
+        offset = 0
+
+    # Daylight saving time
+    if daylightSaving and timezone != "UTC":
+        offset += 1
+    return offset
+        
+
+
+
+def parseDTToStringWithFallback(stringOrDT, fallbackString, quiet=False):
+    output = None
+    try:
+        output = parseDTToString(stringOrDT)
+        #if output is not None:
+    except Exception as e:
+        RichPrintError(f"Failed to parse date string: {stringOrDT}. Error: {e}")
+        # If it fails, return the fallback string
+        output = fallbackString.strip()
+    return output
+
+
+def parseDTToString(stringOrDT):
+    format = settings["DATE_FORMAT"]
+    timezone = settings["TIMEZONE"]
+    # Parse into datetime
+    datetimeobj = None
+    if isinstance(stringOrDT, dict) and "year" in stringOrDT and "month" in stringOrDT and "month_day" in stringOrDT:
+        datetimeobj = DateDictToDT(stringOrDT)  # Convert dict to datetime object
+    if isinstance(stringOrDT, str):
+        datetimeobj = dt.datetime.strptime(stringOrDT, format)
+    elif isinstance(stringOrDT, dt.datetime):
+        datetimeobj = stringOrDT
+    else:
+        raise ValueError("Input must be a string or datetime object.")
+
+    # Convert to timezone
+    timezoneObj = dt.timezone(dt.timedelta(hours=timezoneToOffset(timezone)))
+    datetimeobj = datetimeobj.astimezone(timezoneObj)
+    return datetimeobj.strftime(format)
+
+def parseDTToStringWithHoursMinutes(stringOrDT):
+    # Use consistant format with no slashes or colons
+    format = "%Y-%m-%d %H-%M"
+    timezone = settings["TIMEZONE"]
+    # Parse into datetime
+    datetimeobj = None
+    if isinstance(stringOrDT, str):
+        datetimeobj = dt.datetime.strptime(stringOrDT, format)
+    elif isinstance(stringOrDT, dt.datetime):
+        datetimeobj = stringOrDT
+    else:
+        raise ValueError(f"Input must be a string or datetime object., got {type(stringOrDT)}")
+
+    # Convert to timezone
+    timezoneObj = dt.timezone(dt.timedelta(hours=timezoneToOffset(timezone)))
+    datetimeobj = datetimeobj.astimezone(timezoneObj)
+    returnedString = datetimeobj.strftime(format)
+
+    # Clean of spaces, colons
+    returnedString = re.sub(r'\s+', ' ', returnedString)
+    returnedString = re.sub(r':', '', returnedString)
+    returnedString = re.sub(r' ', '', returnedString)
+    return returnedString
+
+# Formats tried after settings["DATE_FORMAT"] when a date string doesn't match it
+DATE_FALLBACK_FORMATS = [
+    "%Y-%m-%d",  # YYYY-MM-DD
+    "%m-%d-%Y",  # MM-DD-YYYY
+    "%d-%m-%Y",  # DD-MM-YYYY
+    "%Y/%m/%d",  # YYYY/MM/DD
+    "%m/%d/%Y",  # MM/DD/YYYY
+    "%d/%m/%Y",  # DD/MM/YYYY
+    "%Y-%m-%d %H:%M",  # YYYY-MM-DD HH:MM (with time)
+    "%m-%d-%Y %H:%M",  # MM-DD-YYYY HH:MM (with time)
+    "%d-%m-%Y %H:%M",  # DD-MM-YYYY HH:MM (with time)
+    "%Y/%m/%d %H:%M",  # YYYY/MM/DD HH:MM (with time)
+    # With HMS
+    "%Y-%m-%d %H:%M:%S",  # YYYY-MM-DD HH:MM:SS
+    "%m-%d-%Y %H:%M:%S",  # MM-DD-YYYY HH:MM:SS
+    "%d-%m-%Y %H:%M:%S",  # DD-MM-YYYY HH:MM:SS
+    "%Y/%m/%d %H:%M:%S",  # YYYY/MM/DD HH:MM:SS
+]
+
+# Regex for each strptime directive a date format can be compiled from
+DATE_FORMAT_DIRECTIVES = {
+    "%Y": r"(?P<year>\d{4})",
+    "%m": r"(?P<month>\d{1,2})",
+    "%d": r"(?P<day>\d{1,2})",
+    "%H": r"(?P<hour>\d{1,2})",
+    "%M": r"(?P<minute>\d{1,2})",
+    "%S": r"(?P<second>\d{1,2})",
+}
+CompiledDateFormats = {}
+
+# Turns a strptime format into a parser that returns a datetime, or None when the string doesn't match.
+# Formats made of the directives above become one regex match, others fall back to strptime.
+def compileDateFormat(format):
+    parser = CompiledDateFormats.get(format, None)
+    if parser is not None:
+        return parser
+
+    parts = re.split(r"(%.)", format)
+    directives = parts[1::2]
+    if all(directive in DATE_FORMAT_DIRECTIVES for directive in directives) and len(set(directives)) == len(directives):
+        pattern = ""
+        for i, part in enumerate(parts):
+            if i % 2 == 1:
+                pattern += DATE_FORMAT_DIRECTIVES[part]
+            else:
+                # Whitespace in a format matches any run of whitespace, as with strptime
+                pattern += r"\s+".join(re.escape(piece) for piece in re.split(r"\s+", part))
+        regex = re.compile(pattern)
+        def parser(string):
+            match = regex.fullmatch(string)
+            if match is None:
+                return None
+            fields = {"year": 1900, "month": 1, "day": 1}
+            for key, value in match.groupdict().items():
+                fields[key] = int(value)
+            try:
+                return dt.datetime(**fields)
+            except ValueError:
+                return None
+    else:
+        def parser(string):
+            try:
+                return dt.datetime.strptime(string, format)
+            except ValueError:
+                return None
+    CompiledDateFormats[format] = parser
+    return parser
+
+# Schema driven attribute decoding
+# Only attributes of date and datetime categories are parsed as dates, looked up by category name or role.
+# Formats are always tried in the same order, DATE_FORMAT then the fallbacks, so an ambiguous date like 03-04-2024
+# reads the same whatever came before it. Strings already parsed are remembered, dates repeat a lot across a stash.
+ParsedDateStrings = {}
+PARSED_DATE_STRINGS_LIMIT = 100000
+
+def getDateAttributeKeys(categories):
+    keys = []
+    for cat in categories:
+        if cat.categoryType in ["date", "datetime"]:
+            keys.append(cat.name)
+            if cat.categoryRole != cat.name:
+                keys.append(cat.categoryRole)
+    return keys
+
+def parseDateAttribute(value):
+    value = value.strip()
+    cacheKey = (settings["DATE_FORMAT"], value)
+    if cacheKey in ParsedDateStrings:
+        return ParsedDateStrings[cacheKey]
+    parsed = None
+    for format in [settings["DATE_FORMAT"]] + DATE_FALLBACK_FORMATS:
+        parsed = compileDateFormat(format)(value)
+        if parsed is not None:
+            break
+    if len(ParsedDateStrings) >= PARSED_DATE_STRINGS_LIMIT:
+        ParsedDateStrings.clear()
+    ParsedDateStrings[cacheKey] = parsed
+    return parsed
+
+# Decodes the date attributes of one tea (or review) in place
+def decodeAttributes(attributes, review=False):
+    for key in getDateAttributeKeys(TeaReviewCategories if review else TeaCategories):
+        value = attributes.get(key, None)
+        if isinstance(value, str) and value.strip() != "":
+            parsed = parseDateAttribute(value)
+            if parsed is not None:
+                attributes[key] = parsed
+    return attributes
+
+def parseStringToDT(string, default=None, format=None, silent=False):
+    if type(string) is dt.datetime:
+        # If it's already a datetime object, return it directly
+        return string
+    string: str = string.strip()
+    fallbackFormats = DATE_FALLBACK_FORMATS
+
+    if format is None:
+        format = settings["DATE_FORMAT"]
+
+    if type(string) is dt.datetime:
+        # If it's already a datetime object, return it directly
+        return string
+    try:
+        return dt.datetime.strptime(string, format)
+    except ValueError:
+        for fallback_format in fallbackFormats:
+            try:
+                return dt.datetime.strptime(string, fallback_format)
+            except ValueError:
+                continue
+
+    # Nothing works
+    if default is not None:
+        if isinstance(default, dt.datetime):
+            return default
+        elif isinstance(default, str):
+            return dt.datetime.strptime(default, format)
+        else:
+            raise ValueError("Default value must be a datetime object or a string in the correct format.")
+    else:
+        # If no valid date found and no default provided, return None
+        if silent == False:
+            RichPrintError(f"Failed to parse date string: {string}. No valid date found and no default provided (Silent={silent})")
+    return False  # Return False if no valid date found and no default provided
+    
+
+
+def DTToDateDict(dt):
+    # Convert datetime to date dict
+    year = None
+    try:
+        year = dt.year
+    except AttributeError as e:
+        RichPrintError(f"DTToDateDict: dt is not a datetime object: {e}")
+    except Exception as e:
+        RichPrintError(f"DTToDateDict: {e}")
+        return None
+    if year > 1900:
+        year = year - 1900
+
+    # Month is 0-indexed
+    # Year starts from 1900
+    return {
+        'month_day': dt.day,
+        'year': year,
+        'month': dt.month-1,
+    }
+    
+def DateDictToDT(dateDict):
+    # Convert date dict to datetime
+    year = dateDict['year']
+    if year < 1900:
+        year += 1900  # Convert 2-digit year to 4-digit year
+    return dt.datetime(year, dateDict['month']+1, dateDict['month_day'])
+
+# Timestamp based operations
+
+def TimeStampToDateTime(timestamp):
+    # Convert timestamp to datetime
+    return dt.datetime.fromtimestamp(timestamp)
+def DateTimeToTimeStamp(datetime):
+    # Convert datetime to timestamp
+    return int(datetime.timestamp())
+def TimeStampToDateDict(timestamp):
+    # Convert timestamp to date dict
+    datetime = TimeStampToDateTime(timestamp)
+    return DTToDateDict(datetime)
+def DateDictToTimeStamp(dateDict):
+    # Convert date dict to timestamp
+    datetime = DateDictToDT(dateDict)
+    return DateTimeToTimeStamp(datetime)
+def TimeStampToString(timestamp, format=None):
+    # Convert timestamp to string
+    if format is None:
+        format = settings["DATE_FORMAT"]
+    datetime = TimeStampToDateTime(timestamp)
+    return parseDTToString(datetime)
+def TimeStampToStringWithHoursMinutes(timestamp):
+    # Convert timestamp to string with hours and minutes
+    format = "%Y-%m-%d %H-%M"
+    datetime = TimeStampToDateTime(timestamp)
+    return parseDTToStringWithHoursMinutes(datetime, format=format)
+def TimeStampToStringWithFallback(timestamp, fallbackString):
+    # Convert timestamp to string with fallback
+    datetime = TimeStampToDateTime(timestamp)
+    return parseDTToStringWithFallback(datetime, fallbackString=fallbackString, quiet=True)
+def AnyDTFormatToTimeStamp(unknownDT):
+    # Convert any datetime format to timestamp
+    if type(unknownDT) is dt.datetime:
+        return DateTimeToTimeStamp(unknownDT)
+    elif isinstance(unknownDT, str):
+        return DateDictToTimeStamp(parseStringToDT(unknownDT, silent=True))
+    elif isinstance(unknownDT, dict):
+        return DateDictToTimeStamp(DateDictToDT(unknownDT))
+    elif isinstance(unknownDT, int) or isinstance(unknownDT, float):
+        # If it's a timestamp, return it directly
+        return int(unknownDT)
+    else:
+        raise ValueError("Invalid datetime format")
+def StringToTimeStamp(string, silent=False):
+    # Convert string to timestamp
+    dt = parseStringToDT(string, silent=silent)
+    return DateTimeToTimeStamp(dt)
+
+
+
+
+def RichPrint(text, color, typeText="console"):
+    richPrintConsole.print(text, style=color)
+    # Add to logs
+    timeStr = dt.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    
+    # Remove if greater than 2500 entries
+    global terminalConsoleLogs
+    if len(terminalConsoleLogs) > 2500:
+        terminalConsoleLogs.pop(0)
+    terminalConsoleLogs.append(f"[{typeText}] {timeStr} -- {text}")
+
+def RichPrintCritical(text):
+    if DEBUG_LEVEL == "CRITICAL" or DEBUG_LEVEL == "WARNING" or DEBUG_LEVEL == "ERROR" or DEBUG_LEVEL == "CRITICAL" or DEBUG_LEVEL == "ALL" or DEBUG_LEVEL == "INFO":
+        RichPrint(f"CRITICAL: {text}", "bold red", typeText="CRITICAL")
+
+def RichPrintError(text):
+    if DEBUG_LEVEL == "ERROR" or DEBUG_LEVEL == "ALL" or DEBUG_LEVEL == "INFO" or DEBUG_LEVEL == "WARNING":
+        RichPrint(text, "bold red", typeText="ERROR")
+def RichPrintInfo(text):
+    if DEBUG_LEVEL == "INFO" or DEBUG_LEVEL == "ALL":
+        RichPrint(text, "blue", typeText="INFO")
+def RichPrintSuccess(text):
+    if DEBUG_LEVEL == "INFO" or DEBUG_LEVEL == "WARNING" or DEBUG_LEVEL == "ERROR" or DEBUG_LEVEL == "ALL":
+        RichPrint(text, "bold green", typeText="SUCCESS")
+def RichPrintSuccessMinor(text):
+    if DEBUG_LEVEL == "INFO" or DEBUG_LEVEL == "WARNING" or DEBUG_LEVEL == "ERROR" or DEBUG_LEVEL == "ALL":
+        RichPrint(text, "dark_green", typeText="SUCCESS_MINOR")
+def RichPrintWarning(text):
+    if DEBUG_LEVEL == "WARNING" or DEBUG_LEVEL == "ALL" or DEBUG_LEVEL == "INFO":
+        RichPrint(text, "bold yellow", typeText="WARNING")
+def RichPrintSeparator():
+    if DEBUG_LEVEL == "INFO" or DEBUG_LEVEL == "ALL":
+        RichPrint("--------------------------------------------------", "bold white")
+
+def print_me(sender, data, user_data):
+    print("Hello World")
+    print(sender, data, user_data)
+
+def Settings_SaveCurrentSettings():
+    WriteYaml(session["settingsPath"], settings)
+    RichPrintSuccessMinor("Saved current settings to file")
+
+# Fast print the ID and names of all teas and reviews in a tree
+def printTeasAndReviews():
+    RichPrintSeparator()
+    RichPrintInfo("Teas and Reviews:")
+    for i, tea in enumerate(TeaStash):
+        RichPrintInfo(f"Tea {i}: {tea.name} ({tea.dateAdded})")
+        if not tea.isReviewsLoaded():
+            RichPrintInfo(f"\t{tea.getNumReviews()} reviews (not loaded)")
+            continue
+        for j, review in enumerate(tea.reviews):
+            RichPrintInfo(f"\tReview {j}: {review.name} ({review.dateAdded})")
+    RichPrintSeparator()
+
+# Fast print of Categories and Review Categories
+def printCategories():
+    RichPrintSeparator()
+    RichPrintInfo("Categories:")
+    for i, cat in enumerate(TeaCategories):
+        RichPrintInfo(f"Category {i}: {cat.name} ({cat.categoryType}) ({cat.categoryRole})")
+    RichPrintSeparator()
+    RichPrintInfo("Review Categories:")
+    for i, cat in enumerate(TeaReviewCategories):
+        RichPrintInfo(f"Category {i}: {cat.name} ({cat.categoryType}) ({cat.categoryRole})")
+    RichPrintSeparator()
+#endregion
+
+
+#region Helpers2
+
+
+
+
+# Iterates through list of categories and returns first category id that matches the role
+def getCategoryIDByrole(role):
+    noneFoundValue = -1
+    for i, cat in enumerate(TeaCategories):
+        if cat.categoryRole == role:
+            return i
+        
+    return noneFoundValue
+def getCategoryByrole(role):
+    catID = getCategoryIDByrole(role)
+    if catID == -1:
+        return None
+    return TeaCategories[catID]
+
+def getAlLCategoryEntriesByID(categoryID, review=False):
+    # Get the values of all entries of a category by ID, returning the list of values
+    returnList = []
+    catName = ""
+    catRole = ""
+
+    
+    if review == True:
+        catName = TeaReviewCategories[categoryID].name
+        catRole = TeaReviewCategories[categoryID].categoryRole
+    else:
+        catName = TeaCategories[categoryID].name
+        catRole = TeaCategories[categoryID].categoryRole
+    
+    if review:
+        for tea in TeaStash:
+            for review in tea.reviews:
+                if catName in review.attributes:
+                    returnList.append(review.attributes[catName])
+                elif catRole in review.attributes:
+                    returnList.append(review.attributes[catRole])
+    else:
+        for tea in TeaStash:
+            if catName in tea.attributes:
+                returnList.append(tea.attributes[catName])
+            elif catRole in tea.attributes:
+                returnList.append(tea.attributes[catRole])
+
+
+    return returnList
+
+# Get all entries and uses function provided on the category to get the value
+def aggregateCategoryEntriesByID(categoryID, review=False, func=None):
+    if func is None:
+        # Average by default
+        func = lambda x: sum(x) / len(x)
+
+    returnList = getAlLCategoryEntriesByID(categoryID, review=review)
+    if len(returnList) == 0:
+        RichPrintWarning(f"No entries found for category {categoryID} {TeaCategories[categoryID].name}, returning 0")
+
+    returnValue = func(returnList)
+
+    return returnValue
+
+# Average category entries by ID
+def averageCategoryEntriesByID(categoryID, review=False):
+    # Average function, only if the category is a number
+    def averageFunc(x):
+        if len(x) == 0:
+            return 0
+        if isinstance(x[0], str):
+            return -1
+        elif isinstance(x[0], dt.datetime):
+            return -1
+        return round(sum(x) / len(x), 3)
+    return aggregateCategoryEntriesByID(categoryID, review=review, func=averageFunc)
+
+# Sum category entries by ID
+def sumCategoryEntriesByID(categoryID, review=False):
+    # Sum function, only if the category is a number
+    def sumFunc(x):
+        if len(x) == 0:
+            return 0
+        if isinstance(x[0], str):
+            return -1
+        elif isinstance(x[0], dt.datetime):
+            return -1
+        return round(sum(x), 3)
+    return aggregateCategoryEntriesByID(categoryID, review=review, func=sumFunc)
+
+# Count category entries by ID
+def countCategoryEntriesByID(categoryID, review=False):
+    # Count function
+    def countFunc(x):
+        return len(x)
+    return aggregateCategoryEntriesByID(categoryID, review=review, func=countFunc)
+
+# Unique category entries by ID
+def uniqueCategoryEntriesByID(categoryID, review=False):
+    # Unique function
+    def uniqueFunc(x):
+        return list(set(x))
+    return aggregateCategoryEntriesByID(categoryID, review=review, func=uniqueFunc)
+
+# UniqueEntries with count by ID
+def uniqueEntriesWithCountByID(categoryID, review=False):
+    # Unique function with count
+    def uniqueFunc(x):
+        return {i: x.count(i) for i in set(x)}
+    return aggregateCategoryEntriesByID(categoryID, review=review, func=uniqueFunc)
+
+def debugGetcategoryRole():
+    allroleCategories = []
+    for k, v in session["validroleCategory"].items():
+        for i, cat in enumerate(v):
+            allroleCategories.append(cat)
+
+    # Dedup and remove UNUSED
+    allroleCategories = list(set(allroleCategories))
+    allroleCategories.remove("UNUSED")
+
+    # Print a tea dict for debugging
+    RichPrintInfo(f"TeaStash: { {key: getattr(TeaStash[0], key, None) for key in StashedTea.__slots__} }")
+
+    validCatgories = []
+    for i, cat in enumerate(allroleCategories):
+        if cat == "ID":
+            continue
+
+        hasCoorespondingCategory = getCategoryIDByrole(cat)
+        if hasCoorespondingCategory == -1:
+            RichPrintWarning(f"Category {cat} does not have a cooresponding category")
+            continue
+        else:
+            # Get info on category
+            numEntriesInCategory = 0
+            for tea in TeaStash:
+                if cat in tea.attributes:
+                    numEntriesInCategory += 1
+
+            # Get the values of all entries of a category by ID, then truncate to 10
+            dataAverage = averageCategoryEntriesByID(hasCoorespondingCategory, review=False)
+            dataUnique = uniqueCategoryEntriesByID(hasCoorespondingCategory, review=False)
+            dataSum = sumCategoryEntriesByID(hasCoorespondingCategory, review=False)
+            dataCount = countCategoryEntriesByID(hasCoorespondingCategory, review=False)
+            dataUniqueCount = uniqueEntriesWithCountByID(hasCoorespondingCategory, review=False)
+
+
+            RichPrintInfo(f"Category {cat} has a cooresponding category {hasCoorespondingCategory} of name {TeaCategories[hasCoorespondingCategory].name}")
+            RichPrintInfo(f"Category {cat} has average {dataAverage}, unique {dataUnique}, sum {dataSum}, count {dataCount}, uniqueCount {dataUniqueCount}")
+
+            if dataCount > 0:
+                validCatgories.append(cat)
+    RichPrintSuccess(f"Valid categories: {validCatgories}")
+
+def getValidCategoryRolesList():
+    # Get all valid category roles from the session
+    allroleCategories = []
+    for k, v in session["validroleCategory"].items():
+        for i, cat in enumerate(v):
+            allroleCategories.append(cat)
+
+    # Dedup and remove UNUSED
+    allroleCategories = list(set(allroleCategories))
+    allroleCategories.remove("UNUSED")
+
+    validCategoryRoles = []
+    for i, cat in enumerate(allroleCategories):
+        if cat == "ID":
+            continue
+
+        hasCoorespondingCategory = getCategoryIDByrole(cat)
+        if hasCoorespondingCategory == -1:
+            RichPrintWarning(f"Category {cat} does not have a cooresponding category")
+            continue
+        else:
+            # Get info on category
+            numEntriesInCategory = 0
+            for tea in TeaStash:
+                if cat in tea.attributes:
+                    numEntriesInCategory += 1
+
+            # Get the values of all entries of a category by ID, then truncate to 10
+            #dataAverage = averageCategoryEntriesByID(hasCoorespondingCategory, review=False)
+            #dataUnique = uniqueCategoryEntriesByID(hasCoorespondingCategory, review=False)
+            #dataSum = sumCategoryEntriesByID(hasCoorespondingCategory, review=False)
+            dataCount = countCategoryEntriesByID(hasCoorespondingCategory, review=False)
+
+            if dataCount > 0:
+                validCategoryRoles.append(cat)
+
+    return validCategoryRoles, allroleCategories
+
+def getValidReviewCategoryRolesList():
+    # Get all valid category roles from the session
+    allroleCategories = []
+    for k, v in session["validroleReviewCategory"].items():
+        for i, cat in enumerate(v):
+            allroleCategories.append(cat)
+
+    # Dedup and remove UNUSED
+    allroleCategories = list(set(allroleCategories))
+    allroleCategories.remove("UNUSED")
+
+    validCategoryRoles = []
+    for i, cat in enumerate(allroleCategories):
+        if cat == "ID":
+            continue
+
+        hasCoorespondingCategory = getReviewCategoryIDByrole(cat)
+        if hasCoorespondingCategory == -1:
+            RichPrintWarning(f"Category {cat} does not have a cooresponding category")
+            continue
+        else:
+            # Get info on category, from the review summaries so reviews do not have to be loaded
+            # Get the values of all entries of a category by ID, then truncate to 10
+            #dataAverage = averageCategoryEntriesByID(hasCoorespondingCategory, review=True)
+            #dataUnique = uniqueCategoryEntriesByID(hasCoorespondingCategory, review=True)
+            #dataSum = sumCategoryEntriesByID(hasCoorespondingCategory, review=True)
+            category = TeaReviewCategories[hasCoorespondingCategory]
+            dataCount = countReviewEntriesByKey([category.name, category.categoryRole])
+
+            if dataCount > 0:
+                validCategoryRoles.append(cat)
+
+    return validCategoryRoles, allroleCategories
+
+# Number of reviews with any of the given attribute keys, taken from the review summaries
+# A review holding more than one of the keys is counted once per key
+def countReviewEntriesByKey(keys):
+    count = 0
+    for tea in TeaStash:
+        attributeCounts = tea.getReviewSummary()["attributeCounts"]
+        for key in set(keys):
+            count += attributeCounts.get(key, 0)
+    return count
+
+def getStatsOnCategoryByRole(role, review=False):
+    if review:
+        # Get all review categories
+        id = getReviewCategoryIDByrole(role)
+        sum, avrg, count, unique = sumCategoryEntriesByID(id, review=True), averageCategoryEntriesByID(id, review=True), countCategoryEntriesByID(id, review=True), uniqueCategoryEntriesByID(id, review=True)
+        uniqueCount = uniqueEntriesWithCountByID(id, review=True)
+        return sum, avrg, count, unique, uniqueCount
+    else:
+        # Get all categories
+        id = getCategoryIDByrole(role)
+        sum, avrg, count, unique = sumCategoryEntriesByID(id, review=False), averageCategoryEntriesByID(id, review=False), countCategoryEntriesByID(id, review=False), uniqueCategoryEntriesByID(id, review=False)
+        uniqueCount = uniqueEntriesWithCountByID(id, review=False)
+        return sum, avrg, count, unique, uniqueCount
+    
+
+# Iterate through ReviewCategories and return the first category id that matches the role
+def getReviewCategoryIDByrole(role):
+    noneFoundValue = -1
+    for i, cat in enumerate(TeaReviewCategories):
+        if cat.categoryRole == role:
+            return i
+        
+    return noneFoundValue
+
+def debugGetReviewcategoryRole():
+    allroleCategories = []
+    for k, v in session["validroleReviewCategory"].items():
+        for i, cat in enumerate(v):
+            allroleCategories.append(cat)
+
+    # Dedup and remove UNUSED
+    allroleCategories = list(set(allroleCategories))
+    allroleCategories.remove("UNUSED")
+
+    # Print a tea dict for debugging
+    RichPrintInfo(f"TeaStash: { {key: getattr(TeaStash[1], key, None) for key in StashedTea.__slots__} }")
+    
+    validCatgories = []
+    for i, cat in enumerate(allroleCategories):
+        if cat == "ID":
+            continue
+
+        hasCoorespondingCategory = getReviewCategoryIDByrole(cat)
+        if hasCoorespondingCategory == -1:
+            RichPrintWarning(f"Category {cat} does not have a cooresponding category")
+            continue
+        else:
+            # Get info on category
+            numEntriesInCategory = 0
+            for tea in TeaStash:
+                for review in tea.reviews:
+                    if cat in review.attributes:
+                        numEntriesInCategory += 1
+
+            # Get the values of all entries of a category by ID, then truncate to 10
+            dataAverage = averageCategoryEntriesByID(hasCoorespondingCategory, review=True)
+            dataUnique = uniqueCategoryEntriesByID(hasCoorespondingCategory, review=True)
+            dataSum = sumCategoryEntriesByID(hasCoorespondingCategory, review=True)
+            dataCount = countCategoryEntriesByID(hasCoorespondingCategory, review=True)
+            
+            
+            RichPrintInfo(f"Category {cat} has a cooresponding category {hasCoorespondingCategory} of name {TeaReviewCategories[hasCoorespondingCategory].name}")
+            RichPrintInfo(f"Category {cat} has average {dataAverage}, unique {dataUnique}, sum {dataSum}, count {dataCount}")
+            if dataCount > 0:
+                validCatgories.append(cat)
+
+    RichPrintSuccess(f"Valid categories: {validCatgories}")
+
+# Returns what is wrong with the tea and review IDs, None if they are already as renumberTeasAndReviews leaves them:
+# teas numbered by position, each tea's reviews numbered from 0 with the tea as parent. Lazy reviews are not loaded.
+def findTeaIDProblem(stash):
+    for i, tea in enumerate(stash):
+        if tea.id != i:
+            return f"Tea {tea.name} at position {i} has ID {tea.id}"
+        if not tea.isReviewsLoaded():
+            if not tea.reviewSummary["idsInOrder"]:
+                return f"Reviews of tea {i} are not numbered in order"
+            continue
+        for j, review in enumerate(tea.reviews):
+            if review.id != j or review.parentID != i:
+                return f"Review {j} of tea {i} has ID {review.id} and parent {review.parentID}"
+    return None
+
+# Renumbers the IDs of all teas and reviews in the stash
+def renumberTeasAndReviews(save=True, printStash=True):
+    global TeaStash
+    RichPrintInfo("Renumbering Teas and Reviews...")
+    
+    # Sort by date added, if available, otherwise by id
+    if hasattr(TeaStash, 'sort') and callable(getattr(TeaStash, 'sort')):
+        TeaStash.sort(key=lambda tea: (getattr(tea, 'date', dt.datetime.min), tea.id))
+    else:
+        RichPrintWarning("TeaStash does not support sorting or has no dateAdded attribute. Renumbering will proceed without sorting.")
+        # Sort by id only if no dateAdded attribute is found
+        TeaStash.sort(key=lambda tea: tea.id)  # Fallback to sorting by id if no dateAdded attribute exists
+
+    # Renumber teas
+    for i, tea in enumerate(TeaStash):
+        tea.id = i
+
+        # Renumber reviews, reviews that are not loaded are only loaded if their IDs are out of order
+        if not tea.isReviewsLoaded() and tea.reviewSummary["idsInOrder"]:
+            continue
+        for j, review in enumerate(tea.reviews):
+            review.id = j
+            review.parentID = tea.id  # Ensure parent ID is correct
+
+    RichPrintSuccessMinor("Completed renumbering Teas and Reviews.")
+    if printStash:
+        printTeasAndReviews()  # Print the updated teas and reviews for verification
+
+    if save:
+        # Save to file after renumbering
+        saveTeasData(TeaStash, settings["TEA_REVIEWS_PATH"])
+        RichPrintSuccess("Saved renumbered teas and reviews to file.")
+#endregion
+
+
+#region Grade letter functions
+
+
+
+
+
+def getGradeList():
+    return ["S+ (5.0)", "S (4.5)", "S- (4.25)", "A+ (4.0)", "A (3.5)", "A- (3.25)", "B+ (3.0)", "B (2.5)", "B- (2.25)", "C+ (2.0)", "C (1.5)", "C- (1.25)", "D+ (1.0)", "D (0.5)", "D- (0.25)", "F (0)"]
+
+def getGradeValue(grade, silent=False):
+    # Get the value of a grade
+    if grade is None or grade == "":
+        if not silent:
+            RichPrintError("Grade is None or empty")
+        return None
+    gradingOptions = getGradeList()
+    if grade in gradingOptions:
+        return float(grade.split("(")[1].split(")")[0])
+    else:
+        if grade == "---":
+            return 0.0
+        if not silent:
+            RichPrintError(f"Grade {grade} not found in grading options")
+        return None
+
+def getGradeNumericalList():
+    # Get a list of numerical values for the grades
+    return [getGradeValue(grade) for grade in getGradeList() if getGradeValue(grade) is not None]
+
+def getGradeLetter(value):
+    # Get the letter grade for a value
+    if value is None or value == "":
+        return value
+    gradingOptions = getGradeList()
+    for grade in gradingOptions:
+        if getGradeValue(grade) == value:
+            return grade
+    RichPrintError(f"Value {value} not found in grading options")
+    return None
+
+def getGradeLetterFuzzy(value, onlyLetter=False):
+    # Gets letter based on fuzzy range in the format
+    # Letter (actual value)
+    # Letters start at defined range and end right above the next range
+    # IE S+ is from 4.51 to 5.0, S is from 4.26 to 4.5, etc.
+    if value is None or value == "":
+        return None
+    gradingOptions = getGradeList()
+    
+    # If out of range
+    if value < 0 or value > 5:
+        return None
+    
+    # Round value to 3 decimal places
+    value = round(value, 3)
+    
+    for grade in gradingOptions:
+        gradeLettersOnly = grade.split(" (")[0]  # Get the letter part of the grade
+        # If exact match, return grade
+        if getGradeValue(grade) == value:
+            if onlyLetter:
+                return f"{gradeLettersOnly}"
+            else:
+                return f"{gradeLettersOnly} ({value})"
+        
+        upperBound = getGradeValue(grade)
+        lowerBound = upperBound - 0.5  # Assuming each grade has a range of 0.25
+        if "+" not in grade:
+            # If grade has a plus, it is the upper bound of the range
+            lowerBound = upperBound - 0.25
+        if grade == "F (0)":
+            # F is a special case, it is always 0
+            lowerBound = 0
+            upperBound = 0.25
+
+        if onlyLetter:
+            if lowerBound < value <= upperBound:
+                # If value is in range, return grade
+                return f"{gradeLettersOnly}"
+        else:
+            if lowerBound < value <= upperBound:
+                # If value is in range, return grade
+                return f"{gradeLettersOnly} ({value})"
+
+    # If no grade found, return None
+    RichPrintError(f"Value {value} not found in grading options")
+    return None
+
+
+def getGradeDropdownValueByFloat(value):
+    # Get the dropdown value for a float value
+    gradingOptions = getGradeList()
+    for grade in gradingOptions:
+        if getGradeValue(grade) == value:
+            return grade
+    RichPrintError(f"Value {value} not found in grading options")
+    return None
+
+def injectGradeMeaningIntoText(gradeLetter):
+    # Inject the meaning of the grade into the text
+    # Replaces <meaning> with an explanation of the grade
+    gradeMeanings = {
+        "S+": "S (+) outstanding or exceptional. good value. -> must sample. strongly consider dedicated order, rebuy.",
+        "S":  "S (X) outstanding or exceptional. ok value. -> must sample. strongly consider dedicated order, rebuy.",
+        "S-": "S (-) outstanding or exceptional. poor value. -> must sample. consider dedicated order, rebuy.",
+        
+        "A+": "A (+) notably good. good value. -> should sample. strongly consider dedicated order, rebuy.",
+        "A":  "A (X) notably good. ok value. -> should sample. consider dedicated order, rebuy.",
+        "A-": "A (-) notably good. poor value. -> should sample, avoid dedicated order, consider rebuy.",
+        
+        "B+": "B (+) above average. good value. -> consider sample, rebuy.",
+        "B":  "B (X) above average. ok value. -> consider sample, rebuy only if sales.",
+        "B-": "B (-) above average. poor value. -> consider sample, avoid rebuy.",
+        
+        "C+": "C (+) drinkable, unremarkable. good value. -> wouldn't rebuy.",
+        "C":  "C (X) drinkable, unremarkable. ok value. -> wouldn't rebuy.",
+        "C-": "C (-) drinkable, unremarkable. poor value. -> avoid.",
+        
+        "D+": "D (+) bad. good value. -> avoid.",
+        "D":  "D (X) bad. ok value. -> avoid.",
+        "D-": "D (-) bad. poor value. -> avoid.",
+        
+        "F":  "Dumped"
+    }
+    text = gradeMeanings.get(gradeLetter.split(" ")[0], "No meaning found for this grade.")
+    return text
+def resolveLetterGradeToImageGradeIncludingMinusSigns(thisTeaAverageRating):
+    import PIL.ImageOps
+    from PIL import Image, ImageDraw
+    # Resolve letter grade to image grade including minus signs
+    
+    # First get the base letter grade
+    baseGrade = getGradeLetterFuzzy(thisTeaAverageRating, onlyLetter=True)
+    if baseGrade is None:
+        return None
+    hasMinus = False
+    # Check if the value is in the minus range
+    if "-" in baseGrade:
+        hasMinus = True
+        baseGrade = baseGrade.replace("-", "")
+
+    # First construct the image grade
+    asset_path = f"./assets/images/ui_letter_{baseGrade}.png"
+    print(f"Base asset path: {asset_path}")
+    final_image = None
+    try:
+        chart_img = Image.open(asset_path)
+        # Normalize orientation (important!)
+        chart_img = PIL.ImageOps.exif_transpose(chart_img)
+        # Composite over white if transparent
+        if chart_img.mode in ("RGBA", "LA") or (chart_img.mode == "P" and "transparency" in chart_img.info):
+            chart_img = PIL.Image.alpha_composite(
+                PIL.Image.new("RGBA", chart_img.size, (255, 255, 255, 255)),
+                chart_img.convert("RGBA")
+            ).convert("RGB")
+        chart_image_test = chart_img.resize((128, 128), Image.LANCZOS)
+
+        # Add the minus sign if needed
+        if hasMinus:
+            # for now, construct the minus as a red line at the right spot
+            draw = ImageDraw.Draw(chart_image_test)
+            line_y = 16  # Y position for the minus sign
+            line_start_x = 72  # Start X position
+            line_end_x = 120    # End X position
+            line_thickness = 14  # Thickness of the minus sign
+            draw.line((line_start_x, line_y, line_end_x, line_y), fill="red", width=line_thickness)
+        final_image = chart_image_test
+        return final_image
+    except Exception as e:
+        RichPrintError(f"Error loading test image: {e}")
+    return None
+#endregion
+
+
+#region Helpers3
+
+
+
+
+# TODO: Fuzzy tea name matching under same vendor and type (ie sample vs cake or year differences)
+def fuzzy_tea_name_matching(tea, strict_vendor=True, strict_type=True, strict_year=False):
+    from thefuzz import fuzz
+    teaType = tea.attributes.get("Type", "").lower()
+    vendor = tea.attributes.get("Vendor", "").lower()
+    year = tea.attributes.get("Year", None)
+    name = tea.name.lower().strip()
+    allMatchedTeas = []
+    allMatchedReviews = [] # return list of reviews as well for various display stuff
+    # Implement fuzzy matching logic here
+    for other_tea in TeaStash:
+        if other_tea.id == tea.id:
+            continue
+        otherTea_vendor = other_tea.attributes.get("Vendor", "").lower().strip()
+        otherTea_type = other_tea.attributes.get("Type", "").lower().strip()
+        otherTea_year = other_tea.attributes.get("Year", None)
+        otherTea_name = other_tea.name.lower().strip()
+        if strict_vendor and otherTea_vendor != vendor:
+            continue
+        if strict_type and otherTea_type != teaType:
+            continue
+        if strict_year and otherTea_year != year:
+            continue
+        # If we reach here, we need to strip year and vendor from the name and do fuzzy matching
+        # Remove year from name if it exists
+        name_no_year = re.sub(r'\b(19|20)\d{2}\b', '', name).strip()
+        other_name_no_year = re.sub(r'\b(19|20)\d{2}\b', '', otherTea_name).strip()
+        # Remove vendor from name if it exists
+        name_no_vendor = re.sub(r'\b' + re.escape(vendor) + r'\b', '', name_no_year).strip()
+        other_name_no_vendor = re.sub(r'\b' + re.escape(otherTea_vendor) + r'\b', '', other_name_no_year).strip()
+        # Perform fuzzy matching with package fuzzywuzzy
+        lvratio = fuzz.partial_ratio(name_no_vendor, other_name_no_vendor)
+        ratio = fuzz.ratio(name_no_vendor, other_name_no_vendor)
+        print(f"Fuzzy matching {name_no_vendor} and {other_name_no_vendor}: LVRatio={lvratio}, Ratio={ratio}")
+        # If either ratio is above 80, we consider it a match
+        if lvratio >= 80 or ratio >= 70:
+            allMatchedTeas.append(other_tea)
+            allMatchedReviews.extend(other_tea.reviews)
+    # add self tea and reviews to the list
+    allMatchedTeas.append(tea)
+    allMatchedReviews.extend(tea.reviews)
+    return allMatchedTeas, allMatchedReviews
+
+
+# Sorting of the table columns, for the sort callback of the tables in the app.
+# Takes (row, value) pairs with the values as shown in the cells and returns the rows in sorted order:
+# numbers (including amounts like "5g" or "$3" and grade letters) first, then text, then empty cells. None if fewer than two can be sorted
+def sortTableCells(cells, ascending=True):
+    suffixes = ['g', 'ml', '$', '%']
+    sortableItems = []
+    for row, cellValue in cells:
+        # If value is an number, convert it to float
+        parsed_possible_number = cellValue
+        if isinstance(cellValue, str):
+            # Try to strip periods and "g" suffixes for grams
+            possibleNumber = cellValue.lower().replace('g', '').replace(',', '', 1).strip()
+            possibleNumber = possibleNumber.replace('$', '', 1).strip()
+            possibleNumber = possibleNumber.replace('%', '', 1).strip()
+            possibleNumber = possibleNumber.replace('ml', '', 1).strip()
+            if possibleNumber.isdigit():
+                sortableItems.append((row, parsed_possible_number))
+            else:
+                try:
+                    parsed_possible_number = float(possibleNumber)
+                    sortableItems.append((row, parsed_possible_number))
+                except ValueError:
+                    sortableItems.append((row, cellValue))
+        else:
+            sortableItems.append((row, cellValue))
+
+
+    # Define sort key
+    def sort_key(item):
+        suffixes = ['g', 'ml', '$', '%']
+        if isinstance(item[1], str):
+            for suffix in suffixes:
+                if item[1].endswith(suffix):
+                    try:
+                        return float(item[1][:-len(suffix)].strip())
+                    except ValueError:
+                        pass
+        # If date string, try to parse it, if succeeds, use timestamp
+        if isinstance(item[1], str):
+            try:
+                parsed_date = StringToTimeStamp(item[1], silent=True)
+                if parsed_date:
+                    return parsed_date
+            except:
+                # Fail silently as we know it isnt always a date
+                return item[1]
+        return item[1]
+    
+    unsortableItems = []
+    cleanSortableItems = []
+    RichPrintSuccessMinor(f"Found {len(sortableItems)} sortable items and {len(unsortableItems)} unsortable items")
+    # Remove N/A from the list
+    if len(sortableItems) > 1:
+        for i, item in enumerate(sortableItems):
+            if item[1] == "N/A" or item[1] == "" or item[1] == "None":
+                unsortableItems.append(item)
+            elif item[1] is None:
+                unsortableItems.append(item)
+            # Can convert to int or float
+            elif isinstance(item[1], str):
+                #print(item)
+                possibleNumber = item[1].lower()
+                for suffix in suffixes:
+                    if possibleNumber.endswith(suffix):
+                        possibleNumber = possibleNumber[:-len(suffix)].strip()
+                possibleNumber = possibleNumber.replace(',', '', 1).strip()
+                try:
+                    possibleFloat = float(possibleNumber)
+                    cleanSortableItems.append((item[0], possibleFloat))
+                except ValueError:
+                    # Try to convert and parse as grade letter
+                    try:
+                        gradeValue = getGradeValue(item[1], silent=True)
+                        if gradeValue is not None:
+                            cleanSortableItems.append((item[0], gradeValue))
+                        else:
+                            cleanSortableItems.append(item)
+                    except ValueError:
+                        cleanSortableItems.append(item)
+                        RichPrintWarning(f"Could not convert item (str) to float or grade: {item[1]}")
+            else:
+                cleanSortableItems.append(item)
+
+    # string/number comparisons not supported in python3, so we need to separate them
+    # Put all items that are not of the same type as the first item to the end
+    numsCleanSortableItems = []
+    strsCleanSortableItems = []
+    if len(cleanSortableItems) > 0:
+        # We want to have numbers first, then strings
+        for item in cleanSortableItems:
+            if isinstance(item[1], (int, float)):
+                numsCleanSortableItems.append(item)
+            else:
+                strsCleanSortableItems.append(item)
+    
+    # We sort numbers first, then strings then append unsortable items
+    numsCleanSortableItems.sort(key=sort_key, reverse=not ascending)
+    strsCleanSortableItems.sort(key=sort_key, reverse=not ascending)
+    
+    # Sort the items
+    cleanSortableItems = numsCleanSortableItems + strsCleanSortableItems
+
+    if len(cleanSortableItems) < 2:
+        RichPrintError("Not enough sortable items to sort (found less than 2 after cleaning)")
+        return None
+    RichPrintSuccessMinor(f"Found {len(cleanSortableItems)} sortable items and {len(unsortableItems)} unsortable items")
+    # Re-add the unsortable items to the end of the list
+    for item in unsortableItems:
+        cleanSortableItems.append(item)
+    return [item[0] for item in cleanSortableItems]
+
+
+# Defines valid categories, and role as categories
+# Also defines the types of role
+
+def setValidTypes():
+    session["validTypesCategory"] = ["string", "int", "float", "bool", "datetime"]
+    session["validTypesReviewCategory"] = ["string", "int", "float", "bool", "datetime"]
+    
+    session["validroleCategory"] = {"string": ["UNUSED", "Notes (short)", "Notes (Long)", "Name", "Vendor", "Type"],
+                                "int": ["UNUSED","Year"],
+                                "float": ["UNUSED", "Total Score", "Amount", "Remaining", "Cost", "Cost per Gram"],
+                                "bool": ["UNUSED", "bool"],
+                                "date": ["UNUSED", "date"],
+                                "datetime": ["UNUSED", "date"]}
+    
+    session["validroleReviewCategory"] = {"string": ["UNUSED", "Notes (short)", "Notes (Long)", "Name", "Method"],
+                                "int": ["UNUSED", "Year", "Amount", "Steeps", "Vessel size"],
+                                "float": ["UNUSED", "Score", "Final Score", "Amount"],
+                                "bool": ["UNUSED", "bool"],
+                                "date": ["UNUSED", "date"],
+                                "datetime": ["UNUSED", "date"]}
+
+
+# We want to search our entire list of teas or reviews for a list of previous answers, then return the top X results by frequency
+def searchPreviousAnswers(categoryName, data="Tea", topX=5):
+    topX = int(topX)
+    # data must be either "Tea" or "Review"
+    if data not in ["Tea", "Review"]:
+        RichPrintError("Data must be either Tea or Review")
+        return []
+    
+    # If data less than top X return all data
+    if len(TeaStash) < topX:
+        topX = len(TeaStash)
+    
+    answersDict = {}
+    if canQueryTeaDatabase():
+        answersDict = dict(queryPreviousAnswersDatabase(settings["TEA_REVIEWS_PATH"], categoryName, data, topX))
+    elif data == "Tea":
+        for tea in TeaStash:
+            if categoryName in tea.attributes:
+                if tea.attributes[categoryName] in answersDict:
+                    answersDict[tea.attributes[categoryName]] += 1
+                else:
+                    answersDict[tea.attributes[categoryName]] = 1
+
+    elif data == "Review":
+        for tea in TeaStash:
+            for review in tea.reviews:
+                if categoryName in review.attributes:
+                    if review.attributes[categoryName] in answersDict:
+                        answersDict[review.attributes[categoryName]] += 1
+                    else:
+                        answersDict[review.attributes[categoryName]] = 1
+
+    # Get the top X results by frequency, then sort and return them
+    sortedAnswers = sorted(answersDict.items(), key=lambda x: x[1], reverse=True)
+    topAnswers = sortedAnswers[:topX]
+    # Remove time from any datetime objects
+    for i, answer in enumerate(topAnswers):
+        if isinstance(answer[0], dt.datetime):
+            topAnswers[i] = (answer[0].strftime(settings["DATE_FORMAT"]), answer[1])
+    topAnswersList = [answer[0] for answer in topAnswers]
+    RichPrintInfo(f"Top {topX} answers for {categoryName} in {data}: {topAnswers}")
+    return topAnswers, topAnswersList
+#endregion
+
+
+#region DataObject Classes
+
+
+
+
+
+# Defines one tea that has been purchased and may have reviews
+# Teas and reviews use __slots__, a stash holds many of them and a per instance __dict__ costs more than the fields.
+# Every mutable field is created in __init__, so no two instances share a dict or list
+class StashedTea:
+    __slots__ = ("id", "name", "dateAdded", "attributes", "calculated", "adjustments", "finished", "linkedTeas", "_reviews", "_reviewSource", "reviewSummary")
+
+    def __init__(self, id, name, dateAdded=None, attributes=None):
+        self.id = id
+        self.name = name
+        if dateAdded is None:
+            dateAdded = dt.datetime.now(tz=dt.timezone.utc).timestamp()
+        self.dateAdded = dateAdded  # Date when the tea was added to the stash
+        self.attributes = attributes if attributes is not None else {}
+        self.reviews = []
+        self.calculated = {}
+        # Price and amount adjustments, if required, in lists of Adjustment dicts
+        # Price adjustments = [{"price": 10, "amount": 100}, {"price": 5, "amount": 50}]
+        self.adjustments = {}
+        # Finished flag
+        self.finished = False
+        # Teas may be copies of other teas aquired in other methods. We would like to link them together somehow.
+        # We can either link them with IDs or with names. For now, we will use names.
+        # When we call a function with the keywork incLinkedTeas=True, it will include all linked teas in the calculation.
+        self.linkedTeas = []  # List of tea IDs that are linked to this tea
+
+    # Reviews of a lazily loaded tea stay in their saved form (a list of review dicts, or pickled bytes from the
+    # snapshot cache) until something reads tea.reviews. Until then reviewSummary holds the totals the stash table
+    # and populateStatsCache need, see summarizeReviews.
+    @property
+    def reviews(self):
+        if self._reviewSource is not None:
+            self.hydrateReviews()
+        return self._reviews
+    @reviews.setter
+    def reviews(self, reviews):
+        self._reviews = reviews
+        self._reviewSource = None
+        self.reviewSummary = None
+
+    def setLazyReviews(self, reviewSource, reviewSummary):
+        self._reviews = []
+        self._reviewSource = reviewSource
+        self.reviewSummary = reviewSummary
+
+    def isReviewsLoaded(self):
+        return self._reviewSource is None
+
+    def hydrateReviews(self):
+        reviewsData = reviewSourceToSaveDicts(self._reviewSource)
+        self.reviews = loadReviewsFromSaveDicts(reviewsData, self.id)
+
+    # Reviews for read only use such as exports, built without keeping them loaded if the tea is lazy
+    def peekReviews(self):
+        if self._reviewSource is not None:
+            return loadReviewsFromSaveDicts(reviewSourceToSaveDicts(self._reviewSource), self.id)
+        return self._reviews
+
+    def getNumReviews(self):
+        if self._reviewSource is not None:
+            return self.reviewSummary["count"]
+        return len(self._reviews)
+
+    def getReviewSummary(self):
+        if self._reviewSource is not None:
+            return self.reviewSummary
+        return summarizeReviews([(review.id, review.attributes) for review in self._reviews])
+
+    # Reviews in the dict format used in tea_reviews.yml, without loading them
+    def getReviewSaveDicts(self):
+        if self._reviewSource is None:
+            return [dumpReviewToSaveDict(review) for review in self._reviews]
+        return [dict(reviewData, attributes=dict(reviewData.get("attributes", {}) or {})) for reviewData in reviewSourceToSaveDicts(self._reviewSource)]
+
+    def addReview(self, review):
+        self.reviews.append(review)
+    def removeReview(self, reviewID):
+        # Remove review by ID
+        self.reviews = [review for review in self.reviews if review.id != reviewID]
+        # Recalculate the average rating after removing a review
+        self.calculateAverageRating()
+
+    def calculate(self):
+        # call all the calculate functions
+        self.calculateAverageRating()
+    def calculateAverageRating(self):
+        # calculate the average rating
+        if len(self.reviews) > 0:
+            totalRating = 0
+            for review in self.reviews:
+                totalRating += review.rating
+            self.calculated["averageRating"] = totalRating / len(self.reviews)
+        else:
+            self.calculated["averageRating"] = 0
+
+    def getLatestReview(self):
+        # Get the latest review by date added
+        if len(self.reviews) == 0:
+            return None
+        if "date" not in self.reviews[0].attributes:
+            RichPrintError("No date attribute found in reviews, cannot get latest review. (DATEADDED)")
+            return None
+        latestReview = max(self.reviews, key=lambda r: r.attributes["date"])
+        return latestReview
+    
+    def getEarliestReview(self):
+        # Get the earliest review by date added
+        if len(self.reviews) == 0:
+            return None
+        if "date" not in self.reviews[0].attributes:
+            RichPrintError("No date attribute found in reviews, cannot get earliest review. (DATEADDED)")
+            return None
+        earliestReview = min(self.reviews, key=lambda r: r.attributes["date"])
+        return earliestReview
+    
+    def getEstimatedConsumedByReviews(self):
+        # Get the estimated consumed amount by reviews
+        if len(self.reviews) == 0:
+            return 0
+        consumed = 0
+        for review in self.reviews:
+            if "Amount" in review.attributes:
+                consumed += review.attributes["Amount"]
+
+        consumed = round(consumed, 2)  # Round to 2 decimal places
+        return consumed
+    
+    def getEstimatedRemaining(self):
+        # Find self in cache
+        global TeaCache
+        if self in TeaCache:
+            return TeaCache[self.id].get("remaining", None)
+        
+    def getCalcedValue(self, categoryRole="Cost per Gram"):
+        # Get the category role
+        cat = getCategoryByrole(categoryRole)
+        
+        # Check if flagged as autocalculated
+        if cat is None:
+            RichPrintError(f"Category role {categoryRole} not found")
+            return None
+        if not cat.isAutoCalculated:
+            return self.attributes.get(categoryRole, None)
+
+        # Get the calculated cost per gram from the cache
+        global TeaCache
+        if self in TeaCache:
+            print(F"Getting {categoryRole} from cache")
+            return TeaCache[self.id].get(categoryRole, None)
+        # if not found, get calculated
+        if categoryRole in self.calculated:
+            print(F"Getting {categoryRole} from calculated")
+            return self.calculated[categoryRole]
+        # if not found, run autocalculate
+        print(F"Calculating {categoryRole}")
+        value, explanation = cat.autocalculate(self)
+        self.calculated[categoryRole] = value
+        return value
+    
+    def _getLinkedTeas(self):
+        # Get the linked teas as StashedTea objects
+        linkedTeas = [] # self is implicitly included
+        global TeaCache
+        for teaID in self.linkedTeas:
+            tea = TeaCache.get(teaID, None)
+            if tea is not None:
+                linkedTeas.append(tea)
+        return linkedTeas
+
+# Defines a review for a tea
+class Review:
+    __slots__ = ("id", "parentID", "name", "dateAdded", "attributes", "rating", "calculated")
+
+    def __init__(self, id, name, dateAdded, attributes, rating):
+        self.id = id
+        self.parentID = 0
+        self.name = name
+        if dateAdded is None:
+            dateAdded = dt.datetime.now(tz=dt.timezone.utc).timestamp()
+        self.dateAdded = dateAdded
+        self.attributes = attributes
+        self.rating = rating
+        self.calculated = {}
+
+    def calculate(self):
+        # call all the calculate functions
+        self.calculateFinalScore()
+
+
+
+
+class TeaCategory:
+    name = ""
+    categoryType = ""
+    color = ""
+    defaultValue = None
+    categoryRole = None
+
+    # If is required, for when talking about tea, or for all, like teaware and shipping
+    isRequiredForTea = False
+    isRequiredForAll = False
+
+    # Autocalculated, if it is, it would be hidden in entry window and would rely on a calc step after submission
+    # based on its role, would be Not Required if so.
+    isAutoCalculated = False
+
+    # Show as dropdown?
+    isDropdown = False
+
+    # Prefix, rounding
+    prefix = ""
+    suffix = ""
+    rounding = 2
+    
+    # Specific options
+    dropdownMaxLength = 5
+    gradingDisplayAsLetter = False  # If the category is a grading category, like "Score" or "Final Score", it will be a letter grade (A, B, C, D, F) instead of a number
+
+
+    def __init__(self, name, categoryType):
+        self.name = name
+        self.categoryType = categoryType
+        if categoryType == "string":
+            self.defaultValue = ""
+        elif categoryType == "int":
+            self.defaultValue = 0
+        elif categoryType == "float":
+            self.defaultValue = 0.0
+        elif categoryType == "bool":
+            self.defaultValue = False
+        elif categoryType == "date" or categoryType == "datetime":
+            # Set the default value to the current date and time
+            self.defaultValue = dt.datetime.now(tz=dt.timezone.utc).timestamp()
+        self.categoryRole = "UNUSED"
+
+        self.isRequiredForTea = False
+        self.isRequiredForAll = False
+        self.isAutoCalculated = False
+        self.isDropdown = False
+
+    def autocalculate(self, data):
+        
+        # role - Remaining
+        RichPrintInfo("Autocalculating...")
+        if self.categoryRole == "Remaining":
+            return data.calculated.get("remaining", None), data.calculated.get("remainingExplanation", None)
+        elif self.categoryRole == "Cost per Gram":
+            return data.calculated.get("costPerGram", None), data.calculated.get("costPerGramExplanation", None)
+        elif self.categoryRole == "Total Score":
+            # Pulls cached values from TeaCache and put into the calculated dict
+            return data.calculated.get("averageScore", None), data.calculated.get("totalScoreExplanation", None)
+        return None, None 
+        
+    # IsValidBase
+    def isValidBase(self, value):
+        # Checks based on data type
+        if self.categoryType == "string":
+            return isinstance(value, str)
+        elif self.categoryType == "int":
+            return isinstance(value, int)
+        elif self.categoryType == "float":
+            return isinstance(value, (int, float))
+        elif self.categoryType == "bool":
+            return isinstance(value, bool)
+        elif self.categoryType == "date" or self.categoryType == "datetime":
+            # Check if value is a valid datetime object or a timestamp
+            if isinstance(value, dt.datetime):
+                return True
+            elif isinstance(value, (int, float)):
+                # If it's a timestamp, check if it can be converted to a datetime object
+                try:
+                    dt.datetime.fromtimestamp(value, tz=dt.timezone.utc)
+                    return True
+                except (ValueError, OverflowError):
+                    return False
+        return False
+    
+    def isValid(self, value):
+        # Checks base, and on autocalculated values
+        if not self.isValidBase(value):
+            RichPrintWarning(f"Value {value} is not valid for category {self.name} of type {self.categoryType}")
+            return False
+        # If autocalculated, check if it is None
+        if self.isAutoCalculated:
+            if value is None:
+                RichPrintWarning(f"Value {value} is not valid for autocalculated category {self.name}")
+                return False
+            # If it is a string, check if it is empty
+            if isinstance(value, str) and value.strip() == "":
+                RichPrintWarning(f"Value {value} is not valid for autocalculated category {self.name}, it is empty")
+                return False
+        return True
+
+
+class ReviewCategory:
+    name = ""
+    categoryType = ""
+    defaultValue = ""
+    categoryRole = None
+
+    # If is required, for when talking about tea, or for all, like teaware and shipping
+    isRequiredForTea = False
+    isRequiredForAll = False
+    
+    # Autocalculated, if it is, it would be hidden in entry window and would rely on a calc step after submission
+    # based on its role, would be Not Required if so.
+    isAutoCalculated = False
+
+    # Show as dropdown?
+    isDropdown = False
+
+    # Prefix, rounding
+    prefix = ""
+    suffix = ""
+    rounding = 2
+
+    # Special options
+    dropdownMaxLength = 5
+    gradingDisplayAsLetter = False
+
+    def __init__(self, name, categoryType):
+        self.name = name
+        self.categoryType = categoryType
+        self.categoryRole = self.categoryType
+        self.ifisRequiredForTea = False
+        self.ifisRequiredForAll = False
+        
+    # Define if is required depending on role
+    def setRequired(self, isRequiredForTea, isRequiredForAll):
+        self.isRequiredForTea = isRequiredForTea
+        self.isRequiredForAll = isRequiredForAll
+
+    def format_attribute(self, key, value, no_inject_grade_meaning=False):
+        """Formats a review attribute based on its category metadata."""
+        correctTeaReviewCat = TeaReviewCategories # This should be a list of ReviewCategory objects
+        correct_cat = None
+        for cat in correctTeaReviewCat:
+            if cat.categoryRole == key:
+                correct_cat = cat
+                break
+
+        if value is None:
+            return "N/A"
+            
+        # Don't warn for vendor or cost per gram since they are injected from parent tea and may not have a category
+        if not correct_cat and not key in ["Vendor", "Cost per Gram"]:
+            RichPrintWarning(f"No category found for key: {key}. Returning raw value.")
+            return str(value)
+        
+        # Special handling for injected attributes
+        if key == "Vendor":
+            return str(value)
+        if key == "Cost per Gram":
+            try:
+                value = float(value)
+            except ValueError:
+                RichPrintWarning(f"Value {value} for key {key} is not a valid float for Cost per Gram.")
+                return str(value)
+
+            # Free sample casting
+            if value == 0 or value <= 0.01:
+                return "Free Sample"
+            return f"${value:.2f}/g"
+
+        # Handle datetime formatting
+        if correct_cat.categoryType == "date" or correct_cat.categoryType == "datetime":
+            return TimeStampToStringWithFallback(value, "Can't parse date")
+        
+        # Handle grading display by displaying both letter and number regardless of internal setting
+        if correct_cat.categoryRole == "Score" or correct_cat.categoryRole == "Final Score":
+            numerical_value = None
+            try:
+                numerical_value = float(value)
+            except ValueError:
+                RichPrintWarning(f"Value {value} for key {key} is not a valid float for grading.")
+                return str(value)
+            letter_grade = getGradeLetterFuzzy(numerical_value)
+            # Will return either None, just the Letter if exact match, or Letter (value) if fuzzy match, we want it to always be letter (value/5)
+            if letter_grade:
+                if no_inject_grade_meaning:
+                    return f"{letter_grade.split(' (')[0]} ({numerical_value:.{correct_cat.rounding}f}/5)"
+                else:
+                    return f"{letter_grade.split(' (')[0]} ({numerical_value:.{correct_cat.rounding}f}/5) | {injectGradeMeaningIntoText(letter_grade)}"
+            else:
+                return f"{numerical_value:.{correct_cat.rounding}f}"
+            
+        
+        # Handle numeric formatting
+        if isinstance(value, (int, float)):
+            formatted_value = f"{value:.{correct_cat.rounding}f}"
+            # if int
+            if correct_cat.categoryType == "int":
+                formatted_value = str(int(float(formatted_value)))
+            return f"{correct_cat.prefix}{formatted_value}{correct_cat.suffix}"
+        
+        
+
+        return str(value)
+    
+    def generate_review_outputs(self, review: Review, font_size: int = 24):
+        """
+        Ingests a Review object and creates a text-only review, an HTML review, and a PNG image.
+
+        Args:
+            review: A Review object.
+            review_categories: A dictionary mapping attribute names to ReviewCategory objects.
+            font_size: The font size to use for the image generation.
+
+        Returns:
+            A tuple containing (text_review, html_review, image_path).
+        """
+        from PIL import Image, ImageDraw, ImageFont
+
+        # Get the tea parent for the name of the tea, the vendor, and other info
+        overrideDoNotGenerateImage = settings.get("EXPORT_REVIEW_DONT_GENERATE_IMAGES", False)
+        overrideDoNotgenerateTeaLevelAttributes = settings.get("EXPORT_REVIEW_DONT_GENERATE_TEA_LEVEL", False)
+        overrideDoNotDrawGraphs_relativeBubbles = settings.get("EXPORT_REVIEW_DONT_DRAW_BUBBLES", False)
+        # EXPORT_REVIEW_DONT_DRAW_BUBBLES, EXPORT_REVIEW_DONT_GENERATE_IMAGES, EXPORT_REVIEW_DONT_GENERATE_TEA_LEVEL
+
+        
+        teaParent = None
+        for tea in TeaStash:
+            if tea.id == review.parentID:
+                teaParent = tea
+                break
+
+        if teaParent is None:
+            RichPrintError(f"Could not find parent tea for review {review.name} with parent ID {review.parentID}")
+            return None, None, None
+        RichPrintInfo(f"Generating review outputs for review: {review.name} of tea: {teaParent.name}")
+        sessionNum = 1
+        for r in teaParent.reviews:
+            if r.id == review.id:
+                break
+            sessionNum += 1
+        teaYear = teaParent.attributes.get("Year", "")
+
+        reviewAttributes = review.attributes.items()
+        # Tea level attributes, for multiple reviews across one tea.
+        hasTeaLevelAttributes = False
+        # Check if there are reviews dated before this one
+        allReviewsIncludingThisOne = []
+        thisReviewTimestamp = review.attributes.get("date", None)
+        for r in teaParent.reviews:
+            if "date" in r.attributes and thisReviewTimestamp is not None:
+                if r.attributes["date"] <= thisReviewTimestamp:
+                    allReviewsIncludingThisOne.append(r)
+        if len(allReviewsIncludingThisOne) <= 1:
+            hasTeaLevelAttributes = False  # Only this review, no tea-level attributes
+        else:
+            hasTeaLevelAttributes = True
+        RichPrintInfo(f"Found {len(allReviewsIncludingThisOne)} reviews including this one for tea {teaParent.name}")
+
+        # Attributes to derive tea-level: Average ratio, Average rating, earliest review date, latest review date (this review), average time between reviews, total amount drank
+        teaLevelAttributes = dict()
+        formattedTeaLevelAttributes = dict()
+        numReviewsIncludingThisOne = len(allReviewsIncludingThisOne)
+        if hasTeaLevelAttributes:
+            # Average ratio
+            totalRatio = 0
+            countRatio = 0
+            for r in allReviewsIncludingThisOne:
+                if "Score" in r.attributes:
+                    try:
+                        totalRatio += float(r.attributes["Score"])
+                        countRatio += 1
+                    except ValueError:
+                        RichPrintWarning(f"Score {r.attributes['Score']} is not a valid float for review {r.name}")
+            if countRatio > 0:
+                teaLevelAttributes["Average Score"] = round(totalRatio / countRatio, 2)
+            else:
+                teaLevelAttributes["Average Score"] = "N/A"
+
+            # Average rating
+            totalRating = 0
+            countRating = 0
+            for r in allReviewsIncludingThisOne:
+                if r.rating is not None:
+                    try:
+                        totalRating += float(r.rating)
+                        countRating += 1
+                    except ValueError:
+                        RichPrintWarning(f"Rating {r.rating} is not a valid float for review {r.name}")
+            if countRating > 0:
+                teaLevelAttributes["Average Rating"] = round(totalRating / countRating, 2)
+            else:
+                teaLevelAttributes["Average Rating"] = "N/A"
+
+            # Stdev of rating
+            if countRating > 1:
+                ratings = [r.rating for r in allReviewsIncludingThisOne if r.rating is not None]
+                if len(ratings) > 1:
+                    teaLevelAttributes["Rating Std Dev"] = round(stdev(ratings), 2)
+                else:
+                    teaLevelAttributes["Rating Std Dev"] = "N/A"
+
+            # Earliest review date
+            earliestDate = None
+            for r in allReviewsIncludingThisOne:
+                if "date" in r.attributes:
+                    try:
+                        review_date = dt.datetime.fromtimestamp(r.attributes["date"], tz=dt.timezone.utc)
+                        if earliestDate is None or review_date < earliestDate:
+                            earliestDate = review_date
+                    except (ValueError, OSError):
+                        RichPrintWarning(f"Date {r.attributes['date']} is not a valid timestamp for review {r.name}")
+            if earliestDate is not None:
+                teaLevelAttributes["First Reviewed"] = earliestDate.strftime(settings["DATE_FORMAT"])
+            else:
+                teaLevelAttributes["First Reviewed"] = "N/A"
+
+            # Latest review date (this review)
+            if "date" in review.attributes:
+                try:
+                    latestDate = dt.datetime.fromtimestamp(review.attributes["date"], tz=dt.timezone.utc)
+                    teaLevelAttributes["Last Reviewed"] = latestDate.strftime(settings["DATE_FORMAT"])
+                except (ValueError, OSError):
+                    RichPrintWarning(f"Date {review.attributes['date']} is not a valid timestamp for review {review.name}")
+                    teaLevelAttributes["Last Reviewed"] = "N/A"
+            else:
+                teaLevelAttributes["Last Reviewed"] = "N/A"
+
+
+            # Average time between reviews
+            daysBetweenFirstAndLast = 0
+            if earliestDate is not None and latestDate is not None:
+                daysBetweenFirstAndLast = (latestDate - earliestDate).days
+                teaLevelAttributes["Days Between First and Last Review"] = daysBetweenFirstAndLast
+            if numReviewsIncludingThisOne > 1 and daysBetweenFirstAndLast > 0:
+                teaLevelAttributes["Average Time Between Reviews"] = daysBetweenFirstAndLast / (numReviewsIncludingThisOne - 1) # time between reviews is total time divided by number of intervals (num reviews - 1)
+            else:
+                teaLevelAttributes["Average Time Between Reviews"] = "N/A"
+
+            # Total amount drank
+            totalAmount = 0
+            for r in allReviewsIncludingThisOne:
+                if "Amount" in r.attributes:
+                    try:
+                        totalAmount += float(r.attributes["Amount"])
+                    except ValueError:
+                        RichPrintWarning(f"Amount {r.attributes['Amount']} is not a valid float for review {r.name}")
+            teaLevelAttributes["Total Amount Drank"] = f"{totalAmount:.2f}"
+        else:
+            teaLevelAttributes["Average Score"] = "N/A"
+            teaLevelAttributes["Average Rating"] = "N/A"
+            teaLevelAttributes["First Reviewed"] = "N/A"
+            if "date" in review.attributes:
+                try:
+                    latestDate = dt.datetime.fromtimestamp(review.attributes["date"], tz=dt.timezone.utc)
+                    teaLevelAttributes["Last Reviewed"] = latestDate.strftime(settings["DATE_FORMAT"])
+                except (ValueError, OSError):
+                    RichPrintWarning(f"Date {review.attributes['date']} is not a valid timestamp for review {review.name}")
+                    teaLevelAttributes["Last Reviewed"] = "N/A"
+            else:
+                teaLevelAttributes["Last Reviewed"] = "N/A"
+            teaLevelAttributes["Average Time Between Reviews"] = "N/A"
+            if "Amount" in review.attributes:
+                try:
+                    totalAmount = float(review.attributes["Amount"])
+                    teaLevelAttributes["Total Amount Drank"] = totalAmount
+                except ValueError:
+                    RichPrintWarning(f"Amount {review.attributes['Amount']} is not a valid float for review {review.name}")
+                    teaLevelAttributes["Total Amount Drank"] = "N/A"
+            else:
+                teaLevelAttributes["Total Amount Drank"] = "N/A"
+
+
+
+       
+
+
+
+        # Formatted tea level attributes
+        # Grade/rating should be 
+        # We do not inject grade meaning into these summaries to keep them concise
+        # additionally, averaging A+ and B+ gives A- which does not communicate value (A rating but poor value)
+        # so we exclude it entirely.
+        if isinstance(teaLevelAttributes.get("Average Score", None), (int, float)):
+            formattedTeaLevelAttributes["Average Score"] = self.format_attribute("Score", teaLevelAttributes["Average Score"], no_inject_grade_meaning=True)
+        if isinstance(teaLevelAttributes.get("Average Rating", None), (int, float)):
+            formattedTeaLevelAttributes["Average Rating"] = f"{self.format_attribute("Final Score", teaLevelAttributes["Average Rating"], no_inject_grade_meaning=True)} (Std Dev: {teaLevelAttributes.get('Rating Std Dev', 'N/A')})"
+
+        # if average rating is n/a, set to current rating
+        if teaLevelAttributes.get("Average Rating", "N/A") == "N/A" and review.attributes.get("Final Score", None) is not None:
+            formatted_value = self.format_attribute("Final Score", review.attributes["Final Score"], no_inject_grade_meaning=True)
+            formattedTeaLevelAttributes["Average Rating"] = f"{formatted_value} (only one review)"
+
+        # First , last, average review time before should  be combined into 1 line
+        reviewDateString = ""
+        if teaLevelAttributes.get("First Reviewed", "N/A") != "N/A" and teaLevelAttributes.get("Last Reviewed", "N/A") != "N/A":
+            reviewDateString += f"From {teaLevelAttributes['First Reviewed']} to {teaLevelAttributes['Last Reviewed']}"
+        else:
+            reviewDateString += "N/A"
+        if teaLevelAttributes.get("Average Time Between Reviews", "N/A") != "N/A":
+            if reviewDateString != "":
+                reviewDateString += ", "
+            reviewDateString += f"avg. {teaLevelAttributes['Average Time Between Reviews']:.1f} days between reviews"
+            if numReviewsIncludingThisOne <= 1:
+                reviewDateString += " (only one review)"
+            formattedTeaLevelAttributes["Review Dates"] = reviewDateString
+        else:
+            if reviewDateString != "":
+                reviewDateString += "."
+            formattedTeaLevelAttributes["Review Dates"] = reviewDateString
+        # Amount drank and number of reviews, should include both total and avrg
+        #reviewAmtString = ""
+        #if teaLevelAttributes.get("Total Amount Drank", "N/A") != "N/A":
+        #    if reviewAmtString != "":
+        #        reviewAmtString += " "
+        #    reviewAmtString += f"Total amount drank: {teaLevelAttributes['Total Amount Drank']}g over {numReviewsIncludingThisOne} review(s)."
+        #else:
+        #    reviewAmtString += "N/A"
+        #
+        #formattedTeaLevelAttributes["Amount Drank"] = reviewAmtString
+
+
+
+        # inject attribute from parent: Cost per gram if exists, don't inject vendor because this is already covered in the graphs
+        if "Cost" in teaParent.attributes and "Amount" in teaParent.attributes:
+            # Calculate cost per gram if possible
+            cpg = teaParent.getCalcedValue("Cost per Gram")
+            if cpg is not None:
+                reviewAttributes = list(reviewAttributes) + [("Cost per Gram", cpg)]
+
+         # -- Adjustments to review level attributes for formatting --
+
+        # If first reviewed is n/a but last reviewed is not, set first reviewed to last reviewed
+        if teaLevelAttributes["First Reviewed"] == "N/A" and teaLevelAttributes["Last Reviewed"] != "N/A":
+            teaLevelAttributes["First Reviewed"] = teaLevelAttributes["Last Reviewed"]
+
+        # combine amount and cost per gram into one line if both exist
+        amount = 0
+        if "Amount" in dict(reviewAttributes) and "Cost per Gram" in dict(reviewAttributes):
+            amount = dict(reviewAttributes)["Amount"]
+            costPerGram = dict(reviewAttributes)["Cost per Gram"]
+            newAmtCPG = f"{amount}g @ {self.format_attribute('Cost per Gram', costPerGram)}"
+            # Remove both and add new
+            reviewAttributes = [(k, v) for k, v in reviewAttributes if k not in ["Amount", "Cost per Gram"]]
+            reviewAttributes.append(("Amount & $/g", newAmtCPG))
+
+        # Combine "Steeps", "Brew Method", vessel size
+        if "Steeps" in dict(reviewAttributes) or "Method" in dict(reviewAttributes) or "Vessel size" in dict(reviewAttributes):
+            steeps = dict(reviewAttributes).get("Steeps", "N/A")
+            brewMethod = dict(reviewAttributes).get("Method", "N/A")
+            vesselSize = dict(reviewAttributes).get("Vessel size", "N/A")
+            newBrewInfo = f"{steeps} steeps, {brewMethod} method, {vesselSize}ml vessel."
+            # Remove all three and add new
+            reviewAttributes = [(k, v) for k, v in reviewAttributes if k not in ["Steeps", "Method", "Vessel size"]]
+            reviewAttributes.append(("Brewing Info", newBrewInfo))
+
+        # Sort attributes to have notes at the end, date and type near the beginning
+        sortedAttributes = sorted(reviewAttributes, key=lambda x: (("note" in x[0].lower(), x[0] != "date", x[0] != "Type", x[0])))
+        reviewAttributes = sortedAttributes
+
+
+        # Graph data getting
+        thisTeaAverageRating = teaLevelAttributes["Average Rating"] if isinstance(teaLevelAttributes["Average Rating"], (int, float)) else review.attributes.get("Final Score", None)
+        typeDatapts = getAverageRatingRange(teaType=teaParent.attributes.get("Type", None), overlap_threshold=0.04)
+        vendorDatapts = getAverageRatingRange(vendor=teaParent.attributes.get("Vendor", None), overlap_threshold=0.04)
+        allDatapts = getAverageRatingRange(overlap_threshold=0.04)
+        sumTypeData = 0
+        totalTypeData = 0
+        sumvendorData = 0
+        totalvendorData = 0
+        sumAllData = 0
+        totalAllData = 0
+        for pt in typeDatapts:
+            sumTypeData += pt[0] * pt[2]
+            totalTypeData += pt[2]
+        for pt in vendorDatapts:
+            sumvendorData += pt[0] * pt[2]
+            totalvendorData += pt[2]
+        for pt in allDatapts:
+            sumAllData += pt[0] * pt[2]
+            totalAllData += pt[2]
+        typeAvrg = sumTypeData / totalTypeData if totalTypeData > 0 else 0
+        vendorAvrg = sumvendorData / totalvendorData if totalvendorData > 0 else 0
+        priceDataPts, lenPriceData = getAveragePriceOfTeasOfType(teaType=teaParent.attributes.get("Type", None))
+        thisTeaPricePerGram = teaParent.calculated.get("costPerGram")
+
+        # Calc percentiles
+        pricePercentile = getPercentileofPricing(teaParent.attributes.get("Type", None), thisTeaPricePerGram) if thisTeaPricePerGram is not None else None
+        ratingPercentile = getPercentileOfRatingGivenType(teaParent.attributes.get("Type", None), thisTeaAverageRating) if thisTeaAverageRating is not None else None
+        print(f"Type average rating: {typeAvrg}, Vendor average rating: {vendorAvrg}, Price percentile: {pricePercentile}, Rating percentile: {ratingPercentile}")
+
+        # Calc progress to finishing the tea (amount consumed over number of reviews and total final weight)
+        print(f"Calculating progress to finishing tea {teaParent.name}")
+        totalVolumePurchased = teaParent.attributes.get("Amount", None)
+        remaining = totalVolumePurchased - float(teaLevelAttributes['Total Amount Drank'])
+        otherAdjustments = 0
+        for adjName, adjValue in teaParent.adjustments.items():
+            otherAdjustments += adjValue
+
+        print(teaParent.adjustments, otherAdjustments)
+        print(f"{teaLevelAttributes['Total Amount Drank']}g over {numReviewsIncludingThisOne} out of {totalVolumePurchased}g purchased. remaining: {remaining}")
+
+        # --- Text & HTML Review Generation ---
+        doIncludeTeaYear = teaYear != "" and teaYear is not None
+        # Dont include if year is already in the name
+        if doIncludeTeaYear and str(teaYear) in teaParent.name:
+            doIncludeTeaYear = False
+
+        if doIncludeTeaYear:
+            teaYear = str(teaYear) + " "
+        else:
+            teaYear = ""
+        vendorName = teaParent.attributes.get("Vendor", "N/A")
+        text_review = f"Session {sessionNum}: {vendorName} {teaYear}{teaParent.name}\n"
+        html_review = f"<h3>Session {sessionNum}: {vendorName} {teaYear}{teaParent.name}</h3>\n"
+        image_title = f"Session {sessionNum}: {vendorName} {teaYear}{teaParent.name}"
+
+        for key, value in reviewAttributes:
+            if key in ["Name", "dateAdded"]:  # Filter out redundant or internal fields
+                continue
+            # If word "note" in key, lookup and use category description
+            
+            formatted_value = self.format_attribute(key, value)
+            for cat in TeaReviewCategories:
+                if cat.categoryRole == key:
+                    key = cat.name
+                    break
+            text_review += f"\n{key}: {formatted_value}"
+            html_review += f"  <li><b>{key}:</b> {formatted_value.replace(chr(10), '<br>')}</li>\n"
+
+        if hasTeaLevelAttributes and not overrideDoNotgenerateTeaLevelAttributes:
+            text_review += "\n\n--- Cross-Review Summary ---"
+            html_review += "\n<h4>--- Cross-Review Summary ---</h4>\n<ul>"
+            for key, value in formattedTeaLevelAttributes.items():
+                if value == "N/A":
+                    continue
+                text_review += f"\n{key}: {value}"
+                html_review += f"  <li><b>{key}:</b> {value}</li>\n"
+
+            # Add type and vendor average ratings if available as a sub for graphs
+            if typeAvrg > 0:
+                text_review += f"\n Teas of this type ({teaParent.attributes.get('Type', 'N/A')}) average {typeAvrg:.2f} rating. (t={len(typeDatapts)} data points)"
+                html_review += f"  <li>Teas of this type ({teaParent.attributes.get('Type', 'N/A')}) average {typeAvrg:.2f} rating. (t={len(typeDatapts)} data points)</li>\n"
+            if vendorAvrg > 0:
+                text_review += f"\n Teas from this vendor ({teaParent.attributes.get('Vendor', 'N/A')}) average {vendorAvrg:.2f} rating. (t={len(vendorDatapts)} data points)"
+                html_review += f"  <li>Teas from this vendor ({teaParent.attributes.get('Vendor', 'N/A')}) average {vendorAvrg:.2f} rating. (t={len(vendorDatapts)} data points)</li>\n"
+
+        html_review += "</ul>"
+
+        # --- Image Review Generation ---
+        if not overrideDoNotGenerateImage:
+            padding = 50
+            image_width = 1200
+            line_spacing = 12
+            try:
+                title_font = ImageFont.truetype("arialbd.ttf", size=font_size + 8)
+                body_font = ImageFont.truetype("arial.ttf", size=font_size)
+                body_font_smaller = ImageFont.truetype("arial.ttf", size=font_size - 2)
+            except IOError:
+                title_font = ImageFont.load_default()
+                body_font = ImageFont.load_default()
+                body_font_smaller = ImageFont.load_default()
+
+            # --- Calculate Dynamic Image Height ---
+            current_y = padding
+            # Title height
+            current_y += title_font.getbbox(teaParent.name)[3] - title_font.getbbox(teaParent.name)[1] + line_spacing * 2
+
+            # Attributes height
+            reviewAttributes = sortedAttributes
+            for key, value in reviewAttributes:
+                if key in ["Name", "dateAdded"]:
+                    continue
+                
+                # If word "note" in key, lookup and use category description
+                if "note" in key.lower():
+                    for cat in TeaReviewCategories:
+                        if cat.categoryRole == key:
+                            key = cat.name
+                            break
+                        
+                formatted_value = self.format_attribute(key, value)
+                for cat in TeaReviewCategories:
+                    if cat.categoryRole == key:
+                        key = cat.name
+                        break
+                key_text = f"{key}: "
+
+                # Calculate height for the key
+                key_height = (body_font.getbbox(key_text)[3] - body_font.getbbox(key_text)[1]) + 10
+
+                # Calculate height for the wrapped value
+                wrapped_lines = textwrap.wrap(str(formatted_value), width=80)
+                value_height = len(wrapped_lines) * (key_height + line_spacing + 4)
+
+                current_y += value_height + line_spacing
+
+            # Add tea-level attributes height if applicable
+            if hasTeaLevelAttributes and not overrideDoNotgenerateTeaLevelAttributes:
+                current_y += title_font.getbbox("--- Cross-Review Summary ---")[3] - title_font.getbbox("--- Cross-Review Summary ---")[1] + line_spacing * 2
+                for key, value in formattedTeaLevelAttributes.items():
+                    if value == "N/A":
+                        continue
+                    key_text = f"{key}: "
+
+                    # Calculate height for the key
+                    key_height = (body_font.getbbox(key_text)[3] - body_font.getbbox(key_text)[1]) + 10
+
+                    # Calculate height for the wrapped value
+                    wrapped_lines = textwrap.wrap(str(value), width=80)
+                    value_height = len(wrapped_lines) * (key_height + line_spacing + 7)
+
+                    current_y += value_height + line_spacing
+
+            # Add space for cross-review summary if applicable
+            if hasTeaLevelAttributes and not overrideDoNotgenerateTeaLevelAttributes:
+                current_y += line_spacing * 2 # space for seperator line
+                current_y += 50  # Arbitrary space for cross-review summary
+
+            # Add space for graphs if applicable
+            if not overrideDoNotDrawGraphs_relativeBubbles:
+                current_y += 225  # Arbitrary space for graphs
+                current_y += line_spacing * 2 # space for seperator line
+
+            image_height = current_y + padding + 200
+
+            # --- Create and Draw Image ---
+            img = Image.new('RGB', (image_width, image_height), color=(240, 240, 240))
+            draw = ImageDraw.Draw(img)
+
+            # Draw Title
+            current_y = padding
+            draw.text((padding, current_y), image_title, fill=(0, 0, 0), font=title_font)
+            current_y += title_font.getbbox(image_title)[3] - title_font.getbbox(image_title)[1] + line_spacing * 2
+
+            # Draw Attributes
+            for key, value in reviewAttributes:
+                if key in ["Name", "dateAdded"]:
+                    continue
+
+                formatted_value = self.format_attribute(key, value)
+                for cat in TeaReviewCategories:
+                    if cat.categoryRole == key:
+                        key = cat.name
+                        break
+                key_text = f"{key}: "
+
+                # Get line height from a sample character
+                line_height = (body_font.getbbox('A')[3] - body_font.getbbox('A')[1] + line_spacing)
+
+                draw.text((padding, current_y), key_text, fill=(80, 80, 80), font=body_font)
+                key_width = draw.textlength(key_text, font=body_font)
+
+                # Handle multi-line values
+                lines = str(formatted_value).split('\n')
+                for i, line in enumerate(lines):
+                    wrapped_sublines = textwrap.wrap(line, width=90) # Adjust width as needed
+                    if not wrapped_sublines: # Handle empty lines
+                         current_y += line_height 
+                    for sub_line in wrapped_sublines:
+                        # Indent subsequent lines of a wrapped value
+                        text_x = padding + key_width if i == 0 else padding + key_width + 20
+                        draw.text((text_x, current_y), sub_line, fill=(0, 0, 0), font=body_font_smaller)
+                        current_y += line_height
+                current_y += line_spacing # Extra space between attributes
+
+            # Draw Tea-level attributes if applicable
+            if hasTeaLevelAttributes and not overrideDoNotgenerateTeaLevelAttributes:
+                draw.text((padding, current_y), "--- Cross-Review Summary ---", fill=(0, 0, 0), font=title_font)
+                current_y += title_font.getbbox("--- Cross-Review Summary ---")[3] - title_font.getbbox("--- Cross-Review Summary ---")[1] + line_spacing * 2
+                for key, value in formattedTeaLevelAttributes.items():
+                    if value == "N/A":
+                        continue
+                    key_text = f"{key}: "
+
+                    # Get line height from a sample character
+                    line_height = body_font.getbbox('A')[3] - body_font.getbbox('A')[1] + line_spacing
+
+                    draw.text((padding, current_y), key_text, fill=(80, 80, 80), font=body_font)
+                    key_width = draw.textlength(key_text, font=body_font)
+
+                    # Handle multi-line values
+                    lines = str(value).split('\n')
+                    for i, line in enumerate(lines):
+                        wrapped_sublines = textwrap.wrap(line, width=90)
+
+                        if not wrapped_sublines: # Handle empty lines
+                            current_y += line_height
+                        for sub_line in wrapped_sublines:
+                            # Indent subsequent lines of a wrapped value
+                            text_x = padding + key_width if i == 0 else padding + key_width + 20
+                            draw.text((text_x, current_y), sub_line, fill=(0, 0, 0), font=body_font_smaller)
+                            current_y += line_height
+                    current_y += line_spacing # Extra space between attributes
+
+
+            # Group the images horizontally with a title.
+            if not overrideDoNotDrawGraphs_relativeBubbles:
+                # Image only graphing
+                # add a line separator
+                draw.line((padding, current_y, image_width - padding, current_y), fill=(200, 200, 200), width=2)
+                current_y += line_spacing * 2
+                chart_img_all = make_rating_bubble_image(allDatapts, highlight=thisTeaAverageRating, name="All" +f" (n={totalAllData})", grade_labels=True)
+                chart_img_type = make_rating_bubble_image(typeDatapts, highlight=thisTeaAverageRating, name="Type: " + teaParent.attributes.get("Type", "Unknown") +f" (n={totalTypeData})")
+                chart_img_vendor = make_rating_bubble_image(vendorDatapts, highlight=thisTeaAverageRating, name="Vendor: " + teaParent.attributes.get("Vendor", "Unknown") +f" (n={totalvendorData})")
+                chart_title = "Relative Rating Comparison"
+                draw.text((padding, current_y), chart_title, fill=(0, 0, 0), font=body_font)
+                current_y += body_font.getbbox(chart_title)[3] - body_font.getbbox(chart_title)[1] + line_spacing
+                if chart_img_all is not None:
+                    img.paste(chart_img_all, (padding, current_y))
+                if chart_img_type is not None:
+                    img.paste(chart_img_type, (padding + (chart_img_all.width if chart_img_all is not None else 0) + 20, current_y))
+                if chart_img_vendor is not None:
+                    img.paste(chart_img_vendor, (padding + (chart_img_all.width if chart_img_all is not None else 0) + (chart_img_type.width if chart_img_type is not None else 0) + 40, current_y))
+            
+
+                # Second row of graphs can go here, placeholders, use previously defined functions
+                current_y += max(chart_img_all.height if chart_img_all is not None else 0, chart_img_type.height if chart_img_type is not None else 0, chart_img_vendor.height if chart_img_vendor is not None else 0) + 10
+                chart_img_ppg = make_rating_bubble_image(priceDataPts, highlight=thisTeaPricePerGram, name="$/g of Type: " + teaParent.attributes.get("Type", "Unknown") +f" (n={lenPriceData})", grade_labels=False, labelPrefix="$")
+                chart_img_value = make_price_rating_value_image(thisTeaPricePerGram, thisTeaAverageRating, pricePercentile, ratingPercentile)
+                chart_img_progress = make_tea_consumption_progress_image(teaParent.adjustments, numReviewsIncludingThisOne, float(teaLevelAttributes['Total Amount Drank']), totalVolumePurchased, amount)
+
+                # TESTING, paste an image representing the letter grade including minus signs
+                # Disabled for now
+                #chart_image_test = resolveLetterGradeToImageGradeIncludingMinusSigns(thisTeaAverageRating)
+
+                #chart_img_vendor2 = make_rating_bubble_image(vendorDatapts, highlight=thisTeaAverageRating, name="Vendor: " + teaParent.attributes.get("Vendor", "Unknown") +f" (t={totalvendorData})")
+                #chart_title2 = "Relative Rating Comparison 2"
+                #draw.text((padding, current_y), chart_title2, fill=(0, 0, 0), font=body_font)
+                #current_y += body_font.getbbox(chart_title2)[3] - body_font.getbbox(chart_title2)[1] + line_spacing
+                if chart_img_ppg is not None:
+                    img.paste(chart_img_ppg, (padding, current_y))
+                if chart_img_value is not None:
+                    img.paste(chart_img_value, (padding + (chart_img_ppg.width if chart_img_ppg is not None else 0) + 20, current_y))
+                if chart_img_progress is not None:
+                    img.paste(chart_img_progress, (padding + (chart_img_ppg.width if chart_img_ppg is not None else 0) + (chart_img_value.width if chart_img_value is not None else 0) + 40, current_y))
+                #if chart_image_test is not None:
+                #    img.paste(chart_image_test, (padding + (chart_img_ppg.width if chart_img_ppg is not None else 0) + (chart_img_value.width if chart_img_value is not None else 0) + 80, current_y+10))
+                #if chart_img_vendor2 is not None:
+                #    img.paste(chart_img_vendor2, (padding + (chart_img_ppg.width if chart_img_ppg is not None else 0) + (chart_img_value.width if chart_img_value is not None else 0) + 40, current_y))
+
+            current_y += max(chart_img_type.height, chart_img_vendor.height) + 20
+
+            # Trim the bottom of the image of excess space
+            img = img.crop((0, 0, image_width, current_y + padding))
+
+
+
+
+            # --- Save Image ---
+            # Save image to unique path with timestamp, review, parent id, parent name abridged, using underscores
+            image_path = f"review_{review.id}_{review.parentID}_{sessionNum}_{teaParent.name[:20].replace(' ', '_')}_{int(dt.datetime.now().timestamp())}.png"
+            # | is invalid character for file names, remove it
+            image_path = image_path.replace("|", "")
+            img.save(image_path)
+            RichPrintSuccess(f"Generated review image at {image_path}")
+        else:
+            image_path = None
+
+        return text_review, html_review, image_path, current_y
+#endregion
+
+
+#region Visualization stuff. 
+
+
+
+
+# 1. Given a type of tea, return a list of average ratings for all reviews of that type of tea in list form
+# 2. Given a vendor of tea, return a list of average ratings for all reviews of that vendor in list form
+# 3. Given a year of tea, return a list of average ratings for all reviews of that year in list form
+# 4. Given a list from 1-3, automatically find range, return a tuple of (x, y, size) points deduping similar points
+
+def getAverageRatingRange(teaType=None, vendor=None, year=None, overlap_threshold=0.05):
+    import numpy as np
+    # If none are provided, it is considered "All"
+    getAll = False
+    if sum([teaType is None, vendor is None, year is None]) == 3:
+        getAll = True
+    # if more than 1 are provided, error for now
+    elif sum([teaType is not None, vendor is not None, year is not None]) != 1:
+        RichPrintError("Only one of teaType, vendor, or year must be provided")
+        return None
+    # Get the average ratings for the specified criteria
+    if getAll:
+        ratings = getAverageRatingsAll()
+    elif teaType:
+        ratings = getAverageRatingsByTeaType(teaType)
+    elif vendor:
+        ratings = getAverageRatingsByVendor(vendor)
+    elif year:
+        ratings = getAverageRatingsByYear(year)
+    else:
+        RichPrintError("No valid criteria provided")
+        return None
+
+    # If no ratings found, return None
+    if not ratings:
+        RichPrintError("No ratings found")
+        return None
+
+    # Sort ratings for easier clustering
+    ratings = sorted(ratings)
+    min_r, max_r = min(ratings), max(ratings)
+    r_range = max_r - min_r if max_r != min_r else 1e-6  # avoid divide by zero
+
+    # Define max distance considered "overlapping"
+    threshold = overlap_threshold * r_range
+
+    clusters = []
+    current_cluster = [ratings[0]]
+
+    # Group nearby points
+    for r in ratings[1:]:
+        if abs(r - current_cluster[-1]) <= threshold:
+            current_cluster.append(r)
+        else:
+            clusters.append(current_cluster)
+            current_cluster = [r]
+    clusters.append(current_cluster)
+
+    # Now convert clusters into (x, y, size) points
+    points = []
+    for cluster in clusters:
+        x = np.mean(cluster)  # average rating in cluster
+        # y should be static as the plot is very flat
+        y = 1
+        size = len(cluster)
+        # Round y to 2 decimal places
+        y = round(y, 2)
+        points.append((x, y, size))
+    return points
+
+# Given a type of tea, return a list of average prices for all teas of that type in list form
+# Apply bubble thresholding similar to above function
+def getAveragePriceOfTeasOfType(teaType=None, overlap_threshold=0.02):
+    import numpy as np
+    if teaType is None:
+        RichPrintError("teaType must be provided")
+        return None
+    prices = getAveragePriceRange(teaType)
+    RichPrintInfo(f"Found {len(prices)} prices for tea type '{teaType}'")
+    prices = sorted(prices)
+    if not prices:
+        RichPrintError("No prices found")
+        return None
+    
+    threshold = overlap_threshold * (max(prices) - min(prices) if max(prices) != min(prices) else 1e-6)
+    clusters = []
+    current_cluster = [prices[0]]
+
+    # Group nearby points
+    for p in prices[1:]:
+        if abs(p - current_cluster[-1]) <= threshold:
+            current_cluster.append(p)
+        else:
+            clusters.append(current_cluster)
+            current_cluster = [p]
+    clusters.append(current_cluster)
+
+    # Now convert clusters into (x, y, size) points
+    points = []
+    for cluster in clusters:
+        x = np.mean(cluster)  # average price in cluster
+        # y should be static as the plot is very flat
+        y = 1
+        size = len(cluster)
+        # Round y to 2 decimal places
+        y = round(y, 2)
+        points.append((x, y, size))
+    return points, len(prices)
+
+# Given a type of tea, and a price, calculate the percentile of that price among all teas of that type
+# (excluding teas with price <= 0.01)
+def getPercentileofPricing(teaType=None, price=None):
+    import numpy as np
+    if teaType is None or price is None:
+        RichPrintError("teaType and price must be provided")
+        return None
+    
+    # Prices <= 0.01 are already left out
+    columns = TeaColumns.sync()
+    prices = columns.prices(getPriceTypeMask(columns, teaType))
+    if len(prices) == 0:
+        RichPrintError("No valid prices found")
+        return None
+    # Calculate the percentile
+    numBelow = int(np.count_nonzero(prices < price))
+    percentile = (numBelow / len(prices)) * 100
+    return percentile
+
+def getPercentileOfRatingGivenType(teaType=None, rating=None):
+    import numpy as np
+    if teaType is None or rating is None:
+        RichPrintError("teaType and rating must be provided")
+        return None
+    columns = TeaColumns.sync(reviews=True)
+    ratings = columns.reviewValues("score", getRatingTypeMask(columns, teaType))
+    if len(ratings) == 0:
+        RichPrintError("No ratings found")
+        return None
+    numBelow = int(np.count_nonzero(ratings < rating))
+    percentile = (numBelow / len(ratings)) * 100
+    return percentile
+
+# Teas priced against teaType are those whose type is part of it, ignoring case and surrounding spaces
+def getPriceTypeMask(columns, teaType):
+    if teaType is None:
+        return None
+    teaTypeLower = teaType.lower().strip()
+    return columns.teaMaskWhere("Type", lambda value: str(value).lower().strip() in teaTypeLower)
+
+# Teas rated against teaType are those whose type contains it, ignoring case
+def getRatingTypeMask(columns, teaType):
+    teaTypeLower = teaType.lower()
+    return columns.teaMaskWhere("Type", lambda value: teaTypeLower in str(value).lower())
+
+def getAveragePriceRange(teaType=None):
+    # If none are provided, it is considered "All"
+    columns = TeaColumns.sync()
+    return columns.prices(getPriceTypeMask(columns, teaType)).tolist()
+
+def getAverageRatingsAll():
+    return TeaColumns.sync(reviews=True).reviewValues("score").tolist()
+
+def getAverageRatingsByTeaType(teaType):
+    columns = TeaColumns.sync(reviews=True)
+    return columns.reviewValues("score", getRatingTypeMask(columns, teaType)).tolist()
+
+def getAverageRatingsByVendor(vendor):
+    if canQueryTeaDatabase():
+        return queryReviewScoresDatabase(settings["TEA_REVIEWS_PATH"], vendor=vendor)
+    columns = TeaColumns.sync(reviews=True)
+    vendorLower = vendor.lower()
+    return columns.reviewValues("score", columns.teaMaskWhere("Vendor", lambda value: vendorLower in str(value).lower())).tolist()
+
+def getAverageRatingsByYear(year):
+    if canQueryTeaDatabase():
+        return queryReviewScoresDatabase(settings["TEA_REVIEWS_PATH"], year=year)
+    columns = TeaColumns.sync(reviews=True)
+    return columns.reviewValues("score", columns.teaMaskWhere("Year", lambda value: value == year)).tolist()
+
+def make_rating_bubble_image(points, width=320, height=125, highlight=None, name="", grade_labels=True, labelPrefix="", labelSuffix=""):
+    from PIL import Image
+    plt = importPyplot()
+    # Create figure
+    fig, ax = plt.subplots(figsize=(width/100, height/100), dpi=100)
+    x, y, size = zip(*points)
+
+    # Normalize size for bubbles
+    # largest bubble shouldnt exceed 750 in size
+    # smallest bubble shouldnt be smaller than 50
+    # If any bubbles are greater than 750, scale all down proportionally
+    bubble_sizes = [s * 100 for s in size]  # Scale sizes for better visibility
+    if max(bubble_sizes) > 750:
+        scale_factor = 750 / max(bubble_sizes)
+        bubble_sizes = [s * scale_factor for s in bubble_sizes]
+    elif min(bubble_sizes) < 50:
+        scale_factor = 50 / min(bubble_sizes)
+        bubble_sizes = [s * scale_factor for s in bubble_sizes]
+    # Ensure at least 50 to most 750
+    bubble_sizes = [max(50, min(s, 750)) for s in bubble_sizes]
+
+
+    # Add a highlight for highlight if provided
+    if highlight is not None:
+        highlight = float(highlight)
+        highlight_x = highlight
+        highlight_y = 0.96
+
+    if grade_labels == True:
+        labels = {
+        0: "F",
+        0.5: "D",
+        1.5: "C",
+        2.5: "B",
+        3.5: "A",
+        4.5: "S",
+        5: "S+"
+        }
+        # map 0-5 to the xlabels
+        # Set tick positions and labels
+        ax.set_xticks(list(labels.keys()))
+        ax.set_xticklabels(list(labels.values()))
+        ax.tick_params(axis='x', which='major', labelsize=11)
+    else:
+        # Determine numeric labels based on min and max x
+        min_x = min(x)
+        max_x = max(x)
+        step = (max_x - min_x) / 5
+        numeric_labels = [round(min_x + i * step, 1) for i in range(6)]
+        labels = {val: f"{labelPrefix}{val}{labelSuffix}" for val in numeric_labels}
+        ax.set_xticklabels([labels[val] for val in numeric_labels])
+        ax.set_xticks(numeric_labels)
+        ax.tick_params(axis='x', which='major', labelsize=11)
+
+    ax.scatter(x, y, s=bubble_sizes, alpha=0.6, edgecolors='black', linewidths=0.5)
+    if highlight is not None:
+        ax.scatter([highlight_x], [highlight_y], s=85, color='red', edgecolors='black', linewidths=1.5, label='This Rating')
+    ax.set_xlabel("")
+    ax.set_ylabel("")  # y is just jitter
+    ax.set_title(name if name else "Rating Distribution")
+    ax.set_ylim(min(y) - 0.1, max(y) + 0.1)
+    if grade_labels == True:
+        ax.set_xlim(-0.5, 5.5)
+    else:
+        ax.set_xlim(-0.1, max(x) * 1.1)
+    ax.get_yaxis().set_visible(False)
+    ax.grid(alpha=0.2)
+
+    # Save figure to BytesIO buffer
+    buf = BytesIO()
+    plt.tight_layout()
+    plt.savefig(buf, format="png", transparent=True)
+    plt.close(fig)
+    buf.seek(0)
+
+    # Load as Pillow image
+    chart_img = Image.open(buf)
+    return chart_img
+
+# We calculate the percentiles for price and rating and return a combined visualization
+# that shows both price and rating percentiles in an intuitive way
+# We also show the difference between the two (cheap tea should be good value, expensive tea should be high quality)
+# We visualize this with a dumbell scatter plot
+def make_price_rating_value_image(price_per_gram, rating, price_percentile, rating_percentile, name="", width=320, height=130):
+    from PIL import Image
+    plt = importPyplot()
+    difference = rating_percentile - price_percentile
+
+    # Convert pixel size to inches for matplotlib
+    dpi = 100
+    fig_w = width / dpi
+    fig_h = height / dpi
+
+    fig, ax = plt.subplots(figsize=(fig_w, fig_h), dpi=dpi)
+
+    # Dumbbell plot
+    ax.plot(
+        [price_percentile, rating_percentile],
+        [0, 0],
+        linewidth=2
+    )
+    ax.scatter(price_percentile, 0, s=50, zorder=3, label="Price", color="red")
+    ax.scatter(rating_percentile, 0, s=50, zorder=3, label="Rating", color="green")
+
+    # Annotations
+    price_percentile = round(price_percentile, 2)
+    rating_percentile = round(rating_percentile, 2)
+    ax.text(price_percentile, 0.14, f"{price_percentile:.0f}%", ha="left", fontsize=11)
+    ax.text(rating_percentile, 0.14, f"{rating_percentile:.0f}%", ha="right", fontsize=11)
+
+    ax.text(
+        (price_percentile + rating_percentile) / 2,
+        -0.3, # y offset
+        f"Δ {difference:+.0f}%",
+        ha="center",
+        fontsize=11,
+    )
+
+    # Title and subtitle
+    price_per_gram = round(price_per_gram, 2)
+    title = f"${price_per_gram:.2f}/g ({price_percentile:.0f}%) • Rating {rating:.1f} ({rating_percentile:.0f}%)"
+
+    ax.set_title(title, fontsize=12, pad=4)
+
+    # Styling
+    ax.set_xlim(0, 100)
+    ax.set_ylim(-0.5, 0.5)
+    ax.set_yticks([])
+    #ax.set_xlabel("Percentile", fontsize=11)
+    ax.tick_params(axis="x", labelsize=11)
+
+    for spine in ["top", "right", "left"]:
+        ax.spines[spine].set_visible(False)
+
+    plt.tight_layout()
+
+    # Save to image buffer
+    buf = BytesIO()
+    plt.savefig(buf, format="png", transparent=True)
+    plt.close(fig)
+    buf.seek(0)
+
+    return Image.open(buf)
+
+
+
+def make_tea_consumption_progress_image(
+    not_consumed_reasons,     # dict[str, float]  e.g. {"Sale": 12.5, "Gifted": 0}
+    reviews_done,             # int
+    total_consumed,           # float (grams)
+    total_purchased,          # float (grams)
+    last_consumed, # float (grams)
+    name="",
+    width=320,
+    height=130
+):
+    from PIL import Image
+    plt = importPyplot()
+    # Safety
+    total_purchased = max(total_purchased, 1e-6)
+
+    # Normalize values
+    consumed_pct_previous = (total_consumed - last_consumed) / total_purchased * 100
+    consumed_pct_this = (last_consumed) / total_purchased * 100
+    consumed_pct = total_consumed / total_purchased * 100
+
+    reason_items = [
+        (k, v) for k, v in not_consumed_reasons.items() if v > 0
+    ]
+
+    total_consumed_reasons = sum(v for k, v in reason_items)
+    total_remaining = total_purchased - total_consumed - total_consumed_reasons
+    if total_remaining < 0:
+        total_remaining = 0
+
+    total_remaining_pct = total_remaining / total_purchased * 100
+    total_remaining = total_purchased - total_consumed - total_consumed_reasons
+    total_remaining = max(total_remaining, 0)
+
+    # Color palette (extendable)
+    reason_colors = [
+        "#f4a261", "#e76f51", "#2a9d8f", "#e9c46a", "#8ab17d"
+    ]
+
+    # Figure setup
+    dpi = 100
+    fig_w = width / dpi
+    fig_h = height / dpi
+
+    fig, ax = plt.subplots(figsize=(fig_w, fig_h), dpi=dpi)
+
+    # --- Build stacked bar ---
+    left = 0.0
+
+    # Not-consumed reasons
+    for (reason, amount), color in zip(reason_items, reason_colors):
+        pct = amount / total_purchased * 100
+        ax.barh(
+            y=0,
+            width=pct,
+            left=left,
+            height=0.35,
+            color=color,
+            label=reason
+        )
+        left += pct
+
+    # Consumed portion
+    ax.barh(
+        y=0,
+        width=consumed_pct_previous,
+        left=left,
+        height=0.35,
+        color="#347636",
+        label="Consumed"
+    )
+    
+    left += consumed_pct_previous
+
+    ax.barh(
+        y=0,
+        width=consumed_pct_this,
+        left=left,
+        height=0.35,
+        color="#4CAF50",
+        label="Consumed2"
+    )
+
+    left += consumed_pct_this
+
+    
+
+    # --- Labels ---
+    ax.text(
+        7.5,
+        0.35,
+        f"{total_remaining:.1f}g/{total_purchased:.1f}g",
+        ha="left",
+        va="bottom",
+        fontsize=11
+    )
+
+    ax.text(
+        100,
+        0.35,
+        f"{reviews_done} reviews",
+        ha="right",
+        va="bottom",
+        fontsize=11
+    )
+
+    averageConsumedPerReview = total_consumed / reviews_done if reviews_done > 0 else 0
+    
+    estimatedReviewsLeft = total_remaining / averageConsumedPerReview if averageConsumedPerReview > 0 else 0
+    # ceil to nearest int
+    estimatedReviewsLeft = math.ceil(estimatedReviewsLeft)
+
+    # Title
+    title = f"{total_remaining_pct:.0f}% remaining (est. {estimatedReviewsLeft} reviews left)" if estimatedReviewsLeft > 0 else f"All finished!"
+    ax.set_title(title, fontsize=12, pad=4)
+
+    # Styling
+    ax.set_xlim(0, 100)
+    ax.set_ylim(-0.7, 0.8)
+    ax.set_yticks([])
+
+    ax.set_xticks([0, 25, 50, 75, 100])
+    ax.set_xticklabels(["0%", "25%", "50%", "75%", "100%"])
+    ax.tick_params(axis="x", labelsize=10, length=4)
+
+    for spine in ["top", "right"]:
+        ax.spines[spine].set_visible(False)
+
+    plt.tight_layout()
+
+    # Save to image buffer
+    buf = BytesIO()
+    plt.savefig(buf, format="png", transparent=True)
+    plt.close(fig)
+    buf.seek(0)
+
+    return Image.open(buf)
+#endregion
+
+
+#region Stash columns
+# Columnar mirror of TeaStash, so stats and percentile queries run as NumPy array operations instead of walking
+# every tea's attribute dict. Tea row i is TeaStash[i]:
+#   amount, cost, costPerGram, remaining   float64, NaN where missing
+#   Type, Vendor, Year                     int32 codes into codeValues[role], -1 where missing
+# Review rows hold score, amount, steeps, vesselSize and date (float64, dates as epoch seconds) and teaRow, the row of
+# their tea. They are only read in when a query needs them, as that decodes the reviews of teas that are not loaded.
+# appendTeaJournal passes every single tea edit on, so adds, edits, moves and deletes update the rows they touch.
+# Anything else that swaps out the stash (loads, imports, restores) is noticed by the next query, which rebuilds.
+STASH_TEA_COLUMNS = {"amount": "Amount", "cost": "Cost", "remaining": "Remaining"}
+STASH_CODE_COLUMNS = ["Type", "Vendor", "Year"]
+STASH_REVIEW_COLUMNS = {"score": "Final Score", "amount": "Amount", "steeps": "Steeps", "vesselSize": "Vessel size", "date": "date"}
+# Review rows of edited or deleted teas are only marked dead, they are dropped once there are more of them than this
+# and more than there are live rows
+STASH_COLUMNS_MIN_COMPACT = 1024
+
+class StashColumns:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.teas = []
+        self.teaArrays = None
+        self.codeIndex = {role: {} for role in STASH_CODE_COLUMNS}
+        self.codeValues = {role: [] for role in STASH_CODE_COLUMNS}
+        self.reviewArrays = None
+        self.numReviewRows = 0
+        self.numDeadReviewRows = 0
+
+    # Brings the columns in line with TeaStash and returns them. Teas are compared by identity, which is cheap
+    def sync(self, reviews=False):
+        if self.teaArrays is None or self.teas != TeaStash:
+            numRows = len(self.teas)
+            # Teas added to the end, as imports do, are appended instead of rebuilding
+            if self.teaArrays is not None and len(TeaStash) > numRows and TeaStash[:numRows] == self.teas:
+                for tea in TeaStash[numRows:]:
+                    self.applyChange("set", len(self.teas), tea)
+            else:
+                self.buildTeas()
+        if reviews and self.reviewArrays is None:
+            self.buildReviews()
+        return self
+
+    # Follows one tea journal record (see appendTeaJournal), after the stash itself has been changed
+    def applyChange(self, op, index, tea=None, newIndex=None):
+        if self.teaArrays is None:
+            return
+        numRows = len(self.teas)
+        if op == "set" and index < numRows:
+            self.teas[index] = tea
+            self.writeTeaRow(index, tea)
+            if self.reviewArrays is not None:
+                self.dropReviewRows(index)
+                self.appendReviewRows(index, tea)
+        elif op == "set" and index == numRows:
+            self.insertTeaRow(index, tea)
+            if self.reviewArrays is not None:
+                self.appendReviewRows(index, tea)
+        elif op == "delete" and index < numRows:
+            self.deleteTeaRow(index)
+            if self.reviewArrays is not None:
+                self.dropReviewRows(index)
+                teaRows = self.reviewArrays["teaRow"][:self.numReviewRows]
+                teaRows[teaRows > index] -= 1
+        elif op == "move" and index < numRows:
+            tea = self.teas[index]
+            self.deleteTeaRow(index)
+            self.insertTeaRow(newIndex, tea)
+            if self.reviewArrays is not None:
+                teaRows = self.reviewArrays["teaRow"][:self.numReviewRows]
+                moved = teaRows == index
+                if index < newIndex:
+                    teaRows[(teaRows > index) & (teaRows <= newIndex)] -= 1
+                else:
+                    teaRows[(teaRows >= newIndex) & (teaRows < index)] += 1
+                teaRows[moved] = newIndex
+        else:
+            # Out of step with the stash, the next query rebuilds
+            self.reset()
+
+    def encode(self, role, value):
+        if value is None:
+            return -1
+        codeIndex = self.codeIndex[role]
+        if value not in codeIndex:
+            codeIndex[value] = len(codeIndex)
+            self.codeValues[role].append(value)
+        return codeIndex[value]
+
+    def teaRowValues(self, tea):
+        row = {name: toNPZNumber(tea.attributes.get(role, None)) for name, role in STASH_TEA_COLUMNS.items()}
+        # Remaining as stats last calculated it, with reviews and adjustments taken off, over the attribute
+        if "remaining" in tea.calculated:
+            row["remaining"] = toNPZNumber(tea.calculated["remaining"])
+        row["costPerGram"] = row["cost"] / row["amount"] if row["amount"] > 0 else math.nan
+        for role in STASH_CODE_COLUMNS:
+            row[role] = self.encode(role, tea.attributes.get(role, None))
+        return row
+
+    def buildTeas(self):
+        import numpy as np
+        self.reset()
+        self.teas = list(TeaStash)
+        rows = [self.teaRowValues(tea) for tea in self.teas]
+        self.teaArrays = {}
+        for name in list(STASH_TEA_COLUMNS) + ["costPerGram"]:
+            self.teaArrays[name] = np.array([row[name] for row in rows], dtype=np.float64)
+        for role in STASH_CODE_COLUMNS:
+            self.teaArrays[role] = np.array([row[role] for row in rows], dtype=np.int32)
+
+    # Review columns of the given (tea row, tea) pairs
+    def collectReviewRows(self, teaRows):
+        import numpy as np
+        rowTeas = []
+        columns = {name: [] for name in STASH_REVIEW_COLUMNS}
+        for teaRow, tea in teaRows:
+            # Lazily loaded reviews are read without keeping them loaded
+            for review in tea.peekReviews():
+                rowTeas.append(teaRow)
+                for name, role in STASH_REVIEW_COLUMNS.items():
+                    columns[name].append(toNPZNumber(review.attributes.get(role, None)))
+        arrays = {"teaRow": np.array(rowTeas, dtype=np.int64), "alive": np.ones(len(rowTeas), dtype=np.bool_)}
+        for name, values in columns.items():
+            arrays[name] = np.array(values, dtype=np.float64)
+        return arrays
+
+    def buildReviews(self):
+        self.reviewArrays = self.collectReviewRows(enumerate(self.teas))
+        self.numReviewRows = len(self.reviewArrays["teaRow"])
+        self.numDeadReviewRows = 0
+
+    # Arrays keep spare rows at the end, so adding a row doesn't copy the whole column every time
+    def reserve(self, arrays, numRows):
+        import numpy as np
+        for name, array in arrays.items():
+            if len(array) < numRows:
+                grown = np.empty(max(numRows, 2 * len(array), 64), dtype=array.dtype)
+                grown[:len(array)] = array
+                arrays[name] = grown
+
+    def writeTeaRow(self, index, tea):
+        for name, value in self.teaRowValues(tea).items():
+            self.teaArrays[name][index] = value
+
+    def insertTeaRow(self, index, tea):
+        numRows = len(self.teas)
+        self.reserve(self.teaArrays, numRows + 1)
+        for array in self.teaArrays.values():
+            array[index + 1:numRows + 1] = array[index:numRows]
+        self.teas.insert(index, tea)
+        self.writeTeaRow(index, tea)
+
+    def deleteTeaRow(self, index):
+        numRows = len(self.teas)
+        for array in self.teaArrays.values():
+            array[index:numRows - 1] = array[index + 1:numRows]
+        self.teas.pop(index)
+
+    def appendReviewRows(self, teaRow, tea):
+        added = self.collectReviewRows([(teaRow, tea)])
+        start = self.numReviewRows
+        end = start + len(added["teaRow"])
+        self.reserve(self.reviewArrays, end)
+        for name, values in added.items():
+            self.reviewArrays[name][start:end] = values
+        self.numReviewRows = end
+
+    def dropReviewRows(self, teaRow):
+        import numpy as np
+        alive = self.reviewArrays["alive"][:self.numReviewRows]
+        dropped = alive & (self.reviewArrays["teaRow"][:self.numReviewRows] == teaRow)
+        alive[dropped] = False
+        self.numDeadReviewRows += int(np.count_nonzero(dropped))
+        numLive = self.numReviewRows - self.numDeadReviewRows
+        if self.numDeadReviewRows > max(STASH_COLUMNS_MIN_COMPACT, numLive):
+            for name, array in self.reviewArrays.items():
+                self.reviewArrays[name] = array[:self.numReviewRows][alive]
+            self.numReviewRows = numLive
+            self.numDeadReviewRows = 0
+
+    def teaColumn(self, name):
+        return self.teaArrays[name][:len(self.teas)]
+
+    # Mask over the tea rows whose value for role passes predicate, missing values are tested as ""
+    def teaMaskWhere(self, role, predicate):
+        import numpy as np
+        codes = [code for code, value in enumerate(self.codeValues[role]) if predicate(value)]
+        if predicate(""):
+            codes.append(-1)
+        return np.isin(self.teaColumn(role), codes)
+
+    # {value: number of teas} for role, in the order values were first seen
+    def countByValue(self, role):
+        import numpy as np
+        codes = self.teaColumn(role)
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.codeValues[role]))
+        return {self.codeValues[role][code]: int(counts[code]) for code in np.flatnonzero(counts)}
+
+    # Cost per gram of all teas, or of those in teaMask, leaving out anything at or under 0.01 as the price stats do
+    def prices(self, teaMask=None):
+        prices = self.teaColumn("costPerGram")
+        keep = prices > 0.01
+        if teaMask is not None:
+            keep &= teaMask
+        return prices[keep]
+
+    # Values of a review column for all reviews, or for the reviews of the teas in teaMask, missing values left out
+    def reviewValues(self, name, teaMask=None):
+        import numpy as np
+        self.sync(reviews=True)
+        values = self.reviewArrays[name][:self.numReviewRows]
+        keep = self.reviewArrays["alive"][:self.numReviewRows] & ~np.isnan(values)
+        if teaMask is not None:
+            keep &= teaMask[self.reviewArrays["teaRow"][:self.numReviewRows]]
+        return values[keep]
+
+# Shared like the globals at the top, only ever reset in place
+TeaColumns = StashColumns()
+#endregion
+
+
+#region Stats
+
+
+
+# Stats functions
+
+# Get Start day will use the start day from the settings, or default the earliest date it can find
+
+def reCacheStats():
+    # Recalculate all stats and cache them
+    global statsCache
+    statsCache = populateStatsCache()
+    RichPrintSuccessMinor(f"Stats cache updated")
+    return statsCache
+
+def populateStatsCache():
+    import numpy as np
+    # Run all calcs in parallel and cache them for other cals. return the cache
+    cache = {}
+    timeCacheStart = dt.datetime.now(tz=dt.timezone.utc).timestamp()
+    AllTypesCategoryRoleValid, AllTypesCategoryRole = getValidCategoryRolesList()
+    allTypesCategoryRoleReviewsValid, allTypesCategoryRoleReviews = getValidReviewCategoryRolesList()
+
+    remainingCategory = None
+    for cat in TeaCategories:
+        if cat.categoryRole == "Remaining":
+            remainingCategory = cat
+            break
+
+
+    # Num teas
+    cache["numTeas"] = statsNumTeas()
+    # Num reviews
+    cache["numReviews"] = statsNumReviews()
+    # Start day
+    cache["startDay"] = statsgetStartDayTimestamp()
+    totalDays = dt.datetime.now(tz=dt.timezone.utc).timestamp() - cache["startDay"]
+    cache["totalDays"] = totalDays / (24 * 60 * 60)  # Convert to days
+    monthsSinceStart = cache["totalDays"] / 30.44  # Average days per month
+
+    # Num teas by type, counted over the type column
+    columns = TeaColumns.sync()
+    cache["numTeasByType"] = columns.countByValue("Type")
+    cache["allTypesOfTea"] = list(cache["numTeasByType"])
+
+    # Calc total volume, average volume and all the other stash stats in one loop to prevent multiple loops
+    ctrTotalVolume = 0
+    ctrTotalCost = 0
+    ctrTotalConsumedByReviews = 0
+    ctrTotalConsumedByStdAdjustments = 0
+    ctrTotalConsumedByFinishedTeas = 0
+    ctrTotalConsumedByGiftedTeas = 0
+    ctrTotalConsumedBySaleAdjustments = 0
+    ctrTotalReturnedBySales = 0
+    ctrTotalRemaining = 0
+    ctrTotalTeasTried = 0
+    dictCtrTeasTried = {}
+    ctrTeasFinished = 0
+    dictCtrTeasFinished = {}
+    ctrTotalScored = 0
+    dictCtrScoresByType = {}
+    dictSteepsByType = {}
+    dictNumReviewsByType = {}
+    listTopTenTeasSoldByValue = []
+    dictTeaVolByType = {}
+    ctrTotalTeasSold= 0
+    dictRatingsByVendor = {} # Ratings by vendor
+    # Samples are defined as under or including 30g of total amount original.
+    ctrTotalSamples = 0
+    ctrSumTotalSampleAmount = 0
+    # Bags are defined as 30-150g of total amount original.
+    ctrTotalBags = 0
+    ctrSumTotalBagAmount = 0
+    # Bulk is defined as over 150g of total amount original.
+    ctrTotalBulk = 0
+    ctrSumTotalBulkAmount = 0
+
+    # Histogram 1 data, tea consumed by month (dates not handled well, use months from start day to now)
+    cache["histogram1Data"] = {
+        "month": {},
+        "year": {}
+    }
+
+    # Set to 1990-01-01 00:00:00 UTC as the default for latest purchase
+    ctrLatestPurchase = dt.datetime(1990, 1, 1, 0, 0, 0, tzinfo=dt.timezone.utc).timestamp()
+    remainingCategory = None
+    for cat in TeaCategories:
+        if cat.categoryRole == "Remaining":
+            remainingCategory = cat
+            break
+    cache["remainingCategory"] = remainingCategory
+
+    # Info for percentiles
+    cache_dictPriceByType = {}
+    cache_dictRatingByType = {}
+
+    for teaType in cache["allTypesOfTea"]:
+        cache_dictPriceByType[teaType] = []
+        cache_dictRatingByType[teaType] = []
+
+    for tea in TeaStash:
+        ctrTeaRemaining = 0
+        ctrTeaDrankReviews = 0
+        ctrTeaTotalAdjustments = 0
+        ctrTeaGiftAdjustments = 0
+        ctrTeaStandardAdjustments = 0
+        cache_ctrTeaFinishedAmt = 0
+        cache_calcTotalScore = 0
+        cache_calcAverageScore = 0
+        cache_calcAverageCost = 0
+        teaType = None
+        if "Type" in AllTypesCategoryRoleValid:
+            teaType = tea.attributes["Type"]
+
+            if teaType not in dictTeaVolByType:
+                dictTeaVolByType[teaType] = 0
+            dictTeaVolByType[teaType] += tea.attributes["Amount"]
+
+        if "Cost" in AllTypesCategoryRoleValid and "Amount" in AllTypesCategoryRoleValid:
+            if "Cost" in tea.attributes and "Amount" in tea.attributes:
+                cache_calcAverageCost = tea.attributes["Cost"] / tea.attributes["Amount"]
+                # Append to price per gram list split by type
+                if teaType is not None:
+                    cache_dictPriceByType[teaType].append(cache_calcAverageCost)
+
+
+        if "Amount" in AllTypesCategoryRoleValid:
+            if "Amount" in tea.attributes:
+                ctrTotalVolume += tea.attributes["Amount"]
+                # Classify as sample, bag, or bulk
+                if tea.attributes["Amount"] <= 30:
+                    ctrTotalSamples += 1
+                    ctrSumTotalSampleAmount += tea.attributes["Amount"]
+                elif tea.attributes["Amount"] < 200:
+                    ctrTotalBags += 1
+                    ctrSumTotalBagAmount += tea.attributes["Amount"]
+                else:
+                    ctrTotalBulk += 1
+                    ctrSumTotalBulkAmount += tea.attributes["Amount"]
+
+        if "Cost" in AllTypesCategoryRoleValid:
+            if "Cost" in tea.attributes:
+                ctrTotalCost += tea.attributes["Cost"]
+
+        # If the tea has a date, check if it's the latest purchase
+        if "date" in tea.attributes:
+            if tea.attributes["date"] > ctrLatestPurchase:
+                ctrLatestPurchase = tea.attributes["date"]
+
+        if "Standard" in tea.adjustments:
+            ctrTeaStandardAdjustments = tea.adjustments["Standard"]
+            ctrTotalConsumedByStdAdjustments += ctrTeaStandardAdjustments
+            ctrTeaTotalAdjustments += ctrTeaStandardAdjustments
+
+        # Gifted teas
+        if "Amount" in tea.attributes:
+            if "Gift" in tea.adjustments:
+                ctrTeaGiftAdjustments = tea.adjustments["Gift"]
+                ctrTotalConsumedByGiftedTeas += ctrTeaGiftAdjustments
+                ctrTeaTotalAdjustments += ctrTeaGiftAdjustments
+
+        # Sale adjustments
+        ctrTeaSaleAdjustments = 0
+        if "Sale" in tea.adjustments:
+            ctrTeaSaleAdjustments = tea.adjustments["Sale"]
+            if ctrTeaSaleAdjustments > 0:
+            # If there is a sale adjustment, add it to the list of top ten teas sold by value
+                ctrTotalTeasSold += 1
+                ctrTotalConsumedBySaleAdjustments += ctrTeaSaleAdjustments
+                ctrTeaTotalAdjustments += ctrTeaSaleAdjustments
+                # Given cost and amount of sale, calculate total returned
+                if "Cost" in tea.attributes and "Amount" in tea.attributes:
+                    ctrTotalReturnedBySales += cache_calcAverageCost * ctrTeaSaleAdjustments
+                    listTopTenTeasSoldByValue.append((tea, ctrTeaSaleAdjustments, cache_calcAverageCost))
+
+        # Review totals come from the tea's review summary, so teas whose reviews are not loaded stay that way
+        reviewSummary = tea.getReviewSummary()
+
+        # Teas tried
+        if reviewSummary["count"] > 0 or tea.finished or ctrTeaStandardAdjustments > 0:
+            # If the tea has reviews or is finished, count it as tried
+            ctrTotalTeasTried += 1
+            if "Type" in AllTypesCategoryRoleValid:
+                if tea.attributes["Type"] not in dictCtrTeasTried:
+                    dictCtrTeasTried[tea.attributes["Type"]] = 1
+                else:
+                    dictCtrTeasTried[tea.attributes["Type"]] += 1
+
+        
+
+        # Review totals
+        if "Amount" in allTypesCategoryRoleReviewsValid:
+            ctrTeaDrankReviews += reviewSummary["amount"]
+
+        # Total up score raw value
+        if "Final Score" in allTypesCategoryRoleReviewsValid and "Total Score" in AllTypesCategoryRoleValid:
+            ctrTotalScored += reviewSummary["score"]
+            cache_calcTotalScore += reviewSummary["score"]
+            if "Type" in allTypesCategoryRoleReviewsValid:
+                for reviewType, score in reviewSummary["scoreByType"].items():
+                    if reviewType not in dictCtrScoresByType:
+                        dictCtrScoresByType[reviewType] = 0
+                    dictCtrScoresByType[reviewType] += score
+
+        if reviewSummary["count"] > 0 and teaType is not None:
+            # Steeps by type
+            if "Steeps" in allTypesCategoryRoleReviewsValid:
+                if teaType not in dictSteepsByType:
+                    dictSteepsByType[teaType] = 0
+                dictSteepsByType[teaType] += reviewSummary["steeps"]
+
+            # Num reviews by type
+            if teaType not in dictNumReviewsByType:
+                dictNumReviewsByType[teaType] = 0
+            dictNumReviewsByType[teaType] += reviewSummary["count"]
+
+
+        ctrTotalConsumedByReviews += ctrTeaDrankReviews
+
+        # Histogram 1 data (tea consumed by month or year)
+        # Amount consumed in the tea's reviews by month and year of the review
+        for reviewMonth, reviewAmount in reviewSummary["consumedByMonth"].items():
+            if reviewMonth not in cache["histogram1Data"]["month"]:
+                cache["histogram1Data"]["month"][reviewMonth] = 0
+            cache["histogram1Data"]["month"][reviewMonth] += reviewAmount
+        for reviewYear, reviewAmount in reviewSummary["consumedByYear"].items():
+            if reviewYear not in cache["histogram1Data"]["year"]:
+                cache["histogram1Data"]["year"][reviewYear] = 0
+            cache["histogram1Data"]["year"][reviewYear] += reviewAmount
+
+
+        # Calculate remaining
+        ctrTeaRemaining = tea.attributes["Amount"] - ctrTeaDrankReviews - tea.adjustments.get("Standard", 0) - tea.adjustments.get("Gift", 0) - tea.adjustments.get("Sale", 0)
+
+        # If finished, the remaining is set to 0 and added to the total consumed by finished teas
+        if ctrTeaRemaining <= 0:
+            ctrTeaRemaining = 0
+            # If the tea is finished, set the finished flag
+            tea.finished = True
+        if tea.finished:
+            ctrTotalConsumedByFinishedTeas += ctrTeaRemaining
+            cache_ctrTeaFinishedAmt = ctrTeaRemaining
+            ctrTeaRemaining = 0
+            ctrRemainingExcludingStandard = tea.attributes["Amount"] - ctrTeaDrankReviews - tea.adjustments.get("Gift", 0) - tea.adjustments.get("Sale", 0)
+
+            if ctrRemainingExcludingStandard > 0:
+                RichPrintInfo(f"Tea {tea.name} is finished, adjusting standard amount to {ctrRemainingExcludingStandard:.2f}g and remaining amount to 0g.")
+                # back-adjust the tea's standard adjustment to reflect the remaining amount
+                tea.adjustments["Standard"] = ctrRemainingExcludingStandard
+                # back-adjust the tea's remaining amount to 0 to reflect the finished state, only if it is autocalculated
+                if "Remaining" in AllTypesCategoryRoleValid and remainingCategory.isAutoCalculated:
+                    tea.attributes["Remaining"] = 0
+
+        ctrTotalRemaining += ctrTeaRemaining
+
+
+        # Derive explanation for remaining
+        remainingExplanation = ""
+        stdPlusFinished = tea.adjustments.get("Standard", 0) + cache_ctrTeaFinishedAmt
+        explanation = f"{tea.attributes['Amount']:.2f}g Purchased\n- {ctrTeaDrankReviews:.2f}g Sum of all review Amounts\n- {stdPlusFinished:.2f}g Standard Adjustments (inc Finished)\n- {ctrTeaGiftAdjustments:.2f}g Gift Adjustments\n- {ctrTeaSaleAdjustments:.2f}g Sale Adjustments\n= {ctrTeaRemaining:.2f}g Remaining"
+        if ctrTeaRemaining < 0:
+            remainingExplanation = explanation + " (Overdrawn)"
+        elif ctrTeaRemaining == 0:
+            remainingExplanation = explanation + " (Finished)"
+        else:
+            remainingExplanation = explanation + " (Not Finished)"
+
+        # Calc average score
+        if cache_calcTotalScore > 0:
+            cache_calcAverageScore = cache_calcTotalScore / reviewSummary["count"]
+
+        totalScoreExplanation = f"{cache_calcTotalScore:.2f} Total Score\n/ {reviewSummary['count']} Number of reviews\n= {cache_calcAverageScore:.2f} Average Score"
+
+        # if no reviews, set cache_calcAverageScore to -1
+        if reviewSummary["count"] == 0:
+            cache_calcAverageScore = -1
+            totalScoreExplanation = "No reviews, no score"
+
+        # Finished teas
+        if tea.finished or ctrTeaRemaining <= 0:
+            ctrTeasFinished += 1
+            if "Type" in AllTypesCategoryRoleValid:
+                if tea.attributes["Type"] not in dictCtrTeasFinished:
+                    dictCtrTeasFinished[tea.attributes["Type"]] = 1
+                else:
+                    dictCtrTeasFinished[tea.attributes["Type"]] += 1
+            
+        # Autocalc explanation for cost per gram
+        costPerGramExplanation = f"${tea.attributes['Cost']:.2f} Cost\n/ {tea.attributes['Amount']:.2f} Amount\n= ${cache_calcAverageCost:.2f} Price per gram"
+        
+        # Ratings by vendor
+        if "Final Score" in allTypesCategoryRoleReviewsValid and "Vendor" in tea.attributes:
+            # Untried teas count towards their own vendor too
+            vendor = tea.attributes["Vendor"]
+            if vendor not in dictRatingsByVendor:
+                dictRatingsByVendor[vendor] = list()
+            if cache_calcAverageScore >= 0:
+                dictRatingsByVendor[vendor].append(cache_calcAverageScore)
+                if tea.attributes["Type"] is not None:
+                    cache_dictRatingByType[tea.attributes["Type"]].append(cache_calcAverageScore)
+            else:
+                dictRatingsByVendor[vendor].append(-1)
+                if tea.attributes["Type"] is not None:
+                    cache_dictRatingByType[tea.attributes["Type"]].append(-1)
+
+       
+
+
+
+        # Add to tea.cache
+        tea.calculated["remaining"] = ctrTeaRemaining
+        tea.calculated["remainingExplanation"] = remainingExplanation
+        tea.calculated["averageScore"] = cache_calcAverageScore
+        tea.calculated["totalScoreExplanation"] = totalScoreExplanation
+        tea.calculated["costPerGramExplanation"] = costPerGramExplanation
+        tea.calculated["costPerGram"] = cache_calcAverageCost
+
+
+     # Price and rating percentiles
+    # We want to calculate them all in one go to avoid multiple loops
+    # Price is gotten from cost per gram of all teas gt 0.01
+    # Rating is gotten from cache_calcAverageScore of all teas gt -1
+    # Filter and sort the lists first
+    cache_listPriceByTypeFiltered = {}
+    for teaType in cache_dictPriceByType:
+        cache_listPriceByTypeFiltered[teaType] = [
+            x for x in cache_dictPriceByType[teaType] if x > 0.01
+        ]
+        cache_listPriceByTypeFiltered[teaType] = sorted(cache_listPriceByTypeFiltered[teaType])
+    cache_listRatingByTypeFiltered = {}
+    for teaType in cache_dictRatingByType:
+        cache_listRatingByTypeFiltered[teaType] = [
+            x for x in cache_dictRatingByType[teaType] if x > -1
+        ]
+        cache_listRatingByTypeFiltered[teaType] = sorted(cache_listRatingByTypeFiltered[teaType])
+
+    # Remaining was just recalculated for every tea
+    columns.teaColumn("remaining")[:] = [tea.calculated["remaining"] for tea in TeaStash]
+
+    # Percentiles for all teas of a type at once, a binary search into the sorted list gives the number below each tea
+    typeCodes = columns.teaColumn("Type")
+    teaPrices = np.array([tea.calculated["costPerGram"] for tea in TeaStash], dtype=np.float64)
+    teaRatings = np.array([tea.calculated["averageScore"] for tea in TeaStash], dtype=np.float64)
+    pricePercentiles = np.zeros(len(TeaStash))
+    ratingPercentiles = np.zeros(len(TeaStash))
+    for teaType in cache["allTypesOfTea"]:
+        typeRows = typeCodes == columns.codeIndex["Type"][teaType]
+        priceList = np.array(cache_listPriceByTypeFiltered[teaType], dtype=np.float64)
+        if len(priceList) > 0:
+            pricePercentiles[typeRows] = np.searchsorted(priceList, teaPrices[typeRows], side="left") / len(priceList)
+        ratingList = np.array(cache_listRatingByTypeFiltered[teaType], dtype=np.float64)
+        if len(ratingList) > 0:
+            ratingPercentiles[typeRows] = np.searchsorted(ratingList, teaRatings[typeRows], side="left") / len(ratingList)
+
+    cache_listPricePercentiles = [] # tuple of (id, tea name, price percentile)
+    cache_listRatingPercentiles = [] # tuple of (id, tea name, rating percentile)
+    cache_listallPercentiles = [] # tuple of (id, tea name, price, rating, value percentiles)
+    for i, tea in enumerate(TeaStash):
+        teaType = None
+        if "Type" in tea.attributes:
+            teaType = tea.attributes["Type"]
+        # Price percentiles
+        if teaType is not None and teaType in cache_listPriceByTypeFiltered:
+            tea.calculated["pricePercentile"] = float(pricePercentiles[i])
+
+        # Rating percentiles
+        if teaType is not None and teaType in cache_listRatingByTypeFiltered:
+            tea.calculated["ratingPercentile"] = float(ratingPercentiles[i])
+
+        # Value is taken by subtracting price percentile from rating percentile
+        if "pricePercentile" in tea.calculated and "ratingPercentile" in tea.calculated:
+            tea.calculated["valuePercentile"] = tea.calculated["ratingPercentile"] - tea.calculated["pricePercentile"]
+        else:
+            tea.calculated["valuePercentile"] = 0
+
+        cache_listallPercentiles.append((
+            tea.id,
+            tea.name,
+            tea.calculated.get("pricePercentile", 0),
+            tea.calculated.get("ratingPercentile", 0),
+            tea.calculated.get("valuePercentile", 0)
+        ))
+
+        cache_listPricePercentiles.append((
+            tea.id,
+            tea.name,
+            tea.calculated.get("pricePercentile", 0)
+        ))
+        cache_listRatingPercentiles.append((
+            tea.id,
+            tea.name,
+            tea.calculated.get("ratingPercentile", 0)
+        ))
+
+    cache["pricePercentiles"] = cache_listPricePercentiles
+    cache["ratingPercentiles"] = cache_listRatingPercentiles
+    cache["allPercentiles"] = cache_listallPercentiles
+
+    # filter first
+    filtered_percentiles = []
+    for tea in cache["allPercentiles"]:
+        if tea[2] > 0 and tea[3] > 0:
+            filtered_percentiles.append(tea)
+    filtered_percentiles = sorted(filtered_percentiles, key=lambda x: x[4], reverse=True)
+    ##for tea in filtered_percentiles:
+    ##    print(f"Tea {tea[1]}: price percentile = {tea[2]:.4f}, rating percentile = {tea[3]:.4f}, value percentile = {tea[4]:.4f}")
+    ##
+    
+    # Average volume
+    if cache["numTeas"] > 0:
+        cache["averageVolume"] = ctrTotalVolume / cache["numTeas"]
+    else:
+        cache["averageVolume"] = 0
+
+    # Samples, bags, bulk
+    cache["totalSamples"] = ctrTotalSamples
+    cache["totalBags"] = ctrTotalBags
+    cache["totalBulk"] = ctrTotalBulk
+    cache["sumTotalSampleAmount"] = ctrSumTotalSampleAmount
+    cache["sumTotalBagAmount"] = ctrSumTotalBagAmount
+    cache["sumTotalBulkAmount"] = ctrSumTotalBulkAmount
+
+    # Tea volume by type
+    cache["teaVolumeByType"] = dictTeaVolByType
+
+    cache["totalVolume"] = ctrTotalVolume
+    if cache["numTeas"] > 0:
+        cache["averageCost"] = ctrTotalCost / cache["numTeas"]
+    else:
+        cache["averageCost"] = 0
+    cache["totalCost"] = ctrTotalCost
+
+    # Weighted average cost
+    if "Cost" in AllTypesCategoryRoleValid and "Amount" in AllTypesCategoryRoleValid:
+        if ctrTotalVolume > 0:
+            cache["weightedAverageCost"] = ctrTotalCost / ctrTotalVolume
+        else:
+            cache["weightedAverageCost"] = 0
+    else:
+        cache["weightedAverageCost"] = 0
+
+    # Total consumed by reviews
+    if "Amount" in allTypesCategoryRoleReviewsValid and cache["numReviews"] > 0 and cache["numTeas"] > 0:
+        cache["totalConsumedByReviewsSum"] = ctrTotalConsumedByReviews
+        cache["averageConsumedByReviews"] = ctrTotalConsumedByReviews / cache["numTeas"]
+    else:
+        cache["totalConsumedByReviewsSum"] = 0
+        cache["averageConsumedByReviews"] = 0
+
+    # Total consumed by standard adjustments
+    if "Remaining" in AllTypesCategoryRoleValid and cache["numTeas"] > 0:
+        cache["totalConsumedByStdAdjustmentsOnlySum"] = ctrTotalConsumedByStdAdjustments
+        cache["averageConsumedByStdAdjustmentsOnly"] = ctrTotalConsumedByStdAdjustments / cache["numTeas"]
+    else:
+        cache["totalConsumedByStdAdjustmentsOnlySum"] = 0
+        cache["averageConsumedByStdAdjustmentsOnly"] = 0
+
+    # Total consumed by finished teas
+    if "Amount" in AllTypesCategoryRoleValid and cache["numTeas"] > 0:
+        cache["totalConsumedByFinishedTeasSum"] = ctrTotalConsumedByFinishedTeas
+        cache["averageConsumedByFinishedTeas"] = ctrTotalConsumedByFinishedTeas / cache["numTeas"]
+    else:
+        cache["totalConsumedByFinishedTeasSum"] = 0
+        cache["averageConsumedByFinishedTeas"] = 0
+
+    # Total personally consumed (finished + reviews + standard adjustments)
+    if "Amount" in AllTypesCategoryRoleValid and cache["numTeas"] > 0:
+        cache["totalConsumedByPersonalSum"] = ctrTotalConsumedByReviews + ctrTotalConsumedByStdAdjustments + ctrTotalConsumedByFinishedTeas
+        cache["averageConsumedByPersonal"] = (ctrTotalConsumedByReviews + ctrTotalConsumedByStdAdjustments + ctrTotalConsumedByFinishedTeas) / cache["numTeas"]
+    else:
+        cache["totalConsumedByPersonalSum"] = 0
+        cache["averageConsumedByPersonal"] = 0
+
+    # Total consumed by gifted teas
+    if "Amount" in AllTypesCategoryRoleValid and cache["numTeas"] > 0:
+        cache["totalConsumedByGiftedTeasSum"] = ctrTotalConsumedByGiftedTeas
+        cache["averageConsumedByGiftedTeas"] = ctrTotalConsumedByGiftedTeas / cache["numTeas"]
+    else:
+        cache["totalConsumedByGiftedTeasSum"] = 0
+        cache["averageConsumedByGiftedTeas"] = 0
+
+    # Total consumed by sale adjustments
+    if "Amount" in AllTypesCategoryRoleValid and cache["numTeas"] > 0:
+        cache["totalConsumedBySaleAdjustmentsSum"] = ctrTotalConsumedBySaleAdjustments
+        cache["averageConsumedBySaleAdjustments"] = ctrTotalConsumedBySaleAdjustments / cache["numTeas"]
+    else:
+        cache["totalConsumedBySaleAdjustmentsSum"] = 0
+        cache["averageConsumedBySaleAdjustments"] = 0
+
+    # Total returned by sales
+    if "Amount" in AllTypesCategoryRoleValid and cache["numTeas"] > 0:
+        cache["totalReturnedBySales"] = ctrTotalReturnedBySales
+        cache["averageReturnedBySales"] = ctrTotalReturnedBySales / cache["numTeas"]
+    else:
+        cache["totalReturnedBySales"] = 0
+        cache["averageReturnedBySales"] = 0
+
+    if len(dictRatingsByVendor) > 0:
+        cache["ratingsByVendor"] = {}
+        for vendor in dictRatingsByVendor:
+            # -1s indicate untried tea, count them seperately so we have a total teas drank for the vendor
+            # we want a number of reviews (count), a number of teas and number of untried teas
+            numTeas = sum(1 for score in dictRatingsByVendor[vendor] if score != -1)
+            numUntried = dictRatingsByVendor[vendor].count(-1)
+            sumRatings = sum(score for score in dictRatingsByVendor[vendor] if score != -1)
+            lenRatingsTried = len(dictRatingsByVendor[vendor]) - numUntried
+            cache["ratingsByVendor"][vendor] = {
+                "average": sumRatings / lenRatingsTried if lenRatingsTried > 0 else 0,
+                "count": len(dictRatingsByVendor[vendor]),
+                "numTeas": numTeas,
+                "numUntried": numUntried
+            }
+    else:
+        cache["ratingsByVendor"] = {}
+
+    # Top ten teas sold by value
+    listTopTenTeasSoldByValue.sort(key=lambda x: x[1], reverse=True)
+    cache["topTenTeasSoldByValue"] = listTopTenTeasSoldByValue[:10]  # Limit to top 10
+    cache["totalTeasSold"] = ctrTotalTeasSold
+
+    # Steeps by type
+    cache["steepsByType"] = dictSteepsByType
+    # Num reviews by type
+    cache["numReviewsByType"] = dictNumReviewsByType
+
+    # Total consumed by all methods
+    totalConsumed = ctrTotalConsumedByReviews + ctrTotalConsumedByStdAdjustments + ctrTotalConsumedByFinishedTeas + ctrTotalConsumedByGiftedTeas + ctrTotalConsumedBySaleAdjustments
+    cache["totalConsumed"] = totalConsumed
+    cache["averageConsumed"] = totalConsumed / cache["numTeas"] if cache["numTeas"] > 0 else 0
+
+    # Total consumed excluding gift adjustments
+    totalConsumedExcludingGiftAdj = ctrTotalConsumedByReviews + ctrTotalConsumedByStdAdjustments + ctrTotalConsumedByFinishedTeas
+    cache["totalConsumedExcludingGiftAdj"] = totalConsumedExcludingGiftAdj
+    cache["averageConsumedExcludingGiftAdj"] = totalConsumedExcludingGiftAdj / cache["numTeas"] if cache["numTeas"] > 0 else 0
+
+    # Total Consumed Standard Adjustments is finished plus standard
+    totalConsumedStandardAdj = ctrTotalConsumedByStdAdjustments
+    cache["totalConsumedStandardAdj"] = totalConsumedStandardAdj
+    cache["averageConsumedStandardAdj"] = totalConsumedStandardAdj / cache["numTeas"] if cache["numTeas"] > 0 else 0
+
+    # Total Consumed Gift Adjustments is just the gift adjustments
+    totalConsumedGiftAdj = ctrTotalConsumedByGiftedTeas
+    cache["totalConsumedGiftAdj"] = totalConsumedGiftAdj
+    cache["averageConsumedGiftAdj"] = totalConsumedGiftAdj / cache["numTeas"] if cache["numTeas"] > 0 else 0
+
+    # Total consumed by sale and gift adjustments
+    totalConsumedSaleAdj = ctrTotalConsumedBySaleAdjustments
+    cache["totalConsumedSaleGiftAdj"] = totalConsumedSaleAdj
+    cache["averageConsumedSaleGiftAdj"] = totalConsumedSaleAdj / cache["numTeas"] if cache["numTeas"] > 0 else 0
+
+    # Total Remaining
+    cache["totalRemaining"] = ctrTotalRemaining
+    if cache["numTeas"] > 0:
+        cache["averageRemaining"] = ctrTotalRemaining / cache["numTeas"]
+    else:
+        cache["averageRemaining"] = 0
+
+    # Teas tried
+    cache["totalTeasTried"] = ctrTotalTeasTried
+    cache["averageTeasTried"] = ctrTotalTeasTried / cache["numTeas"] if cache["numTeas"] > 0 else 0
+    cache["teasTriedByType"] = dictCtrTeasTried
+    
+    # Teas not tried
+    cache["totalTeasNotTried"] = cache["numTeas"] - ctrTotalTeasTried
+    cache["averageTeasNotTried"] = (cache["numTeas"] - ctrTotalTeasTried) / cache["numTeas"] if cache["numTeas"] > 0 else 0
+    cache["teasNotTriedByType"] = {k: cache["numTeasByType"].get(k, 0) - dictCtrTeasTried.get(k, 0) for k in cache["numTeasByType"]}
+
+    # Teas finished
+    cache["totalTeasFinished"] = ctrTeasFinished
+    cache["averageTeasFinished"] = ctrTeasFinished / cache["numTeas"] if cache["numTeas"] > 0 else 0
+    cache["teasFinishedByType"] = dictCtrTeasFinished
+
+    # Total and average score by type
+    cache["totalScore"] = ctrTotalScored
+    cache["scoreByType"] = dictCtrScoresByType
+
+    # Average purchase per month
+    if monthsSinceStart > 0:
+        cache["averagePurchasePerMonth"] = cache["totalCost"] / monthsSinceStart
+    else:
+        cache["averagePurchasePerMonth"] = 0
+    # Latest purchase date
+    cache["latestPurchase"] = ctrLatestPurchase
+    
+    # Days since last purchase
+    if ctrLatestPurchase > 0:
+        daysSinceLastPurchase = (dt.datetime.now(tz=dt.timezone.utc).timestamp() - ctrLatestPurchase) / (24 * 60 * 60)
+        cache["daysSinceLastPurchase"] = daysSinceLastPurchase
+    else:
+        cache["daysSinceLastPurchase"] = 0
+
+    # Purchases by month
+    purchasesByMonth = {}
+    for tea in TeaStash:
+        if "date" in tea.attributes and tea.attributes["date"] is not None:
+            purchaseDate = dt.datetime.fromtimestamp(tea.attributes["date"], tz=dt.timezone.utc)
+            monthYear = purchaseDate.strftime("%Y-%m")
+            if monthYear not in purchasesByMonth:
+                purchasesByMonth[monthYear] = 0
+            purchasesByMonth[monthYear] += tea.attributes.get("Cost", 0)
+    cache["purchasesByMonth"] = purchasesByMonth
+
+    timeCacheEnd = dt.datetime.now(tz=dt.timezone.utc).timestamp()
+    timeCacheDuration = timeCacheEnd - timeCacheStart
+    RichPrintSuccessMinor(f"Stats cache duration: {timeCacheDuration:.2f} seconds")
+
+    return cache
+
+def statsgetStartDayTimestamp():
+    startDay = None
+    if "START_DAY" in settings and settings["START_DAY"] is not None and settings["START_DAY"] != "":
+        startDay = settings["START_DAY"]
+        return AnyDTFormatToTimeStamp(startDay)
+    # If no start day is set, find the earliest date in the stash
+    earliestDate = None
+    for tea in TeaStash:
+        if tea.dateAdded is not None:
+            dateAddedTimestamp = AnyDTFormatToTimeStamp(tea.dateAdded)
+            if earliestDate is None or dateAddedTimestamp < earliestDate:
+                earliestDate = dateAddedTimestamp
+        # Also check date purchased if it exists
+        if "date" in tea.attributes and tea.attributes["date"] is not None:
+            datePurchasedTimestamp = AnyDTFormatToTimeStamp(tea.attributes["date"])
+            if earliestDate is None or datePurchasedTimestamp < earliestDate:
+                earliestDate = datePurchasedTimestamp
+    if earliestDate is not None:
+        return earliestDate
+    # If no teas are in the stash, return the current time
+    RichPrintWarning("No start day set and no teas in the stash. Defaulting to current time.")
+    return dt.datetime.now(tz=dt.timezone.utc).timestamp()
+
+def statsNumTeas():
+    # Get the number of teas in the stash
+    numTeas = len(TeaStash)
+    return numTeas
+def statsNumReviews():
+    # Get the number of reviews in the stash
+    numReviews = 0
+    for tea in TeaStash:
+        numReviews += tea.getNumReviews()
+    return numReviews
+
+def statsWaterConsumed():
+    # For each review, multiply the number of steeps by vessel size
+    # and sum them up
+    totalWaterConsumed = 0
+    for tea in TeaStash:
+        tea: StashedTea
+        totalWaterConsumed += tea.getReviewSummary()["water"]
+    # Calculate the average water consumed
+    sum, avrg, count, unique, _ = getStatsOnCategoryByRole("Steeps", True)
+    if sum > 0:
+        averageWaterConsumed = totalWaterConsumed / sum
+    else:
+        averageWaterConsumed = 0
+    return totalWaterConsumed, averageWaterConsumed
+#endregion
+
+
+#region Save and Load
+
+# Backup store
+# Backups are content addressed: every file is stored once under objects/, keyed by the hash of its contents,
+# and each backup is a small manifest in snapshots/ mapping the file names SaveAll writes to those hashes.
+# Files that did not change between backups (categories, settings, windows, often the teas) take no extra space.
+# Stored files are compressed according to BACKUP_COMPRESSION, the suffix says how
+BACKUP_COMPRESSION_SUFFIXES = {"none": "", "gzip": ".gz", "lzma": ".xz"}
+
+def getBackupCompression():
+    compression = settings["BACKUP_COMPRESSION"]
+    if compression not in BACKUP_COMPRESSION_SUFFIXES:
+        RichPrintWarning(f"Unknown backup compression {compression}, storing backups uncompressed")
+        return "none"
+    return compression
+
+def getBackupObjectPath(storePath, fileHash, compression="none"):
+    return f"{storePath}/objects/{fileHash[:2]}/{fileHash[2:]}{BACKUP_COMPRESSION_SUFFIXES[compression]}"
+
+# Path of the stored file with this hash in whichever compression it was stored with, None if not stored
+def findBackupObject(storePath, fileHash):
+    for compression in BACKUP_COMPRESSION_SUFFIXES:
+        objectPath = getBackupObjectPath(storePath, fileHash, compression)
+        if os.path.exists(objectPath):
+            return objectPath
+    return None
+
+def openBackupObject(objectPath):
+    if objectPath.endswith(".gz"):
+        return gzip.open(objectPath, "rb")
+    if objectPath.endswith(".xz"):
+        return lzma.open(objectPath, "rb")
+    return open(objectPath, "rb")
+
+def hashFile(path):
+    hasher = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+def storeBackupSnapshot(storePath, stagingPath, name, manifest):
+    compression = getBackupCompression()
+    stagedBytes = 0
+    newBytes = 0
+    try:
+        # The tea file is written by the save worker
+        flushSaveWorker()
+        for fileName in sorted(os.listdir(stagingPath)):
+            filePath = f"{stagingPath}/{fileName}"
+            fileHash = hashFile(filePath)
+            stagedBytes += os.path.getsize(filePath)
+            if findBackupObject(storePath, fileHash) is None:
+                objectPath = getBackupObjectPath(storePath, fileHash, compression)
+                os.makedirs(os.path.dirname(objectPath), exist_ok=True)
+                if compression == "none":
+                    os.replace(filePath, objectPath)
+                else:
+                    opener = gzip.open if compression == "gzip" else lzma.open
+                    with open(filePath, "rb") as source, opener(f"{objectPath}.tmp", "wb") as target:
+                        shutil.copyfileobj(source, target)
+                    os.replace(f"{objectPath}.tmp", objectPath)
+                newBytes += os.path.getsize(objectPath)
+            manifest["files"][fileName] = fileHash
+    except OSError as e:
+        RichPrintError(f"Failed to store backup {name} in {storePath}: {e}")
+        return
+    finally:
+        shutil.rmtree(stagingPath, ignore_errors=True)
+
+    # The manifest is written last, a backup interrupted before this point only leaves unreferenced objects.
+    # Another backup's manifest is never replaced, its stored files stay until collectBackupObjects
+    manifestPath = f"{storePath}/snapshots/{name}.json"
+    if os.path.exists(manifestPath):
+        RichPrintError(f"Backup {name} already exists in {storePath}, not overwriting it")
+        return
+    WriteFileAtomic(manifestPath, json.dumps(manifest, indent=2))
+    RichPrintSuccess(f"Backup {name} stored in {storePath}, {len(manifest['files'])} files, {stagedBytes} bytes, {newBytes} bytes new on disk")
+
+# Backups taken back to back, like the pre-restore copy the CLI takes, can share a timestamp, later ones get a suffix
+def getFreeBackupSnapshotName(storePath, name):
+    candidate = name
+    suffix = 2
+    while os.path.exists(f"{storePath}/snapshots/{candidate}.json"):
+        candidate = f"{name}-{suffix}"
+        suffix += 1
+    return candidate
+
+# Writes all files to a staging folder, then stores them. With background=True hashing and
+# compression happen on a separate thread and the snapshot name is returned before it is stored.
+# saveFunc(path, saveCSV=True) writes the files, the app passes SaveAll so open windows are included
+def createBackupSnapshot(storePath, kind="manual", background=False, saveFunc=None):
+    if saveFunc is None:
+        saveFunc = saveAllToDirectory
+    os.makedirs(f"{storePath}/snapshots", exist_ok=True)
+    created = dt.datetime.now(tz=dt.timezone.utc)
+    name = getFreeBackupSnapshotName(storePath, created.strftime("%Y-%m-%d %H-%M-%S-%f"))
+    manifest = {"created": created.timestamp(), "kind": kind, "appVersion": settings["APP_VERSION"], "files": {}}
+    stagingPath = tempfile.mkdtemp(prefix="staging-", dir=storePath)
+    saveFunc(stagingPath, saveCSV=True)
+    if background:
+        threading.Thread(target=storeBackupSnapshot, args=(storePath, stagingPath, name, manifest)).start()
+    else:
+        storeBackupSnapshot(storePath, stagingPath, name, manifest)
+    return name
+
+# Returns (name, manifest) pairs, newest first
+def listBackupSnapshots(storePath):
+    snapshotsPath = f"{storePath}/snapshots"
+    if not os.path.exists(snapshotsPath):
+        return []
+    snapshots = []
+    for fileName in os.listdir(snapshotsPath):
+        if not fileName.endswith(".json"):
+            continue
+        try:
+            with open(f"{snapshotsPath}/{fileName}", "r") as file:
+                manifest = json.load(file)
+        except (OSError, json.JSONDecodeError) as e:
+            RichPrintWarning(f"Skipping unreadable backup manifest {fileName}: {e}")
+            continue
+        snapshots.append((fileName[:-len(".json")], manifest))
+    snapshots.sort(key=lambda snapshot: snapshot[1]["created"], reverse=True)
+    return snapshots
+
+# Thins out old snapshots: keeps the newest overall, plus the newest of each of the last
+# BACKUP_KEEP_HOURLY hours, BACKUP_KEEP_DAILY days and BACKUP_KEEP_WEEKLY weeks that have backups
+def pruneBackupSnapshots(storePath):
+    snapshots = listBackupSnapshots(storePath)
+    if len(snapshots) == 0:
+        return
+    keep = {snapshots[0][0]}
+    rules = [
+        (settings["BACKUP_KEEP_HOURLY"], lambda created: (created.date(), created.hour)),
+        (settings["BACKUP_KEEP_DAILY"], lambda created: created.date()),
+        (settings["BACKUP_KEEP_WEEKLY"], lambda created: tuple(created.isocalendar())[:2]),
+    ]
+    for count, bucketOf in rules:
+        buckets = set()
+        for name, manifest in snapshots:
+            if len(buckets) >= count:
+                break
+            bucket = bucketOf(dt.datetime.fromtimestamp(manifest["created"], tz=dt.timezone.utc))
+            if bucket not in buckets:
+                buckets.add(bucket)
+                keep.add(name)
+
+    numRemoved = 0
+    for name, manifest in snapshots:
+        if name not in keep:
+            os.remove(f"{storePath}/snapshots/{name}.json")
+            numRemoved += 1
+    if numRemoved > 0:
+        RichPrintInfo(f"Pruned {numRemoved} old backups from {storePath}, keeping {len(keep)}")
+        collectBackupObjects(storePath)
+
+# Deletes stored files no manifest refers to anymore
+def collectBackupObjects(storePath):
+    referenced = set()
+    for name, manifest in listBackupSnapshots(storePath):
+        referenced.update(manifest["files"].values())
+    objectsPath = f"{storePath}/objects"
+    if not os.path.exists(objectsPath):
+        return
+    freedBytes = 0
+    for prefix in os.listdir(objectsPath):
+        prefixPath = f"{objectsPath}/{prefix}"
+        for rest in os.listdir(prefixPath):
+            if prefix + rest.split(".")[0] not in referenced:
+                freedBytes += os.path.getsize(f"{prefixPath}/{rest}")
+                os.remove(f"{prefixPath}/{rest}")
+        if len(os.listdir(prefixPath)) == 0:
+            os.rmdir(prefixPath)
+    RichPrintSuccessMinor(f"Freed {freedBytes} bytes of unreferenced backup files in {storePath}")
+
+# Newest manual or auto backup as (storePath, name), not counting the safety copies taken by earlier restores
+def findLatestBackupSnapshot():
+    candidates = []
+    for storePath in (settings["BACKUP_PATH"], settings["AUTO_SAVE_PATH"]):
+        for name, manifest in listBackupSnapshots(storePath):
+            if manifest.get("kind", None) != "pre-restore":
+                candidates.append((manifest["created"], storePath, name))
+    if len(candidates) == 0:
+        return None
+    created, storePath, name = max(candidates)
+    return storePath, name
+
+# Where each backed up file lives in the running app
+def getLiveDataPaths():
+    return {
+        "tea_reviews.yml": settings["TEA_REVIEWS_PATH"],
+        "tea_categories.yml": settings["TEA_CATEGORIES_PATH"],
+        "tea_review_categories.yml": settings["TEA_REVIEW_CATEGORIES_PATH"],
+        "user_settings.yml": session["settingsPath"],
+        "persistant_windows.yml": settings["PERSISTANT_WINDOWS_PATH"],
+        "tea.csv": settings["CSV_OUTPUT_TEA_PATH"],
+        "review.csv": settings["CSV_OUTPUT_REVIEW_PATH"],
+    }
+
+# Writes the files of a snapshot (the newest if name is None) into targetDir, or over the live data files if targetDir is None
+def restoreBackupSnapshot(storePath, name=None, targetDir=None):
+    snapshots = listBackupSnapshots(storePath)
+    if name is not None:
+        snapshots = [snapshot for snapshot in snapshots if snapshot[0] == name]
+    if len(snapshots) == 0:
+        RichPrintError(f"No backup {name if name is not None else ''} found in {storePath}")
+        return False
+    name, manifest = snapshots[0]
+
+    if targetDir is None:
+        targets = getLiveDataPaths()
+    else:
+        os.makedirs(targetDir, exist_ok=True)
+        targets = {fileName: f"{targetDir}/{fileName}" for fileName in manifest["files"]}
+
+    # Check everything is there before overwriting anything
+    objectPaths = {}
+    for fileName, fileHash in manifest["files"].items():
+        objectPaths[fileName] = findBackupObject(storePath, fileHash)
+        if objectPaths[fileName] is None:
+            RichPrintError(f"Backup {name} is missing stored file {fileName}, not restoring")
+            return False
+
+    flushSaveWorker()
+    for fileName, objectPath in objectPaths.items():
+        if fileName not in targets:
+            RichPrintWarning(f"Don't know where to restore {fileName}, skipping")
+            continue
+        targetPath = targets[fileName]
+        if isTeaDatabasePath(targetPath) or isTeaShardIndexPath(targetPath):
+            # Backups hold the teas as one YAML file, import them into the database or shards
+            with openBackupObject(objectPath) as source, open(f"{targetPath}.restore.yml", "wb") as target:
+                shutil.copyfileobj(source, target)
+            convertTeaStorage(f"{targetPath}.restore.yml", targetPath)
+            for leftoverPath in (f"{targetPath}.restore.yml", getTeaSnapshotCachePath(f"{targetPath}.restore.yml")):
+                if os.path.exists(leftoverPath):
+                    os.remove(leftoverPath)
+            continue
+        with openBackupObject(objectPath) as source, open(f"{targetPath}.tmp", "wb") as target:
+            shutil.copyfileobj(source, target)
+        os.replace(f"{targetPath}.tmp", targetPath)
+    # Edits journaled against the replaced tea file no longer apply
+    if "tea_reviews.yml" in manifest["files"]:
+        resetTeaJournal(targets["tea_reviews.yml"])
+    RichPrintSuccess(f"Restored backup {name} from {storePath}")
+    return True
+
+# Writes the loaded teas, categories and settings as flat files into a folder, the layout backups use.
+# The saved window layout is copied from disk, the app overwrites it with the windows currently open
+def saveAllToDirectory(newBaseDirectory, saveCSV=True):
+    os.makedirs(newBaseDirectory, exist_ok=True)
+    saveTeasData(TeaStash, f"{newBaseDirectory}/tea_reviews.yml")
+    saveTeaCategories(TeaCategories, f"{newBaseDirectory}/tea_categories.yml")
+    saveTeaReviewCategories(TeaReviewCategories, f"{newBaseDirectory}/tea_review_categories.yml")
+    WriteYaml(f"{newBaseDirectory}/user_settings.yml", settings)
+    if os.path.exists(settings["PERSISTANT_WINDOWS_PATH"]):
+        shutil.copyfile(settings["PERSISTANT_WINDOWS_PATH"], f"{newBaseDirectory}/persistant_windows.yml")
+    RichPrintSuccess(f"All data saved to {newBaseDirectory}")
+
+    # CSVs
+    if saveCSV:
+        teaStashToCSV(f"{newBaseDirectory}/tea.csv", f"{newBaseDirectory}/review.csv")
+        RichPrintSuccess(f"CSV files saved to {newBaseDirectory}")
+
+# Backup archives
+# SaveAll(altPath) with a path ending in .zip writes one compressed archive instead of a folder.
+# The files are written to a temp folder first, packing them runs on its own thread.
+def writeBackupArchive(stagingPath, archivePath):
+    compression = zipfile.ZIP_LZMA if getBackupCompression() == "lzma" else zipfile.ZIP_DEFLATED
+    try:
+        # The tea file is written by the save worker
+        flushSaveWorker()
+        os.makedirs(os.path.dirname(os.path.abspath(archivePath)), exist_ok=True)
+        with zipfile.ZipFile(f"{archivePath}.tmp", "w", compression=compression) as archive:
+            for fileName in sorted(os.listdir(stagingPath)):
+                archive.write(f"{stagingPath}/{fileName}", fileName)
+        os.replace(f"{archivePath}.tmp", archivePath)
+        RichPrintSuccess(f"Backup archive written to {archivePath}, {os.path.getsize(archivePath)} bytes")
+    except OSError as e:
+        RichPrintError(f"Failed to write backup archive {archivePath}: {e}")
+    finally:
+        shutil.rmtree(stagingPath, ignore_errors=True)
+
+# Turns a backup store, a .zip backup archive or a backup folder into a folder of flat files LoadAll can read.
+# Returns (folder, isBackup), folders that are not backups are returned unchanged
+def unpackBackupForLoading(path):
+    if os.path.isfile(path) and zipfile.is_zipfile(path):
+        folder = tempfile.mkdtemp(prefix="ratea-load-")
+        with zipfile.ZipFile(path, "r") as archive:
+            archive.extractall(folder)
+        RichPrintInfo(f"Extracted backup archive {path} to {folder}")
+        return folder, True
+    if os.path.isdir(f"{path}/snapshots"):
+        folder = tempfile.mkdtemp(prefix="ratea-load-")
+        if not restoreBackupSnapshot(path, targetDir=folder):
+            return path, False
+        return folder, True
+    if os.path.exists(f"{path}/tea_reviews.yml"):
+        return path, True
+    return path, False
+
+# Version of the tea_reviews.yml layout written by saveTeasData
+# 1: a plain list of teas, attributes stored twice (mapping and attributesJson), dates as strings or timestamps
+# 2: {schemaVersion, teas}, attributes stored once as native YAML values, all dates as epoch numbers
+TEA_REVIEWS_SCHEMA_VERSION = 2
+
+def saveTeasData(stash, path):
+    # Full saves follow bulk changes that don't go through the journal (imports, renumbering, restores),
+    # so the stash columns are rebuilt on their next query
+    if stash is TeaStash:
+        TeaColumns.reset()
+    # Save as one file in yml format
+    allData = []
+    for tea in stash:
+        allData.append(dumpTeaToSaveDict(tea))
+
+    # If stash is not empty and data is not empty, write to file
+    if len(allData) > 0 and allData is not None:
+        # Serialized here, written by the save worker
+        queueSave("full", path, allData)
+        # Only a snapshot of the live file takes in its journal, backups and conversions leave it as it is
+        if os.path.abspath(path) == os.path.abspath(settings["TEA_REVIEWS_PATH"]):
+            session["teaJournalRecords"] = 0
+    else:
+        RichPrintWarning(f"No teas to save, skipping save to {path}")
+        return
+
+def writeTeasData(allData, path):
+    RichPrintInfo(f"Saving {len(allData)} teas to {path}")
+    WriteYaml(path, {"schemaVersion": TEA_REVIEWS_SCHEMA_VERSION, "teas": allData})
+    # The snapshot now contains every journaled change, so the journal can go
+    resetTeaJournal(path)
+
+# Converts a datetime to an epoch number, other values are returned unchanged
+def dateToEpoch(value):
+    if isinstance(value, dt.datetime):
+        return value.timestamp()
+    return value
+
+# Converts one tea and its reviews to the dict format used in tea_reviews.yml
+def dumpTeaToSaveDict(tea):
+    # Convert all datetimes to unix timestamps, in place as the rest of the app expects epoch dates after a save
+    for key, value in tea.attributes.items():
+        if isinstance(value, dt.datetime):
+            tea.attributes[key] = value.timestamp()
+
+    # Clone adjustments
+    adjustments = tea.adjustments.copy() if tea.adjustments else {}
+    teaData = {
+        "_index": tea.id,
+        "Name": tea.name,
+        "dateAdded": dateToEpoch(tea.dateAdded),
+        "attributes": dict(tea.attributes),
+        "reviews": [],
+        "adjustments": adjustments,
+        "finished": tea.finished,
+    }
+    # Reviews that were never loaded are copied over in their saved form
+    teaData["reviews"] = tea.getReviewSaveDicts()
+    return teaData
+
+def dumpReviewToSaveDict(review):
+    for key, value in review.attributes.items():
+        if isinstance(value, dt.datetime):
+            review.attributes[key] = value.timestamp()
+
+    reviewData = {
+        "_reviewindex": review.id,
+        "Name": review.name,
+        "dateAdded": dateToEpoch(review.dateAdded),
+        "attributes": dict(review.attributes),
+        "rating": review.rating,
+    }
+    return reviewData
+
+def loadTeasReviews(path):
+    # If not exists, create the directory, return false
+    if not os.path.exists(path):
+        RichPrintInfo(f"Directory {path} created")
+        return []
+    if isTeaDatabasePath(path):
+        return loadTeasDatabase(path)
+    
+    # Rebuild from the binary snapshot if the yml file hasn't changed since it was written, shards are parsed in parallel instead
+    TeaStash = loadTeaShards(path) if isTeaShardIndexPath(path) else loadTeaSnapshotCache(path)
+    if TeaStash is None:
+        # Load from one file in yml format, a tea at a time
+        try:
+            schemaVersion, TeaStash = streamTeasReviews(path)
+        except yaml.constructor.ConstructorError:
+            # Files written by older versions may contain python tags, ReadYaml falls back to the full loader for those
+            allData = ReadYaml(path)
+            schemaVersion, teasData = unpackTeasData(allData)
+            TeaStash = []
+            for i, teaData in enumerate(teasData):
+                TeaStash.append(loadTeaFromSaveDict(teaData, i, schemaVersion, lazy=settings["LAZY_REVIEWS"]))
+        session["teaReviewsSchemaVersion"] = schemaVersion
+        writeTeaSnapshotCache(TeaStash, path, schemaVersion)
+
+    # Apply any changes recorded since the file was last written
+    replayTeaJournal(TeaStash, path)
+    return TeaStash
+
+# Streaming read of tea_reviews.yml
+# Teas are composed and constructed from the parser's events one at a time, so apart from the StashedTea objects
+# only the tea being read is held as YAML data. Keys other than teas go to info["header"], after the last tea
+# info["fingerprint"] matches what fingerprintData would give for the whole document.
+def iterTeasYaml(path, info):
+    info["header"] = {}
+    info["fingerprint"] = None
+    totalBytes = max(os.path.getsize(path), 1)
+    numTeas = 0
+    lastReport = time.monotonic()
+    reported = False
+    with open(path, "rb") as file:
+        loader = YamlStreamLoader(file)
+        try:
+            loader.get_event()
+            if loader.check_event(yaml.StreamEndEvent):
+                info["fingerprint"] = fingerprintData(None)
+                return
+            loader.get_event()
+            hasher = hashlib.blake2b(digest_size=16)
+            isList = loader.check_event(yaml.SequenceStartEvent)
+            info["isList"] = isList
+            if isList:
+                # Schema 1, the document is the list of teas
+                loader.get_event()
+                hasher.update(b"[")
+            elif loader.check_event(yaml.MappingStartEvent):
+                loader.get_event()
+                hasher.update(b"{")
+            else:
+                # Not a stash file, nothing to stream
+                del info["isList"]
+                data = loader.construct_document(loader.compose_node(None, None))
+                info["fingerprint"] = fingerprintData(data)
+                return
+
+            teasStarted = False
+            keysAfterTeas = []
+            while not loader.check_event(yaml.MappingEndEvent, yaml.SequenceEndEvent):
+                if not isList:
+                    key = loader.construct_document(loader.compose_node(None, None))
+                    if key != "teas" or not loader.check_event(yaml.SequenceStartEvent):
+                        info["header"][key] = loader.construct_document(loader.compose_node(None, None))
+                        if teasStarted:
+                            keysAfterTeas.append(key)
+                        continue
+                    # Keys sorting before teas are written ahead of it by fingerprintData
+                    loader.get_event()
+                    teasStarted = True
+                    for headerKey in sorted(info["header"]):
+                        if headerKey < "teas":
+                            hasher.update(f"{json.dumps(headerKey)}: {json.dumps(info['header'][headerKey], sort_keys=True, default=str)}, ".encode("utf-8"))
+                    hasher.update(b'"teas": [')
+
+                while not loader.check_event(yaml.SequenceEndEvent):
+                    teaData = loader.construct_document(loader.compose_node(None, None))
+                    hasher.update(f"{', ' if numTeas > 0 else ''}{json.dumps(teaData, sort_keys=True, default=str)}".encode("utf-8"))
+                    numTeas += 1
+                    yield teaData
+                    if time.monotonic() - lastReport >= 1:
+                        lastReport = time.monotonic()
+                        reported = True
+                        reportLoadProgress(path, file.tell() / totalBytes, numTeas)
+                loader.get_event()
+                hasher.update(b"]")
+                if isList:
+                    break
+
+            if not isList:
+                if not teasStarted:
+                    info["fingerprint"] = fingerprintData(info["header"])
+                    return
+                # A key sorting before teas that only came after it can't be added to the running hash
+                if any(key < "teas" for key in keysAfterTeas):
+                    return
+                for headerKey in sorted(info["header"]):
+                    if headerKey > "teas":
+                        hasher.update(f", {json.dumps(headerKey)}: {json.dumps(info['header'][headerKey], sort_keys=True, default=str)}".encode("utf-8"))
+                hasher.update(b"}")
+            info["fingerprint"] = hasher.hexdigest()
+        finally:
+            loader.dispose()
+            # Only loads long enough to have shown progress say when they are done
+            if reported:
+                reportLoadProgress(path, 1.0, numTeas)
+
+# Progress of a long load, shown in the terminal at the default log level since the app window opens after loading
+def reportLoadProgress(path, fraction, numTeas):
+    RichPrintSuccessMinor(f"Loading {os.path.basename(path)}: {fraction * 100:.0f}% ({numTeas} teas)")
+
+# Loads teas from tea_reviews.yml as they are read, returns the schema version and the stash
+def streamTeasReviews(path):
+    RichPrintSuccessMinor(f"Streaming {path} from file")
+    info = {}
+    stash = []
+    pendingTeas = []
+    for teaData in iterTeasYaml(path, info):
+        if info["isList"]:
+            schemaVersion = 1
+        elif "schemaVersion" in info["header"]:
+            schemaVersion = info["header"]["schemaVersion"]
+        else:
+            # The schema version comes after the teas, hold them until it is known
+            pendingTeas.append(teaData)
+            continue
+        stash.append(loadTeaFromSaveDict(teaData, len(stash), schemaVersion, lazy=settings["LAZY_REVIEWS"]))
+
+    # Same defaults as unpackTeasData
+    if info.get("isList", False):
+        schemaVersion = 1
+    elif "isList" in info:
+        schemaVersion = info["header"].get("schemaVersion", 1)
+    else:
+        schemaVersion = TEA_REVIEWS_SCHEMA_VERSION
+    if schemaVersion > TEA_REVIEWS_SCHEMA_VERSION:
+        RichPrintWarning(f"Tea reviews file has schema version {schemaVersion}, newer than supported {TEA_REVIEWS_SCHEMA_VERSION}. Loading anyway.")
+    for teaData in pendingTeas:
+        stash.append(loadTeaFromSaveDict(teaData, len(stash), schemaVersion, lazy=settings["LAZY_REVIEWS"]))
+
+    # Remember what was read so saving the same data back can be skipped
+    setFileFingerprint(path, info["fingerprint"])
+    return schemaVersion, stash
+
+# Splits the contents of tea_reviews.yml into its schema version and list of teas
+def unpackTeasData(allData):
+    if allData is None:
+        return TEA_REVIEWS_SCHEMA_VERSION, []
+    if isinstance(allData, list):
+        return 1, allData
+    schemaVersion = allData.get("schemaVersion", 1)
+    if schemaVersion > TEA_REVIEWS_SCHEMA_VERSION:
+        RichPrintWarning(f"Tea reviews file has schema version {schemaVersion}, newer than supported {TEA_REVIEWS_SCHEMA_VERSION}. Loading anyway.")
+    return schemaVersion, allData.get("teas", [])
+
+# Builds a StashedTea and its reviews from the dict format used in tea_reviews.yml
+# With lazy set the reviews are kept as dicts and only summarized, they are built on first use of tea.reviews
+def loadTeaFromSaveDict(teaData, i=0, schemaVersion=TEA_REVIEWS_SCHEMA_VERSION, lazy=False):
+    if schemaVersion < 2:
+        return loadTeaFromSaveDictV1(teaData, i)
+
+    # Attributes are stored once with native types and epoch dates, so no decoding is needed
+    tea = StashedTea(teaData.get("_index", i), teaData.get("Name", None), dateAdded=None, attributes=teaData.get("attributes", {}) or {})
+    dateAdded = teaData.get("dateAdded", None)
+    if isinstance(dateAdded, (int, float)):
+        tea.dateAdded = dt.datetime.fromtimestamp(dateAdded, tz=dt.timezone.utc)
+    elif dateAdded is not None:
+        tea.dateAdded = dateAdded
+    tea.adjustments = teaData.get("adjustments", {}) or {}
+    tea.finished = teaData.get("finished", False)
+    reviewsData = teaData.get("reviews", []) or []
+    if lazy:
+        tea.setLazyReviews(reviewsData, summarizeReviewSaveDicts(reviewsData))
+    else:
+        tea.reviews = loadReviewsFromSaveDicts(reviewsData, tea.id)
+    return tea
+
+def loadReviewsFromSaveDicts(reviewsData, parentID):
+    reviews = []
+    for j, reviewData in enumerate(reviewsData):
+        review = Review(reviewData.get("_reviewindex", j), reviewData.get("Name", None), reviewData.get("dateAdded", None), reviewData.get("attributes", {}) or {}, reviewData.get("rating", None))
+        review.parentID = parentID
+        reviews.append(review)
+    return reviews
+
+# Lazy reviews are held as review dicts, or as the pickled review dicts of one tea from the snapshot cache
+def reviewSourceToSaveDicts(reviewSource):
+    if isinstance(reviewSource, bytes):
+        return pickle.loads(reviewSource)
+    return reviewSource
+
+def summarizeReviewSaveDicts(reviewsData):
+    return summarizeReviews([(reviewData.get("_reviewindex", j), reviewData.get("attributes", {}) or {}) for j, reviewData in enumerate(reviewsData)])
+
+def toSummaryNumber(value):
+    if isinstance(value, (int, float)):
+        return value
+    return 0
+
+# Totals over one tea's reviews, given as (id, attributes) pairs. These are all populateStatsCache and the stash table
+# need from reviews, so a summary stands in for reviews that are not loaded.
+def summarizeReviews(reviews):
+    summary = {"count": len(reviews), "amount": 0, "score": 0, "steeps": 0, "water": 0, "scoreByType": {},
+               "consumedByMonth": {}, "consumedByYear": {}, "attributeCounts": {}, "idsInOrder": True}
+    for j, (reviewId, attributes) in enumerate(reviews):
+        if reviewId != j:
+            summary["idsInOrder"] = False
+        for key in attributes:
+            summary["attributeCounts"][key] = summary["attributeCounts"].get(key, 0) + 1
+
+        # Values that are not numbers count as 0 rather than failing the load
+        amount = toSummaryNumber(attributes.get("Amount", 0))
+        summary["amount"] += amount
+        score = toSummaryNumber(attributes.get("Final Score", 0))
+        summary["score"] += score
+        if "Type" in attributes:
+            summary["scoreByType"][attributes["Type"]] = summary["scoreByType"].get(attributes["Type"], 0) + score
+        steeps = toSummaryNumber(attributes.get("Steeps", 0))
+        summary["steeps"] += steeps
+        if "Steeps" in attributes and "Vessel size" in attributes:
+            summary["water"] += steeps * toSummaryNumber(attributes["Vessel size"])
+
+        # Amount consumed by month and year, keyed like histogram1Data
+        reviewDateunix = dateToEpoch(attributes.get("date", None))
+        if isinstance(reviewDateunix, (int, float)):
+            reviewDate = TimeStampToDateDict(reviewDateunix)
+            reviewYear = f"{(reviewDate['year'] + 1900)}"
+            reviewMonth = f"{reviewDate['month']}-{reviewYear}"
+            summary["consumedByMonth"][reviewMonth] = summary["consumedByMonth"].get(reviewMonth, 0) + amount
+            summary["consumedByYear"][reviewYear] = summary["consumedByYear"].get(reviewYear, 0) + amount
+    return summary
+
+# Schema 1 loader, attributes come from the attributesJson string with dates parsed out of strings
+def loadTeaFromSaveDictV1(teaData, i=0):
+    idx = i
+    if "_index" in teaData:
+        idx = teaData["_index"]
+
+    # Name could be under name or Name
+    name = teaData.get("name", None)
+    if name is None:
+        name = teaData.get("Name", None)
+
+    dateAdded = dt.datetime.now(tz=dt.timezone.utc).timestamp()
+    if "dateAddedTimeStamp" in teaData:
+        dateAdded = dt.datetime.fromtimestamp(teaData["dateAddedTimeStamp"], tz=dt.timezone.utc)
+
+    tea = StashedTea(idx, name, dateAdded=dateAdded, attributes=teaData["attributes"])
+    
+    if "attributesJson" in teaData and teaData["attributesJson"]:
+        # If attributesJson is present, load it
+        try:
+            tea.attributes = loadAttributesFromString(teaData["attributesJson"])
+        except Exception as e:
+            # Fall back on loading from the old attributes format if JSON loading fails
+            if "attributes" in teaData:
+                tea.attributes = teaData["attributes"]
+            else:
+                RichPrintError(f"Failed to load attributes from JSON: {e}. Falling back to old attributes format.")
+                tea.attributes = {}  # Fallback to empty attributes if both fail
+
+    # Add adjustments and finished flags
+    if "adjustments" in teaData:
+        tea.adjustments = teaData["adjustments"]
+    if "finished" in teaData:
+        tea.finished = teaData["finished"]
+    for j, reviewData in enumerate(teaData["reviews"]):
+        idx2 = j
+        if "_reviewindex" in reviewData:
+            idx2 = reviewData["_reviewindex"]
+        # Rating could be stored under 'rating' or 'Final Score', check both
+        rating = reviewData.get("rating", None)
+        if rating is None:
+            rating = reviewData.get("Final Score", None)
+
+        # Name could be under name or Name
+        name = reviewData.get("name", None)
+        if name is None:
+            name = reviewData.get("Name", None)
+
+
+        # dateadded Timestamp could be under dateAddedTimeStamp or Date Added TimeStamp
+        dateAddedTimeStamp = reviewData.get("dateAddedTimeStamp", None)
+        if dateAddedTimeStamp is None:
+            dateAddedTimeStamp = reviewData.get("Date Added TimeStamp", None)
+
+        
+        review = Review(idx2, name, dateAddedTimeStamp, reviewData["attributes"], rating)
+        review.parentID = tea.id
+        tea.addReview(review)
+    return tea
+
+# One-time migration of a tea_reviews.yml written with an older schema
+# The original file is kept next to it as tea_reviews.v<version>.yml
+def migrateTeasData(stash, path, fromVersion):
+    backupPath = f"{os.path.splitext(path)[0]}.v{fromVersion}.yml"
+    if not os.path.exists(backupPath):
+        shutil.copy2(path, backupPath)
+        RichPrintInfo(f"Copied schema {fromVersion} tea reviews file to {backupPath}")
+
+    normalizeTeaDates(stash)
+    saveTeasData(stash, path)
+    session["teaReviewsSchemaVersion"] = TEA_REVIEWS_SCHEMA_VERSION
+    RichPrintSuccess(f"Migrated {path} from schema {fromVersion} to {TEA_REVIEWS_SCHEMA_VERSION}")
+
+# Schema 1 could hold dates as strings, store every date attribute as an epoch number
+def normalizeTeaDates(stash):
+    dateRoles = ["dateAdded"] + [cat.categoryRole for cat in TeaCategories + TeaReviewCategories if cat.categoryType in ["date", "datetime"]]
+    for tea in stash:
+        normalizeDateAttributes(tea.attributes, dateRoles)
+        for review in tea.reviews:
+            normalizeDateAttributes(review.attributes, dateRoles)
+
+def normalizeDateAttributes(attributes, dateRoles):
+    for key in dateRoles:
+        value = attributes.get(key, None)
+        if not isinstance(value, str) or value.strip() == "":
+            continue
+        parsed = parseDateAttribute(value)
+        if not isinstance(parsed, dt.datetime):
+            try:
+                parsed = dt.datetime.fromisoformat(value.strip())
+            except ValueError:
+                RichPrintWarning(f"Could not convert {key} value {value} to a date, keeping it as text")
+                continue
+        attributes[key] = parsed.timestamp()
+
+# Change journal
+# Single-tea edits are appended to a journal file next to tea_reviews.yml instead of rewriting the whole stash.
+# Each line is one JSON record, the first line ties the journal to the size and mtime of the snapshot it applies to.
+# Records are positional: set (replace or append the tea at index), delete (remove index), move (index -> newIndex)
+def getTeaJournalPath(path):
+    return f"{os.path.splitext(path)[0]}.journal"
+
+def getTeaSnapshotKey(path):
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+
+def appendTeaJournal(op, index, tea=None, newIndex=None, path=None):
+    # The stash columns follow the same records
+    TeaColumns.applyChange(op, index, tea, newIndex)
+    if path is None:
+        path = settings["TEA_REVIEWS_PATH"]
+    # Without a snapshot there is nothing to journal against, write the full stash instead
+    if not os.path.exists(path):
+        saveTeasData(TeaStash, path)
+        return
+
+    record = {"op": op, "index": index}
+    if tea is not None:
+        record["tea"] = dumpTeaToSaveDict(tea)
+    if newIndex is not None:
+        record["newIndex"] = newIndex
+
+    # Serialized here, appended by the save worker
+    queueSave("journal", path, json.dumps(record, default=str))
+    session["teaJournalRecords"] = session.get("teaJournalRecords", 0) + 1
+
+    # Fold the journal back into the main file once it grows past the threshold, databases apply records as row writes
+    if session["teaJournalRecords"] >= settings["TEA_JOURNAL_COMPACT_THRESHOLD"] and not isTeaDatabasePath(path):
+        compactTeaJournal(path)
+
+def writeTeaJournalRecords(records, path):
+    if not os.path.exists(path):
+        RichPrintError(f"Tea snapshot {path} is missing, dropping {len(records)} journaled changes")
+        return
+    journalPath = getTeaJournalPath(path)
+    lines = []
+    if not os.path.exists(journalPath):
+        lines.append(json.dumps({"snapshot": getTeaSnapshotKey(path), "schemaVersion": TEA_REVIEWS_SCHEMA_VERSION}))
+    lines.extend(records)
+
+    with open(journalPath, "a") as file:
+        file.write("\n".join(lines) + "\n")
+        file.flush()
+        os.fsync(file.fileno())
+    RichPrintSuccessMinor(f"Journaled {len(records)} changes to {journalPath}")
+
+def compactTeaJournal(path=None):
+    if path is None:
+        path = settings["TEA_REVIEWS_PATH"]
+    RichPrintInfo(f"Compacting tea journal into {path}")
+    saveTeasData(TeaStash, path)
+
+def resetTeaJournal(path):
+    journalPath = getTeaJournalPath(path)
+    if os.path.exists(journalPath):
+        os.remove(journalPath)
+        RichPrintSuccessMinor(f"Cleared tea journal {journalPath}")
+
+# Save worker
+# Tea saves are written by one background thread so UI callbacks never wait on the disk.
+# Callers serialize what should be written before queueing it, so the worker only sees consistent snapshots.
+# Requests arriving within SAVE_WORKER_DEBOUNCE seconds of each other are merged into one write per file:
+# only the newest full snapshot is written, followed by one append of the journal records queued after it.
+def startStopSaveWorker(shouldStart=False):
+    global saveWorkerThread
+    if shouldStart and saveWorkerThread == False:
+        saveWorkerThread = threading.Thread(target=saveWorkerFunc, daemon=True)
+        saveWorkerThread.start()
+        RichPrintSuccess("Save worker started")
+    elif not shouldStart and saveWorkerThread != False:
+        # The stop marker is queued behind any pending saves, so they are written first
+        saveWorkerQueue.put(None)
+        saveWorkerThread.join()
+        saveWorkerThread = False
+        RichPrintSuccess("Save worker stopped")
+
+def queueSave(kind, path, payload):
+    # Without a running worker, write right away on the calling thread
+    if saveWorkerThread == False or not saveWorkerThread.is_alive():
+        processSaveRequests([(kind, path, payload)])
+        return
+    saveWorkerQueue.put((kind, path, payload))
+
+# Blocks until every queued save has been written
+def flushSaveWorker():
+    if saveWorkerThread != False and saveWorkerThread.is_alive():
+        saveWorkerQueue.join()
+
+def saveWorkerFunc():
+    running = True
+    while running:
+        requests = [saveWorkerQueue.get()]
+        # Wait for the edits to go quiet, but never hold saves back for more than ten debounce periods
+        deadline = time.monotonic() + settings["SAVE_WORKER_DEBOUNCE"] * 10
+        while requests[-1] is not None and time.monotonic() < deadline:
+            try:
+                requests.append(saveWorkerQueue.get(timeout=settings["SAVE_WORKER_DEBOUNCE"]))
+            except queue.Empty:
+                break
+        if requests[-1] is None:
+            running = False
+        try:
+            processSaveRequests([request for request in requests if request is not None])
+        except Exception as e:
+            RichPrintError(f"Save worker failed to write queued saves: {e}")
+        for _ in requests:
+            saveWorkerQueue.task_done()
+
+def processSaveRequests(requests):
+    # Group by file, keeping the order requests were made in
+    requestsByPath = {}
+    for kind, path, payload in requests:
+        requestsByPath.setdefault(path, []).append((kind, payload))
+
+    for path, pathRequests in requestsByPath.items():
+        # A full snapshot already contains every change journaled before it
+        lastFull = -1
+        for i, (kind, payload) in enumerate(pathRequests):
+            if kind == "full":
+                lastFull = i
+        if lastFull >= 0:
+            if isTeaDatabasePath(path):
+                writeTeasDatabase(pathRequests[lastFull][1], path)
+            elif isTeaShardIndexPath(path):
+                writeTeaShards(pathRequests[lastFull][1], path)
+            else:
+                writeTeasData(pathRequests[lastFull][1], path)
+        records = [payload for kind, payload in pathRequests[lastFull + 1:] if kind == "journal"]
+        if len(records) > 0:
+            if isTeaDatabasePath(path):
+                writeTeaRecordsDatabase(records, path)
+            else:
+                writeTeaJournalRecords(records, path)
+        if len(pathRequests) > 1:
+            RichPrintSuccessMinor(f"Merged {len(pathRequests)} queued saves into one write of {path}")
+
+def replayTeaJournal(stash, path):
+    journalPath = getTeaJournalPath(path)
+    if not os.path.exists(journalPath):
+        return stash
+
+    with open(journalPath, "r") as file:
+        lines = file.readlines()
+    if len(lines) == 0:
+        return stash
+
+    # A journal written against an older snapshot has already been folded in
+    try:
+        header = json.loads(lines[0])
+    except json.JSONDecodeError:
+        header = {}
+    if header.get("snapshot") != getTeaSnapshotKey(path):
+        RichPrintWarning(f"Tea journal {journalPath} does not match {path}, discarding it")
+        os.remove(journalPath)
+        return stash
+
+    # Records are in the tea format of whichever version wrote the journal
+    schemaVersion = header.get("schemaVersion", 1)
+    numApplied = 0
+    for line in lines[1:]:
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            # A torn final line from an interrupted append, everything before it is intact
+            RichPrintWarning(f"Skipping unreadable record in tea journal {journalPath}")
+            continue
+        op = record["op"]
+        index = record["index"]
+        if op == "set":
+            tea = loadTeaFromSaveDict(record["tea"], index, schemaVersion)
+            if index < len(stash):
+                stash[index] = tea
+            else:
+                stash.append(tea)
+        elif op == "delete":
+            if index < len(stash):
+                stash.pop(index)
+        elif op == "move":
+            if index < len(stash):
+                tea = stash.pop(index)
+                stash.insert(record["newIndex"], tea)
+        else:
+            RichPrintWarning(f"Unknown tea journal operation {op}, skipping")
+            continue
+        numApplied += 1
+
+    # Positions are authoritative after replay, bring the IDs back in line
+    for i, tea in enumerate(stash):
+        tea.id = i
+        # Reviews that are not loaded yet get their parent ID when they are
+        if tea.isReviewsLoaded():
+            for review in tea.reviews:
+                review.parentID = i
+    session["teaJournalRecords"] = numApplied
+    RichPrintSuccess(f"Replayed {numApplied} journaled changes from {journalPath}")
+    return stash
+
+# Binary snapshot cache
+# Holds the already decoded teas and reviews from tea_reviews.yml as plain tuples in a pickle next to it.
+# It is keyed by the yml file's size, mtime and hash (plus the date format used to decode attributes),
+# so a matching cache skips both the YAML parse and the attribute date parsing on startup.
+# Each tea's reviews are pickled separately along with their summary, so lazy loading only unpickles opened teas.
+TEA_SNAPSHOT_CACHE_VERSION = 3
+
+def getTeaSnapshotCachePath(path):
+    return f"{os.path.splitext(path)[0]}.cache"
+
+def getTeaSnapshotCacheKey(path):
+    key = getTeaSnapshotKey(path)
+    hasher = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            hasher.update(chunk)
+    key["hash"] = hasher.hexdigest()
+    key["dateFormat"] = settings["DATE_FORMAT"]
+    return key
+
+def writeTeaSnapshotCache(stash, path, schemaVersion=TEA_REVIEWS_SCHEMA_VERSION):
+    cachePath = getTeaSnapshotCachePath(path)
+    teas = []
+    for tea in stash:
+        reviews = pickle.dumps(tea.getReviewSaveDicts(), protocol=pickle.HIGHEST_PROTOCOL)
+        teas.append((tea.id, tea.name, tea.dateAdded, tea.attributes, tea.adjustments, tea.finished, reviews, tea.getReviewSummary()))
+    cacheData = {"version": TEA_SNAPSHOT_CACHE_VERSION, "key": getTeaSnapshotCacheKey(path), "schemaVersion": schemaVersion, "fingerprint": getFileFingerprint(path), "teas": teas}
+    try:
+        # Write to a temp file first so a crash never leaves a half written cache behind
+        with open(f"{cachePath}.tmp", "wb") as file:
+            pickle.dump(cacheData, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(f"{cachePath}.tmp", cachePath)
+        RichPrintSuccessMinor(f"Written snapshot cache {cachePath}")
+    except (OSError, pickle.PicklingError) as e:
+        RichPrintWarning(f"Failed to write snapshot cache {cachePath}: {e}")
+
+def loadTeaSnapshotCache(path):
+    cachePath = getTeaSnapshotCachePath(path)
+    if not os.path.exists(cachePath):
+        return None
+    try:
+        with open(cachePath, "rb") as file:
+            cacheData = pickle.load(file)
+    except Exception as e:
+        RichPrintWarning(f"Failed to read snapshot cache {cachePath}: {e}")
+        return None
+    if not isinstance(cacheData, dict) or cacheData.get("version") != TEA_SNAPSHOT_CACHE_VERSION:
+        return None
+
+    # Compare the cheap parts of the key before hashing the file
+    cachedKey = cacheData.get("key", {})
+    currentKey = getTeaSnapshotKey(path)
+    if cachedKey.get("size") != currentKey["size"] or cachedKey.get("mtime") != currentKey["mtime"]:
+        RichPrintInfo(f"Snapshot cache {cachePath} is out of date")
+        return None
+    if cachedKey != getTeaSnapshotCacheKey(path):
+        RichPrintInfo(f"Snapshot cache {cachePath} does not match {path}")
+        return None
+
+    stash = []
+    for teaId, name, dateAdded, attributes, adjustments, finished, reviews, reviewSummary in cacheData["teas"]:
+        tea = StashedTea(teaId, name, dateAdded=dateAdded, attributes=attributes)
+        tea.adjustments = adjustments
+        tea.finished = finished
+        if settings["LAZY_REVIEWS"]:
+            tea.setLazyReviews(reviews, reviewSummary)
+        else:
+            tea.reviews = loadReviewsFromSaveDicts(pickle.loads(reviews), teaId)
+        stash.append(tea)
+    session["teaReviewsSchemaVersion"] = cacheData["schemaVersion"]
+    # The cache key matched, so the file still holds what the fingerprint was taken from
+    if cacheData.get("fingerprint", None) is not None:
+        session.setdefault("savedFileFingerprints", {})[os.path.abspath(path)] = cacheData["fingerprint"]
+    RichPrintSuccess(f"Loaded {len(stash)} teas from snapshot cache {cachePath}")
+    return stash
+
+# SQLite storage
+# With TEA_REVIEWS_PATH ending in .sqlite3 the teas are kept in a database instead of tea_reviews.yml.
+# Teas, reviews, their attributes and adjustments get a table each, attribute values are stored as JSON.
+# Teas are ordered by position, journaled edits become row writes instead of appends to a journal file.
+# Type, Vendor and Year are copied out of the attributes into indexed columns, as is the review date.
+TEA_DATABASE_EXTENSIONS = (".sqlite3", ".sqlite", ".db")
+
+TEA_DATABASE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS teas (teaKey INTEGER PRIMARY KEY, position INTEGER NOT NULL, teaIndex INTEGER, name TEXT, dateAdded REAL, finished INTEGER, Type TEXT, Vendor TEXT, Year);
+CREATE TABLE IF NOT EXISTS tea_attributes (teaKey INTEGER NOT NULL REFERENCES teas(teaKey) ON DELETE CASCADE, key TEXT NOT NULL, value TEXT);
+CREATE TABLE IF NOT EXISTS adjustments (teaKey INTEGER NOT NULL REFERENCES teas(teaKey) ON DELETE CASCADE, name TEXT NOT NULL, value TEXT);
+CREATE TABLE IF NOT EXISTS reviews (reviewKey INTEGER PRIMARY KEY, teaKey INTEGER NOT NULL REFERENCES teas(teaKey) ON DELETE CASCADE, reviewIndex INTEGER, name TEXT, dateAdded REAL, rating REAL, date REAL);
+CREATE TABLE IF NOT EXISTS review_attributes (reviewKey INTEGER NOT NULL REFERENCES reviews(reviewKey) ON DELETE CASCADE, key TEXT NOT NULL, value TEXT);
+CREATE INDEX IF NOT EXISTS teas_position ON teas(position);
+CREATE INDEX IF NOT EXISTS teas_type ON teas(Type);
+CREATE INDEX IF NOT EXISTS teas_vendor ON teas(Vendor);
+CREATE INDEX IF NOT EXISTS teas_year ON teas(Year);
+CREATE INDEX IF NOT EXISTS tea_attributes_tea ON tea_attributes(teaKey);
+CREATE INDEX IF NOT EXISTS tea_attributes_key ON tea_attributes(key);
+CREATE INDEX IF NOT EXISTS adjustments_tea ON adjustments(teaKey);
+CREATE INDEX IF NOT EXISTS reviews_tea ON reviews(teaKey);
+CREATE INDEX IF NOT EXISTS reviews_date ON reviews(date);
+CREATE INDEX IF NOT EXISTS review_attributes_review ON review_attributes(reviewKey);
+CREATE INDEX IF NOT EXISTS review_attributes_key ON review_attributes(key);
+"""
+
+def isTeaDatabasePath(path):
+    return isinstance(path, str) and path.endswith(TEA_DATABASE_EXTENSIONS)
+
+def openTeaDatabase(path, write=False):
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA foreign_keys = ON")
+    # Only writers create the tables and stamp the schema version, so loads and queries never wait on the save worker's lock
+    if write:
+        connection.executescript(TEA_DATABASE_SCHEMA)
+        connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('schemaVersion', ?)", (str(TEA_REVIEWS_SCHEMA_VERSION),))
+    return connection
+
+# Rows for one tea in the dict format of dumpTeaToSaveDict, reviews are numbered from nextReviewKey
+def teaDataToRows(teaKey, position, teaData, nextReviewKey, rows):
+    attributes = teaData["attributes"]
+    rows["teas"].append((teaKey, position, teaData["_index"], teaData["Name"], teaData["dateAdded"], int(bool(teaData["finished"])),
+                         attributes.get("Type", None), attributes.get("Vendor", None), attributes.get("Year", None)))
+    for key, value in attributes.items():
+        rows["tea_attributes"].append((teaKey, key, json.dumps(value, default=str)))
+    for name, value in teaData["adjustments"].items():
+        rows["adjustments"].append((teaKey, name, json.dumps(value, default=str)))
+    for reviewData in teaData["reviews"]:
+        reviewAttributes = reviewData["attributes"]
+        reviewDate = reviewAttributes.get("date", reviewData["dateAdded"])
+        rows["reviews"].append((nextReviewKey, teaKey, reviewData["_reviewindex"], reviewData["Name"], reviewData["dateAdded"], reviewData["rating"],
+                                reviewDate if isinstance(reviewDate, (int, float)) else None))
+        for key, value in reviewAttributes.items():
+            rows["review_attributes"].append((nextReviewKey, key, json.dumps(value, default=str)))
+        nextReviewKey += 1
+    return nextReviewKey
+
+def insertTeaRows(connection, rows):
+    connection.executemany("INSERT INTO teas VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows["teas"])
+    connection.executemany("INSERT INTO tea_attributes VALUES (?, ?, ?)", rows["tea_attributes"])
+    connection.executemany("INSERT INTO adjustments VALUES (?, ?, ?)", rows["adjustments"])
+    connection.executemany("INSERT INTO reviews VALUES (?, ?, ?, ?, ?, ?, ?)", rows["reviews"])
+    connection.executemany("INSERT INTO review_attributes VALUES (?, ?, ?)", rows["review_attributes"])
+
+def emptyTeaRows():
+    return {"teas": [], "tea_attributes": [], "adjustments": [], "reviews": [], "review_attributes": []}
+
+# Replaces the whole database with allData, skipped if it already holds the same data
+def writeTeasDatabase(allData, path):
+    fingerprint = fingerprintData(allData)
+    if isFileUnchanged(path, fingerprint):
+        RichPrintSuccessMinor(f"{path} is unchanged, skipping write")
+        return
+    RichPrintInfo(f"Saving {len(allData)} teas to {path}")
+    rows = emptyTeaRows()
+    nextReviewKey = 1
+    for position, teaData in enumerate(allData):
+        nextReviewKey = teaDataToRows(position + 1, position, teaData, nextReviewKey, rows)
+    connection = openTeaDatabase(path, write=True)
+    try:
+        with connection:
+            for table in ["review_attributes", "reviews", "adjustments", "tea_attributes", "teas"]:
+                connection.execute(f"DELETE FROM {table}")
+            insertTeaRows(connection, rows)
+    finally:
+        connection.close()
+    setFileFingerprint(path, fingerprint)
+    RichPrintSuccessMinor(f"Written {path} to database")
+
+# Applies journal records (JSON strings from appendTeaJournal) as row writes in one transaction
+def writeTeaRecordsDatabase(records, path):
+    connection = openTeaDatabase(path, write=True)
+    try:
+        with connection:
+            for line in records:
+                record = json.loads(line)
+                op = record["op"]
+                index = record["index"]
+                current = connection.execute("SELECT teaKey FROM teas WHERE position = ?", (index,)).fetchone()
+                if op == "set":
+                    if current is not None:
+                        connection.execute("DELETE FROM teas WHERE teaKey = ?", current)
+                    teaKey = connection.execute("SELECT COALESCE(MAX(teaKey), 0) + 1 FROM teas").fetchone()[0]
+                    nextReviewKey = connection.execute("SELECT COALESCE(MAX(reviewKey), 0) + 1 FROM reviews").fetchone()[0]
+                    # Past the end appends, like the journal replay
+                    if current is None:
+                        index = connection.execute("SELECT COUNT(*) FROM teas").fetchone()[0]
+                    rows = emptyTeaRows()
+                    teaDataToRows(teaKey, index, record["tea"], nextReviewKey, rows)
+                    insertTeaRows(connection, rows)
+                # Tea IDs are positions, so teaIndex moves along with every position that changes
+                elif op == "delete":
+                    if current is not None:
+                        connection.execute("DELETE FROM teas WHERE teaKey = ?", current)
+                        connection.execute("UPDATE teas SET position = position - 1, teaIndex = position - 1 WHERE position > ?", (index,))
+                elif op == "move":
+                    if current is not None:
+                        newIndex = record["newIndex"]
+                        connection.execute("UPDATE teas SET position = position - 1, teaIndex = position - 1 WHERE position > ?", (index,))
+                        connection.execute("UPDATE teas SET position = position + 1, teaIndex = position + 1 WHERE position >= ? AND teaKey != ?", (newIndex, current[0]))
+                        connection.execute("UPDATE teas SET position = ?, teaIndex = ? WHERE teaKey = ?", (newIndex, newIndex, current[0]))
+                else:
+                    RichPrintWarning(f"Unknown tea journal operation {op}, skipping")
+    finally:
+        connection.close()
+    RichPrintSuccessMinor(f"Wrote {len(records)} changes to {path}")
+
+def loadTeasDatabase(path):
+    connection = openTeaDatabase(path)
+    try:
+        teaAttributes = {}
+        for teaKey, key, value in connection.execute("SELECT teaKey, key, value FROM tea_attributes ORDER BY rowid"):
+            teaAttributes.setdefault(teaKey, {})[key] = json.loads(value)
+        adjustments = {}
+        for teaKey, name, value in connection.execute("SELECT teaKey, name, value FROM adjustments ORDER BY rowid"):
+            adjustments.setdefault(teaKey, {})[name] = json.loads(value)
+        reviewAttributes = {}
+        for reviewKey, key, value in connection.execute("SELECT reviewKey, key, value FROM review_attributes ORDER BY rowid"):
+            reviewAttributes.setdefault(reviewKey, {})[key] = json.loads(value)
+        reviews = {}
+        for reviewKey, teaKey, reviewIndex, name, dateAdded, rating in connection.execute("SELECT reviewKey, teaKey, reviewIndex, name, dateAdded, rating FROM reviews ORDER BY reviewKey"):
+            reviews.setdefault(teaKey, []).append({"_reviewindex": reviewIndex, "Name": name, "dateAdded": dateAdded, "attributes": reviewAttributes.get(reviewKey, {}), "rating": rating})
+
+        # Rebuild the tea_reviews.yml dicts so teas load exactly like from YAML.
+        # The ID is the position, teaIndex may be stale in databases written before moves and deletes kept it up to date
+        stash = []
+        for i, (teaKey, name, dateAdded, finished) in enumerate(connection.execute("SELECT teaKey, name, dateAdded, finished FROM teas ORDER BY position")):
+            teaData = {"_index": i, "Name": name, "dateAdded": dateAdded, "attributes": teaAttributes.get(teaKey, {}),
+                       "reviews": reviews.get(teaKey, []), "adjustments": adjustments.get(teaKey, {}), "finished": bool(finished)}
+            stash.append(loadTeaFromSaveDict(teaData, i, lazy=settings["LAZY_REVIEWS"]))
+    finally:
+        connection.close()
+    session["teaReviewsSchemaVersion"] = TEA_REVIEWS_SCHEMA_VERSION
+    RichPrintSuccess(f"Loaded {len(stash)} teas from database {path}")
+    return stash
+
+# Copies teas between storage formats, e.g. tea_reviews.yml into a .sqlite3 database or back
+def convertTeaStorage(sourcePath, targetPath):
+    stash = loadTeasReviews(sourcePath)
+    saveTeasData(stash, targetPath)
+    flushSaveWorker()
+    RichPrintSuccess(f"Copied {len(stash)} teas from {sourcePath} to {targetPath}")
+
+# Indexed queries answer from the database only when it holds everything in memory, i.e. no saves are queued
+def canQueryTeaDatabase():
+    path = settings["TEA_REVIEWS_PATH"]
+    return isTeaDatabasePath(path) and os.path.exists(path) and saveWorkerQueue.unfinished_tasks == 0
+
+# Final Scores of the reviews of teas whose Vendor contains vendor (any case) and/or whose Year is year
+def queryReviewScoresDatabase(path, vendor=None, year=None):
+    query = "SELECT ra.value FROM teas t JOIN reviews r ON r.teaKey = t.teaKey JOIN review_attributes ra ON ra.reviewKey = r.reviewKey WHERE ra.key = 'Final Score' AND ra.value != 'null'"
+    parameters = []
+    if vendor is not None:
+        query += " AND instr(lower(t.Vendor), lower(?)) > 0"
+        parameters.append(vendor)
+    if year is not None:
+        query += " AND t.Year = ?"
+        parameters.append(year)
+    query += " ORDER BY t.position, r.reviewKey"
+    connection = openTeaDatabase(path)
+    try:
+        return [json.loads(value) for (value,) in connection.execute(query, parameters)]
+    finally:
+        connection.close()
+
+# (answer, count) pairs of the most common values of an attribute, most common first, ties in stash order
+def queryPreviousAnswersDatabase(path, categoryName, data, topX):
+    if data == "Tea":
+        query = "SELECT a.value, COUNT(*) AS count FROM tea_attributes a JOIN teas t ON t.teaKey = a.teaKey WHERE a.key = ? GROUP BY a.value ORDER BY count DESC, MIN(t.position) LIMIT ?"
+    else:
+        query = "SELECT a.value, COUNT(*) AS count FROM review_attributes a JOIN reviews r ON r.reviewKey = a.reviewKey JOIN teas t ON t.teaKey = r.teaKey WHERE a.key = ? GROUP BY a.value ORDER BY count DESC, MIN(t.position) LIMIT ?"
+    connection = openTeaDatabase(path)
+    try:
+        return [(json.loads(value), count) for value, count in connection.execute(query, (categoryName, topX))]
+    finally:
+        connection.close()
+
+# Sharded storage
+# With TEA_REVIEWS_PATH ending in .shards.yml that file is only an index, the teas themselves are split over yml files
+# in the folder next to it (tea_reviews.shards.yml -> tea_reviews.shards/), one per purchase year or per block of
+# TEA_SHARD_BLOCK_SIZE teas depending on TEA_SHARD_BY. The index keeps the shard each tea position comes from,
+# so a save only rewrites the shards whose teas changed and a load can parse the shards in parallel.
+# Tea IDs are not stored in the shards, they are the positions, so removing a tea doesn't touch the shards after it.
+# With "block" later teas still move to another block, "year" keeps every tea in the shard of its purchase year.
+TEA_SHARD_INDEX_EXTENSION = ".shards.yml"
+# Below this many bytes of shards, starting worker processes costs more than parsing the shards one by one
+TEA_SHARD_PARALLEL_MIN_BYTES = 4 * 1024 * 1024
+
+def isTeaShardIndexPath(path):
+    return isinstance(path, str) and path.endswith(TEA_SHARD_INDEX_EXTENSION)
+
+def getTeaShardDir(path):
+    return path[:-len(".yml")]
+
+# The plain tea_reviews.yml a database or shard index path is started from
+def getPlainTeaReviewsPath(path):
+    if isTeaShardIndexPath(path):
+        return f"{path[:-len(TEA_SHARD_INDEX_EXTENSION)]}.yml"
+    return f"{os.path.splitext(path)[0]}.yml"
+
+def getTeaShardName(teaData, position):
+    if settings["TEA_SHARD_BY"] == "year":
+        purchased = teaData["attributes"].get("date", None)
+        try:
+            return f"year-{dt.datetime.fromtimestamp(purchased).year}"
+        except (TypeError, ValueError, OverflowError, OSError):
+            return "year-unknown"
+    return f"block-{position // settings['TEA_SHARD_BLOCK_SIZE']:05d}"
+
+# Splits allData over the shards, each shard file is skipped by WriteYaml when its teas haven't changed
+def writeTeaShards(allData, path):
+    RichPrintInfo(f"Saving {len(allData)} teas to the shards of {path}")
+    shardDir = getTeaShardDir(path)
+    os.makedirs(shardDir, exist_ok=True)
+    shards = {}
+    # Runs of [shard name, number of teas] in stash order
+    order = []
+    for position, teaData in enumerate(allData):
+        name = getTeaShardName(teaData, position)
+        shards.setdefault(name, []).append({key: value for key, value in teaData.items() if key != "_index"})
+        if len(order) > 0 and order[-1][0] == name:
+            order[-1][1] += 1
+        else:
+            order.append([name, 1])
+
+    index = {"schemaVersion": TEA_REVIEWS_SCHEMA_VERSION, "shardBy": settings["TEA_SHARD_BY"], "order": order, "shards": {}}
+    numWritten = 0
+    for name, teasData in shards.items():
+        shardData = {"schemaVersion": TEA_REVIEWS_SCHEMA_VERSION, "teas": teasData}
+        if WriteYaml(os.path.join(shardDir, f"{name}.yml"), shardData):
+            numWritten += 1
+        # The shard fingerprints make the index change whenever a shard does
+        index["shards"][name] = {"teas": len(teasData), "fingerprint": fingerprintData(shardData)}
+
+    # Shards left over from teas that moved or were removed
+    for fileName in os.listdir(shardDir):
+        if fileName.endswith(".yml") and fileName[:-len(".yml")] not in shards:
+            os.remove(os.path.join(shardDir, fileName))
+            setFileFingerprint(os.path.join(shardDir, fileName), None)
+            RichPrintSuccessMinor(f"Removed empty shard {fileName}")
+    # Written last, so an interrupted save still has an index matching the shards until here
+    WriteYaml(path, index)
+    RichPrintSuccess(f"Saved {len(allData)} teas, {numWritten} of {len(shards)} shards changed")
+    resetTeaJournal(path)
+
+# Reads one shard, runs in a worker process so it only returns plain data
+def readTeaShard(shardPath):
+    info = {}
+    try:
+        teasData = list(iterTeasYaml(shardPath, info))
+        return info["header"].get("schemaVersion", TEA_REVIEWS_SCHEMA_VERSION), teasData, info["fingerprint"]
+    except yaml.constructor.ConstructorError:
+        allData = ReadYaml(shardPath)
+        schemaVersion, teasData = unpackTeasData(allData)
+        return schemaVersion, teasData, fingerprintData(allData)
+
+def readTeaShards(shardPaths):
+    numWorkers = min(settings["TEA_SHARD_LOAD_WORKERS"], len(shardPaths), os.cpu_count() or 1)
+    totalBytes = sum(os.path.getsize(shardPath) for shardPath in shardPaths)
+    if numWorkers > 1 and totalBytes >= TEA_SHARD_PARALLEL_MIN_BYTES:
+        try:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=numWorkers) as executor:
+                return list(executor.map(readTeaShard, shardPaths))
+        except (OSError, concurrent.futures.process.BrokenProcessPool) as e:
+            RichPrintWarning(f"Failed to read shards in parallel, reading them one by one: {e}")
+    return [readTeaShard(shardPath) for shardPath in shardPaths]
+
+def loadTeaShards(path):
+    index = ReadYaml(path) or {}
+    shardDir = getTeaShardDir(path)
+    names = []
+    for name in index.get("shards", {}):
+        if os.path.exists(os.path.join(shardDir, f"{name}.yml")):
+            names.append(name)
+        else:
+            RichPrintError(f"Shard {name} of {path} is missing, its teas are not loaded")
+    shardPaths = [os.path.join(shardDir, f"{name}.yml") for name in names]
+    RichPrintInfo(f"Reading {len(shardPaths)} shards of {path}")
+
+    shardTeas = {}
+    shardVersions = {}
+    for name, shardPath, (schemaVersion, teasData, fingerprint) in zip(names, shardPaths, readTeaShards(shardPaths)):
+        shardTeas[name] = teasData
+        shardVersions[name] = schemaVersion
+        # Remember what was read so saving the same shard back can be skipped
+        setFileFingerprint(shardPath, fingerprint)
+
+    # The order has to account for exactly the teas in the shards, otherwise keep the teas grouped by shard
+    order = index.get("order", [])
+    counts = {}
+    for name, count in order:
+        counts[name] = counts.get(name, 0) + count
+    if counts != {name: len(teasData) for name, teasData in shardTeas.items() if len(teasData) > 0}:
+        RichPrintWarning(f"Shard index {path} does not match its shards, teas are loaded in shard order")
+        order = [[name, len(teasData)] for name, teasData in shardTeas.items()]
+
+    stash = []
+    positions = dict.fromkeys(shardTeas, 0)
+    for name, count in order:
+        start = positions[name]
+        for teaData in shardTeas[name][start:start + count]:
+            stash.append(loadTeaFromSaveDict(teaData, len(stash), shardVersions[name], lazy=settings["LAZY_REVIEWS"]))
+        positions[name] = start + count
+    # Migrate if any shard is in an older format
+    session["teaReviewsSchemaVersion"] = min(shardVersions.values(), default=TEA_REVIEWS_SCHEMA_VERSION)
+    RichPrintSuccess(f"Loaded {len(stash)} teas from {len(shardTeas)} shards of {path}")
+    return stash
+
+def saveTeaCategories(categories, path):
+    # Save as one file in yml format
+    allData = []
+    for category in categories:
+        category: TeaCategory
+        categoryData = {
+            "Name": category.name,
+            "categoryType": category.categoryType,
+            "defaultValue": category.defaultValue,
+            "categoryRole": category.categoryRole,
+            "isAutoCalculated": category.isAutoCalculated,
+            "isRequiredForTea": category.isRequiredForTea,
+            "isRequiredForAll": category.isRequiredForAll,
+            "isDropdown": category.isDropdown,
+            "rounding": int(category.rounding),
+            "prefix": category.prefix,
+            "suffix": category.suffix,
+            "maxItems": int(category.dropdownMaxLength),
+            "gradingDisplayAsLetter": category.gradingDisplayAsLetter,
+        }
+        allData.append(categoryData)
+
+    return WriteYaml(path, allData)
+
+def loadTeaCategories(path):
+    # If not exists, create the directory, return false
+    if not os.path.exists(path):
+        RichPrintInfo(f"Directory {path} created")
+        return []
+    
+    # Load from one file in yml format
+    allData = ReadYaml(path)
+    TeaCategories = []
+    for categoryData in allData:
+        category = TeaCategory(categoryData["Name"], categoryData["categoryType"])
+        category.defaultValue = ""
+        if "defaultValue" in categoryData:
+            category.defaultValue = categoryData["defaultValue"]
+        # Check if the category type is valid
+        if category.categoryType not in session["validTypesCategory"]:
+            category.categoryType = "string"
+
+        # Add role
+        if "categoryRole" in categoryData:
+            category.categoryRole = categoryData["categoryRole"]
+        else:
+            category.categoryRole = category.categoryType
+        TeaCategories.append(category)
+
+        # Add flags
+        if "isRequiredForAll" in categoryData:
+            category.isRequiredForAll = categoryData["isRequiredForAll"]
+        else:
+            category.isRequiredForAll = False
+
+        if "isRequiredForTea" in categoryData:
+            category.isRequiredForTea = categoryData["isRequiredForTea"]
+
+        if "isDropdown" in categoryData:
+            category.isDropdown = categoryData["isDropdown"]
+
+        if "isAutoCalculated" in categoryData:
+            category.isAutoCalculated = categoryData["isAutoCalculated"]
+
+        # Additional options
+        if "rounding" in categoryData:
+            category.rounding = int(categoryData["rounding"])
+        else:
+            category.rounding = 2
+
+        if "prefix" in categoryData:
+            category.prefix = categoryData["prefix"]
+
+        if "suffix" in categoryData:
+            category.suffix = categoryData["suffix"]
+
+        if "maxItems" in categoryData:
+            category.dropdownMaxLength = int(categoryData["maxItems"])
+        else:
+            category.dropdownMaxLength = 5
+
+        if "gradingDisplayAsLetter" in categoryData:
+            category.gradingDisplayAsLetter = categoryData["gradingDisplayAsLetter"]
+        else:
+            category.gradingDisplayAsLetter = False
+
+    return TeaCategories
+
+def loadTeaReviewCategories(path):
+    # If not exists, create the directory, return false
+    if not os.path.exists(path):
+        RichPrintInfo(f"Directory {path} created")
+        return []
+    
+    # Load from one file in yml format
+    allData = ReadYaml(path)
+    TeaReviewCategories = []
+    for categoryData in allData:
+        category = ReviewCategory(categoryData["Name"], categoryData["categoryType"])
+        category.defaultValue = ""
+        if "defaultValue" in categoryData:
+            category.defaultValue = categoryData["defaultValue"]
+        # Check if the category type is valid
+        if category.categoryType not in session["validTypesReviewCategory"]:
+            category.categoryType = "string"
+        TeaReviewCategories.append(category)
+
+        # Add role
+        if "categoryRole" in categoryData:
+            category.categoryRole = categoryData["categoryRole"]
+        else:
+            category.categoryRole = category.categoryType
+
+        # Add flags
+        if "isRequiredForAll" in categoryData:
+            category.isRequiredForAll = categoryData["isRequiredForAll"]
+        else:
+            category.isRequiredForAll = False
+
+        if "isRequiredForTea" in categoryData:
+            category.isRequiredForTea = categoryData["isRequiredForTea"]
+
+        if "isDropdown" in categoryData:
+            category.isDropdown = categoryData["isDropdown"]
+
+        if "isAutoCalculated" in categoryData:
+            category.isAutoCalculated = categoryData["isAutoCalculated"]
+
+        if "rounding" in categoryData:
+            category.rounding = int(categoryData["rounding"])
+
+        if "prefix" in categoryData:
+            category.prefix = categoryData["prefix"]
+
+        if "suffix" in categoryData:
+            category.suffix = categoryData["suffix"]
+
+        if "maxItems" in categoryData:
+            category.dropdownMaxLength = int(categoryData["maxItems"])
+
+        if "gradingDisplayAsLetter" in categoryData:
+            category.gradingDisplayAsLetter = categoryData["gradingDisplayAsLetter"]
+        else:
+            category.gradingDisplayAsLetter = False
+
+
+    return TeaReviewCategories
+
+def saveTeaReviewCategories(categories, path):
+    # Save as one file in yml format
+    allData = []
+    for category in categories:
+        category: ReviewCategory
+        categoryData = {
+            "Name": category.name,
+            "categoryType": category.categoryType,
+            "defaultValue": category.defaultValue,
+            "categoryRole": category.categoryRole,
+            "isAutoCalculated": category.isAutoCalculated,
+            "isRequiredForTea": category.isRequiredForTea,
+            "isRequiredForAll": category.isRequiredForAll,
+            "isDropdown": category.isDropdown,
+            "rounding": int(category.rounding),
+            "prefix": category.prefix,
+            "suffix": category.suffix,
+            "maxItems": category.dropdownMaxLength,
+            "gradingDisplayAsLetter": category.gradingDisplayAsLetter,
+        }
+        allData.append(categoryData)
+
+    return WriteYaml(path, allData)
+
+# Settings a new install starts with, keys missing from user_settings.yml are filled in from these
+def getDefaultSettings(uiScale=1):
+    return {
+        "UI_SCALE": uiScale,
+        "SETTINGS_FILENAME": "ratea-data/user_settings.yml", # do not change
+        "TEA_CATEGORIES_PATH": f"ratea-data/tea_categories.yml",
+        "TEA_REVIEW_CATEGORIES_PATH": f"ratea-data/tea_review_categories.yml",
+        "CSV_OUTPUT_TEA_PATH": f"ratea-data/tea_stash.csv",
+        "CSV_OUTPUT_REVIEW_PATH": f"ratea-data/tea_review.csv",
+        "CSV_IMPORT_TEA_PATH": f"ratea-data/import_tea.csv", # Read by Import CSV in the stash window, same columns as the exported CSVs
+        "CSV_IMPORT_REVIEW_PATH": f"ratea-data/import_review.csv",
+        "NPZ_OUTPUT_PATH": f"ratea-data/tea_stash.npz", # Columnar export for analysis scripts, see teaStashToNPZ
+        "JSON_OUTPUT_PATH": f"ratea-data/tea_stash.json",
+        "FALLBACK_DEFAULT_PATH": f"defaults",
+        "USERNAME": "John Puerh",
+        "DIRECTORY": "ratea-data",
+        "DATE_FORMAT": "%Y-%m-%d",
+        "TIMEZONE": "UTC", # default to UTC, doesn't really matter since time is not used
+        "TIMER_WINDOW_LABEL": True,
+        "TIMER_PERSIST_LAST_WINDOW": True, # TODO
+        "TEA_REVIEWS_PATH": f"ratea-data/tea_reviews.yml", # .sqlite3 instead of .yml stores the teas in an SQLite database, .shards.yml splits them over several files
+        "TEA_SHARD_BY": "year", # With .shards.yml, "year" puts teas in a shard per purchase year, "block" in blocks of TEA_SHARD_BLOCK_SIZE teas
+        "TEA_SHARD_BLOCK_SIZE": 500,
+        "TEA_SHARD_LOAD_WORKERS": 4, # Processes parsing shards on load, 1 parses them one by one
+        "BACKUP_PATH": f"ratea-data/backup",
+        "PERSISTANT_WINDOWS_PATH": f"ratea-data/persistant_windows.yml",
+        "APP_VERSION": "0.25.0", # Updates to most recently loaded
+        "AUTO_SAVE": True,
+        "AUTO_SAVE_INTERVAL": 15, # Minutes
+        "AUTO_SAVE_PATH": f"ratea-data/auto_backup",
+        "BACKUP_KEEP_HOURLY": 24, # Auto backups keep the newest backup of each of the last N hours with backups
+        "BACKUP_KEEP_DAILY": 7, # ... of each of the last N days
+        "BACKUP_KEEP_WEEKLY": 8, # ... and of each of the last N weeks, older auto backups are deleted
+        "BACKUP_COMPRESSION": "gzip", # none, gzip or lzma, used for stored backup files and .zip backup archives
+        "TEA_JOURNAL_COMPACT_THRESHOLD": 100, # Journaled tea edits before tea_reviews.yml is rewritten in full
+        "SAVE_WORKER_DEBOUNCE": 0.5, # Seconds without new edits before queued tea saves are written together
+        "LAZY_REVIEWS": True, # Reviews of a tea are loaded when first opened, the stash table and stats use per tea totals until then
+        "STARTUP_PROFILE_PATH": f"ratea-data/startup_profile.json", # Time and allocations of each startup phase, written on every start, "" to skip
+        "DEFAULT_FONT": "OpenSans", # OpenSans, Roboto, Merriweather, Montserrat
+        "START_DAY": "", # If none, will find the earliest tea date, else will use the date set here
+        "EXPORT_REVIEW_DONT_DRAW_BUBBLES": False, # If true, will not draw bubbles on export review graph (Will still write the text if images are disabled)
+        "EXPORT_REVIEW_DONT_GENERATE_IMAGES": False, # If true, will not generate images on export review graph
+        "EXPORT_REVIEW_DONT_GENERATE_TEA_LEVEL": False, # If true, will not generate tea level on export review graph
+    }
+
+def LoadSettings(path=None):
+    if path is None:
+        path = session["settingsPath"]
+    if not os.path.exists(path):
+        RichPrintError(f"Settings file {path} does not exist. Using default settings.")
+        return False
+    loadedSettings = ReadYaml(path)
+    if loadedSettings is None:
+        RichPrintError("Failed to load settings from YAML.")
+        return False
+    session["settingsPath"] = path
+    RichPrintSuccess(f"Loaded settings from {path}")
+
+    # If there are any keys missing from the settings, add them from the default settings
+    for key, value in default_settings.items():
+        if key not in loadedSettings:
+            RichPrintWarning(f"Key {key} missing from settings, adding default value {value}")
+            loadedSettings[key] = value
+    settings.clear()
+    settings.update(loadedSettings)
+    return settings
+
+def hasLoadableFiles():
+    # Checks if the DIRECTORY exists and if the files exist
+    # else, checks if backup or autobackup path exists
+    teaReviewsExist = os.path.exists(settings["TEA_REVIEWS_PATH"]) or os.path.exists(getPlainTeaReviewsPath(settings["TEA_REVIEWS_PATH"]))
+    mainFilesExist = teaReviewsExist and os.path.exists(settings["TEA_CATEGORIES_PATH"]) and os.path.exists(settings["TEA_REVIEW_CATEGORIES_PATH"])
+    backupFilesExist = os.path.exists(settings["AUTO_SAVE_PATH"]) and os.path.exists(settings["BACKUP_PATH"])
+    return mainFilesExist, backupFilesExist
+
+# repairIDs=False leaves out of order tea and review IDs as they are, for callers that only want to report them
+def LoadAll(baseDir=None, repairIDs=True):
+    # ignore sender when called from the menu
+    if type(baseDir) != str:
+        baseDir = None
+    appDir = os.path.dirname(os.path.abspath(__file__))
+    if baseDir is None:
+        baseDir = appDir
+    # Load all data
+    # Let queued saves land before reading the files back
+    flushSaveWorker()
+    # Backups (stores, .zip archives and SaveAll(altPath) folders) hold the files flat in one folder
+    requestedDir = baseDir
+    baseDir, isBackup = unpackBackupForLoading(baseDir)
+    if isBackup:
+        RichPrintInfo(f"Loading backup from {baseDir}, it replaces the current data once saved")
+        LoadSettings(f"{baseDir}/user_settings.yml")
+        teaReviewsPath = f"{baseDir}/tea_reviews.yml"
+        categoriesPath = f"{baseDir}/tea_categories.yml"
+        teaReviewCategoriesPath = f"{baseDir}/tea_review_categories.yml"
+        # Keep saving to the live files, not into the backup
+        session["settingsPath"] = f"{appDir}/{default_settings['SETTINGS_FILENAME']}"
+    else:
+        #baseDir = os.path.dirname(os.path.abspath(__file__))
+        settingsPath = f"{baseDir}/{default_settings['SETTINGS_FILENAME']}"
+        session["settingsPath"] = settingsPath
+        LoadSettings(session["settingsPath"])
+        teaReviewsPath = settings["TEA_REVIEWS_PATH"]
+        # Switching to a database or shards starts them from the existing tea_reviews.yml
+        yamlPath = getPlainTeaReviewsPath(teaReviewsPath)
+        if (isTeaDatabasePath(teaReviewsPath) or isTeaShardIndexPath(teaReviewsPath)) and not os.path.exists(teaReviewsPath) and os.path.exists(yamlPath):
+            convertTeaStorage(yamlPath, teaReviewsPath)
+        categoriesPath = f"{baseDir}/{settings['TEA_CATEGORIES_PATH']}"
+        teaReviewCategoriesPath = f"{baseDir}/{settings['TEA_REVIEW_CATEGORIES_PATH']}"
+    # Update version
+    session["categoriesPath"] = f"{appDir}/{settings['TEA_CATEGORIES_PATH']}" if isBackup else categoriesPath
+    session["reviewCategoriesPath"] = f"{appDir}/{settings['TEA_REVIEW_CATEGORIES_PATH']}" if isBackup else teaReviewCategoriesPath
+    settings["APP_VERSION"] = default_settings["APP_VERSION"]
+    TeaStash[:] = loadTeasReviews(teaReviewsPath)
+    TeaCategories[:] = loadTeaCategories(categoriesPath)
+    TeaReviewCategories[:] = loadTeaReviewCategories(teaReviewCategoriesPath)
+    schemaVersion = session.get("teaReviewsSchemaVersion", TEA_REVIEWS_SCHEMA_VERSION)
+    if isBackup:
+        # The live tea file and its journal no longer describe what is loaded, replace them
+        if schemaVersion < TEA_REVIEWS_SCHEMA_VERSION:
+            normalizeTeaDates(TeaStash)
+        saveTeasData(TeaStash, settings["TEA_REVIEWS_PATH"])
+        # Stores and archives were unpacked to a temp folder that is no longer needed
+        if baseDir != requestedDir:
+            shutil.rmtree(baseDir, ignore_errors=True)
+    elif schemaVersion < TEA_REVIEWS_SCHEMA_VERSION and os.path.exists(teaReviewsPath):
+        # Upgrade older tea review files to the current schema once
+        migrateTeasData(TeaStash, teaReviewsPath, schemaVersion)
+    # Renumber the teas and reviews only if needed, loading doesn't rewrite the files otherwise
+    idProblem = findTeaIDProblem(TeaStash)
+    if idProblem is not None and repairIDs:
+        RichPrintWarning(f"{idProblem}, renumbering teas and reviews")
+        renumberTeasAndReviews(printStash=False)
+
+    RichPrintInfo(f"Loaded settings from {session['settingsPath']}")
+    
+    RichPrintSuccess(f"Loaded {len(TeaStash)} teas and {len(TeaCategories)} categories")
+
+# Attributes to string, json, with special datetime handling
+def dumpAttributesToString(attributes):
+    returnDict = dumpAttributesToDict(attributes)
+    # Convert dict to JSON string
+    returnString = json.dumps(returnDict)  # Convert datetime objects to string
+    
+    # Replace escaped double quotes with double quotes
+    returnString = returnString.replace('\\"', '"')
+    return returnString
+    
+
+def dumpAttributesToDict(attributes):
+    returnDict = {}
+    parseDict = json.loads(json.dumps(attributes, default=str))  # Convert datetime objects to string
+    # for strings, remove the HH:MM:SS part
+    if isinstance(parseDict, str):
+        parseDict = parseDict.replace("00:00:00", "")  # Remove HH:MM:SS part
+    if not isinstance(parseDict, dict):
+        try:
+            parseDict = json.loads(parseDict)  # Try to parse it again if it's not a dict
+        except json.JSONDecodeError:
+            RichPrintError("Failed to parse attributes to dict")
+            return {}
+    if not isinstance(parseDict, dict):
+        RichPrintError("Attributes must be a dictionary")
+        return {}
+    
+    # Ensure all datetime objects are converted to strings
+    for key, value in parseDict.items():
+        if isinstance(value, dt.datetime):
+            #atetimeString = parseDTToString(value)
+            #dateString = datetimeString.split(" ")[0]
+            #timeString = datetimeString.split(" ")[1]
+            # Timestamp
+            dateString = TimeStampToString(value.timestamp())
+            returnDict[key] = dateString
+        else:
+            keyvalue = value
+            if isinstance(value, str):
+                keyvalue = keyvalue.replace("00:00:00", "")  # Remove HH:MM:SS part
+            returnDict[key] = keyvalue
+    return returnDict
+
+# Return Attributes dict from a JSON string, handling datetime parsing
+def loadAttributesFromString(json_string, review=False):
+    if not json_string or json_string.strip() == "":
+        return {}
+    try:
+        attributes = json.loads(json_string)
+        # Convert datetime strings of date categories back to datetime objects
+        return decodeAttributes(attributes, review=review)
+    except json.JSONDecodeError:
+        print (f"Error decoding JSON string: {json_string}")
+        RichPrintError("Failed to decode JSON string for attributes")
+        return {}
+    
+def dumpReviewToDict(review):
+    returnDict = {}
+    # Declare an empty dict then handle each attribute seperately, datetime needs to be converted to string
+    for key in Review.__slots__:
+        value = getattr(review, key)
+        if isinstance(value, dt.datetime):
+            datetimeString = parseDTToString(value)
+            dateString = datetimeString.split(" ")[0]
+            #timeString = datetimeString.split(" ")[1]
+            returnDict[key] = dateString
+        elif isinstance(value, dict):
+            # Recursive handling
+            returnDict[key] = dumpAttributesToDict(value)
+        else:
+            returnDict[key] = value
+    return returnDict
+
+def dumpTeaToDict(tea):
+    returnDict = {}
+    # Declare an empty dict then handle each attribute seperately, datetime needs to be converted to string
+    for key in StashedTea.__slots__:
+        value = getattr(tea, key)
+        # Lazy review state is not part of the tea, the reviews themselves are added below. Linked teas were never saved
+        if key in ["_reviews", "_reviewSource", "reviewSummary", "linkedTeas"]:
+            continue
+        if isinstance(value, dt.datetime):
+            datetimeString = parseDTToString(value)
+            dateString = datetimeString.split(" ")[0]
+            #timeString = datetimeString.split(" ")[1]
+            returnDict[key] = dateString
+    
+        elif isinstance(value, dict):
+            # Recursive handling
+            returnDict[key] = dumpAttributesToDict
+        else:
+            returnDict[key] = value
+    
+    returnDict["attributes"] = dumpAttributesToDict(tea.attributes)  # Save attributes as JSON string for easier parsing
+    
+    returnDict["calculated"] = tea.calculated  # Save calculated values
+    returnDict["reviews"] = []  # Add empty list for reviews
+
+    # Add in reviews from the tea object
+    # Reviews is a list of Review objects, convert to dicts first
+    reviews = []
+    for review in tea.reviews:
+        reviews.append(dumpReviewToDict(review))
+    returnDict["reviews"] = reviews
+
+
+    return returnDict
+
+def loadReviewFromDictNewID(reviewData, id, parentId):
+    # Create a new review object from the dict generated by the above function
+    review = Review(id, reviewData["Name"], reviewData["dateAdded"], reviewData["attributes"], reviewData["Final Score"])
+    review.parentID = parentId  # Set the parent ID to the tea ID
+    if type(reviewData["attributes"]) is str:
+        review.attributes = loadAttributesFromString(reviewData["attributes"], review=True)
+    else:
+        review.attributes = reviewData["attributes"]
+
+    # Convert a datetime string back to a datetime object if needed, dateAdded is the only date field
+    if isinstance(review.dateAdded, str) and review.dateAdded.strip() != "":
+        parsed_date = parseDateAttribute(review.dateAdded)
+        if parsed_date is not None:
+            review.dateAdded = parsed_date
+
+    return review
+
+# CSV columns: these object fields first, then category roles in category order, then any other attribute or calculated keys
+TEA_CSV_FIELDS = ["id", "name", "dateAdded", "adjustments", "finished"]
+REVIEW_CSV_FIELDS = ["id", "name", "dateAdded", "rating", "parentID"]
+# Review flags older exports wrote, reviews never used them. Skipped on import without a warning
+REVIEW_CSV_RETIRED_FIELDS = ["isRequiredForTea", "isRequiredForAll", "isAutoCalculated", "isDropdown"]
+
+def getCSVHeaders(fields, categories, items):
+    headers = dict.fromkeys(fields)
+    for category in categories:
+        headers.setdefault(category.categoryRole, None)
+    # Keys outside the categories (removed categories, calculated values) only need their names collected
+    for item in items:
+        headers.update(dict.fromkeys(item.attributes))
+        headers.update(dict.fromkeys(item.calculated))
+    return list(headers)
+
+def toCSVValue(value):
+    if isinstance(value, dt.datetime):
+        return parseDTToString(value).split(" ")[0]
+    if isinstance(value, str):
+        return value.replace("00:00:00", "")  # Remove HH:MM:SS part
+    if isinstance(value, dict):
+        return json.dumps(value, default=str)
+    return value
+
+# Writes one row per item straight from the objects, attributes take precedence over calculated values
+def writeCSVRows(path, fields, headers, items):
+    keys = headers[len(fields):]
+    with open(f"{path}.tmp", "w", newline="") as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(headers)
+        for item in items:
+            attributes = item.attributes
+            calculated = item.calculated
+            row = [toCSVValue(getattr(item, field, "")) for field in fields]
+            for key in keys:
+                if key in attributes:
+                    row.append(toCSVValue(attributes[key]))
+                elif key in calculated:
+                    row.append(toCSVValue(calculated[key]))
+                else:
+                    row.append("")
+            writer.writerow(row)
+    os.replace(f"{path}.tmp", path)
+
+def teaStashToCSV(csvPath=None, csvPathReviews=None):
+    # ignore sender when called from the menu
+    if type(csvPath) != str:
+        csvPath = None
+    if type(csvPathReviews) != str:
+        csvPathReviews = None
+    # If no path is given, use the default path
+    if csvPath is None:
+        csvPath = settings["CSV_OUTPUT_TEA_PATH"]
+    if csvPathReviews is None:
+        csvPathReviews = settings["CSV_OUTPUT_REVIEW_PATH"]
+    # For exporting every tea in TeaStash to a CSV file, streamed row by row from the live objects
+    RichPrintInfo("Exporting TeaStash to CSV")
+    allReviews = [review for tea in TeaStash for review in tea.peekReviews()]
+
+    teaHeaders = getCSVHeaders(TEA_CSV_FIELDS, TeaCategories, TeaStash)
+    writeCSVRows(csvPath, TEA_CSV_FIELDS, teaHeaders, TeaStash)
+    RichPrintSuccess(f"Exported {len(TeaStash)} teas to {csvPath}")
+
+    reviewHeaders = getCSVHeaders(REVIEW_CSV_FIELDS, TeaReviewCategories, allReviews)
+    writeCSVRows(csvPathReviews, REVIEW_CSV_FIELDS, reviewHeaders, allReviews)
+    RichPrintSuccess(f"Exported {len(allReviews)} reviews to {csvPathReviews}")
+    return len(TeaStash), len(allReviews)
+
+# Writes every tea with its reviews as JSON, in the same layout as tea_reviews.yml
+def teaStashToJSON(jsonPath=None):
+    # ignore sender when called from the menu
+    if type(jsonPath) != str:
+        jsonPath = None
+    if jsonPath is None:
+        jsonPath = settings["JSON_OUTPUT_PATH"]
+    RichPrintInfo("Exporting TeaStash to JSON")
+    allData = [dumpTeaToSaveDict(tea) for tea in TeaStash]
+    WriteFileAtomic(jsonPath, json.dumps({"schemaVersion": TEA_REVIEWS_SCHEMA_VERSION, "teas": allData}, indent=2, default=str))
+    RichPrintSuccess(f"Exported {len(allData)} teas to {jsonPath}")
+    return len(allData)
+
+# Bulk CSV import
+# Reads tea and review CSVs in the layout teaStashToCSV writes, or any CSV whose headers are category names or roles.
+# Rows are read in batches and each batch is converted a column at a time by the type of the column's category.
+# Rows with a cell that doesn't convert are reported and skipped, everything else is added and saved once.
+CSV_IMPORT_BATCH_SIZE = 5000
+# Bad rows listed after an import, past this only the count is given
+CSV_IMPORT_BAD_ROWS_SHOWN = 50
+
+def coerceCSVInt(value):
+    try:
+        return int(value)
+    except ValueError:
+        number = float(value)
+        if not number.is_integer():
+            raise ValueError(f"{value} is not a whole number")
+        return int(number)
+
+def coerceCSVBool(value):
+    lowered = value.strip().lower()
+    if lowered in ["true", "1", "yes", "y"]:
+        return True
+    if lowered in ["false", "0", "no", "n"]:
+        return False
+    raise ValueError(f"{value} is not true or false")
+
+def coerceCSVDict(value):
+    parsed = json.loads(value)
+    if not isinstance(parsed, dict):
+        raise ValueError(f"{value} is not a JSON object")
+    return parsed
+
+# Dates are stored as epoch numbers, text dates go through the date formats of parseDateAttribute
+def coerceCSVDate(value):
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parsed = parseDateAttribute(value)
+    if parsed is None:
+        raise ValueError(f"{value} is not a date")
+    return parsed.timestamp()
+
+def getCSVCoercer(categoryType):
+    if categoryType == "int":
+        return coerceCSVInt
+    elif categoryType == "float":
+        return float
+    elif categoryType == "bool":
+        return coerceCSVBool
+    elif categoryType in ["date", "datetime"]:
+        return coerceCSVDate
+    # Strings are kept as read
+    return None
+
+# Object field columns and their coercers, the other columns written by teaStashToCSV are ignored
+TEA_CSV_IMPORT_FIELDS = {"id": coerceCSVInt, "name": None, "dateAdded": coerceCSVDate, "adjustments": coerceCSVDict, "finished": coerceCSVBool}
+REVIEW_CSV_IMPORT_FIELDS = {"id": coerceCSVInt, "name": None, "dateAdded": coerceCSVDate, "rating": float, "parentID": coerceCSVInt}
+
+# Converts one column of a batch, empty cells become None. Returns the values and (row, message) for cells that failed
+def coerceCSVColumn(values, coercer):
+    if coercer is None:
+        return [value if value != "" else None for value in values], []
+    try:
+        # Most columns convert in one go
+        return list(map(coercer, values)), []
+    except (ValueError, TypeError, json.JSONDecodeError):
+        pass
+    coerced = []
+    errors = []
+    for i, value in enumerate(values):
+        if value.strip() == "":
+            coerced.append(None)
+            continue
+        try:
+            coerced.append(coercer(value))
+        except (ValueError, TypeError, json.JSONDecodeError) as e:
+            coerced.append(None)
+            errors.append((i, str(e)))
+    return coerced, errors
+
+# Matches headers to object fields first, then to categories by role or name. Returns {column: (isField, key, coercer)}
+def mapCSVColumns(headers, fieldCoercers, categories):
+    categoriesByHeader = {}
+    for category in categories:
+        categoriesByHeader.setdefault(category.categoryRole, category)
+        categoriesByHeader.setdefault(category.name, category)
+    columns = {}
+    ignored = []
+    for i, header in enumerate(headers):
+        header = header.strip()
+        if header in fieldCoercers:
+            columns[i] = (True, header, fieldCoercers[header])
+        elif header in categoriesByHeader:
+            category = categoriesByHeader[header]
+            columns[i] = (False, category.categoryRole, getCSVCoercer(category.categoryType))
+        elif header not in TEA_CSV_FIELDS + REVIEW_CSV_FIELDS + REVIEW_CSV_RETIRED_FIELDS:
+            ignored.append(header)
+    return columns, ignored
+
+# Yields (row number, fields, attributes) for every good row of a CSV, bad rows are added to badRows instead
+def readCSVImportRows(path, fieldCoercers, categories, badRows):
+    with open(path, newline="", encoding="utf-8-sig") as csvfile:
+        reader = csv.reader(csvfile)
+        headers = next(reader, None)
+        if headers is None:
+            return
+        columns, ignored = mapCSVColumns(headers, fieldCoercers, categories)
+        if len(ignored) > 0:
+            RichPrintWarning(f"Ignoring columns of {path} without a matching category: {', '.join(ignored)}")
+
+        rowNumber = 1
+        while True:
+            batch = list(itertools.islice(reader, CSV_IMPORT_BATCH_SIZE))
+            if len(batch) == 0:
+                break
+            rows = []
+            rowNumbers = []
+            for row in batch:
+                rowNumber += 1
+                if len(row) == 0:
+                    continue
+                if len(row) > len(headers):
+                    badRows.append((path, rowNumber, f"{len(row)} cells but only {len(headers)} columns"))
+                    continue
+                # Trailing empty cells are often left off
+                row.extend([""] * (len(headers) - len(row)))
+                rows.append(row)
+                rowNumbers.append(rowNumber)
+            if len(rows) == 0:
+                continue
+
+            cells = list(zip(*rows))
+            rowErrors = {}
+            coercedColumns = []
+            for column, (isField, key, coercer) in columns.items():
+                values, errors = coerceCSVColumn(cells[column], coercer)
+                for i, message in errors:
+                    rowErrors.setdefault(i, f"{headers[column]}: {message}")
+                coercedColumns.append((isField, key, values))
+
+            for i in range(len(rows)):
+                if i in rowErrors:
+                    badRows.append((path, rowNumbers[i], rowErrors[i]))
+                    continue
+                fields = {}
+                attributes = {}
+                for isField, key, values in coercedColumns:
+                    if values[i] is not None:
+                        if isField:
+                            fields[key] = values[i]
+                        else:
+                            attributes[key] = values[i]
+                yield rowNumbers[i], fields, attributes
+
+# Imports teas and their reviews from CSV, reviews point at teas by the id column of the tea CSV through parentID.
+# Without a tea CSV, parentID is the ID of a tea already in the stash. Returns (numTeas, numReviews, badRows)
+def importTeasFromCSV(csvPath=None, csvPathReviews=None):
+    # ignore sender when called from the menu
+    if type(csvPath) != str:
+        csvPath = None
+    if type(csvPathReviews) != str:
+        csvPathReviews = None
+    if csvPath is None:
+        csvPath = settings["CSV_IMPORT_TEA_PATH"]
+    if csvPathReviews is None:
+        csvPathReviews = settings["CSV_IMPORT_REVIEW_PATH"]
+    RichPrintInfo(f"Importing teas from {csvPath} and reviews from {csvPathReviews}")
+    timeStart = time.perf_counter()
+
+    badRows = []
+    newTeas = []
+    teasByCSVId = None
+    if os.path.exists(csvPath):
+        teasByCSVId = {}
+        for rowNumber, fields, attributes in readCSVImportRows(csvPath, TEA_CSV_IMPORT_FIELDS, TeaCategories, badRows):
+            tea = StashedTea(len(TeaStash) + len(newTeas), fields.get("name", attributes.get("Name", "")), attributes=attributes)
+            if "dateAdded" in fields:
+                tea.dateAdded = dt.datetime.fromtimestamp(fields["dateAdded"], tz=dt.timezone.utc)
+            tea.adjustments = fields.get("adjustments", {})
+            tea.finished = fields.get("finished", False)
+            newTeas.append(tea)
+            if "id" in fields:
+                teasByCSVId[fields["id"]] = tea
+
+    numReviews = 0
+    if os.path.exists(csvPathReviews):
+        for rowNumber, fields, attributes in readCSVImportRows(csvPathReviews, REVIEW_CSV_IMPORT_FIELDS, TeaReviewCategories, badRows):
+            parentID = fields.get("parentID", None)
+            if teasByCSVId is not None:
+                tea = teasByCSVId.get(parentID, None)
+            else:
+                tea = TeaStash[parentID] if parentID is not None and 0 <= parentID < len(TeaStash) else None
+            if tea is None:
+                badRows.append((csvPathReviews, rowNumber, f"parentID: no tea with id {parentID}"))
+                continue
+            review = Review(len(tea.reviews), fields.get("name", tea.name), fields.get("dateAdded", None), attributes, fields.get("rating", attributes.get("Final Score", None)))
+            review.parentID = tea.id
+            tea.reviews.append(review)
+            numReviews += 1
+
+    # Everything read, add to the stash and save once
+    TeaStash.extend(newTeas)
+    if len(newTeas) > 0 or numReviews > 0:
+        saveTeasData(TeaStash, settings["TEA_REVIEWS_PATH"])
+
+    if len(badRows) > 0:
+        # Shown at the default log level, the rest of the file did import so this is not a failure
+        RichPrintError(f"Imported {len(newTeas)} teas and {numReviews} reviews, but skipped {len(badRows)} rows that could not be imported:")
+        for line in formatCSVImportBadRows(badRows):
+            RichPrintError(line)
+    else:
+        RichPrintSuccess(f"Imported {len(newTeas)} teas and {numReviews} reviews in {time.perf_counter() - timeStart:.2f} seconds")
+    return len(newTeas), numReviews, badRows
+
+# One line per bad row from importTeasFromCSV, only the first few so a broken file doesn't flood the log
+def formatCSVImportBadRows(badRows, limit=CSV_IMPORT_BAD_ROWS_SHOWN):
+    lines = [f"{os.path.basename(path)} row {rowNumber}: {message}" for path, rowNumber, message in badRows[:limit]]
+    if len(badRows) > limit:
+        lines.append(f"... and {len(badRows) - limit} more")
+    return lines
+
+# Columnar NumPy export
+# One array per category for teas (tea/<role>) and reviews (review/<role>), row i of every tea array is TeaStash[i].
+# Numeric, bool and date categories are float64 with NaN where missing, dates as epoch seconds.
+# String categories are dictionary encoded: int32 codes (-1 where missing) in <role>/codes into the strings in <role>/values.
+# The reviews of tea i are review rows tea/reviewOffsets[i] to tea/reviewOffsets[i + 1].
+# Arrays are plain numbers and unicode strings, so np.load reads them without pickle, one array at a time on access.
+NPZ_NUMERIC_TYPES = ["int", "float", "bool", "date", "datetime"]
+
+def toNPZNumber(value):
+    value = dateToEpoch(value)
+    if isinstance(value, (int, float)):
+        return float(value)
+    return math.nan
+
+def encodeNPZStrings(values):
+    import numpy as np
+    codes = np.full(len(values), -1, dtype=np.int32)
+    dictionary = {}
+    for i, value in enumerate(values):
+        if value is None or value == "":
+            continue
+        codes[i] = dictionary.setdefault(str(value), len(dictionary))
+    return codes, np.array(list(dictionary), dtype=np.str_)
+
+# Adds the arrays for one category column under prefix/<role>
+def addNPZColumn(arrays, prefix, category, values):
+    import numpy as np
+    key = f"{prefix}/{category.categoryRole}"
+    if category.categoryType in NPZ_NUMERIC_TYPES:
+        arrays[key] = np.array([toNPZNumber(value) for value in values], dtype=np.float64)
+    else:
+        arrays[f"{key}/codes"], arrays[f"{key}/values"] = encodeNPZStrings(values)
+
+def getNPZCategories(categories):
+    # UNUSED roles can't be told apart, and a role is only exported once
+    seen = set()
+    usable = []
+    for category in categories:
+        if category.categoryRole == "UNUSED" or category.categoryRole in seen:
+            continue
+        seen.add(category.categoryRole)
+        usable.append(category)
+    return usable
+
+def teaStashToNPZ(npzPath=None):
+    import numpy as np
+    # ignore sender when called from the menu
+    if type(npzPath) != str:
+        npzPath = None
+    if npzPath is None:
+        npzPath = settings["NPZ_OUTPUT_PATH"]
+    RichPrintInfo("Exporting TeaStash to NumPy columns")
+
+    teaCategories = getNPZCategories(TeaCategories)
+    reviewCategories = getNPZCategories(TeaReviewCategories)
+    teaColumns = {category.categoryRole: [] for category in teaCategories}
+    reviewColumns = {category.categoryRole: [] for category in reviewCategories}
+    teaFields = {"id": [], "dateAdded": [], "finished": []}
+    reviewFields = {"id": [], "dateAdded": [], "rating": []}
+    adjustmentNames = sorted({name for tea in TeaStash for name in tea.adjustments})
+    adjustments = {name: [] for name in adjustmentNames}
+    reviewOffsets = [0]
+    for tea in TeaStash:
+        teaFields["id"].append(tea.id)
+        teaFields["dateAdded"].append(toNPZNumber(tea.dateAdded))
+        teaFields["finished"].append(bool(tea.finished))
+        for role, column in teaColumns.items():
+            column.append(tea.attributes.get(role, None))
+        for name, column in adjustments.items():
+            column.append(toNPZNumber(tea.adjustments.get(name, None)))
+        # Lazily loaded reviews are read without keeping them loaded
+        reviews = tea.peekReviews()
+        for review in reviews:
+            reviewFields["id"].append(review.id)
+            reviewFields["dateAdded"].append(toNPZNumber(review.dateAdded))
+            reviewFields["rating"].append(toNPZNumber(review.rating))
+            for role, column in reviewColumns.items():
+                column.append(review.attributes.get(role, None))
+        reviewOffsets.append(reviewOffsets[-1] + len(reviews))
+
+    arrays = {
+        "tea/id": np.array(teaFields["id"], dtype=np.int64),
+        "tea/dateAdded": np.array(teaFields["dateAdded"], dtype=np.float64),
+        "tea/finished": np.array(teaFields["finished"], dtype=np.bool_),
+        "tea/reviewOffsets": np.array(reviewOffsets, dtype=np.int64),
+        "review/id": np.array(reviewFields["id"], dtype=np.int64),
+        "review/dateAdded": np.array(reviewFields["dateAdded"], dtype=np.float64),
+        "review/rating": np.array(reviewFields["rating"], dtype=np.float64),
+    }
+    for category in teaCategories:
+        addNPZColumn(arrays, "tea", category, teaColumns[category.categoryRole])
+    for category in reviewCategories:
+        addNPZColumn(arrays, "review", category, reviewColumns[category.categoryRole])
+    for name, column in adjustments.items():
+        arrays[f"tea/adjustments/{name}"] = np.array(column, dtype=np.float64)
+    # Category types, so scripts can tell dates from other numbers
+    meta = {"appVersion": settings["APP_VERSION"], "created": dt.datetime.now(tz=dt.timezone.utc).timestamp(),
+            "teaCategories": {category.categoryRole: category.categoryType for category in teaCategories},
+            "reviewCategories": {category.categoryRole: category.categoryType for category in reviewCategories}}
+    arrays["meta"] = np.array(json.dumps(meta))
+
+    # np.savez adds .npz to names without it, write to a temp name that already has it
+    tempPath = f"{os.path.splitext(npzPath)[0]}.tmp.npz"
+    np.savez_compressed(tempPath, **arrays)
+    os.replace(tempPath, npzPath)
+    RichPrintSuccess(f"Exported {len(TeaStash)} teas and {reviewOffsets[-1]} reviews to {npzPath}")
+    return len(TeaStash), reviewOffsets[-1]
+#endregion
@@ -0,0 +1,87 @@
+# Times the price and rating queries with the previous loops over TeaStash against the stash columns, checks both
+# give the same values, and times keeping the columns in step with one edit against rebuilding them.
+# Usage: python benchmarks/bench_columns.py [numReviews]
+import sys
+import tempfile
+import time
+
+from synthetic_stash import RateaCore, writeSyntheticData
+
+# The previous queries, kept here as the baseline: every call walks the stash and each tea's attribute dicts
+def legacyGetAveragePriceRange(teaType=None):
+    prices = []
+    for tea in RateaCore.TeaStash:
+        teaTypeLower = teaType.lower().strip() if teaType is not None else None
+        searchedType = tea.attributes.get('Type', '').lower().strip() if teaType is not None else None
+        if teaType is None or (searchedType in teaTypeLower) or (searchedType == teaTypeLower):
+            if tea.calculated.get("costPerGram") is not None and tea.calculated.get("costPerGram") > 0.01:
+                prices.append(tea.calculated.get("costPerGram"))
+    return prices
+
+def legacyGetAverageRatingsByTeaType(teaType):
+    ratings = []
+    for tea in RateaCore.TeaStash:
+        if teaType.lower() in tea.attributes.get("Type", "").lower():
+            for review in tea.reviews:
+                if review.attributes.get("Final Score") is not None:
+                    ratings.append(review.attributes.get("Final Score"))
+    return ratings
+
+def legacyGetPercentileofPricing(teaType, price):
+    prices = sorted(p for p in legacyGetAveragePriceRange(teaType) if p > 0.01)
+    return (sum(1 for p in prices if p < price) / len(prices)) * 100 if prices else None
+
+def legacyGetPercentileOfRatingGivenType(teaType, rating):
+    ratings = sorted(legacyGetAverageRatingsByTeaType(teaType))
+    return (sum(1 for r in ratings if r < rating) / len(ratings)) * 100 if ratings else None
+
+def timeCall(func, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+def main():
+    numReviews = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    writeSyntheticData(tempfile.mkdtemp(prefix="ratea-bench-"), numReviews)
+    RateaCore.DEBUG_LEVEL = "CRITICAL"
+    RateaCore.settings["LAZY_REVIEWS"] = False
+    RateaCore.TeaStash[:] = RateaCore.loadTeasReviews(RateaCore.settings["TEA_REVIEWS_PATH"])
+    # Fills in cost per gram, which the previous price queries read
+    timeStats, _ = timeCall(RateaCore.populateStatsCache, repeat=1)
+    numTeas = len(RateaCore.TeaStash)
+    print(f"Synthetic stash: {numTeas} teas, {sum(tea.getNumReviews() for tea in RateaCore.TeaStash)} reviews, populateStatsCache {timeStats:.3f} s")
+
+    # The first query builds the columns, later ones only check they still match the stash
+    timeBuild, _ = timeCall(lambda: RateaCore.TeaColumns.reset() or RateaCore.TeaColumns.sync(reviews=True), repeat=1)
+    print(f"Building the columns: {timeBuild * 1e3:.1f} ms")
+
+    # A tea window asks for the price and rating percentile of its tea
+    teas = RateaCore.TeaStash[:20]
+    cases = [
+        ("getAveragePriceRange (all)", lambda: sorted(legacyGetAveragePriceRange()), lambda: sorted(RateaCore.getAveragePriceRange())),
+        ("getAverageRatingsByTeaType", lambda: [sorted(legacyGetAverageRatingsByTeaType(tea.attributes["Type"])) for tea in teas],
+         lambda: [sorted(RateaCore.getAverageRatingsByTeaType(tea.attributes["Type"])) for tea in teas]),
+        (f"percentiles x{len(teas)}", lambda: [(legacyGetPercentileofPricing(tea.attributes["Type"], tea.calculated["costPerGram"]),
+                                                legacyGetPercentileOfRatingGivenType(tea.attributes["Type"], 3.0)) for tea in teas],
+         lambda: [(RateaCore.getPercentileofPricing(tea.attributes["Type"], tea.calculated["costPerGram"]),
+                   RateaCore.getPercentileOfRatingGivenType(tea.attributes["Type"], 3.0)) for tea in teas]),
+    ]
+    print(f"{'Query':<30}{'Previous (ms)':>15}{'Columns (ms)':>14}{'Speedup':>9}{'Same':>6}")
+    for label, before, after in cases:
+        timeBefore, resultBefore = timeCall(before)
+        timeAfter, resultAfter = timeCall(after)
+        print(f"{label:<30}{timeBefore * 1e3:>15.2f}{timeAfter * 1e3:>14.2f}{timeBefore / timeAfter:>9.1f}{str(resultBefore == resultAfter):>6}")
+
+    # One edit, as appendTeaJournal passes it on, against building everything again
+    tea = RateaCore.TeaStash[numTeas // 2]
+    timeEdit, _ = timeCall(lambda: RateaCore.TeaColumns.applyChange("set", numTeas // 2, tea))
+    timeRebuild, _ = timeCall(lambda: RateaCore.TeaColumns.reset() or RateaCore.TeaColumns.sync(reviews=True))
+    print(f"One tea edit: {timeEdit * 1e3:.3f} ms applied, {timeRebuild * 1e3:.1f} ms rebuilt")
+
+if __name__ == "__main__":
+    main()
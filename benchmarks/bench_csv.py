@@ -0,0 +1,170 @@
+# Times the streaming teaStashToCSV against the previous dict based exporter on a synthetic stash
+# and checks both write the same cells. Usage: python benchmarks/bench_csv.py [numTeas]
+import csv
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from synthetic_stash import RateaCore, generateStash, setupRatea
+
+# The previous exporter, kept here as the baseline: converts every tea to a dict through dumpTeaToDict,
+# then makes separate passes to flatten, convert dates and collect headers before writing
+def legacyTeaStashToCSV(csvPath, csvPathReviews):
+    # Piggyback on exisitng json support to convert to CSV
+    # For exporting every tea in TeaStash to a CSV file
+    RateaCore.RichPrintInfo("Exporting TeaStash to CSV")
+    rawData = RateaCore.TeaStash
+    # For each tea, convert to dict
+    allData = []
+    for tea in rawData:
+        teaData = RateaCore.dumpTeaToDict(tea)
+        allData.append(teaData)
+        
+    # Seperate reviews from the tea data
+    allReviews = []
+    for tea in allData:
+        if len(tea["reviews"]) > 0:
+            for review in tea["reviews"]:
+                allReviews.append(review)
+    
+    # Flatten attributes and calculated values
+    for tea in allData:
+        for key, value in tea["attributes"].items():
+            if key not in tea:
+                tea[key] = value
+        for key, value in tea["calculated"].items():
+            if key not in tea:
+                tea[key] = value
+
+    for review in allReviews:
+        for key, value in review["attributes"].items():
+            if key not in review:
+                review[key] = value
+        for key, value in review["calculated"].items():
+            if key not in review:
+                review[key] = value
+
+    # Remove reviews from the tea data
+    for tea in allData:
+        tea.pop("reviews", None)
+        tea.pop("calculated", None)
+        tea.pop("attributes", None)
+    
+    # Remove attributes from the review data
+    for review in allReviews:
+        review.pop("attributes", None)
+        review.pop("calculated", None)
+    
+
+    # Swap datetime to string for all datetime objects
+    for tea in allData:
+        for key, value in tea.items():
+            if isinstance(value, RateaCore.dt.datetime):
+                datetimeString = RateaCore.parseDTToString(value)
+                dateString = datetimeString.split(" ")[0]
+                #timeString = datetimeString.split(" ")[1]
+                tea[key] = dateString
+    
+    for review in allReviews:
+        for key, value in review.items():
+            if isinstance(value, RateaCore.dt.datetime):
+                datetimeString = RateaCore.parseDTToString(value)
+                dateString = datetimeString.split(" ")[0]
+                #timeString = datetimeString.split(" ")[1]
+                review[key] = dateString
+
+    # Add headers for both by iterating over all keys in both lists
+    headers = []
+    for tea in allData:
+        for key in tea.keys():
+            if key not in headers:
+                headers.append(key)
+    headersReviews = []
+    for review in allReviews:
+        for key in review.keys():
+            if key not in headersReviews:
+                headersReviews.append(key)
+
+
+
+    # Create two CSV files, one for teas and one for reviews
+    with open(csvPath, "w", newline="") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=headers)
+        writer.writeheader()
+        for tea in allData:
+            writer.writerow(tea)
+        RateaCore.RichPrintSuccess(f"Exported {len(allData)} teas to {csvPath}")
+
+    with open(csvPathReviews, "w", newline="") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=headersReviews)
+        writer.writeheader()
+        for review in allReviews:
+            writer.writerow(review)
+        RateaCore.RichPrintSuccess(f"Exported {len(allReviews)} reviews to {csvPathReviews}")
+    return allData, allReviews
+
+def timeIt(func, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def peakMemory(func):
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+def readRows(path):
+    with open(path, newline="") as csvfile:
+        return list(csv.DictReader(csvfile))
+
+# Same columns and values, apart from adjustments which the previous exporter wrote as a function repr
+def compareCSV(pathA, pathB):
+    rowsA = readRows(pathA)
+    rowsB = readRows(pathB)
+    if len(rowsA) != len(rowsB):
+        return f"{len(rowsA)} rows vs {len(rowsB)}"
+    for rowA, rowB in zip(rowsA, rowsB):
+        rowA.pop("adjustments", None)
+        rowB.pop("adjustments", None)
+        if rowA != rowB:
+            keys = sorted(key for key in set(rowA) | set(rowB) if rowA.get(key) != rowB.get(key))
+            return f"row {rowA.get('id')} differs in {keys}"
+    return "identical"
+
+def main():
+    numTeas = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    dataDir = tempfile.mkdtemp(prefix="ratea-bench-")
+    setupRatea(dataDir)
+    # Keep the per-file log lines out of the timings
+    RateaCore.DEBUG_LEVEL = "CRITICAL"
+
+    RateaCore.TeaStash[:] = generateStash(numTeas)
+    numReviews = sum(len(tea.reviews) for tea in RateaCore.TeaStash)
+    print(f"Synthetic stash: {numTeas} teas, {numReviews} reviews")
+
+    paths = {
+        "Previous": lambda: legacyTeaStashToCSV(f"{dataDir}/old_tea.csv", f"{dataDir}/old_review.csv"),
+        "Streaming": lambda: RateaCore.teaStashToCSV(f"{dataDir}/new_tea.csv", f"{dataDir}/new_review.csv"),
+    }
+    results = {}
+    for label, export in paths.items():
+        results[label] = (timeIt(export), peakMemory(export))
+
+    baseTime, basePeak = results["Previous"]
+    print(f"{'Path':<12}{'Time (s)':>10}{'Peak (MB)':>11}{'Speedup':>9}")
+    for label, (elapsed, peak) in results.items():
+        print(f"{label:<12}{elapsed:>10.2f}{peak / (1024 * 1024):>11.1f}{baseTime / elapsed:>9.1f}")
+    print(f"Tea CSV: {compareCSV(f'{dataDir}/old_tea.csv', f'{dataDir}/new_tea.csv')}")
+    print(f"Review CSV: {compareCSV(f'{dataDir}/old_review.csv', f'{dataDir}/new_review.csv')}")
+
+if __name__ == "__main__":
+    main()
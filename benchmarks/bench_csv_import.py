@@ -0,0 +1,76 @@
+# Times importTeasFromCSV on CSVs exported from a synthetic stash, with a few bad rows mixed in,
+# and checks the imported teas and reviews match the exported ones. Usage: python benchmarks/bench_csv_import.py [numReviews]
+import csv
+import sys
+import tempfile
+import time
+
+from synthetic_stash import RateaCore, generateStash, setupRatea
+
+# Copies a CSV adding rows that should be reported: a bad number, a bad date and a row with too many cells
+def addBadRows(path, numericColumn, dateColumn):
+    with open(path, newline="") as csvfile:
+        rows = list(csv.reader(csvfile))
+    headers = rows[0]
+    badNumber = list(rows[1])
+    badNumber[headers.index(numericColumn)] = "lots"
+    badDate = list(rows[1])
+    badDate[headers.index(dateColumn)] = "the day after tomorrow"
+    tooLong = list(rows[1]) + ["extra"]
+    rows.extend([badNumber, badDate, tooLong])
+    with open(path, "w", newline="") as csvfile:
+        csv.writer(csvfile).writerows(rows)
+    return 3
+
+# Only attributes with a category are imported, compare those
+def sameAttributes(a, b, categories):
+    for key in [category.categoryRole for category in categories if category.categoryRole in a]:
+        value = a[key]
+        other = b.get(key, None)
+        if isinstance(value, float) and isinstance(other, float):
+            if abs(value - other) > 1e-6 * max(1, abs(value)):
+                return False
+        elif value != other and not (value == "" and other is None):
+            return False
+    return True
+
+def main():
+    numReviews = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    dataDir = tempfile.mkdtemp(prefix="ratea-bench-")
+    setupRatea(dataDir)
+    RateaCore.DEBUG_LEVEL = "CRITICAL"
+
+    stash = generateStash(numReviews // 2, reviewsPerTea=2)
+    RateaCore.TeaStash[:] = stash
+    numTeas, numReviews = RateaCore.teaStashToCSV(f"{dataDir}/tea.csv", f"{dataDir}/review.csv")
+    expectedBad = addBadRows(f"{dataDir}/tea.csv", "Amount", "date") + addBadRows(f"{dataDir}/review.csv", "Steeps", "date")
+    print(f"Synthetic CSVs: {numTeas} teas, {numReviews} reviews, {expectedBad} bad rows")
+
+    # Time the import and the one save it ends with separately
+    saveTeasData = RateaCore.saveTeasData
+    saveTimes = []
+    def timedSave(stash, path):
+        start = time.perf_counter()
+        saveTeasData(stash, path)
+        RateaCore.flushSaveWorker()
+        saveTimes.append(time.perf_counter() - start)
+    RateaCore.saveTeasData = timedSave
+
+    RateaCore.TeaStash.clear()
+    start = time.perf_counter()
+    importedTeas, importedReviews, badRows = RateaCore.importTeasFromCSV(f"{dataDir}/tea.csv", f"{dataDir}/review.csv")
+    elapsed = time.perf_counter() - start - sum(saveTimes)
+    print(f"Imported {importedTeas} teas and {importedReviews} reviews in {elapsed:.2f}s ({(numTeas + numReviews) / elapsed:,.0f} rows/s)")
+    print(f"Saves: {len(saveTimes)}, {sum(saveTimes):.2f}s")
+    print(f"Bad rows reported: {len(badRows)} of {expectedBad}")
+    mismatched = 0
+    for old, new in zip(stash, RateaCore.TeaStash):
+        if old.name != new.name or not sameAttributes(old.attributes, new.attributes, RateaCore.TeaCategories):
+            mismatched += 1
+        for oldReview, newReview in zip(old.reviews, new.reviews):
+            if not sameAttributes(oldReview.attributes, newReview.attributes, RateaCore.TeaReviewCategories):
+                mismatched += 1
+    print(f"Mismatched teas and reviews: {mismatched}")
+
+if __name__ == "__main__":
+    main()
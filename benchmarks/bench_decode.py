@@ -0,0 +1,77 @@
+# Times decoding of schema 1 attribute strings with the previous trial-and-error date parsing against the
+# schema driven decoder, per tea and per review, and checks both give the same attributes.
+# Usage: python benchmarks/bench_decode.py [numTeas]
+import datetime as dt
+import json
+import sys
+import tempfile
+import time
+
+from synthetic_stash import RateaCore, generateStash, setupRatea
+
+# The previous decoder, kept here as the baseline: every string value goes through parseStringToDT
+def legacyLoadAttributesFromString(json_string):
+    if not json_string or json_string.strip() == "":
+        return {}
+    attributes = json.loads(json_string)
+    for key, value in attributes.items():
+        if isinstance(value, str):
+            try:
+                parsed_date = RateaCore.parseStringToDT(value, silent=True)
+                if parsed_date is None or parsed_date == "" or parsed_date == False:
+                    raise ValueError("Invalid datetime string")
+                if type(parsed_date) is dt.datetime:
+                    attributes[key] = parsed_date
+                else:
+                    attributes[key] = value
+            except (ValueError, TypeError):
+                attributes[key] = value
+    return attributes
+
+# Attribute strings as schema 1 wrote them, dates as text in DATE_FORMAT
+def encodeAttributes(attributes, dateKeys):
+    encoded = {}
+    for key, value in attributes.items():
+        if key in dateKeys and isinstance(value, (int, float)):
+            value = dt.datetime.fromtimestamp(value).strftime(RateaCore.settings["DATE_FORMAT"])
+        encoded[key] = value
+    return json.dumps(encoded)
+
+def timePerItem(func, items, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best / max(len(items), 1)
+
+def countDifferences(strings, review):
+    differences = 0
+    for string in strings:
+        if legacyLoadAttributesFromString(string) != RateaCore.loadAttributesFromString(string, review=review):
+            differences += 1
+    return differences
+
+def main():
+    numTeas = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    setupRatea(tempfile.mkdtemp(prefix="ratea-bench-"))
+    RateaCore.DEBUG_LEVEL = "CRITICAL"
+
+    stash = generateStash(numTeas)
+    teaDateKeys = RateaCore.getDateAttributeKeys(RateaCore.TeaCategories)
+    reviewDateKeys = RateaCore.getDateAttributeKeys(RateaCore.TeaReviewCategories)
+    teaStrings = [encodeAttributes(tea.attributes, teaDateKeys) for tea in stash]
+    reviewStrings = [encodeAttributes(review.attributes, reviewDateKeys) for tea in stash for review in tea.reviews]
+    print(f"Synthetic stash: {len(teaStrings)} teas, {len(reviewStrings)} reviews")
+
+    print(f"{'Decode':<10}{'Previous (us)':>15}{'Schema (us)':>13}{'Speedup':>9}{'Differences':>13}")
+    for label, strings, review in [("Tea", teaStrings, False), ("Review", reviewStrings, True)]:
+        before = timePerItem(legacyLoadAttributesFromString, strings)
+        after = timePerItem(lambda string: RateaCore.loadAttributesFromString(string, review=review), strings)
+        print(f"{label:<10}{before * 1e6:>15.1f}{after * 1e6:>13.1f}{before / after:>9.1f}{countDifferences(strings, review):>13}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# Measures how long "import Ratea" takes with python -X importtime and checks it against the startup budget.
+# Also checks the modules Ratea imports on first use (charts, fuzzy matching, clipboard, images) stay out of the import,
+# and that "import RateaCore" pulls in no UI modules at all.
+# Exits with 1 when over budget, so it can gate changes. Usage: python benchmarks/bench_import_time.py [budgetSeconds] [runs]
+import os
+import subprocess
+import sys
+
+# Seconds for "import Ratea" on a development machine, dearpypixl is most of it
+IMPORT_BUDGET_SECONDS = 1.5
+DEFERRED_MODULES = ["matplotlib", "numpy", "PIL", "thefuzz", "screeninfo", "pyperclip", "dearpygui.demo"]
+UI_MODULES = ["dearpygui", "dearpypixl"]
+
+def measureImport(repoDir, moduleName="Ratea"):
+    # Each run is a fresh interpreter so nothing is cached in sys.modules
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {moduleName}"], cwd=repoDir, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {moduleName} failed:\n{result.stderr[-2000:]}")
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        selfTime, cumulative, name = [part.strip() for part in line[len("import time:"):].split("|")]
+        if not cumulative.isdigit():
+            continue
+        # The top level imports of Ratea are indented by three spaces
+        modules[name] = (int(cumulative) / 1e6, len(line.split("|")[2]) - len(line.split("|")[2].lstrip()))
+    return modules
+
+def findImported(modules, names):
+    return [name for name in names if any(imported == name or imported.startswith(f"{name}.") for imported in modules)]
+
+def main():
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else IMPORT_BUDGET_SECONDS
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    repoDir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    measurements = [measureImport(repoDir) for _ in range(runs)]
+    # The fastest run has the least noise from the rest of the machine
+    modules = min(measurements, key=lambda measurement: measurement["Ratea"][0])
+    total = modules["Ratea"][0]
+
+    print(f"import Ratea: {total:.3f} s (fastest of {runs}), budget {budget:.3f} s")
+    print("Slowest direct imports:")
+    direct = [(seconds, name) for name, (seconds, depth) in modules.items() if depth == 3]
+    for seconds, name in sorted(direct, reverse=True)[:10]:
+        print(f"  {name:<30}{seconds:>8.3f} s")
+
+    loaded = findImported(modules, DEFERRED_MODULES)
+    if loaded:
+        print(f"Imported at startup but should be deferred: {', '.join(loaded)}")
+
+    coreModules = measureImport(repoDir, "RateaCore")
+    print(f"import RateaCore: {coreModules['RateaCore'][0]:.3f} s")
+    coreLoaded = findImported(coreModules, UI_MODULES + DEFERRED_MODULES)
+    if coreLoaded:
+        print(f"Imported by RateaCore but it should not need them: {', '.join(coreLoaded)}")
+    if total > budget or loaded or coreLoaded:
+        print("Over startup budget")
+        sys.exit(1)
+    print("Within startup budget")
+
+if __name__ == "__main__":
+    main()
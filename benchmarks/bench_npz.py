@@ -0,0 +1,72 @@
+# Exports a synthetic stash to CSV and to the columnar .npz, then times how long an analysis script takes to get
+# the review scores per tea type from each. The .npz side only uses numpy, as a script outside the app would.
+# Usage: python benchmarks/bench_npz.py [numTeas]
+import csv
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from synthetic_stash import RateaCore, generateStash, setupRatea
+
+def meanScoreByTypeCSV(teaPath, reviewPath):
+    with open(teaPath, newline="", encoding="utf-8") as file:
+        teaTypes = {row["id"]: row["Type"] for row in csv.DictReader(file)}
+    totals = {}
+    with open(reviewPath, newline="", encoding="utf-8") as file:
+        for row in csv.DictReader(file):
+            try:
+                score = float(row["Final Score"])
+            except ValueError:
+                continue
+            total = totals.setdefault(teaTypes[row["parentID"]], [0.0, 0])
+            total[0] += score
+            total[1] += 1
+    return {teaType: total[0] / total[1] for teaType, total in totals.items()}
+
+def meanScoreByTypeNPZ(npzPath):
+    stash = np.load(npzPath)
+    offsets = stash["tea/reviewOffsets"]
+    # Repeat each tea's type code once per review, then group the scores by code
+    reviewTypes = np.repeat(stash["tea/Type/codes"], np.diff(offsets))
+    scores = stash["review/Final Score"]
+    valid = ~np.isnan(scores) & (reviewTypes >= 0)
+    names = stash["tea/Type/values"]
+    sums = np.bincount(reviewTypes[valid], weights=scores[valid], minlength=len(names))
+    counts = np.bincount(reviewTypes[valid], minlength=len(names))
+    return {str(names[i]): sums[i] / counts[i] for i in range(len(names)) if counts[i]}
+
+def main():
+    numTeas = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    dataDir = tempfile.mkdtemp(prefix="ratea-bench-")
+    setupRatea(dataDir)
+    RateaCore.DEBUG_LEVEL = "CRITICAL"
+    RateaCore.TeaStash[:] = generateStash(numTeas)
+    teaPath, reviewPath, npzPath = [os.path.join(dataDir, name) for name in ["teas.csv", "reviews.csv", "stash.npz"]]
+
+    start = time.perf_counter()
+    RateaCore.teaStashToCSV(teaPath, reviewPath)
+    csvExport = time.perf_counter() - start
+    start = time.perf_counter()
+    RateaCore.teaStashToNPZ(npzPath)
+    npzExport = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fromCSV = meanScoreByTypeCSV(teaPath, reviewPath)
+    csvRead = time.perf_counter() - start
+    start = time.perf_counter()
+    fromNPZ = meanScoreByTypeNPZ(npzPath)
+    npzRead = time.perf_counter() - start
+
+    differences = sum(1 for key in fromCSV if key not in fromNPZ or abs(fromCSV[key] - fromNPZ[key]) > 1e-9)
+    csvSize = os.path.getsize(teaPath) + os.path.getsize(reviewPath)
+    print(f"Synthetic stash: {numTeas} teas")
+    print(f"{'Format':<8}{'Export (s)':>12}{'Analysis (s)':>14}{'Size (KB)':>11}")
+    print(f"{'CSV':<8}{csvExport:>12.3f}{csvRead:>14.4f}{csvSize / 1024:>11.0f}")
+    print(f"{'NPZ':<8}{npzExport:>12.3f}{npzRead:>14.4f}{os.path.getsize(npzPath) / 1024:>11.0f}")
+    print(f"Types with different mean scores: {differences}")
+
+if __name__ == "__main__":
+    main()
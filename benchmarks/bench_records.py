@@ -0,0 +1,107 @@
+# Measures the memory each tea and review record takes with the previous __dict__ based classes against the
+# __slots__ classes in RateaCore, per record and for a full load of tea_reviews.yml with every review loaded.
+# Usage: python benchmarks/bench_records.py [numReviews]
+import sys
+import tempfile
+import tracemalloc
+import types
+
+from synthetic_stash import RateaCore, setupRatea, writeSyntheticData
+
+# The previous record classes, kept here as the baseline: mutable class level defaults, a __dict__ per instance,
+# and four category flags on every review. The tea keeps the methods of StashedTea, without its slots
+def legacyTeaInit(self, id, name, dateAdded=None, attributes={}):
+    self.id = id
+    self.name = name
+    self.dateAdded = dateAdded
+    self.attributes = attributes
+    self.reviews = []
+    self.calculated = {}
+
+teaMethods = {key: value for key, value in vars(RateaCore.StashedTea).items() if key != "__slots__" and not isinstance(value, types.MemberDescriptorType)}
+LegacyStashedTea = type("LegacyStashedTea", (), dict(teaMethods, id=0, name="", dateAdded=None, attributes={}, calculated={}, adjustments={},
+                                                    finished=False, linkedTeas=[], __init__=legacyTeaInit))
+
+class LegacyReview:
+    attempt = 0
+    parentID = 0
+    id = 0
+    name = ""
+    dateAdded = None
+    attributes = {}
+    calculated = {}
+    isRequiredForTea = False
+    isRequiredForAll = False
+    isAutoCalculated = False
+    isDropdown = False
+    def __init__(self, id, name, dateAdded, attributes, rating):
+        self.id = id
+        self.name = name
+        self.dateAdded = dateAdded
+        self.attributes = attributes
+        self.rating = rating
+        self.calculated = {}
+
+        self.isRequiredForTea = False
+        self.isRequiredForAll = False
+        self.isAutoCalculated = False
+        self.isDropdown = False
+
+# Bytes allocated while func runs and its result is kept alive
+def tracedBytes(func):
+    tracemalloc.start()
+    result = func()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current
+
+# The record objects alone, sharing attribute dicts built beforehand
+def recordBytes(teaClass, reviewClass, stash):
+    teaArgs = [(tea.id, tea.name, tea.dateAdded, tea.attributes) for tea in stash]
+    reviewArgs = [(review.id, review.name, review.dateAdded, review.attributes, review.rating) for tea in stash for review in tea.reviews]
+    teaBytes = tracedBytes(lambda: [teaClass(*args) for args in teaArgs])
+    reviewBytes = tracedBytes(lambda: [reviewClass(*args) for args in reviewArgs])
+    return teaBytes / len(teaArgs), reviewBytes / len(reviewArgs)
+
+# A full load of tea_reviews.yml with reviews loaded, as the app holds a stash once every tea has been opened.
+# The loaders look the classes up in RateaCore, so the legacy ones are swapped in for the baseline
+def loadBytes(teaClass, reviewClass, path):
+    originalTea, originalReview = RateaCore.StashedTea, RateaCore.Review
+    RateaCore.StashedTea, RateaCore.Review = teaClass, reviewClass
+    try:
+        def load():
+            stash = RateaCore.loadTeasReviews(path)
+            for tea in stash:
+                if not tea.isReviewsLoaded():
+                    tea.hydrateReviews()
+            return stash
+        return tracedBytes(load)
+    finally:
+        RateaCore.StashedTea, RateaCore.Review = originalTea, originalReview
+
+def main():
+    numReviews = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    dataDir = tempfile.mkdtemp(prefix="ratea-bench-")
+    stash = writeSyntheticData(dataDir, numReviews)
+    setupRatea(dataDir)
+    RateaCore.DEBUG_LEVEL = "CRITICAL"
+    RateaCore.settings["LAZY_REVIEWS"] = False
+    numTeas = len(stash)
+    numReviews = sum(len(tea.reviews) for tea in stash)
+    print(f"Synthetic stash: {numTeas} teas, {numReviews} reviews")
+
+    layouts = [("Previous (__dict__)", LegacyStashedTea, LegacyReview), ("__slots__", RateaCore.StashedTea, RateaCore.Review)]
+    print(f"{'Records':<22}{'Bytes per tea':>15}{'Bytes per review':>18}{'Full load (MB)':>16}{'Load bytes per review':>23}")
+    for label, teaClass, reviewClass in layouts:
+        teaBytes, reviewBytes = recordBytes(teaClass, reviewClass, stash)
+        totalBytes = loadBytes(teaClass, reviewClass, f"{dataDir}/tea_reviews.yml")
+        print(f"{label:<22}{teaBytes:>15.0f}{reviewBytes:>18.0f}{totalBytes / 1e6:>16.1f}{totalBytes / numReviews:>23.0f}")
+
+    # Attribute values are the same in both layouts, so the difference is all record overhead
+    if hasattr(RateaCore.StashedTea(0, ""), "__dict__") or hasattr(RateaCore.Review(0, "", 0, {}, 0), "__dict__"):
+        print("Tea or review records have a __dict__ again")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+# Times the data hot paths on seeded synthetic stashes of 1k, 10k and 100k reviews and records the peak memory of each.
+# Results are written as JSON. Given a baseline from an earlier run, each timing is compared against it and the run
+# exits with 1 when any is slower than the baseline by more than the tolerance, so it can gate changes.
+# Usage: python benchmarks/bench_suite.py [--sizes 1000,10000,100000] [--repeat 3] [--out results.json] [--baseline baseline.json] [--tolerance 0.25]
+import argparse
+import contextlib
+import datetime as dt
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from synthetic_stash import RateaCore, writeSyntheticData
+
+FUZZY_QUERIES = 20
+# Cases this much slower or less are within timer noise and not counted as regressions, whatever the ratio
+MIN_REGRESSION_SECONDS = 0.01
+
+# Fastest of repeat runs, then one more run under tracemalloc for the peak, as tracing slows everything down.
+# prepare() runs before each run and isn't timed
+def measure(func, repeat, prepare=None):
+    best = None
+    # Some paths print per item, keep that out of the timings and the output
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(repeat):
+            if prepare is not None:
+                prepare()
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            if best is None or elapsed < best:
+                best = elapsed
+        if prepare is not None:
+            prepare()
+        tracemalloc.start()
+        func()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {"seconds": best, "peakBytes": peak}
+
+def removeIfExists(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+def benchSize(numReviews, repeat, seed):
+    dataDir = tempfile.mkdtemp(prefix="ratea-bench-")
+    writeSyntheticData(dataDir, numReviews, seed=seed)
+    teaReviewsPath = RateaCore.settings["TEA_REVIEWS_PATH"]
+    cachePath = RateaCore.getTeaSnapshotCachePath(teaReviewsPath)
+    cases = {}
+
+    def loadCold():
+        RateaCore.TeaStash[:] = RateaCore.loadTeasReviews(teaReviewsPath)
+    cases["loadTeasReviews"] = measure(loadCold, repeat, prepare=lambda: removeIfExists(cachePath))
+    # The cold load left a snapshot cache behind
+    cases["loadTeasReviews (snapshot cache)"] = measure(loadCold, repeat)
+    stash = RateaCore.TeaStash
+    numTeas = len(stash)
+    numLoadedReviews = sum(tea.getNumReviews() for tea in stash)
+
+    # Saves skip files that already hold the same data, so each save goes to a new file
+    savePaths = iter(f"{dataDir}/save-{i}.yml" for i in range(repeat + 1))
+    cases["saveTeasData"] = measure(lambda: RateaCore.saveTeasData(stash, next(savePaths)), repeat)
+
+    def populateStats():
+        RateaCore.TeaCache.clear()
+        RateaCore.TeaCache.update(RateaCore.populateStatsCache())
+    cases["populateStatsCache"] = measure(populateStats, repeat)
+    cases["teaStashToCSV"] = measure(lambda: RateaCore.teaStashToCSV(f"{dataDir}/tea.csv", f"{dataDir}/review.csv"), repeat)
+
+    queries = random.Random(seed).sample(stash, min(FUZZY_QUERIES, numTeas))
+    def fuzzyMatch():
+        for tea in queries:
+            RateaCore.fuzzy_tea_name_matching(tea)
+    cases[f"fuzzy_tea_name_matching x{len(queries)}"] = measure(fuzzyMatch, repeat)
+
+    # Cells as the stash table shows them
+    nameCells = [(tea.id, tea.name) for tea in stash]
+    amountCells = [(tea.id, f"{tea.attributes.get('Amount', 'N/A')}g") for tea in stash]
+    cases["table sort (name column)"] = measure(lambda: RateaCore.sortTableCells(nameCells, ascending=True), repeat)
+    cases["table sort (amount column)"] = measure(lambda: RateaCore.sortTableCells(amountCells, ascending=False), repeat)
+
+    shutil.rmtree(dataDir, ignore_errors=True)
+    return {"numTeas": numTeas, "numReviews": numLoadedReviews, "cases": cases}
+
+# Prints each timing next to the baseline, returns the cases slower than the baseline by more than tolerance
+def compareToBaseline(results, baseline, tolerance):
+    regressions = []
+    print(f"{'Reviews':<9}{'Case':<36}{'Baseline (s)':>13}{'Now (s)':>10}{'Ratio':>8}")
+    for size, sizeResult in results["sizes"].items():
+        baselineCases = baseline["sizes"].get(size, {}).get("cases", {})
+        for case, result in sizeResult["cases"].items():
+            if case not in baselineCases:
+                continue
+            before = baselineCases[case]["seconds"]
+            ratio = result["seconds"] / before if before > 0 else 1.0
+            flag = ""
+            if ratio > 1 + tolerance and result["seconds"] - before > MIN_REGRESSION_SECONDS:
+                flag = "  slower"
+                regressions.append((size, case, ratio))
+            print(f"{size:<9}{case:<36}{before:>13.4f}{result['seconds']:>10.4f}{ratio:>8.2f}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Times the data hot paths on synthetic stashes")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Comma separated numbers of reviews")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case, the fastest is kept")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="bench_suite_results.json", help="Where to write the results")
+    parser.add_argument("--baseline", default=None, help="Results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown against the baseline, 0.25 is 25%%")
+    args = parser.parse_args()
+    RateaCore.DEBUG_LEVEL = "CRITICAL"
+
+    results = {"created": dt.datetime.now(tz=dt.timezone.utc).timestamp(), "python": platform.python_version(), "platform": platform.platform(),
+               "seed": args.seed, "repeat": args.repeat, "sizes": {}}
+    for size in [int(size) for size in args.sizes.split(",")]:
+        sizeResult = benchSize(size, args.repeat, args.seed)
+        results["sizes"][str(size)] = sizeResult
+        print(f"{size} reviews requested, {sizeResult['numTeas']} teas and {sizeResult['numReviews']} reviews generated")
+        for case, result in sizeResult["cases"].items():
+            print(f"  {case:<36}{result['seconds']:>10.4f} s{result['peakBytes'] / 1e6:>10.1f} MB peak")
+
+    with open(args.out, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"Written results to {args.out}")
+
+    if args.baseline is not None:
+        with open(args.baseline, "r") as file:
+            baseline = json.load(file)
+        regressions = compareToBaseline(results, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} cases slower than the baseline by more than {args.tolerance:.0%}")
+            sys.exit(1)
+        print("No regressions against the baseline")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# Times ReadYaml/WriteYaml on a synthetic stash with the pure Python and libyaml loaders and dumpers
+# Usage: python benchmarks/bench_yaml.py [numTeas]
+import os
+import sys
+import tempfile
+import time
+
+import yaml
+
+from synthetic_stash import RateaCore, generateStash, setupRatea
+
+def timeIt(func, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+# Forgets what was last written so WriteYaml doesn't skip the repeated saves as unchanged
+def writeUncached(path, data):
+    RateaCore.session.pop("savedFileFingerprints", None)
+    RateaCore.WriteYaml(path, data)
+
+def main():
+    numTeas = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    dataDir = tempfile.mkdtemp(prefix="ratea-bench-")
+    setupRatea(dataDir)
+    # Keep the per-file log lines out of the timings
+    RateaCore.DEBUG_LEVEL = "CRITICAL"
+
+    stash = generateStash(numTeas)
+    numReviews = sum(len(tea.reviews) for tea in stash)
+    path = f"{dataDir}/tea_reviews.yml"
+    RateaCore.saveTeasData(stash, path)
+    data = RateaCore.ReadYaml(path)
+    sizeMB = os.path.getsize(path) / (1024 * 1024)
+    print(f"Synthetic stash: {numTeas} teas, {numReviews} reviews, {sizeMB:.1f} MB of YAML")
+
+    paths = [("Full (previous)", yaml.FullLoader, yaml.Dumper), ("Safe, pure Python", yaml.SafeLoader, yaml.SafeDumper)]
+    if yaml.__with_libyaml__:
+        paths.append(("Safe, libyaml", yaml.CSafeLoader, yaml.CSafeDumper))
+    else:
+        print("PyYAML was built without libyaml, the C path is unavailable")
+
+    results = {}
+    for label, loader, dumper in paths:
+        RateaCore.YamlLoader = loader
+        RateaCore.YamlDumper = dumper
+        loadTime = timeIt(lambda: RateaCore.ReadYaml(path))
+        saveTime = timeIt(lambda: writeUncached(f"{dataDir}/out.yml", data))
+        results[label] = (loadTime, saveTime)
+
+    baseLoad, baseSave = results["Full (previous)"]
+    print(f"{'Path':<20}{'Load (s)':>10}{'Save (s)':>10}{'Load x':>8}{'Save x':>8}")
+    for label, (loadTime, saveTime) in results.items():
+        print(f"{label:<20}{loadTime:>10.2f}{saveTime:>10.2f}{baseLoad / loadTime:>8.1f}{baseSave / saveTime:>8.1f}")
+
+if __name__ == "__main__":
+    main()
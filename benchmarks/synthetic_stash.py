@@ -0,0 +1,120 @@
+# Synthetic stash generation shared by the benchmark scripts
+# Teas and reviews use the same attribute roles as defaults/tea_categories.yml and defaults/tea_review_categories.yml
+# Run directly to write a stash as data files: python benchmarks/synthetic_stash.py outDir [numReviews] [seed]
+import datetime as dt
+import os
+import random
+import shutil
+import sys
+
+# Benchmarks run from the repo root or from this folder, make RateaCore importable from both
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_DIR not in sys.path:
+    sys.path.insert(0, REPO_DIR)
+
+import RateaCore
+
+VENDORS = ["Yunnan Sourcing", "White2Tea", "Crimson Lotus", "Farmerleaf", "Bitterleaf", "Wuyi Origin", "Mei Leaf", "Taiwan Sourcing"]
+TYPES = ["Sheng", "Shou", "Hong", "Oolong", "Green", "White", "Yancha", "Dancong"]
+METHODS = ["Gongfu", "Western", "Grandpa", "Cold Brew"]
+WORDS = ["old", "tree", "spring", "autumn", "bing", "brick", "mini", "tuo", "wild", "arbor", "gushu", "honey", "orchid", "stone", "smoke", "fruit"]
+
+# Minimal settings and session so the RateaCore load/save functions can run without the GUI.
+# Filled in place like the app does, so anything holding the shared globals sees the new data
+def setupRatea(dataDir):
+    os.makedirs(dataDir, exist_ok=True)
+    RateaCore.settings.clear()
+    RateaCore.settings.update({
+        "DATE_FORMAT": "%Y-%m-%d",
+        "TIMEZONE": "UTC",
+        "TEA_REVIEWS_PATH": f"{dataDir}/tea_reviews.yml",
+        "TEA_CATEGORIES_PATH": f"{dataDir}/tea_categories.yml",
+        "TEA_REVIEW_CATEGORIES_PATH": f"{dataDir}/tea_review_categories.yml",
+        "CSV_OUTPUT_TEA_PATH": f"{dataDir}/tea_stash.csv",
+        "CSV_OUTPUT_REVIEW_PATH": f"{dataDir}/tea_review.csv",
+        "TEA_JOURNAL_COMPACT_THRESHOLD": 100,
+        "LAZY_REVIEWS": True,
+        "APP_VERSION": "bench",
+    })
+    RateaCore.session.clear()
+    RateaCore.session["settingsPath"] = f"{dataDir}/user_settings.yml"
+    RateaCore.setValidTypes()
+    RateaCore.TeaCache.clear()
+    RateaCore.TeaStash.clear()
+    RateaCore.TeaCategories[:] = RateaCore.loadTeaCategories(f"{REPO_DIR}/defaults/tea_categories.yml")
+    RateaCore.TeaReviewCategories[:] = RateaCore.loadTeaReviewCategories(f"{REPO_DIR}/defaults/tea_review_categories.yml")
+
+def randomTeaName(rng, vendor, year):
+    words = " ".join(rng.sample(WORDS, rng.randint(2, 4))).title()
+    return f"{year} {vendor.split(' ')[0]} {words}"
+
+# Build numTeas StashedTea objects with on average reviewsPerTea reviews each
+def generateStash(numTeas, reviewsPerTea=2, seed=0):
+    rng = random.Random(seed)
+    start = dt.datetime(2018, 1, 1, tzinfo=dt.timezone.utc).timestamp()
+    end = dt.datetime(2025, 6, 1, tzinfo=dt.timezone.utc).timestamp()
+    stash = []
+    for i in range(numTeas):
+        vendor = rng.choice(VENDORS)
+        teaType = rng.choice(TYPES)
+        year = rng.randint(2005, 2025)
+        amount = float(rng.choice([10, 25, 50, 100, 200, 357]))
+        cost = round(amount * rng.uniform(0.05, 1.5), 2)
+        purchased = rng.uniform(start, end)
+        name = randomTeaName(rng, vendor, year)
+        attributes = {
+            "Name": name,
+            "Vendor": vendor,
+            "Year": year,
+            "date": purchased,
+            "Type": teaType,
+            "Cost": cost,
+            "Amount": amount,
+            "Notes (Long)": f"Order #{rng.randint(1, 400)} from {vendor}",
+            "Remaining": amount,
+            "Cost per Gram": round(cost / amount, 3),
+            "Total Score": 0.0,
+        }
+        tea = RateaCore.StashedTea(i, name, dateAdded=purchased, attributes=attributes)
+        tea.adjustments = {"Standard": 0.0}
+        tea.finished = False
+
+        numReviews = rng.randint(0, reviewsPerTea * 2)
+        for j in range(numReviews):
+            reviewed = rng.uniform(purchased, end + 86400 * 30)
+            score = rng.choice(RateaCore.getGradeNumericalList())
+            reviewAttributes = {
+                "Name": name,
+                "date": reviewed,
+                "Amount": float(rng.choice([3, 5, 7, 8, 10])),
+                "Vessel size": rng.choice([60, 100, 120, 150, 200]),
+                "Steeps": rng.randint(1, 15),
+                "Method": rng.choice(METHODS),
+                "Final Score": score,
+                "Notes (short)": " ".join(rng.sample(WORDS, 3)),
+                "Notes (Long)": " ".join(rng.choice(WORDS) for _ in range(rng.randint(10, 60))),
+                "dateAdded": reviewed,
+            }
+            review = RateaCore.Review(j, name, reviewed, reviewAttributes, score)
+            review.parentID = i
+            tea.addReview(review)
+        stash.append(tea)
+    return stash
+
+# Writes a stash of about numReviews reviews as tea_reviews.yml, with the default categories and settings next to it,
+# the same files the app keeps in ratea-data. The same seed always writes the same stash
+def writeSyntheticData(dataDir, numReviews, reviewsPerTea=2, seed=0):
+    setupRatea(dataDir)
+    stash = generateStash(max(1, numReviews // reviewsPerTea), reviewsPerTea, seed)
+    RateaCore.writeTeasData([RateaCore.dumpTeaToSaveDict(tea) for tea in stash], f"{dataDir}/tea_reviews.yml")
+    for fileName in ["tea_categories.yml", "tea_review_categories.yml", "user_settings.yml"]:
+        shutil.copyfile(f"{REPO_DIR}/defaults/{fileName}", f"{dataDir}/{fileName}")
+    return stash
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python benchmarks/synthetic_stash.py outDir [numReviews] [seed]")
+        sys.exit(1)
+    RateaCore.DEBUG_LEVEL = "CRITICAL"
+    stash = writeSyntheticData(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 10000, seed=int(sys.argv[3]) if len(sys.argv) > 3 else 0)
+    print(f"Written {len(stash)} teas and {sum(len(tea.reviews) for tea in stash)} reviews to {sys.argv[1]}")
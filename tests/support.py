@@ -0,0 +1,33 @@
+# Shared setup for the tests: an app folder with ratea-data filled by the benchmark stash generator,
+# loaded the way RateaCLI loads it, without the GUI.
+# Run the tests from the repo root: python -m unittest discover tests
+import os
+import sys
+import tempfile
+
+import yaml
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, f"{REPO_DIR}/benchmarks")
+
+from synthetic_stash import RateaCore, writeSyntheticData
+import RateaCLI
+
+# Temp app folder with a seeded stash of about numReviews reviews, settings overrides are written to user_settings.yml
+def makeAppDir(numReviews=40, seed=0, **settingsOverrides):
+    appDir = tempfile.mkdtemp(prefix="ratea-test-")
+    writeSyntheticData(f"{appDir}/ratea-data", numReviews, seed=seed)
+    if settingsOverrides:
+        settingsPath = f"{appDir}/ratea-data/user_settings.yml"
+        with open(settingsPath, "r") as file:
+            userSettings = yaml.safe_load(file)
+        userSettings.update(settingsOverrides)
+        with open(settingsPath, "w") as file:
+            yaml.safe_dump(userSettings, file)
+    return appDir
+
+def loadAppDir(appDir):
+    RateaCore.DEBUG_LEVEL = "CRITICAL"
+    if not RateaCLI.loadData(appDir):
+        raise RuntimeError(f"Nothing to load in {appDir}")
+    return RateaCore.TeaStash
@@ -0,0 +1,32 @@
+import os
+import unittest
+
+from support import RateaCLI, RateaCore, loadAppDir, makeAppDir
+
+class TestBackupSnapshots(unittest.TestCase):
+    def setUp(self):
+        self.appDir = makeAppDir()
+        loadAppDir(self.appDir)
+        self.storePath = RateaCore.settings["BACKUP_PATH"]
+
+    def testBackToBackSnapshotsKeepTheirOwnManifests(self):
+        names = [RateaCore.createBackupSnapshot(self.storePath, kind=kind) for kind in ["manual", "pre-restore", "manual"]]
+        self.assertEqual(len(set(names)), 3)
+        stored = {name: manifest["kind"] for name, manifest in RateaCore.listBackupSnapshots(self.storePath)}
+        self.assertEqual(stored, dict(zip(names, ["manual", "pre-restore", "manual"])))
+
+    def testTakenNameGetsSuffix(self):
+        name = RateaCore.createBackupSnapshot(self.storePath)
+        self.assertEqual(RateaCore.getFreeBackupSnapshotName(self.storePath, name), f"{name}-2")
+
+    # Restoring takes a pre-restore copy first, which must not replace the backup being restored
+    def testCLIRestoreRightAfterBackup(self):
+        self.assertEqual(RateaCLI.main(["--dir", self.appDir, "--log-level", "CRITICAL", "backup"]), 0)
+        name = RateaCore.listBackupSnapshots(self.storePath)[0][0]
+        self.assertEqual(RateaCLI.main(["--dir", self.appDir, "--log-level", "CRITICAL", "restore", name]), 0)
+        kinds = sorted(manifest["kind"] for name, manifest in RateaCore.listBackupSnapshots(self.storePath))
+        self.assertEqual(kinds, ["manual", "pre-restore"])
+        self.assertTrue(os.path.exists(f"{self.storePath}/snapshots/{name}.json"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+from support import REPO_DIR, makeAppDir
+
+# Runs RateaCLI.py as a separate process, as cron or another script would
+def runCLI(appDir, *args):
+    return subprocess.run([sys.executable, f"{REPO_DIR}/RateaCLI.py", "--dir", appDir, *args], capture_output=True, text=True, timeout=300)
+
+class TestCLI(unittest.TestCase):
+    # Generated stashes have untried teas from vendors that weren't seen before, which stats used to trip over
+    def testStatsOnGeneratedStash(self):
+        for seed in range(3):
+            appDir = makeAppDir(numReviews=3000, seed=seed)
+            result = runCLI(appDir, "stats")
+            self.assertEqual(result.returncode, 0, result.stderr)
+            stats = json.loads(result.stdout)
+            self.assertGreater(stats["numTeas"], 0)
+
+    def testStatsToFile(self):
+        appDir = makeAppDir()
+        outPath = f"{appDir}/stats.json"
+        result = runCLI(appDir, "stats", "--out", outPath)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertTrue(os.path.exists(outPath))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+
+from support import RateaCore, loadAppDir, makeAppDir
+
+class TestStashColumns(unittest.TestCase):
+    def setUp(self):
+        self.appDir = makeAppDir()
+        loadAppDir(self.appDir)
+
+    # Reviews imported onto a tea already in the stash don't go through the journal
+    def testImportedReviewsReachRatingQueries(self):
+        tea = RateaCore.TeaStash[0]
+        teaType = tea.attributes["Type"]
+        numAll = len(RateaCore.getAverageRatingsAll())
+        numOfType = len(RateaCore.getAverageRatingsByTeaType(teaType))
+
+        scores = [1.5, 2.5, 4.0]
+        reviewsPath = f"{self.appDir}/import_reviews.csv"
+        with open(reviewsPath, "w") as file:
+            file.write("parentID,name,Final Score\n")
+            for score in scores:
+                file.write(f"{tea.id},{tea.name},{score}\n")
+        numTeas, numReviews, badRows = RateaCore.importTeasFromCSV(f"{self.appDir}/no_teas.csv", reviewsPath)
+        self.assertEqual((numTeas, numReviews, badRows), (0, len(scores), []))
+
+        self.assertEqual(len(RateaCore.getAverageRatingsAll()), numAll + len(scores))
+        ratingsOfType = RateaCore.getAverageRatingsByTeaType(teaType)
+        self.assertEqual(len(ratingsOfType), numOfType + len(scores))
+        for score in scores:
+            self.assertIn(score, ratingsOfType)
+
+    # Single tea edits update the rows they touch and match a rebuild
+    def testJournaledEditMatchesRebuild(self):
+        RateaCore.getAverageRatingsAll()
+        tea = RateaCore.TeaStash[1]
+        tea.attributes["Type"] = "Imported Type"
+        tea.reviews = tea.reviews[:1]
+        RateaCore.appendTeaJournal("set", 1, tea)
+        incremental = sorted(RateaCore.getAverageRatingsByTeaType("Imported Type"))
+        RateaCore.TeaColumns.reset()
+        self.assertEqual(incremental, sorted(RateaCore.getAverageRatingsByTeaType("Imported Type")))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,25 @@
+import datetime as dt
+import unittest
+
+from support import RateaCore, loadAppDir, makeAppDir
+
+class TestDateAttributes(unittest.TestCase):
+    def setUp(self):
+        loadAppDir(makeAppDir(numReviews=2))
+        RateaCore.settings["DATE_FORMAT"] = "%Y-%m-%d"
+        RateaCore.ParsedDateStrings.clear()
+
+    # An ambiguous date reads the same whether or not another format matched a record before it
+    def testAmbiguousDateDoesNotDependOnRecordOrder(self):
+        fresh = RateaCore.parseDateAttribute("03-04-2024")
+        RateaCore.ParsedDateStrings.clear()
+        self.assertEqual(RateaCore.parseDateAttribute("25-04-2024"), dt.datetime(2024, 4, 25))
+        self.assertEqual(RateaCore.parseDateAttribute("03-04-2024"), fresh)
+        self.assertEqual(fresh, RateaCore.parseStringToDT("03-04-2024", silent=True))
+
+    def testUnparseableDate(self):
+        self.assertIsNone(RateaCore.parseDateAttribute("not a date"))
+        self.assertIsNone(RateaCore.parseDateAttribute("not a date"))
+
+if __name__ == "__main__":
+    unittest.main()
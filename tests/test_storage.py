@@ -0,0 +1,61 @@
+import os
+import sqlite3
+import unittest
+
+from support import RateaCore, loadAppDir, makeAppDir
+
+class TestTeaDatabase(unittest.TestCase):
+    def setUp(self):
+        self.appDir = makeAppDir(TEA_REVIEWS_PATH="ratea-data/tea_reviews.sqlite3")
+        # The first load converts tea_reviews.yml into the database
+        loadAppDir(self.appDir)
+
+    # Journaled moves and deletes become row writes, the order has to survive a reload
+    def testMoveAndDeleteKeepOrderAfterReload(self):
+        stash = RateaCore.TeaStash
+        tea = stash.pop(0)
+        stash.insert(3, tea)
+        RateaCore.appendTeaJournal("move", 0, newIndex=3)
+        stash.pop(1)
+        RateaCore.appendTeaJournal("delete", 1)
+        expected = [tea.name for tea in stash]
+
+        stash = loadAppDir(self.appDir)
+        self.assertEqual([tea.name for tea in stash], expected)
+        self.assertEqual([tea.id for tea in stash], list(range(len(expected))))
+        self.assertIsNone(RateaCore.findTeaIDProblem(stash))
+
+    # Queries from the stats windows only read, so they still answer while the save worker holds the write lock
+    def testQueriesDontWaitOnWriter(self):
+        path = f"{self.appDir}/{RateaCore.settings['TEA_REVIEWS_PATH']}"
+        expected = RateaCore.queryReviewScoresDatabase(path)
+        writer = sqlite3.connect(path, isolation_level=None)
+        try:
+            writer.execute("BEGIN IMMEDIATE")
+            self.assertEqual(RateaCore.queryReviewScoresDatabase(path), expected)
+            self.assertGreater(len(RateaCore.queryPreviousAnswersDatabase(path, "Type", "Tea", 5)), 0)
+        finally:
+            writer.execute("ROLLBACK")
+            writer.close()
+
+class TestTeaJournal(unittest.TestCase):
+    def setUp(self):
+        self.appDir = makeAppDir()
+        loadAppDir(self.appDir)
+
+    # Backups are full saves of another path, the live journal and its count of records stay until it is compacted
+    def testBackupSaveKeepsJournalCount(self):
+        for index in range(3):
+            RateaCore.appendTeaJournal("set", index, RateaCore.TeaStash[index])
+        RateaCore.saveAllToDirectory(f"{self.appDir}/backup", saveCSV=False)
+        RateaCore.flushSaveWorker()
+        self.assertEqual(RateaCore.session["teaJournalRecords"], 3)
+        self.assertTrue(os.path.exists(RateaCore.getTeaJournalPath(RateaCore.settings["TEA_REVIEWS_PATH"])))
+
+        RateaCore.compactTeaJournal()
+        RateaCore.flushSaveWorker()
+        self.assertEqual(RateaCore.session["teaJournalRecords"], 0)
+        self.assertFalse(os.path.exists(RateaCore.getTeaJournalPath(RateaCore.settings["TEA_REVIEWS_PATH"])))
+
+if __name__ == "__main__":
+    unittest.main()